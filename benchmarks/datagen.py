@@ -0,0 +1,263 @@
+# benchmarks/datagen.py
+#
+# Szintetikus adatgenerátor a négy adatbázishoz (products, orders, delivery_notes,
+# production_inventory). Seedelt véletlen, így ugyanaz a méret + seed mindig
+# ugyanazt az adatbázist adja – a mérések verziók között összevethetők.
+#
+#     python -m benchmarks.datagen --scale 10k --seed 42 --out /tmp/erp_bench
+
+import argparse
+import os
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+
+# méret → alap darabszám (termékek, rendelések, szállítólevél tételek, műszaknaplók)
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+DB_FILES = {
+    "products":  "products.db",
+    "orders":    "orders.db",
+    "delivery":  "delivery_notes.db",
+    "inventory": "production_inventory.db",
+}
+
+CUSTOMERS = ["Bosch Kft.", "Continental AG", "ZF Hungária", "Audi Hungaria", "Knorr-Bremse",
+             "Schaeffler", "Mahle", "Valeo", "Denso", "Hella"]
+PLANTS    = ["Öntöde", "Megmunkálás", "Festés", "Szerelés"]
+SURFACES  = ["nyers", "szemcseszórt", "porfestett", "eloxált"]
+MATERIALS = ["AlSi9Cu3", "AlSi12", "AlSi10Mg", "ZAMAK5"]
+MACHINES  = ["OMS 950T öntőgép", "OMS 500T öntőgép", "CLOO 400T öntőgép", "CLOO 250T függőleges öntőgép"]
+SHIFTS    = ["délelőtt", "délután", "éjszaka"]
+OPERATORS = ["Kiss Péter", "Nagy Anna", "Tóth Gábor", "Szabó Éva", "Horváth László"]
+CAUSES    = ["géphiba", "szerszámhiba", "elektromos hiba", "fémhiány hiba", "általános állás"]
+
+
+def counts(n: int) -> dict:
+    """Darabszámok egy méretezéshez (n = termékek, rendelések, tételek, naplók nagyságrendje)."""
+    return {
+        "products":       n,
+        "orders":         n,
+        "order_items":    n * 3,
+        "delivery_notes": max(1, n // 4),
+        "delivery_items": n,
+        "shift_logs":     n,
+        "inventory":      n,
+    }
+
+
+def _customer_fields(rnd: random.Random, name: str) -> tuple:
+    country = rnd.choice(["HU", "DE", "AT"])
+    return (name, f"{rnd.randint(1000, 9999)} Város, Fő utca {rnd.randint(1, 200)}.",
+            f"{rnd.randint(10000000, 99999999)}-2-{rnd.randint(10, 99)}",
+            f"{country}{rnd.randint(10000000, 99999999)}", country,
+            f"{name} – telephely", f"{rnd.randint(1000, 9999)} Ipari park {rnd.randint(1, 50)}.", country)
+
+
+def gen_products(path: str, n: int, rnd: random.Random):
+    """A sémát a product_db.create_tables hozza létre, az adatot executemany tölti."""
+    from modules.product_module.product_db import create_tables
+    con = sqlite3.connect(path)
+    create_tables(con)
+    rows, prices = [], []
+    for pid in range(1, n + 1):
+        cust = rnd.choice(CUSTOMERS)
+        grams = rnd.random() < 0.2
+        plants = ",".join(rnd.sample(PLANTS, rnd.randint(1, 3)))
+        rows.append((
+            pid, cust, f"Öntvény {pid}", f"CK-{pid:06d}", "db",
+            rnd.choice(SURFACES), ",".join(rnd.sample(MATERIALS, 2)),
+            round(rnd.uniform(50, 900) if grams else rnd.uniform(0.05, 12), 3),
+            "g" if grams else "kg", plants, rnd.choice([1, 2, 4, 8]),
+            round(rnd.uniform(0.5, 30), 3), "kg", "",
+            *_customer_fields(rnd, cust),
+        ))
+        start = date(2023, 1, 1)
+        for k in range(2):
+            kezdet = start + timedelta(days=365 * k)
+            prices.append((pid, round(rnd.uniform(1, 80), 2), "EUR", kezdet.isoformat(),
+                           None if k else (kezdet + timedelta(days=364)).isoformat()))
+    con.executemany("""
+        INSERT INTO products
+          (id, vevo_nev, megnevezes, cikkszam, mennyisegi_egyseg, felulet, alapanyagok,
+           suly, suly_mertekegyseg, uzem_lanc, feszekszam, csokosuly, csokosuly_mertekegyseg, foto,
+           customer_name, customer_address, customer_tax_number, customer_eu_tax_number,
+           customer_country, shipping_name, shipping_address, shipping_country)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    con.executemany("INSERT INTO arak (product_id, ar, valuta, kezdet, veg) VALUES (?, ?, ?, ?, ?)", prices)
+    con.commit()
+    con.close()
+
+
+def gen_orders(path: str, c: dict, rnd: random.Random) -> list[tuple]:
+    """Rendelések + tételek (séma: init_order_db); visszaadja a (order_id, product_id, qty) hármasokat."""
+    from modules.order_module.order_module import init_order_db
+    init_order_db(path)
+    con = sqlite3.connect(path)
+    orders, items = [], []
+    per_order = max(1, c["order_items"] // c["orders"])
+    for oid in range(1, c["orders"] + 1):
+        cust = rnd.choice(CUSTOMERS)
+        name, addr, tax, eu_tax, country, shp_name, shp_addr, shp_country = _customer_fields(rnd, cust)
+        received = date(2024, 1, 1) + timedelta(days=rnd.randint(0, 600))
+        orders.append((oid, name, addr, tax, eu_tax, country, shp_name, shp_addr, shp_country,
+                       received.isoformat(), f"PO-{oid:07d}",
+                       (received + timedelta(days=rnd.randint(14, 90))).isoformat(), ""))
+        for pid in rnd.sample(range(1, c["products"] + 1), min(per_order, c["products"])):
+            qty = rnd.randint(10, 5000)
+            remaining = qty if rnd.random() < 0.6 else rnd.randint(0, qty)
+            items.append((oid, pid, qty, remaining, "db"))
+    con.executemany("""
+        INSERT INTO orders
+          (id, vevo_nev, vevo_cim, vevo_adoszam, vevo_eu_adoszam, vevo_orszag,
+           szallitasi_nev, szallitasi_cim, szallitasi_orszag,
+           beerkezes, megrendeles_szam, szall_hatarido, megjegyzes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, orders)
+    con.executemany("""
+        INSERT INTO order_items (order_id, product_id, qty, fennmarado_mennyiseg, mennyisegi_egyseg)
+        VALUES (?, ?, ?, ?, ?)
+    """, items)
+    con.commit()
+    con.close()
+    return [(oid, pid, qty) for oid, pid, qty, _, _ in items]
+
+
+def gen_deliveries(path: str, c: dict, order_items: list[tuple], rnd: random.Random):
+    """A sémát a DeliveryNoteDB hozza létre (indexek, havi összesítő triggerek)."""
+    from modules.delivery_module.delivery_note_db import DeliveryNoteDB
+    db = DeliveryNoteDB(path)
+    con = db.conn
+    notes, items = [], []
+    per_note = max(1, c["delivery_items"] // c["delivery_notes"])
+    for nid in range(1, c["delivery_notes"] + 1):
+        oid, _, _ = rnd.choice(order_items)
+        cust = rnd.choice(CUSTOMERS)
+        ts = (datetime(2024, 1, 1) + timedelta(minutes=rnd.randint(0, 60 * 24 * 600))).isoformat(timespec="seconds")
+        name, addr, tax, eu_tax, country, shp_name, shp_addr, shp_country = _customer_fields(rnd, cust)
+        notes.append((nid, oid, f"DRK-{ts[:10].replace('-', '')}-{nid:05d}", ts, "pending",
+                      name, addr, tax, eu_tax, country, shp_name, shp_addr, shp_country, ts))
+        for _ in range(per_note):
+            _, pid, qty = rnd.choice(order_items)
+            items.append((nid, pid, rnd.randint(1, max(1, int(qty) // 3))))
+    con.executemany("""
+        INSERT INTO delivery_notes
+          (id, order_id, note_number, created_at, status,
+           customer_name, customer_address, customer_tax_number, customer_eu_tax_number, customer_country,
+           shipping_name, shipping_address, shipping_country, shipping_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, notes)
+    con.executemany("INSERT INTO delivery_note_items (delivery_note_id, product_id, quantity) VALUES (?, ?, ?)",
+                    items)
+    con.commit()
+    con.close()
+
+
+def gen_inventory(path: str, c: dict, rnd: random.Random, products_db: str, delivery_db: str):
+    """A sémát az InventoryDB hozza létre (indexek, triggerek, rollup), az adatot executemany tölti."""
+    from modules.manufacturing_module.inventory_db import InventoryDB
+    from modules.manufacturing_module.report_rollup import ReportRollup
+
+    db = InventoryDB(path)
+    con = db.conn
+    con.executemany("INSERT INTO operators (name) VALUES (?)", [(o,) for o in OPERATORS])
+
+    day0 = date(2024, 1, 1)
+    jobs, logs, downtimes = [], [], []
+    t = datetime(2024, 1, 1, 6)
+    for m in MACHINES:
+        start = t
+        for _ in range(max(1, c["shift_logs"] // 40)):
+            end = start + timedelta(hours=rnd.randint(8, 96))
+            jobs.append((m, rnd.randint(1, c["products"]), start.isoformat(timespec="seconds"),
+                         end.isoformat(timespec="seconds"), "replaced"))
+            start = end
+    for i in range(c["shift_logs"]):
+        d = day0 + timedelta(days=i // (len(MACHINES) * len(SHIFTS)))
+        m = MACHINES[i % len(MACHINES)]
+        s = SHIFTS[(i // len(MACHINES)) % len(SHIFTS)]
+        pid = rnd.randint(1, c["products"])
+        shots, scrap = rnd.randint(200, 900), rnd.randint(0, 40)
+        fesz = rnd.choice([1, 2, 4])
+        logs.append((m, pid, rnd.choice(OPERATORS), f"{d} 00:00:00", f"{d} 23:59:59",
+                     d.isoformat(), s, shots, scrap, shots * fesz, scrap * fesz, f"{d}T23:00:00"))
+        if rnd.random() < 0.3:
+            downtimes.append((m, d.isoformat(), s, rnd.choice(CAUSES), rnd.choice([0.5, 1.0, 1.5, 2.0])))
+
+    con.executemany("""
+        INSERT INTO machine_job_history (machine, product_id, start_at, end_at, status)
+        VALUES (?, ?, ?, ?, ?)
+    """, jobs)
+    con.executemany("""
+        INSERT INTO shift_logs
+          (machine, product_id, operator, start_time, end_time, date, shift_type,
+           shots, scrap_shots, good_qty, scrap_qty, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, logs)
+    con.executemany("""
+        INSERT INTO shift_downtimes (machine, date, shift_type, cause, hours)
+        VALUES (?, ?, ?, ?, ?)
+    """, downtimes)
+    con.executemany("""
+        INSERT INTO product_norms (product_id, norm, updated_at) VALUES (?, ?, ?)
+    """, [(pid, rnd.randint(300, 900), "2024-01-01T00:00:00") for pid in range(1, c["products"] + 1, 3)])
+
+    # készlet: gyártás ('in') + részben kiadás ('out')
+    inv, moves = [], []
+    for inv_id in range(1, c["inventory"] + 1):
+        pid, qty = rnd.randint(1, c["products"]), rnd.randint(10, 2000)
+        inv.append((inv_id, pid, qty, "", "2024-01-01T00:00:00", ""))
+        moves.append((inv_id, "in", qty, "2024-01-01T00:00:00", ""))
+        if rnd.random() < 0.5:
+            moves.append((inv_id, "out", rnd.randint(1, qty), "2024-02-01T00:00:00", ""))
+    con.executemany("""
+        INSERT INTO production_inventory (id, product_id, quantity, batch_number, created_at, note)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, inv)
+    con.executemany("""
+        INSERT INTO inventory_movements (inventory_id, movement_type, quantity, movement_at, reference)
+        VALUES (?, ?, ?, ?, ?)
+    """, moves)
+    con.commit()
+
+    # havi rollup a generált termékekkel és szállítólevelekkel
+    ReportRollup(con, products_db, delivery_db).rebuild()
+    con.close()
+
+
+def generate(target_dir: str, n: int, seed: int = 42) -> dict:
+    """
+    Létrehozza a négy adatbázist a target_dir-ben (a meglévőket felülírja).
+    Visszaadja a fájl útvonalakat: {"products": ..., "orders": ..., ...}.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    paths = {k: os.path.join(target_dir, f) for k, f in DB_FILES.items()}
+    for p in paths.values():
+        if os.path.exists(p):
+            os.remove(p)
+
+    rnd = random.Random(seed)
+    c = counts(n)
+    gen_products(paths["products"], c["products"], rnd)
+    order_items = gen_orders(paths["orders"], c, rnd)
+    gen_deliveries(paths["delivery"], c, order_items, rnd)
+    gen_inventory(paths["inventory"], c, rnd, paths["products"], paths["delivery"])
+    return paths
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Szintetikus ERP adatbázisok generálása")
+    ap.add_argument("--scale", default="1k", help=f"méret: {', '.join(SCALES)} vagy darabszám")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", required=True, help="cél mappa")
+    args = ap.parse_args()
+
+    n = SCALES.get(args.scale) or int(args.scale)
+    paths = generate(args.out, n, args.seed)
+    for name, p in paths.items():
+        print(f"{name:10s} {p}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/pdf_tables.py
+#
+# Hosszú táblás PDF riport mérése (modules/shared/report_writer), műszaknapló
+# jellegű generált sorokkal, háromféleképpen:
+#
+#   egy tábla   – minden sor egyetlen <table>-ben, egy WeasyPrint futás (a régi út)
+#   darabolt    – PDF_CHUNK_ROWS soros darabok egymás után, egy folyamatban
+#   párhuzamos  – ugyanezek a darabok külön folyamatokban, a lapok egy PDF-be fűzve
+#
+#     python -m benchmarks.pdf_tables
+#     python -m benchmarks.pdf_tables --rows 1k,10k,50k --workers 4 --out pdf.json
+#
+# Az "egy tábla" mód nagy sorszámnál perceket fut; --single-max fölött kimarad.
+# WeasyPrint nélkül minden mérés kihagyva.
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+SIZES = {"1k": 1_000, "10k": 10_000, "50k": 50_000}
+CAUSES = ["Szerszámcsere", "Anyaghiány", "Géphiba"]
+
+
+def foundry_like_rows(n: int, seed: int = 42):
+    """A Műszakgyártások riport oszlopaival egyező, generált sorok."""
+    rnd = random.Random(seed)
+    for i in range(n):
+        shots = rnd.randint(100, 900)
+        scrap = rnd.randint(0, shots // 8)
+        yield (f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", f"Operátor {i % 17}", f"Gép {i % 9}",
+               f"Öntvény {i % 500}", f"CK-{i % 500:06d}", "délelőtt", shots, 850,
+               shots / 850, f"{(shots - scrap) * 2} db", scrap, scrap / shots,
+               "8.00 h") + tuple(rnd.choice((0.0, 0.0, 0.5)) for _ in CAUSES)
+
+
+def _report(n: int, seed: int):
+    from modules.manufacturing_module import reports
+    return reports.foundry_report(foundry_like_rows(n, seed), CAUSES)
+
+
+def _single(n: int, seed: int, workers: int) -> bytes:
+    from modules.shared import rendering, report_writer
+    buf = io.StringIO()
+    report_writer.stream_html(_report(n, seed), buf)
+    return rendering.write_pdf(buf.getvalue(), base_url=PROJECT_DIR)
+
+
+def _chunked(n: int, seed: int, workers: int) -> bytes:
+    from modules.shared import report_writer
+    out = io.BytesIO()
+    report_writer.write_report(_report(n, seed), out, "pdf", base_url=PROJECT_DIR, workers=workers)
+    return out.getvalue()
+
+
+def measure(mode, n: int, seed: int, workers: int) -> dict:
+    t = time.perf_counter()
+    pdf = mode(n, seed, workers)
+    return {"ms": (time.perf_counter() - t) * 1000, "bytes": len(pdf)}
+
+
+def main():
+    from modules.shared import rendering
+    ap = argparse.ArgumentParser(description="Hosszú táblás PDF riport mérése")
+    ap.add_argument("--rows", default="1k,10k,50k", help=f"sorszámok vesszővel ({', '.join(SIZES)} vagy szám)")
+    ap.add_argument("--workers", type=int, default=rendering.pdf_workers())
+    ap.add_argument("--single-max", type=int, default=10_000, help="efölött az 'egy tábla' mód kimarad")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="eredmény JSON fájl")
+    args = ap.parse_args()
+
+    try:
+        import weasyprint  # noqa: F401
+    except ImportError as e:
+        print(f"kihagyva ({e})")
+        return
+
+    modes = [("egy tábla", _single, None), ("darabolt", _chunked, 1),
+             ("párhuzamos", _chunked, args.workers)]
+    results = {}
+    print(f"PDF riport (ms), {args.workers} renderelő folyamat:")
+    for label in args.rows.split(","):
+        n = SIZES.get(label.strip()) or int(label)
+        results[n] = {}
+        for name, mode, workers in modes:
+            if mode is _single and n > args.single_max:
+                results[n][name] = {"status": "skipped"}
+                print(f"  {n:>7} sor  {name:11s} kihagyva (--single-max {args.single_max})")
+                continue
+            r = measure(mode, n, args.seed, workers or 1)
+            results[n][name] = r
+            print(f"  {n:>7} sor  {name:11s} {r['ms']:>10.0f} ms  ({r['bytes'] // 1024} KiB)")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"workers": args.workers, "results": results}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# benchmarks/run.py
+#
+# Időmért forgatókönyvek a forró útvonalakra, generált adatbázisokon.
+# Az eredmény JSON, így két verzió mérése összevethető (--compare).
+#
+#     python -m benchmarks.run --scale 10k --repeat 3 --out bench_10k.json
+#     python -m benchmarks.run --scale 10k --compare bench_regi.json
+#
+# Az adatbázisokat egy ideiglenes (vagy --data) mappába generálja, és a modulok
+# DB_PATH konstansait erre irányítja át – a valódi adatbázisokhoz nem nyúl.
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+from benchmarks.datagen import SCALES, generate
+
+
+# ──────────────────────────────────────────────────────────
+# Adatbázis útvonalak átirányítása
+# ──────────────────────────────────────────────────────────
+
+def use_databases(paths: dict):
+    """A modulok adatbázis útvonal konstansainak átállítása a generált fájlokra."""
+    from modules.product_module import product_module, weights
+    from modules.order_module import order_module
+    from modules.delivery_module import delivery_note_db, delivery_module
+    from modules.manufacturing_module import inventory_db, report_rollup, shift_import
+    from modules.order_module import order_db
+
+    product_module.DB_PATH     = paths["products"]
+    weights.DB_PATH            = paths["products"]
+    order_module.DB_PATH       = paths["orders"]
+    delivery_note_db.DB_PATH   = paths["delivery"]
+    delivery_module.DB_PATH    = paths["delivery"]
+    inventory_db.DB_PATH       = paths["inventory"]
+    report_rollup.PRODUCTS_DB  = paths["products"]
+    report_rollup.DELIV_DB     = paths["delivery"]
+    shift_import.PRODUCTS_DB   = paths["products"]
+    order_db.ORDERS_DB         = paths["orders"]
+    order_db.PRODUCTS_DB       = paths["products"]
+    order_db.DELIV_DB          = paths["delivery"]
+
+
+# ──────────────────────────────────────────────────────────
+# Forgatókönyvek: név → (előkészítés(paths) → hívható)
+# Az előkészítés nincs mérve; a visszaadott hívható futását mérjük.
+# ──────────────────────────────────────────────────────────
+
+def _osszes_termek(paths):
+    from modules.product_module.product_module import osszes_termek
+    return osszes_termek
+
+
+def _osszes_megrendeles(paths):
+    from modules.order_module.order_module import osszes_megrendeles
+    return osszes_megrendeles
+
+
+def _get_all_order_items(paths):
+    from modules.order_module.order_db import OrderDB
+    return OrderDB().get_all_order_items
+
+
+def _get_pending_items_list(paths):
+    from modules.order_module.order_db import OrderDB
+    return OrderDB().get_pending_items_list
+
+
+def _get_current_stock(paths):
+    from modules.manufacturing_module.inventory_db import InventoryDB
+    db = InventoryDB(paths["inventory"])
+    ids = [r[0] for r in db.conn.execute("SELECT DISTINCT product_id FROM production_inventory LIMIT 200")]
+    return lambda: [db.get_current_stock(pid) for pid in ids]
+
+
+def _delivery_note_creation(paths):
+    """Egy 10 tételes szállítólevél: fejléc + tételek + rendelés csökkentés (ahogy a DeliveryWindow)."""
+    from modules.delivery_module.delivery_module import DeliveryModule
+    from modules.order_module.order_db import OrderDB
+    dm, odb = DeliveryModule(), OrderDB()
+    items = [dict(r) for r in odb.conn.execute(
+        "SELECT order_id, product_id FROM order_items WHERE fennmarado_mennyiseg > 1 LIMIT 10")]
+    info = {"name": "Bench Kft.", "address": "Bench utca 1.", "tax_number": "1",
+            "eu_tax_number": "HU1", "country": "HU"}
+    counter = iter(range(1, 10**9))
+
+    def run():
+        dm.generate_delivery_note_for_order(
+            items[0]["order_id"], info, info,
+            [{"product_id": e["product_id"], "quantity": 1} for e in items],
+            f"BENCH-{next(counter):07d}")
+        for e in items:
+            odb.decrease_item_qty(e["order_id"], e["product_id"], 1)
+    return run
+
+
+def _foundry_report(paths):
+    """
+    A Műszakgyártások ablak adatútja (FoundryProductsWindow.load_shift_logs):
+    reports.load_foundry_rows (iter_foundry_rows), ahogy a munkaszál futtatja.
+    """
+    from modules.manufacturing_module import reports
+    from modules.manufacturing_module.inventory_db import InventoryDB
+    db = InventoryDB(paths["inventory"])
+    causes = reports.downtime_causes(db.conn)
+    db.close()
+    return lambda: reports.load_foundry_rows(paths["products"], causes)
+
+
+def _monthly_report(paths):
+    from modules.manufacturing_module.inventory_db import InventoryDB
+    db = InventoryDB(paths["inventory"])
+    months = db.rollup.months()
+    return lambda: [db.rollup.month_report(m, plant="Öntöde") for m in months]
+
+
+def _report_export(paths):
+    """Műszakgyártások riport HTML és CSV streamelve (report_writer), az adatrétegből."""
+    import io
+    from modules.manufacturing_module import reports
+    from modules.manufacturing_module.inventory_db import InventoryDB
+    from modules.shared.report_writer import write_report
+    db = InventoryDB(paths["inventory"])
+    causes = reports.downtime_causes(db.conn)
+    db.close()
+    template_dir = os.path.join(PROJECT_DIR, "templates")
+
+    def run():
+        rows = [vals for _, vals in reports.iter_foundry_rows(paths["products"], causes, paths["inventory"])]
+        for fmt in ("html", "csv"):
+            write_report(reports.foundry_report(rows, causes), io.StringIO(), fmt, template_dir)
+        return rows
+    return run
+
+
+def _pdf_rendering(paths):
+    """Egy 50 tételes szállítólevél PDF a valódi sablonnal (jinja2 + weasyprint)."""
+    from weasyprint import HTML
+    from modules.shared import rendering
+    tmpl = rendering.get_template("delivery_base_hu.html", os.path.join(PROJECT_DIR, "templates"))
+    entries = [{"order_number": f"PO-{i:07d}", "product_name": f"Öntvény {i}",
+                "item_number": f"CK-{i:06d}", "ship_qty": i, "unit": "db"} for i in range(50)]
+    html = tmpl.render(logo_uri="", buyer_name="Bench Kft.", buyer_address="Bench utca 1.",
+                       buyer_country="HU", ship_name="Bench Kft.", ship_address="Bench utca 1.",
+                       ship_country="HU", note_number="BENCH-1", delivery_date="2025-01-01",
+                       entries=entries, net_weight="1.00", gross_weight="25.00",
+                       euro_count=1, one_count=0, exchange_euro=0, exchange_one=0)
+    return lambda: HTML(string=html).write_pdf()
+
+
+SCENARIOS = {
+    "osszes_termek":          _osszes_termek,
+    "osszes_megrendeles":     _osszes_megrendeles,
+    "get_all_order_items":    _get_all_order_items,
+    "get_pending_items_list": _get_pending_items_list,
+    "get_current_stock":      _get_current_stock,
+    "delivery_note_creation": _delivery_note_creation,
+    "foundry_report":         _foundry_report,
+    "monthly_report":         _monthly_report,
+    "report_export":          _report_export,
+    "pdf_rendering":          _pdf_rendering,
+}
+
+
+# ──────────────────────────────────────────────────────────
+# Futtatás
+# ──────────────────────────────────────────────────────────
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_scenario(setup, paths: dict, repeat: int) -> dict:
+    """Egy forgatókönyv: előkészítés, majd repeat darab mért futás. Hiányzó függőségnél 'skipped'."""
+    try:
+        call = setup(paths)
+    except ImportError as e:
+        return {"status": "skipped", "reason": str(e)}
+    times, rows = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = call()
+        times.append((time.perf_counter() - t) * 1000)
+        rows = len(result) if hasattr(result, "__len__") else rows
+    return {
+        "status":    "ok",
+        "repeat":    repeat,
+        "min_ms":    round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "max_ms":    round(max(times), 3),
+        "rows":      rows,
+    }
+
+
+def run(scale: str, seed: int = 42, repeat: int = 3, only=None, data_dir: str = None) -> dict:
+    n = SCALES.get(scale) or int(scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        target = data_dir or tmp
+        t = time.perf_counter()
+        paths = generate(target, n, seed)
+        gen_ms = (time.perf_counter() - t) * 1000
+        use_databases(paths)
+
+        results = {}
+        for name, setup in SCENARIOS.items():
+            if only and name not in only:
+                continue
+            results[name] = run_scenario(setup, paths, repeat)
+            r = results[name]
+            if r["status"] == "ok":
+                print(f"{name:24s} {r['median_ms']:>10.1f} ms  (min {r['min_ms']:.1f}, rows {r['rows']})")
+            else:
+                print(f"{name:24s} {'kihagyva':>10s}     ({r['reason']})")
+
+    return {
+        "meta": {
+            "scale":     scale,
+            "n":         n,
+            "seed":      seed,
+            "repeat":    repeat,
+            "generate_ms": round(gen_ms, 1),
+            "revision":  _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python":    platform.python_version(),
+            "sqlite":    sqlite3.sqlite_version,
+            "platform":  platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, previous: dict, threshold: float = 1.2) -> list[str]:
+    """Forgatókönyvenként a medián aránya az előző méréshez; threshold felett regresszió."""
+    lines = []
+    for name, r in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if r.get("status") != "ok" or not old or old.get("status") != "ok" or not old["median_ms"]:
+            continue
+        ratio = r["median_ms"] / old["median_ms"]
+        flag = "  ← LASSULÁS" if ratio > threshold else ""
+        lines.append(f"{name:24s} {old['median_ms']:>10.1f} → {r['median_ms']:>10.1f} ms  ×{ratio:.2f}{flag}")
+    return lines
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ERP benchmark forgatókönyvek")
+    ap.add_argument("--scale", default="1k", help=f"méret: {', '.join(SCALES)} vagy darabszám")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--only", nargs="*", choices=list(SCENARIOS), help="csak ezek a forgatókönyvek")
+    ap.add_argument("--data", help="a generált adatbázisok mappája (alapból ideiglenes)")
+    ap.add_argument("--out", help="eredmény JSON fájl")
+    ap.add_argument("--compare", help="korábbi eredmény JSON az összevetéshez")
+    args = ap.parse_args()
+
+    report = run(args.scale, args.seed, args.repeat, args.only, args.data)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Eredmény: {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(report, json.load(f))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# benchmarks/startup.py
+#
+# Indulási idő mérése, két részben:
+#
+# 1) Import audit (python -X importtime): modulonként mennyi idő az import, és
+#    melyik húzza be a nehéz könyvtárakat (weasyprint, jinja2, pandas, openpyxl,
+#    QtSql). A main és az ablakmodulok importja ezeket nem töltheti be.
+# 2) Idővonal egy friss folyamatban, generált adatbázisokon: main import →
+#    QApplication → főablak látható → első tábla (Termékek ablak) feltöltve.
+#    A bemelegítés (modules.shared.warmup) lépéseinek ideje is bekerül.
+#
+#     python -m benchmarks.startup --scale 1k
+#     python -m benchmarks.startup --audit-only
+#     python -m benchmarks.startup --login-ms 800 --out startup.json
+#
+# Kijelző nélkül a Qt 'offscreen' platformmal fut (QT_QPA_PLATFORM).
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+# ezeknek csak első használatkor szabad betöltődniük
+HEAVY = ("weasyprint", "jinja2", "pandas", "openpyxl", "PyQt5.QtSql")
+
+AUDIT_MODULES = [
+    "main",
+    "gui.product_gui", "gui.order_gui", "gui.delivery_gui", "gui.view_deliveries_gui",
+    "gui.order_label_viewer", "gui.foundry_products_gui", "gui.stock_overview_gui",
+]
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+# ──────────────────────────────────────────────────────────
+# Import audit
+# ──────────────────────────────────────────────────────────
+
+def import_audit(module: str, top: int = 10) -> dict:
+    """Egy modul importja friss értelmezőben: összidő, a leglassabb közvetlen importok, nehéz csomagok."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=PROJECT_DIR, capture_output=True, text=True,
+                          env=dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen")))
+    entries = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            entries.append((int(m.group(2)), int(m.group(1)), len(m.group(3)) // 2, m.group(4)))
+    own = next((e for e in entries if e[3] == module), None)
+    # a modul közvetlen importjai (egy szinttel mélyebben), kumulált idő szerint
+    direct = sorted((e for e in entries if e[2] == 1), reverse=True)[:top]
+    return {
+        "ok":       proc.returncode == 0,
+        "error":    proc.stderr.strip().splitlines()[-1] if proc.returncode else "",
+        "total_ms": round(own[0] / 1000, 1) if own else None,
+        "top":      [(name, round(cum / 1000, 1)) for cum, _, _, name in direct],
+        "heavy":    sorted({h for *_, name in entries for h in HEAVY
+                            if name == h or name.startswith(h + ".")}),
+    }
+
+
+# ──────────────────────────────────────────────────────────
+# Idővonal (gyermekfolyamat)
+# ──────────────────────────────────────────────────────────
+
+def _child(paths: dict, t0: float, login_ms: int) -> dict:
+    marks = {}
+
+    def mark(name):
+        marks[name] = round((time.time() - t0) * 1000, 1)
+
+    from benchmarks.run import use_databases
+    use_databases(paths)
+    import main as app_main
+    mark("import_main")
+
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication([])
+    app_main.warmup.start()
+    mark("qapplication")
+
+    # a bejelentkező ablak ideje alatt a bemelegítés fut
+    until = time.perf_counter() + login_ms / 1000
+    while time.perf_counter() < until:
+        app.processEvents()
+        time.sleep(0.005)
+
+    win = app_main.MainWindow("benchmark")
+    win.show()
+    app.processEvents()
+    mark("main_window")
+
+    from gui.async_loader import loader_pool
+    win._open_products()
+    w = win.windows.get("products")
+    while w.loader.is_loading():
+        app.processEvents()
+        loader_pool().waitForDone(5)
+    app.processEvents()
+    mark("first_table")
+
+    app_main.warmup.wait(30)
+    return {"marks": marks, "rows": w.model.rowCount(), "warmup": dict(app_main.warmup.timings)}
+
+
+def timeline(paths: dict, login_ms: int = 0) -> dict:
+    """A gyermekfolyamat indítása; a jelölések a folyamat indításától számított ms-ok."""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    t0 = time.time()
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child", json.dumps(paths),
+                           "--t0", repr(t0), "--login-ms", str(login_ms)],
+                          cwd=PROJECT_DIR, capture_output=True, text=True, env=env)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "hiba")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ERP indulási idő mérése")
+    ap.add_argument("--scale", default="1k")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--login-ms", type=int, default=0,
+                    help="a bejelentkező ablak szimulált ideje (ennyi ideje van a bemelegítésnek)")
+    ap.add_argument("--audit-only", action="store_true", help="csak az import audit")
+    ap.add_argument("--out", help="eredmény JSON fájl")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--t0", type=float, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(json.loads(args.child), args.t0, args.login_ms)))
+        return
+
+    report = {"audit": {}}
+    failed = False
+    print("Import audit (ms, a leglassabb közvetlen importok):")
+    for module in AUDIT_MODULES:
+        a = import_audit(module)
+        report["audit"][module] = a
+        if not a["ok"]:
+            print(f"  {module:28s} hiba: {a['error']}")
+            continue
+        flag = f"  ← NEHÉZ: {', '.join(a['heavy'])}" if a["heavy"] else ""
+        failed |= bool(a["heavy"])
+        print(f"  {module:28s} {a['total_ms']:>8.1f}{flag}")
+        print("      " + ", ".join(f"{n} {ms:.0f}" for n, ms in a["top"][:5]))
+
+    if not args.audit_only:
+        from benchmarks.datagen import SCALES, generate
+        n = SCALES.get(args.scale) or int(args.scale)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate(tmp, n, args.seed)
+            report["timeline"] = timeline(paths, args.login_ms)
+        t = report["timeline"]
+        print(f"\nIdővonal ({args.scale}, bejelentkezés {args.login_ms} ms):")
+        for name, ms in t["marks"].items():
+            print(f"  {name:16s} {ms:>8.1f} ms")
+        print(f"  első tábla sorai: {t['rows']}; bemelegítés: "
+              + ", ".join(f"{k} {v:.0f} ms" for k, v in t["warmup"].items()))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Eredmény: {args.out}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# gui/asset_cache.py
+#
+# Közös kép gyorsítótár a logóhoz, termékfotókhoz és bélyegképekhez.
+#
+#   - pixmap(path, size): a kért méretre kicsinyített QPixmap, memóriában LRU
+#     (MAX_BYTES korláttal, a költség szélesség × magasság × 4 bájt). A kulcs
+#     az útvonal, a fájl mtime/méret és a kért méret – a fájl cseréje új kulcs.
+#   - A dekódolás QImageReader.setScaledSize-zal megy: a JPEG eleve kicsiben
+#     dekódol, egy sokmegapixeles fotóból sem készül teljes méretű kép.
+#   - thumbnail_path(path): lemezen tárolt bélyegkép (THUMB_DIR), a kulcs a
+#     forrás útvonalának hash-e + mtime + méret; egyszer készül el, utána a
+#     tooltipek és a fotók a kis fájlból jönnek (a hálózati meghajtóról sem
+#     kell újra beolvasni).
+#
+#   - pregenerate(paths): az összes termékfotó bélyegképe előre, folyamatokban
+#     (a termékkatalógus betöltése után, háttérben); a változatlan fotókat
+#     kihagyja, a hiányzó útvonalakat a MISSING_FILE-ba írja.
+#
+#     from gui import asset_cache
+#     pix = asset_cache.shared().scaled_to_height(logo_path, 50)
+#     thumb = asset_cache.shared().thumbnail_path(termek.foto)
+#
+# A QPixmap csak a GUI szálon használható; munkaszálon / folyamatban a
+# read_scaled() és make_thumbnail() QImage-dzsel dolgozik.
+
+import collections
+import hashlib
+import os
+
+from modules.shared import cancel
+
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+THUMB_DIR   = os.path.join(PROJECT_DIR, "cache", "thumbnails")
+THUMB_SIZE  = 320                  # bélyegkép: a hosszabbik oldal legfeljebb ennyi px
+THUMB_QUALITY = 85                 # JPEG minőség (átlátszó képnél PNG)
+MAX_BYTES   = 64 * 1024 * 1024     # a memóriában tartott pixmapek felső korlátja
+LOGO_PATH   = os.path.join(PROJECT_DIR, "logo.png")
+MISSING_FILE = "missing.txt"       # a THUMB_DIR-ben: a legutóbbi futás hiányzó fotói
+MAX_THUMB_WORKERS = 4
+SIZE_STEP   = 256                  # változó méretű rajzolásnál ekkora lépcsőkben dekódolunk
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def read_scaled(path: str, size: QSize = None, mode=Qt.KeepAspectRatio) -> QImage:
+    """A kép beolvasása legfeljebb size méretben (arányosan); nagyítás nincs. Hibánál üres QImage."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)   # EXIF forgatás (telefonos fotók)
+    full = reader.size()
+    if size is not None and full.isValid():
+        target = full.scaled(size, mode)
+        if target.width() < full.width() or target.height() < full.height():
+            reader.setScaledSize(target)
+    img = reader.read()
+    return img if not img.isNull() else QImage()
+
+
+def size_bucket(size: QSize, step: int = SIZE_STEP) -> QSize:
+    """
+    A méret felfelé kerekítve step többszörösére. Ablakmérethez igazodó képnél
+    (pl. háttér logó) ezt kérjük a gyorsítótártól, és rajzoláskor skálázunk – így
+    átméretezéskor nem keletkezik minden pixelméretre új bejegyzés.
+    """
+    return QSize(-(-max(1, size.width()) // step) * step, -(-max(1, size.height()) // step) * step)
+
+
+def thumb_key(path: str, size: int = THUMB_SIZE):
+    """A bélyegkép kulcsa (forrás útvonal hash + mtime + méret), vagy None, ha a forrás nem olvasható."""
+    stat = _stat(path)
+    if stat is None:
+        return None
+    raw = f"{os.path.normcase(os.path.abspath(path))}|{stat[0]}|{stat[1]}|{size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def stored_thumbnail(key: str, thumb_dir: str = None):
+    """A kulcshoz már elkészült bélyegkép útvonala (vagy None)."""
+    base = os.path.join(thumb_dir or THUMB_DIR, key[:2], key)
+    for ext in (".jpg", ".png"):
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+
+def make_thumbnail(path: str, size: int = THUMB_SIZE, thumb_dir: str = None):
+    """
+    A bélyegkép elkészítése (ha még nincs); az útvonalát adja, olvashatatlan
+    forrásnál None. Csak QImage – munkafolyamatból is hívható.
+    """
+    key = thumb_key(path, size)
+    if key is None:
+        return None
+    done = stored_thumbnail(key, thumb_dir)
+    if done:
+        return done
+    img = read_scaled(path, QSize(size, size))
+    if img.isNull():
+        return None
+    fmt, ext = ("PNG", ".png") if img.hasAlphaChannel() else ("JPG", ".jpg")
+    target = os.path.join(thumb_dir or THUMB_DIR, key[:2], key + ext)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    if not img.save(tmp, fmt, THUMB_QUALITY if fmt == "JPG" else -1):
+        return None
+    os.replace(tmp, target)
+    return target
+
+
+def photo_path(path: str) -> str:
+    """A termékfotó útvonala; a relatív útvonal a projekt könyvtárhoz képest értendő."""
+    return path if os.path.isabs(path) else os.path.join(PROJECT_DIR, path)
+
+
+def thumb_workers() -> int:
+    return max(1, min(MAX_THUMB_WORKERS, (os.cpu_count() or 1) - 1))
+
+
+def pregenerate(paths, size: int = THUMB_SIZE, thumb_dir: str = None, workers: int = None) -> dict:
+    """
+    Bélyegkép a megadott fotókhoz (munkaszálon hívandó). A már elkészültek
+    (változatlan forrás) kimaradnak, a többi make_thumbnail-lel külön
+    folyamatokban készül. Eredmény: {"made", "skipped", "missing", "failed"} –
+    az utóbbi kettő útvonal lista; a hiányzók a thumb_dir/MISSING_FILE-ba is kerülnek.
+    """
+    thumb_dir = thumb_dir or THUMB_DIR
+    result = {"made": 0, "skipped": 0, "missing": [], "failed": []}
+    todo = []
+    for path in dict.fromkeys(photo_path(p) for p in paths if p):
+        cancel.check()
+        key = thumb_key(path, size)
+        if key is None:
+            result["missing"].append(path)
+        elif stored_thumbnail(key, thumb_dir):
+            result["skipped"] += 1
+        else:
+            todo.append(path)
+
+    workers = min(workers or thumb_workers(), len(todo))
+    if workers < 2:
+        for path in todo:
+            cancel.check()
+            _count(result, path, make_thumbnail(path, size, thumb_dir))
+    else:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn: a GUI szálai mellett a fork nem biztonságos (mint a PDF renderelésnél)
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            try:
+                futures = [(p, pool.submit(make_thumbnail, p, size, thumb_dir)) for p in todo]
+                for path, fut in futures:
+                    cancel.check()
+                    _count(result, path, fut.result())
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    os.makedirs(thumb_dir, exist_ok=True)
+    with open(os.path.join(thumb_dir, MISSING_FILE), "w", encoding="utf-8") as f:
+        f.writelines(p + "\n" for p in result["missing"])
+    return result
+
+
+def _count(result: dict, path: str, thumb):
+    if thumb:
+        result["made"] += 1
+    else:
+        result["failed"].append(path)   # létezik, de nem olvasható képként
+
+
+class AssetCache:
+    """Méret szerint kulcsolt QPixmap LRU, bájtkorláttal (GUI szál)."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES, thumb_dir: str = None):
+        self.max_bytes = max_bytes
+        self.thumb_dir = thumb_dir or THUMB_DIR
+        self._items = collections.OrderedDict()   # kulcs → (pixmap, költség)
+        self._bytes = 0
+
+    def pixmap(self, path: str, size: QSize = None, mode=Qt.KeepAspectRatio) -> QPixmap:
+        """A kép size-ba illesztve (None: eredeti méret); hiányzó / hibás fájlnál üres QPixmap."""
+        stat = _stat(path) if path else None
+        if stat is None:
+            return QPixmap()
+        key = (path, stat, (size.width(), size.height()) if size is not None else None, int(mode))
+        hit = self._items.get(key)
+        if hit is not None:
+            self._items.move_to_end(key)
+            return hit[0]
+        pix = QPixmap.fromImage(read_scaled(path, size, mode))
+        if not pix.isNull():
+            self._put(key, pix)
+        return pix
+
+    def scaled_to_height(self, path: str, height: int) -> QPixmap:
+        return self.pixmap(path, QSize(1 << 16, height))
+
+    def logo(self, size: QSize = None) -> QPixmap:
+        return self.pixmap(LOGO_PATH, size)
+
+    def thumbnail_path(self, path: str, size: int = THUMB_SIZE):
+        """A lemezen tárolt bélyegkép útvonala; ha még nincs, most készül el."""
+        return make_thumbnail(photo_path(path), size, self.thumb_dir) if path else None
+
+    def thumbnail(self, path: str, size: QSize = None) -> QPixmap:
+        """Fotó a bélyegképből (size-ba illesztve); nagyobb méretnél az eredetiből."""
+        if size is not None and max(size.width(), size.height()) > THUMB_SIZE:
+            return self.pixmap(photo_path(path), size) if path else QPixmap()
+        thumb = self.thumbnail_path(path)
+        return self.pixmap(thumb, size) if thumb else QPixmap()
+
+    def clear(self):
+        self._items.clear()
+        self._bytes = 0
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def _put(self, key, pix: QPixmap):
+        cost = pix.width() * pix.height() * 4
+        if cost > self.max_bytes:
+            return
+        self._items[key] = (pix, cost)
+        self._bytes += cost
+        while self._bytes > self.max_bytes:
+            _, (_, old) = self._items.popitem(last=False)
+            self._bytes -= old
+
+
+_SHARED = None
+
+
+def shared() -> AssetCache:
+    """Az alkalmazás közös gyorsítótára (első használatkor jön létre)."""
+    global _SHARED
+    if _SHARED is None:
+        _SHARED = AssetCache()
+    return _SHARED
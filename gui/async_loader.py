@@ -0,0 +1,168 @@
+# gui/async_loader.py
+#
+# Nem blokkoló adatbetöltés az ablakokhoz. A lekérdezés (repository hívás) a
+# QThreadPool egy szálán fut, és ott saját adatbázis kapcsolatot nyit – a GUI
+# szál kapcsolatai más szálról nem használhatók. Az eredmény signal-on érkezik
+# vissza a GUI szálra.
+#
+# Kulcsonként mindig csak a legutóbb indított betöltés eredménye jut el az
+# ablakhoz: ha közben új betöltés indult, a korábbit megszakítjuk – a futó
+# lekérdezése Connection.interrupt()-tal leáll (modules/shared/cancel), a még
+# el sem indult pedig nem fut le. Amíg van futó betöltés, a jelző látszik.
+#
+#     self.loader = AsyncLoader(self, self.loading_lbl)
+#     self.loader.load("tetelek", lambda: load_items(szuro), self._on_items,
+#                      label="Tételek betöltése")
+
+import traceback
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThread, QThreadPool, pyqtSignal
+from PyQt5.QtWidgets import QLabel, QMessageBox
+
+from modules.shared import cancel, sql_trace
+
+
+_POOL = None
+
+
+def loader_pool() -> QThreadPool:
+    """
+    A betöltések saját szálkészlete. Nem a QThreadPool.globalInstance(): azt a Qt
+    maga is használja (pl. QPixmap sima skálázás), és egy magos gépen a foglalt
+    globális szál a GIL-re váró GUI szállal holtpontba kerülne.
+    """
+    global _POOL
+    if _POOL is None:
+        _POOL = QThreadPool()
+        _POOL.setMaxThreadCount(max(2, QThread.idealThreadCount()))
+    return _POOL
+
+
+class LoadingLabel(QLabel):
+    """Betöltésjelző felirat; az AsyncLoader mutatja / rejti."""
+
+    def __init__(self, text: str = "Betöltés…", parent=None):
+        super().__init__(text, parent)
+        self.setStyleSheet("color:#777; font-style:italic;")
+        self.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.hide()
+
+
+class _WorkerSignals(QObject):
+    done      = pyqtSignal(str, int, object)   # kulcs, sorszám, eredmény
+    failed    = pyqtSignal(str, int, str)      # kulcs, sorszám, hibaüzenet
+    cancelled = pyqtSignal(str, int)           # kulcs, sorszám
+
+
+class LoadWorker(QRunnable):
+    """Egy betöltés a szálkészletben: fn() eredménye vagy hibája signal-on megy vissza."""
+
+    def __init__(self, key: str, seq: int, fn, label: str = None):
+        super().__init__()
+        self.key, self.seq, self.fn = key, seq, fn
+        self.label   = label or key
+        self.token   = cancel.CancelToken()
+        # a GUI szálon jön létre, így a hozzá kötött slotok ott futnak (queued)
+        self.signals = _WorkerSignals()
+
+    def run(self):
+        if self.token.cancelled:   # még a sorban várt, amikor újabb betöltés jött
+            self.signals.cancelled.emit(self.key, self.seq)
+            return
+        try:
+            with sql_trace.action(self.label), cancel.bind(self.token):
+                result = self.fn()
+        except cancel.Cancelled:
+            self.signals.cancelled.emit(self.key, self.seq)
+        except Exception as e:
+            if self.token.cancelled:
+                self.signals.cancelled.emit(self.key, self.seq)
+                return
+            traceback.print_exc()
+            self.signals.failed.emit(self.key, self.seq, f"{type(e).__name__}: {e}")
+        else:
+            self.signals.done.emit(self.key, self.seq, result)
+
+
+class AsyncLoader(QObject):
+    """
+    Egy ablak háttérbetöltései. load() azonnal visszatér; az on_done(eredmény)
+    a GUI szálon hívódik, de csak ha a kulcshoz azóta nem indult újabb betöltés.
+    Hiba esetén on_error(üzenet), ennek hiányában hibaablak.
+    """
+
+    def __init__(self, parent=None, indicator=None, pool: QThreadPool = None,
+                 busy_cursor: bool = True):
+        super().__init__(parent)
+        self._parent    = parent
+        self._indicator = indicator
+        self._busy      = busy_cursor   # False: csendes háttérmunka (pl. bélyegképek), nincs homokóra
+        self._pool      = pool or loader_pool()
+        self._seq       = 0
+        self._pending   = {}   # kulcs → (sorszám, on_done, on_error)
+        self._workers   = {}   # sorszám → LoadWorker (a signal objektum életben tartásához)
+
+    def load(self, key: str, fn, on_done, on_error=None, label: str = None) -> int:
+        self._seq += 1
+        worker = LoadWorker(key, self._seq, fn, label)
+        worker.signals.done.connect(self._on_done)
+        worker.signals.failed.connect(self._on_failed)
+        worker.signals.cancelled.connect(self._on_cancelled)
+        self._abort(key)   # a kulcs előző betöltése elavult
+        self._pending[key] = (self._seq, on_done, on_error)
+        self._workers[self._seq] = worker
+        self._update_indicator()
+        self._pool.start(worker)
+        return self._seq
+
+    def cancel(self, key: str = None):
+        """A kulcs (vagy minden) betöltésének megszakítása; az eredmény már nem érkezik meg."""
+        for k in ([key] if key is not None else list(self._pending)):
+            self._abort(k)
+            self._pending.pop(k, None)
+        self._update_indicator()
+
+    def _abort(self, key: str):
+        entry = self._pending.get(key)
+        worker = self._workers.get(entry[0]) if entry else None
+        if worker is not None:
+            worker.token.cancel()
+
+    def is_loading(self, key: str = None) -> bool:
+        return bool(self._pending) if key is None else key in self._pending
+
+    def _take(self, key: str, seq: int):
+        self._workers.pop(seq, None)
+        entry = self._pending.get(key)
+        if entry is None or entry[0] != seq:
+            return None   # elavult vagy visszavont
+        del self._pending[key]
+        self._update_indicator()
+        return entry
+
+    def _on_done(self, key: str, seq: int, result):
+        entry = self._take(key, seq)
+        if entry:
+            entry[1](result)
+
+    def _on_cancelled(self, key: str, seq: int):
+        self._take(key, seq)
+
+    def _on_failed(self, key: str, seq: int, message: str):
+        entry = self._take(key, seq)
+        if not entry:
+            return
+        if entry[2]:
+            entry[2](message)
+        else:
+            QMessageBox.critical(self._parent, "Hiba", f"Nem sikerült betölteni az adatokat:\n{message}")
+
+    def _update_indicator(self):
+        busy = bool(self._pending)
+        if self._indicator is not None:
+            self._indicator.setVisible(busy)
+        if self._parent is not None and self._busy:
+            if busy:
+                self._parent.setCursor(Qt.BusyCursor)
+            else:
+                self._parent.unsetCursor()
@@ -1,20 +1,16 @@
 
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import sys, os
+import sys, os, shutil
 from datetime import date
 from pathlib import Path
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QTableWidget, QTableWidgetItem, QLineEdit, QPushButton, QMessageBox,
+    QTableView, QPushButton, QMessageBox,
     QFileDialog, QInputDialog, QDialog, QDateEdit, QDialogButtonBox
 )
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, QDate, QUrl
-
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+from PyQt5.QtCore import Qt, QDate, QUrl, QSignalBlocker
 
 # project / modules útvonalak
 this_dir    = os.path.dirname(__file__)
@@ -22,9 +18,67 @@ project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-from modules.product_module.product_module     import osszes_termek
+from modules.product_module.weights            import WeightTable
 from modules.order_module.order_db             import OrderDB
-from modules.delivery_module.delivery_module   import DeliveryModule
+from modules.delivery_module.pdf_archive       import PdfArchive
+from modules.shared                            import cancel, events, rendering
+from modules.service                           import backend
+from gui.async_loader                          import AsyncLoader, LoadingLabel
+from gui.event_relay                           import EventRelay
+from gui.delivery_note_preview                 import DeliveryNotePreviewDialog
+from gui.table_model                           import RowTableModel, RowFilterProxy, configure_view
+from gui                                       import asset_cache
+
+
+# tábla oszlopai: (fejléc, tétel mező, mód)
+COLUMNS = [
+    ("Küld",              None,            "checkbox"),
+    ("Megrendelési szám", "order_number",  None),
+    ("Vevő neve",         "cust_name",     None),
+    ("Termék neve",       "product_name",  None),
+    ("Cikkszám",          "item_number",   None),
+    ("Felület",           "surface",       None),
+    ("Megrendelt",        "ordered_qty",   None),
+    ("Fennmaradó",        "remaining_qty", None),
+    ("Egység",            "unit",          None),
+    ("Szállítási menny.", "ship_qty",      "editable"),
+    ("Határidő",          "szall_hatarido",None),
+]
+CUST_COL = 2
+SHIP_COL = 9
+
+
+def delivery_row(r: dict) -> tuple:
+    return tuple(float(r.get(key, 0) or 0) if mode == "editable" else
+                 None if mode == "checkbox" else r.get(key, "")
+                 for _, key, mode in COLUMNS)
+
+
+def load_open_items(order_id: int = None):
+    """
+    Munkaszálon fut, saját kapcsolattal: a nyitott tételek (order_id, product_id)
+    szerint és a tábla sorai ugyanebben a sorrendben; order_id-val csak egy rendelésé.
+    """
+    odb = backend.order_items()
+    if isinstance(odb, OrderDB):
+        try:
+            with cancel.watch(odb.conn, odb.prod_conn, odb.deliv_conn):
+                items = odb.get_all_order_items(order_id)
+        finally:
+            odb.close()
+    else:
+        items = odb.get_all_order_items(order_id)
+    by_key = {}
+    for r in items:
+        if r["remaining_qty"] > 0:
+            r['ship_qty'] = r['remaining_qty']
+            by_key[(r["order_id"], r["product_id"])] = r
+    return by_key, [delivery_row(r) for r in by_key.values()]
+
+
+def load_delivery_data():
+    """Munkaszálon fut: termékek + az összes nyitott tétel (load_open_items)."""
+    return (backend.products().termek_katalogus(),) + load_open_items()
 
 
 class DateDialog(QDialog):
@@ -45,6 +99,10 @@ class DateDialog(QDialog):
     def date_str(self):
         return self.date_edit.date().toString("yyyy.MM.dd")
 
+    def iso_date(self):
+        """A szállítólevél shipping_date mezőjébe (a havi riport hónapja ebből jön)."""
+        return self.date_edit.date().toString("yyyy-MM-dd")
+
 
 class DeliveryWindow(QWidget):
     def __init__(self):
@@ -53,20 +111,78 @@ class DeliveryWindow(QWidget):
         self.project_dir  = project_dir
         self.template_dir = os.path.join(self.project_dir, "templates")
 
-        # DB és terméklista
-        self.order_db = OrderDB()
-        self.dm       = DeliveryModule()
-        self.products = osszes_termek()
-
-        # betöltés + ship_qty előkészítése
-        self.data = self.order_db.get_all_order_items()
-        for r in self.data:
-            r['ship_qty'] = r['remaining_qty']
+        # DB (írásokhoz); a termék- és tétellista háttérben töltődik
+        self.order_db = backend.order_items()
+        self.dm       = backend.delivery()
+        self.products = []
+        self.weights  = WeightTable({})
+        self.by_key   = {}   # (order_id, product_id) → nyitott tétel
 
         # UI kezdeti állapot
         self.current_lang = "hu"
         self._build_ui()
-        self._refresh_table()
+        self.loader = AsyncLoader(self, self.loading_lbl)
+        # más ablakok (és a saját mentéseink) változásai: csak az érintett sorok frissülnek
+        self.relay = EventRelay(self, {
+            events.OrderItemChanged: self._on_item_changed,
+            events.OrderChanged:     self._on_order_changed,
+            events.OrderDeleted:     self._on_order_deleted,
+        })
+        self._reload()
+
+    def _reload(self):
+        self.loader.load("order_items", load_delivery_data, self._on_data_loaded,
+                         label="Kiszállítás: tételek betöltése")
+
+    def _on_data_loaded(self, result):
+        self.products, self.by_key, rows = result
+        self.weights = WeightTable.from_products(self.products)
+        # egyedi vevőnevek a data alapján (a kiválasztás megmarad)
+        with QSignalBlocker(self.customer_combo):
+            sel = self.customer_combo.currentText()
+            self.customer_combo.clear()
+            self.customer_combo.addItem("Összes vevő")
+            self.customer_combo.addItems(sorted({r["cust_name"] for r in self.by_key.values() if r["cust_name"]}))
+            self.customer_combo.setCurrentText(sel)
+        self.model.set_rows(rows, keys=list(self.by_key))
+        self._apply_filter()
+        self.table.resizeColumnsToContents()
+
+    # --- változásesemények ---
+    def _on_item_changed(self, ev):
+        key = (ev.order_id, ev.product_id)
+        item = self.by_key.get(key)
+        if ev.remaining_qty <= 0:
+            self._remove_keys([key])
+        elif item is None:
+            self._on_order_changed(ev)   # újra nyitott tétel: a rendelés sorai kellenek
+        else:
+            item["remaining_qty"] = item["ship_qty"] = ev.remaining_qty
+            self.model.upsert(key, delivery_row(item))
+
+    def _on_order_changed(self, ev):
+        oid = ev.order_id
+        self.loader.load(f"order_{oid}", lambda: load_open_items(oid),
+                         lambda result: self._on_order_loaded(oid, result),
+                         label="Kiszállítás: rendelés frissítése")
+
+    def _on_order_loaded(self, order_id, result):
+        by_key, rows = result
+        self._remove_keys([k for k in self.by_key if k[0] == order_id and k not in by_key])
+        for (key, item), row in zip(by_key.items(), rows):
+            self.by_key[key] = item
+            self.model.upsert(key, row)
+        names = {self.customer_combo.itemText(i) for i in range(self.customer_combo.count())}
+        for name in sorted({r["cust_name"] for r in by_key.values() if r["cust_name"]} - names):
+            self.customer_combo.addItem(name)
+
+    def _on_order_deleted(self, ev):
+        self._remove_keys([k for k in self.by_key if k[0] == ev.order_id])
+
+    def _remove_keys(self, keys):
+        for k in keys:
+            self.by_key.pop(k, None)
+        self.model.remove_keys(keys)
 
     def _build_ui(self):
         self.setWindowTitle("Kiszállítási modul")
@@ -78,12 +194,14 @@ class DeliveryWindow(QWidget):
         logo_lbl = QLabel()
         lp = os.path.join(self.project_dir, "logo.png")
         if os.path.exists(lp):
-            logo_lbl.setPixmap(QPixmap(lp).scaledToHeight(30, Qt.SmoothTransformation))
+            logo_lbl.setPixmap(asset_cache.shared().scaled_to_height(lp, 30))
         hdr.addWidget(logo_lbl, alignment=Qt.AlignLeft)
         hdr.addWidget(QLabel(
             "<b>Dr. Köcher Kft.</b><br/>2300 Ráckeve, Vásártér utca 15, Magyarország"
         ))
         hdr.addStretch()
+        self.loading_lbl = LoadingLabel()
+        hdr.addWidget(self.loading_lbl)
         self.lang_combo = QComboBox()
         self.lang_combo.addItem("Magyar", "hu")
         self.lang_combo.addItem("Deutsch", "de")
@@ -95,31 +213,21 @@ class DeliveryWindow(QWidget):
         main.addWidget(QLabel("Vevő szűrés:"))
         self.customer_combo = QComboBox()
         self.customer_combo.addItem("Összes vevő")
-        # egyedi vevőnevek a data alapján
-        neveks = sorted({r["cust_name"] for r in self.data if r["cust_name"]})
-        for name in neveks:
-            self.customer_combo.addItem(name)
-        self.customer_combo.currentIndexChanged.connect(self._refresh_table)
+        self.customer_combo.currentIndexChanged.connect(self._apply_filter)
         main.addWidget(self.customer_combo)
 
         # — táblázat —
-        self.table = QTableWidget()
-        cols = [
-            ("Küld",              None,            "checkbox"),
-            ("Megrendelési szám", "order_number",  None),
-            ("Vevő neve",         "cust_name",     None),
-            ("Termék neve",       "product_name",  None),
-            ("Cikkszám",          "item_number",   None),
-            ("Felület",           "surface",       None),
-            ("Megrendelt",        "ordered_qty",   None),
-            ("Fennmaradó",        "remaining_qty", None),
-            ("Egység",            "unit",          None),
-            ("Szállítási menny.", "ship_qty",      "editable"),
-            ("Határidő",          "szall_hatarido",None),
-        ]
-        self.columns = cols
-        self.table.setColumnCount(len(cols))
-        self.table.setHorizontalHeaderLabels([h[0] for h in cols])
+        self.model = RowTableModel(
+            [h[0] for h in COLUMNS], self,
+            formats={SHIP_COL: lambda v: f"{v:g}"},
+            editable={SHIP_COL},
+            checkable=0,
+        )
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        configure_view(self.table)
         main.addWidget(self.table)
 
         # — generálás gomb —
@@ -133,47 +241,24 @@ class DeliveryWindow(QWidget):
         self.current_lang = self.lang_combo.currentData()
         # (ha a vevőlista nyelve is változna, itt frissíthetnéd)
 
-    def _refresh_table(self):
-        # először szűrjük vevőre
+    def _apply_filter(self):
         sel = self.customer_combo.currentText()
         if sel == "Összes vevő":
-            rows = [r for r in self.data if r["remaining_qty"] > 0]
+            self.proxy.set_predicate(None)
         else:
-            rows = [r for r in self.data
-                    if r["remaining_qty"] > 0 and r["cust_name"] == sel]
-
-        self.filtered = rows
-        self.table.setRowCount(len(rows))
-        for r, row in enumerate(rows):
-            for c, (hdr, key, mode) in enumerate(self.columns):
-                if mode == "checkbox":
-                    it = QTableWidgetItem()
-                    it.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
-                    it.setCheckState(Qt.Unchecked)
-                    self.table.setItem(r, c, it)
-                elif mode == "editable":
-                    le = QLineEdit(str(row.get(key, 0)))
-                    le.setProperty("remaining_qty", row["remaining_qty"])
-                    self.table.setCellWidget(r, c, le)
-                else:
-                    val = row.get(key, "")
-                    self.table.setItem(r, c, QTableWidgetItem(str(val)))
-        self.table.resizeColumnsToContents()
+            self.proxy.set_predicate(lambda row: row[CUST_COL] == sel)
 
     def on_generate(self):
-        # 1) összegyűjtjük a kiválasztott tételeket vevőnként
+        # 1) összegyűjtjük a kiválasztott (és a szűrés szerint látható) tételeket vevőnként
+        checked = self.model.checked_keys()
         groups = {}
-        for r, row in enumerate(self.filtered):
-            cb = self.table.item(r, 0)
-            if cb.checkState() != Qt.Checked:
+        for r in self.proxy.source_rows():
+            key = self.model.key(r)
+            if key not in checked:
                 continue
-            qty_w = self.table.cellWidget(r, 9)
-            try:
-                qty = float(qty_w.text())
-            except:
-                QMessageBox.warning(self, "Hiba", "Érvénytelen szállítási mennyiség!")
-                return
-            rem = qty_w.property("remaining_qty")
+            row = self.by_key[key]
+            qty = self.model.row(r)[SHIP_COL]
+            rem = row["remaining_qty"]
             if qty < 0 or qty > rem:
                 QMessageBox.warning(
                     self, "Hiba",
@@ -235,6 +320,7 @@ class DeliveryWindow(QWidget):
             dd = DateDialog(QDate.currentDate(), self)
             if dd.exec_() != QDialog.Accepted: continue
             delivery_date = dd.date_str()
+            shipping_date = dd.iso_date()
 
             # raklapok
             euros, ok_e = QInputDialog.getInt(
@@ -246,31 +332,15 @@ class DeliveryWindow(QWidget):
             )
             if not ok_o: continue
 
-            # --- mentés DB-be ---
-            note_id = self.dm.delivery_db.insert_delivery_note_with_number(
-                grp["order_id"], grp["customer"], grp["shipping"], note
+            # súlyok (kg-ra normálva, raklap önsúly a beállításokból)
+            net   = self.weights.net_weight(
+                (e["product_id"], e["ship_qty"]) for e in grp["entries"]
             )
-            for e in grp["entries"]:
-                self.dm.delivery_db.insert_delivery_note_item(
-                    note_id, e["product_id"], e["ship_qty"]
-                )
-                self.order_db.decrease_item_qty(
-                    grp["order_id"], e["product_id"], e["ship_qty"]
-                )
+            gross = WeightTable.gross_weight(net, {"euro": euros, "egyutas": one})
 
-            # súlyok
-            net = 0.0
-            for e in grp["entries"]:
-                prod   = next((p for p in self.products if p.id==e["product_id"]), None)
-                unit_w = getattr(prod, "suly", 1.0) if prod else 1.0
-                net   += e["ship_qty"] * unit_w
-            gross = net + euros*24 + one*14
-
-            # --- PDF generálás sablonnal ---
-            env  = Environment(loader=FileSystemLoader(self.template_dir))
-            tpl  = "delivery_base_de.html" if self.current_lang=="de" else "delivery_base_hu.html"
-            tmpl = env.get_template(tpl)
-            html = tmpl.render(
+            # --- előnézet: a PDF sablonja HTML-ként, azonnal (mentés még nincs) ---
+            tpl     = "delivery_base_de.html" if self.current_lang=="de" else "delivery_base_hu.html"
+            context = dict(
                 logo_uri      = QUrl.fromLocalFile(os.path.join(self.project_dir,"logo.png")).toString(),
                 buyer_name    = grp["customer"]["name"],
                 buyer_address = grp["customer"]["address"],
@@ -288,25 +358,58 @@ class DeliveryWindow(QWidget):
                 exchange_euro = 0,
                 exchange_one  = 0
             )
+            try:
+                html = rendering.get_template(tpl, self.template_dir).render(**context)
+            except Exception as e:
+                QMessageBox.critical(self, "Hiba", f"Sablon hiba:\n{e}")
+                continue
+            preview = DeliveryNotePreviewDialog(html, note, self.current_lang, self.project_dir,
+                                                context["logo_uri"], self)
+            if preview.exec_() != QDialog.Accepted:
+                continue
 
+            # a mentés helye most, hogy a háttérben készülő PDF-re ne kelljen várni
             path, _ = QFileDialog.getSaveFileName(
                 self, "PDF mentése", f"{note}.pdf", "PDF fájl (*.pdf)"
             )
-            if not path:
-                continue
-            if not path.lower().endswith(".pdf"):
+            if path and not path.lower().endswith(".pdf"):
                 path += ".pdf"
-            try:
-                HTML(string=html).write_pdf(path)
-                QMessageBox.information(self, "Kész", f"PDF elmentve:\n{path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{e}")
 
-        # 4) tábla frissítése
-        self.data = self.order_db.get_all_order_items()
-        for r in self.data:
-            r['ship_qty'] = r['remaining_qty']
-        self._refresh_table()
+            # --- mentés DB-be: fejléc, tételek és havi összesítő egy tranzakcióban ---
+            note_id = self.dm.generate_delivery_note_for_order(
+                grp["order_id"], grp["customer"], grp["shipping"],
+                [{"product_id": e["product_id"], "quantity": e["ship_qty"]} for e in grp["entries"]],
+                note, shipping_date
+            )
+            for e in grp["entries"]:
+                self.order_db.decrease_item_qty(
+                    grp["order_id"], e["product_id"], e["ship_qty"]
+                )
+
+            # --- PDF háttérben: archívumba, majd másolat a választott helyre ---
+            self._render_pdf(tpl, context, html, note_id, note, path)
+        # a tábla a decrease_item_qty eseményeiből soronként frissült
+
+    def _render_pdf(self, tpl, context, html, note_id, note, path):
+        """WeasyPrint a szálkészletben (saját archívum kapcsolattal); a GUI közben szabad."""
+        template_dir = self.template_dir
+
+        def render():
+            archive = PdfArchive()
+            try:
+                archived, _ = archive.render_note(tpl, context, note_id, note, template_dir, html=html)
+            finally:
+                archive.close()
+            if path:
+                shutil.copyfile(archived, path)
+            return archived
+
+        self.loader.load(
+            f"pdf_{note}", render,
+            lambda _: path and QMessageBox.information(self, "Kész", f"PDF elmentve:\n{path}"),
+            lambda msg: QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen ({note}):\n{msg}"),
+            label="Szállítólevél PDF generálása",
+        )
 
 
 def main():
@@ -1,14 +1,13 @@
 import sys
 import os
-import sqlite3
 from pathlib import Path
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QLineEdit, QTextEdit, QPushButton,
     QTableView, QVBoxLayout, QHBoxLayout, QApplication,
     QMessageBox, QFormLayout, QComboBox, QFrame
 )
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QPixmap
-from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QSortFilterProxyModel, QSize
 
 # Projekt gyökér hozzáadása az import útvonalhoz
 this_dir    = os.path.dirname(__file__)
@@ -16,8 +15,18 @@ project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-# Termékadatbázis elérési útja
-PRODUCTS_DB = os.path.join(project_dir, "modules", "product_module", "products.db")
+from modules.service import backend
+from gui import asset_cache
+
+# a táblázat oszlopai (Termek mezők); a vevői/szállítási oszlopokat a mentés írja
+TABLE_FIELDS = [
+    "vevo_nev", "megnevezes", "cikkszam", "uzem_lanc",
+    "customer_name", "customer_address", "customer_tax_number",
+    "customer_eu_tax_number", "customer_country",
+    "shipping_name", "shipping_address", "shipping_country",
+]
+CUSTOMER_FIELDS = ["customer_name", "customer_address", "customer_tax_number",
+                   "customer_eu_tax_number", "customer_country"]
 
 class DeliveryNoteInputWindow(QWidget):
     """
@@ -30,14 +39,12 @@ class DeliveryNoteInputWindow(QWidget):
         self.setWindowTitle("Vevői és szállítási címek hozzáadása")
         self.resize(950, 720)
 
-        self.ensure_columns_exist()
-
         # Céges fejléc logóval
         header_layout = QHBoxLayout()
         logo_path = os.path.join(project_dir, "logo.png")
         if os.path.exists(logo_path):
             logo = QLabel()
-            logo.setPixmap(QPixmap(logo_path).scaled(48, 48, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            logo.setPixmap(asset_cache.shared().pixmap(logo_path, QSize(48, 48)))
             header_layout.addWidget(logo, alignment=Qt.AlignLeft)
         header_layout.addSpacing(10)
         company_label = QLabel("<b><span style='font-size:18pt'>Dr. Köcher Kft.</span></b>")
@@ -132,51 +139,15 @@ class DeliveryNoteInputWindow(QWidget):
             QHeaderView::section { background: #e3e9f1; font-weight: bold; }
         """)
 
-        self.load_products()
-        self.load_customers()
-
-    def ensure_columns_exist(self):
-        """Ha hiányoznak a customer_/shipping_ oszlopok, hozzáadjuk őket."""
-        needed = {
-            "customer_name":          "TEXT",
-            "customer_address":       "TEXT",
-            "customer_tax_number":    "TEXT",
-            "customer_eu_tax_number": "TEXT",
-            "customer_country":       "TEXT",
-            "shipping_name":          "TEXT",
-            "shipping_address":       "TEXT",
-            "shipping_country":       "TEXT"
-        }
-        conn = sqlite3.connect(PRODUCTS_DB)
-        cur = conn.cursor()
-        cur.execute("PRAGMA table_info(products)")
-        existing = [row[1] for row in cur.fetchall()]
-        for col, coltype in needed.items():
-            if col not in existing:
-                cur.execute(f"ALTER TABLE products ADD COLUMN {col} {coltype}")
-        conn.commit()
-        conn.close()
+        self.load_products()   # a vevőválasztót is tölti
 
     def load_products(self):
-        """Betölti a products táblát, beállítja a táblázatot és a szűrő listát."""
+        """Betölti a termékkatalógust, beállítja a táblázatot és a szűrő listát."""
         try:
-            conn = sqlite3.connect(PRODUCTS_DB)
-            conn.row_factory = sqlite3.Row
-            cur = conn.execute("""
-                SELECT id,
-                       vevo_nev,
-                       megnevezes, cikkszam, uzem_lanc,
-                       customer_name, customer_address, customer_tax_number,
-                       customer_eu_tax_number, customer_country,
-                       shipping_name, shipping_address, shipping_country
-                  FROM products
-                 ORDER BY megnevezes
-            """)
-            rows = cur.fetchall()
-            conn.close()
+            rows = sorted(backend.products().termek_katalogus(), key=lambda t: t.megnevezes or "")
 
             # Frissítjük a legördülő szűrőt vevőnév szerint
-            vevo_set = sorted({row["vevo_nev"] for row in rows if row["vevo_nev"]})
+            vevo_set = sorted({t.vevo_nev for t in rows if t.vevo_nev})
             self.filter_combo.blockSignals(True)
             self.filter_combo.clear()
             self.filter_combo.addItem("Összes vevő")
@@ -196,48 +167,33 @@ class DeliveryNoteInputWindow(QWidget):
             model = QStandardItemModel(len(rows), len(headers))
             model.setHorizontalHeaderLabels(headers)
 
-            for i, row in enumerate(rows):
-                for col, key in enumerate([
-                    "vevo_nev", "megnevezes", "cikkszam", "uzem_lanc",
-                    "customer_name", "customer_address", "customer_tax_number",
-                    "customer_eu_tax_number", "customer_country",
-                    "shipping_name", "shipping_address", "shipping_country"
-                ]):
-                    item = QStandardItem(row[key] or "")
-                    item.setData(row["id"], Qt.UserRole)
+            for i, t in enumerate(rows):
+                for col, key in enumerate(TABLE_FIELDS):
+                    value = getattr(t, key)
+                    if isinstance(value, list):   # uzem_lanc
+                        value = ", ".join(value)
+                    item = QStandardItem(value or "")
+                    item.setData(t.id, Qt.UserRole)
                     model.setItem(i, col, item)
 
             self.proxy_model.setSourceModel(model)
             self.table.resizeColumnsToContents()
 
-            self.load_customers()  # frissítjük a vevőválasztót is
+            self.load_customers(rows)  # frissítjük a vevőválasztót is
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"Termékek betöltése sikertelen: {e}")
 
-    def load_customers(self):
-        """A products.db-ből egyedi vevőket betölti a vevőválasztó comboboxba."""
-        try:
-            conn = sqlite3.connect(PRODUCTS_DB)
-            cur = conn.execute("""
-                SELECT DISTINCT customer_name, customer_address, customer_tax_number,
-                                customer_eu_tax_number, customer_country
-                  FROM products
-                 WHERE customer_name IS NOT NULL AND customer_name != ''
-                 ORDER BY customer_name
-            """)
-            self.customer_select_combo.blockSignals(True)
-            self.customer_select_combo.clear()
-            self.customer_select_combo.addItem("Új vevő (kézi rögzítés)")
-            self._customers = []
-            for row in cur.fetchall():
-                display = row[0]
-                self.customer_select_combo.addItem(display)
-                self._customers.append(row)
-            self.customer_select_combo.blockSignals(False)
-        except Exception as e:
-            self.customer_select_combo.clear()
-            self.customer_select_combo.addItem("Új vevő (kézi rögzítés)")
-            self._customers = []
+    def load_customers(self, products):
+        """A termékek egyedi vevői (név szerint) a vevőválasztó comboboxba."""
+        customers = sorted({tuple(getattr(t, f) or "" for f in CUSTOMER_FIELDS)
+                            for t in products if t.customer_name})
+        self.customer_select_combo.blockSignals(True)
+        self.customer_select_combo.clear()
+        self.customer_select_combo.addItem("Új vevő (kézi rögzítés)")
+        self._customers = customers
+        for row in customers:
+            self.customer_select_combo.addItem(row[0])
+        self.customer_select_combo.blockSignals(False)
 
     def on_customer_selected(self, idx):
         """Ha meglévő vevőt választunk, tölti az adatmezőket."""
@@ -291,35 +247,8 @@ class DeliveryNoteInputWindow(QWidget):
             return
 
         try:
-            conn = sqlite3.connect(PRODUCTS_DB)
-            cur = conn.cursor()
-            for proxy_index in selection:
-                src_index = self.proxy_model.mapToSource(proxy_index)
-                prod_id = self.proxy_model.sourceModel().item(src_index.row(), 0).data(Qt.UserRole)
-                cur.execute("""
-                    UPDATE products SET
-                        customer_name          = ?,
-                        customer_address       = ?,
-                        customer_tax_number    = ?,
-                        customer_eu_tax_number = ?,
-                        customer_country       = ?,
-                        shipping_name          = ?,
-                        shipping_address       = ?,
-                        shipping_country       = ?
-                    WHERE id = ?
-                """, (
-                    cust["customer_name"],
-                    cust["customer_address"],
-                    cust["customer_tax_number"],
-                    cust["customer_eu_tax_number"],
-                    cust["customer_country"],
-                    ship["shipping_name"],
-                    ship["shipping_address"],
-                    ship["shipping_country"],
-                    prod_id
-                ))
-            conn.commit()
-            conn.close()
+            ids = [self.proxy_model.mapToSource(ix).data(Qt.UserRole) for ix in selection]
+            backend.products().frissit_cimek(ids, {**cust, **ship})
             QMessageBox.information(self, "Siker", "Adatok sikeresen mentve.")
             self.load_products()
         except Exception as e:
@@ -0,0 +1,46 @@
+# gui/event_relay.py
+#
+# A modules.shared.events változásesemények átadása egy ablaknak. Az esemény
+# bármelyik szálról érkezhet (pl. háttérmentés); a signal a relay szálára –
+# a GUI szálra – sorolja be, és ott hívódik a típushoz tartozó kezelő.
+#
+#     self.relay = EventRelay(self, {
+#         events.OrderItemChanged: self._on_item_changed,
+#         events.OrderDeleted:     self._on_order_deleted,
+#     })
+#
+# A relay az ablak gyereke: az ablakkal együtt szűnik meg, és ezzel a
+# feliratkozása is (az events gyenge hivatkozást tart rá).
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from modules.shared import events
+
+
+class EventRelay(QObject):
+    received = pyqtSignal(object)
+
+    def __init__(self, parent, handlers: dict):
+        super().__init__(parent)
+        self._handlers = dict(handlers)
+        self.received.connect(self._dispatch)
+        for event_type in self._handlers:
+            events.subscribe(event_type, self._forward)
+
+    def _forward(self, event):
+        # más szálról hívva queued kapcsolat lesz belőle (AutoConnection)
+        try:
+            self.received.emit(event)
+        except RuntimeError:
+            # a Qt oldali objektum már megszűnt (bezárt ablak)
+            self.close()
+
+    def _dispatch(self, event):
+        handler = self._handlers.get(type(event))
+        if handler is not None:
+            handler(event)
+
+    def close(self):
+        """Leiratkozás (pl. ha az ablak rejtve marad, de nem kell frissíteni)."""
+        for event_type in self._handlers:
+            events.unsubscribe(event_type, self._forward)
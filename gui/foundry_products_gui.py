@@ -2,15 +2,12 @@
 
 import sys
 import os
-import sqlite3
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QColor, QPixmap
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem, QPushButton,
+    QTableView, QPushButton,
     QHeaderView, QComboBox, QLineEdit,
     QSpacerItem, QSizePolicy,
     QFileDialog, QMessageBox
@@ -22,7 +19,15 @@ project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-from modules.manufacturing_module.inventory_db import InventoryDB
+from modules.manufacturing_module.reports import (
+    COL_SHOTS, COL_PERF, COL_SCRAP_SH, COL_SCRAP, FOUNDRY_HEADERS,
+    perf_color, scrap_color, foundry_filter, foundry_report,
+)
+from modules.service import backend
+from modules.shared.report_writer import write_report
+from gui.async_loader import AsyncLoader, LoadingLabel
+from gui.table_model import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui import asset_cache
 
 class FoundryProductsWindow(QMainWindow):
     def __init__(self):
@@ -34,13 +39,8 @@ class FoundryProductsWindow(QMainWindow):
         self.template_dir = os.path.join(project_dir, "templates")
 
         # Adatbázis & downtime-ok
-        self.inv_db = InventoryDB()
-        self.prod_db = os.path.join(
-            project_dir, "modules", "product_module", "products.db"
-        )
-        cur = self.inv_db.conn.cursor()
-        cur.execute("SELECT DISTINCT cause FROM shift_downtimes")
-        self.downtime_causes = [row["cause"] for row in cur.fetchall()]
+        self.inv_db = backend.inventory()
+        self.downtime_causes = self.inv_db.downtime_causes()
 
         # --- GUI felépítés ---
         central = QWidget()
@@ -53,7 +53,7 @@ class FoundryProductsWindow(QMainWindow):
         header_layout = QHBoxLayout()
         logo_path = os.path.join(project_dir, "logo.png")
         if os.path.exists(logo_path):
-            pix = QPixmap(logo_path).scaledToHeight(50, Qt.SmoothTransformation)
+            pix = asset_cache.shared().scaled_to_height(logo_path, 50)
             logo_lbl = QLabel()
             logo_lbl.setPixmap(pix)
             header_layout.addWidget(logo_lbl)
@@ -64,6 +64,8 @@ class FoundryProductsWindow(QMainWindow):
         title_lbl.setFont(QFont("Arial", 13, QFont.Bold))
         header_layout.addWidget(title_lbl, alignment=Qt.AlignVCenter)
         header_layout.addStretch()
+        self.loading_lbl = LoadingLabel()
+        header_layout.addWidget(self.loading_lbl)
         main_layout.addLayout(header_layout)
 
         # Alfejléc
@@ -79,37 +81,35 @@ class FoundryProductsWindow(QMainWindow):
         self.op_cb.addItem("Összes", "")
         for op in self.inv_db.list_operators():
             self.op_cb.addItem(op, op)
-        self.op_cb.currentIndexChanged.connect(self.load_shift_logs)
+        self.op_cb.currentIndexChanged.connect(self._apply_filter)
         filter_layout.addWidget(self.op_cb)
 
         filter_layout.addWidget(QLabel("Gép:"))
         self.machine_cb = QComboBox()
         self.machine_cb.addItem("Összes", "")
-        machines = [r["machine"] for r in self.inv_db.conn.execute(
-            "SELECT DISTINCT machine FROM shift_logs"
-        )]
-        for m in machines:
+        for m in self.inv_db.list_logged_machines():
             if m and self.machine_cb.findData(m) < 0:
                 self.machine_cb.addItem(m, m)
-        self.machine_cb.currentIndexChanged.connect(self.load_shift_logs)
+        self.machine_cb.currentIndexChanged.connect(self._apply_filter)
         filter_layout.addWidget(self.machine_cb)
 
         filter_layout.addWidget(QLabel("Termék:"))
+        self._filter_later = Debouncer(self._apply_filter, parent=self)
         self.prod_le = QLineEdit()
         self.prod_le.setPlaceholderText("keresés…")
-        self.prod_le.textChanged.connect(self.load_shift_logs)
+        self.prod_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.prod_le)
 
         filter_layout.addWidget(QLabel("Cikkszám:"))
         self.sku_le = QLineEdit()
         self.sku_le.setPlaceholderText("keresés…")
-        self.sku_le.textChanged.connect(self.load_shift_logs)
+        self.sku_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.sku_le)
 
         filter_layout.addWidget(QLabel("Dátum:"))
         self.date_le = QLineEdit()
         self.date_le.setPlaceholderText("YYYY-MM-DD")
-        self.date_le.textChanged.connect(self.load_shift_logs)
+        self.date_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.date_le)
 
         filter_layout.addItem(
@@ -123,7 +123,7 @@ class FoundryProductsWindow(QMainWindow):
         for txt, slot in [
             ("Frissítés", self.load_shift_logs),
             ("Mentés", self.save_changes),
-            ("PDF generálás…", self.generate_pdf),
+            ("Exportálás…", self.generate_pdf),
         ]:
             b = QPushButton(txt)
             b.clicked.connect(slot)
@@ -132,13 +132,19 @@ class FoundryProductsWindow(QMainWindow):
 
         # Táblázat
         cols = 12 + 1 + len(self.downtime_causes)
-        self.tbl = QTableWidget(0, cols)
-        headers = [
-            "Dátum", "Operátor", "Gép", "Termék", "Cikkszám",
-            "Műszak", "Öntött lövés", "Előírt norma", "Teljesítmény (%)",
-            "Jó darabszám", "Selejt lövés", "Selejt (%)"
-        ] + ["Aktív munkaidő"] + self.downtime_causes
-        self.tbl.setHorizontalHeaderLabels(headers)
+        headers = FOUNDRY_HEADERS + self.downtime_causes
+        pct = lambda v: f"{v:.1%}"
+        self.model = RowTableModel(
+            headers, self,
+            formats={COL_PERF: pct, COL_SCRAP: pct},
+            colors={COL_PERF: perf_color, COL_SCRAP: scrap_color},
+            editable={COL_SHOTS, COL_SCRAP_SH},
+        )
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        configure_view(self.tbl)
         for i in range(cols):
             self.tbl.horizontalHeader().setSectionResizeMode(
                 i, QHeaderView.Interactive
@@ -151,107 +157,35 @@ class FoundryProductsWindow(QMainWindow):
         dev_lbl.setFont(QFont("", 8, QFont.StyleItalic))
         main_layout.addWidget(dev_lbl, alignment=Qt.AlignLeft)
 
-        # Első betöltés
+        # Első betöltés (háttérszálon)
+        self.loader = AsyncLoader(self, self.loading_lbl)
         self.load_shift_logs()
 
-    def load_shift_logs(self):
-        self.tbl.setRowCount(0)
-        logs = self.inv_db.list_shift_logs()
-        op_f = self.op_cb.currentData()
-        mch_f = self.machine_cb.currentData()
-        pd_f = self.prod_le.text().lower()
-        sku_f = self.sku_le.text().lower()
-        dt_f = self.date_le.text()
-
-        for log in logs:
-            if op_f and log["operator"] != op_f:
-                continue
-            if mch_f and log["machine"] != mch_f:
-                continue
-            if dt_f and not log["date"].startswith(dt_f):
-                continue
-
-            # Termékadatok lekérdezése
-            pid = self.inv_db.get_active_job_product(log["machine"])
-            name, sku, unit, cav = "—", "—", "", 1
-            if pid:
-                con = sqlite3.connect(self.prod_db)
-                con.row_factory = sqlite3.Row
-                cur = con.cursor()
-                cur.execute(
-                    "SELECT megnevezes,cikkszam,mennyisegi_egyseg,feszekszam "
-                    "FROM products WHERE id=?", (pid,)
-                )
-                prow = cur.fetchone()
-                con.close()
-                if prow:
-                    name = prow["megnevezes"]
-                    sku = prow["cikkszam"]
-                    unit = prow["mennyisegi_egyseg"] or ""
-                    cav = int(prow["feszekszam"] or 1)
-
-            if pd_f and pd_f not in name.lower():
-                continue
-            if sku_f and sku_f not in sku.lower():
-                continue
-
-            shots = log["shots"]
-            scrap_sh = log["scrap_shots"]
-            total_q = shots * cav
-            good_q = (shots - scrap_sh) * cav
-            scrap_q = scrap_sh * cav
-            scrap_pct = (scrap_q / total_q * 100) if total_q > 0 else 0
-
-            norma = self.inv_db.get_norm(pid) or 0
-            shift_h = 8.0
-            cur = self.inv_db.conn.cursor()
-            cur.execute(
-                "SELECT cause,hours FROM shift_downtimes "
-                "WHERE machine=? AND date=? AND shift_type=?",
-                (log["machine"], log["date"], log["shift_type"])
-            )
-            dt_list = {r["cause"]: r["hours"] for r in cur.fetchall()}
-            sum_dt = sum(dt_list.values())
-            eff_h = max(0.0, shift_h - sum_dt)
-
-            adj_norm = norma * (eff_h / shift_h) if shift_h > 0 else norma
-            perf_pct = ((shots * cav) / adj_norm) if adj_norm > 0 else 0
-            scrap_frac = scrap_pct / 100.0
-
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-            row_vals = [
-                log["date"], log["operator"], log["machine"],
-                name, sku, log["shift_type"], shots,
-                norma, perf_pct, f"{good_q} {unit}",
-                scrap_sh, scrap_frac, f"{eff_h:.2f} h"
-            ] + [dt_list.get(c, 0.0) for c in self.downtime_causes]
-
-            for c, v in enumerate(row_vals):
-                it = QTableWidgetItem()
-                if c in (8, 11):
-                    it.setData(Qt.EditRole, v)
-                else:
-                    it.setText(str(v))
-                    if c not in (6, 10):
-                        it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-
-                # Színezés GUI‐ban
-                if c == 8:
-                    color = 'lightgreen' if v >= 0.80 else 'yellow' if v >= 0.60 else 'red'
-                    it.setBackground(QColor(color))
-                    it.setText(f"{v:.1%}")
-                if c == 11:
-                    color = 'lightgreen' if v <= 0.07 else 'yellow' if v <= 0.10 else 'red'
-                    it.setBackground(QColor(color))
-                    it.setText(f"{v:.1%}")
-
-                self.tbl.setItem(r, c, it)
+    def reactivate(self):
+        """Újra megnyitáskor (WindowRegistry): a naplók háttérben frissülnek, a szűrők maradnak."""
+        self.load_shift_logs()
 
-            self.tbl.item(r, 0).setData(Qt.UserRole, log["id"])
+    def load_shift_logs(self):
+        """A sorok a szálkészletben készülnek; a szűrők a már betöltött sorokon dolgoznak."""
+        causes = list(self.downtime_causes)
+        self.loader.load(
+            "shift_logs",
+            lambda: backend.foundry_rows(causes),
+            self._fill_table,
+            label="Műszakgyártások betöltése",
+        )
 
+    def _fill_table(self, rows):
+        self.model.set_rows((vals for _, vals in rows), keys=[log_id for log_id, _ in rows])
+        self._apply_filter()
         self.tbl.resizeColumnsToContents()
 
+    def _apply_filter(self):
+        self.proxy.set_predicate(foundry_filter(
+            self.op_cb.currentData(), self.machine_cb.currentData(),
+            self.date_le.text(), self.prod_le.text(), self.sku_le.text(),
+        ))
+
     def save_changes(self):
         ans = QMessageBox.question(
             self, "Megerősítés",
@@ -261,90 +195,32 @@ class FoundryProductsWindow(QMainWindow):
         if ans != QMessageBox.Yes:
             return
 
-        cur = self.inv_db.conn.cursor()
-        for r in range(self.tbl.rowCount()):
-            rec = self.tbl.item(r, 0).data(Qt.UserRole)
-            shots = int(self.tbl.item(r, 6).text())
-            scraps = int(self.tbl.item(r, 10).text())
-            cur.execute(
-                "UPDATE shift_logs SET shots=?, scrap_shots=? WHERE id=?",
-                (shots, scraps, rec)
-            )
-        self.inv_db.conn.commit()
+        self.inv_db.update_shift_counts([
+            (self.model.key(r), int(self.model.row(r)[COL_SHOTS]), int(self.model.row(r)[COL_SCRAP_SH]))
+            for r in self.proxy.source_rows()
+        ])
         QMessageBox.information(self, "Mentés", "Módosítások sikeresen mentve.")
         self.load_shift_logs()
 
     def generate_pdf(self):
         path, _ = QFileDialog.getSaveFileName(
-            self, "PDF mentése…", "", "PDF fájl (*.pdf)"
+            self, "Riport mentése…", "",
+            "PDF fájl (*.pdf);;Excel fájl (*.xlsx);;CSV fájl (*.csv);;HTML fájl (*.html)"
         )
         if not path:
             return
-        if not path.lower().endswith(".pdf"):
+        if os.path.splitext(path)[1].lower() not in (".pdf", ".xlsx", ".csv", ".html"):
             path += ".pdf"
 
-        # Fejléc és sorok kigyűjtése, numerikus százalékok parse-olása
-        headers = [
-            self.tbl.horizontalHeaderItem(c).text()
-            for c in range(self.tbl.columnCount())
-        ]
-        rows = []
-        for r in range(self.tbl.rowCount()):
-            d = {}
-            for c, h in enumerate(headers):
-                item = self.tbl.item(r, c)
-                if h in ("Teljesítmény (%)", "Selejt (%)"):
-                    txt = item.text().strip().strip('%')
-                    try:
-                        val = float(txt) / 100.0
-                    except:
-                        val = 0.0
-                    d[h] = val
-                else:
-                    d[h] = item.text()
-            rows.append(d)
-
-        html = self._render_html(rows, headers)
-
-        try:
-            HTML(string=html, base_url=project_dir).write_pdf(path)
-            QMessageBox.information(self, "Kész", f"PDF elkészült:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{e}")
-
-    def _render_html(self, rows, headers):
-        env = Environment(loader=FileSystemLoader(self.template_dir))
-        tmpl = env.get_template("base.html")
-
-        thead = "".join(f"<th>{h}</th>" for h in headers)
-        tbody = ""
-        for row in rows:
-            cells = ""
-            for h in headers:
-                if h == "Teljesítmény (%)":
-                    v = row[h]
-                    col = 'lightgreen' if v >= 0.80 else 'yellow' if v >= 0.60 else 'red'
-                    cells += f'<td style="background-color:{col}">{v:.1%}</td>'
-                elif h == "Selejt (%)":
-                    v = row[h]
-                    col = 'lightgreen' if v <= 0.07 else 'yellow' if v <= 0.10 else 'red'
-                    cells += f'<td style="background-color:{col}">{v:.1%}</td>'
-                else:
-                    cells += f"<td>{row[h]}</td>"
-            tbody += f"<tr>{cells}</tr>"
-
-        table_html = f"""
-        <table>
-          <thead><tr>{thead}</tr></thead>
-          <tbody>{tbody}</tbody>
-        </table>
-        """
-
-        return tmpl.render(
-            logo_path=os.path.join(project_dir, "logo.png"),
-            company_name="Dr. Köcher Kft. – Öntöde Üzem",
-            report_title="Műszakgyártások áttekintése",
-            content_table=table_html
+        # a szűrt sorok a modellből (nem a widgetből); az írás háttérszálon, streamelve
+        rows = [self.model.row(r) for r in self.proxy.source_rows()]
+        report = foundry_report(rows, list(self.downtime_causes))
+        self.loader.load(
+            "export",
+            lambda: write_report(report, path, template_dir=self.template_dir, base_url=project_dir),
+            lambda n: QMessageBox.information(self, "Kész", f"Riport elkészült ({n} sor):\n{path}"),
+            lambda msg: QMessageBox.critical(self, "Hiba", f"Riport generálás sikertelen:\n{msg}"),
+            label="Riport generálása",
         )
 
 def main():
@@ -1,8 +1,21 @@
 # gui/label_preview_window.py
+#
+# Címke előnézet és nyomtatás. A címkéket a paint_page() rajzolja közvetlenül
+# a kapott QPainter-re – a képernyőn a LabelCanvas, nyomtatáskor a nyomtató
+# festője –, így a nyomat vektoros marad (nincs oldalméretű raszterkép), és
+# tetszőleges számú címke lapozódik LABELS_PER_PAGE-esével.
+#
+# A rajz egy rögzített logikai lapon (PAGE_W × PAGE_H egység, A4 arány) készül,
+# amit a festő transzformációja a céltéglalapra méretez; a betűk is logikai
+# egységben (pixelSize) vannak megadva, így képernyőn és nyomtatón egyforma.
+# A címkék jobb oldalán QR kód (rendelésszám|cikkszám|mennyiség) és Code 128
+# vonalkódok; ezek útvonalai (QPainterPath) tartalom szerint gyorsítótárazva.
 
+import functools
 import os
+import sys
 from PyQt5.QtCore        import Qt, QRectF
-from PyQt5.QtGui         import QPixmap, QFont, QPainter
+from PyQt5.QtGui         import QPixmap, QFont, QPainter, QPainterPath
 from PyQt5.QtWidgets     import (
     QDialog, QVBoxLayout, QLabel, QHBoxLayout, QPushButton,
     QWidget, QInputDialog, QSizeGrip
@@ -11,42 +24,204 @@ from PyQt5.QtPrintSupport import QPrinter, QPrintPreviewDialog
 from datetime            import date
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from modules.shared import barcodes
+from gui import asset_cache
+
+LABELS_PER_PAGE = 3
+PAGE_W, PAGE_H  = 800.0, 1131.0   # logikai lap, A4 arány (210 × 297)
+MARGIN          = 30.0
+LOGO_SIZE       = 70.0
+CODE_COLUMN     = 330.0   # a kódok sávja a címke jobb szélén
+QR_SIZE         = 110.0
+BARCODE_H       = 48.0
+
+
+def logo_pixmap(path: str) -> QPixmap:
+    """A logó a közös gyorsítótárból; ugyanaz a QPixmap minden címkén (a nyomtató is egyszer kapja meg)."""
+    return asset_cache.shared().pixmap(path)
+
+
+@functools.lru_cache(maxsize=barcodes.CACHE_SIZE)
+def _code128_path(data: str):
+    """(szélesség modulban, útvonal) – egységnyi magas vonalak."""
+    total, bars = barcodes.code128_bars(data)
+    path = QPainterPath()
+    for x, w in bars:
+        path.addRect(QRectF(x, 0, w, 1))
+    return total, path
+
+
+@functools.lru_cache(maxsize=barcodes.CACHE_SIZE)
+def _qr_path(data: str):
+    total, runs = barcodes.qr_runs(data)
+    path = QPainterPath()
+    for x, y, w in runs:
+        path.addRect(QRectF(x, y, w, 1))
+    # a szomszédos futások körvonallá olvasztva: kevesebb elem a nyomtatási adatfolyamban
+    return total, path.simplified()
+
+
+def paint_code(qp: QPainter, rect: QRectF, kind: str, data: str):
+    """Code 128 ("code128") vagy QR ("qr") vektorosan a téglalapba; nem kódolható tartalomnál semmi."""
+    try:
+        total, path = _code128_path(data) if kind == "code128" else _qr_path(data)
+    except ValueError:
+        return
+    qp.save()
+    qp.translate(rect.x(), rect.y())
+    if kind == "code128":
+        qp.scale(rect.width() / total, rect.height())
+    else:
+        side = min(rect.width(), rect.height())
+        qp.scale(side / total, side / total)
+    qp.setPen(Qt.NoPen)
+    qp.fillPath(path, Qt.black)
+    qp.restore()
+
+
+def _font(px: int, bold: bool = False) -> QFont:
+    f = QFont("Arial")
+    f.setPixelSize(px)
+    f.setBold(bold)
+    return f
+
+
+def page_count(n_labels: int, per_page: int = LABELS_PER_PAGE) -> int:
+    return max(1, -(-n_labels // per_page))
+
+
+def paint_label(qp: QPainter, rect: QRectF, d, qty, logo: QPixmap, today: str):
+    """Egy címke a logikai koordinátájú téglalapba."""
+    x0, y0, w, h = rect.x(), rect.y(), rect.width(), rect.height()
+    qp.setPen(Qt.black)
+    qp.setBrush(Qt.white)
+    qp.drawRect(rect)
+    if not any(d):
+        return
+
+    # LOGO
+    if not logo.isNull():
+        s = min(LOGO_SIZE / logo.width(), LOGO_SIZE / logo.height())
+        qp.drawPixmap(QRectF(x0 + 10, y0 + 10, logo.width() * s, logo.height() * s),
+                      logo, QRectF(logo.rect()))
+
+    # CÉGNÉV
+    qp.setFont(_font(19, True))
+    qp.drawText(QRectF(x0 + 95, y0 + 20, w - 105, 30), Qt.AlignLeft, "Dr. Köcher Kft.")
+
+    lines = [
+        # Vevő és termék
+        (_font(16, True), d[1]),
+        (None,            f"Termék: {d[2]}"),
+        # Részletek
+        (_font(15),       f"Cikkszám: {d[3]}"),
+        (None,            f"Mennyiség: {qty:g} {d[5]}"),
+        (None,            f"Rend. szám: {d[0]}"),
+        (None,            f"Beérkezés: {d[6]}"),
+        (None,            f"Elkészülés ideje: {today}"),
+        (None,            f"Címzett: {d[8]}"),
+        (None,            f"Cím: {d[9]}"),
+    ]
+    y = y0 + 80
+    text_w = w - 30 - CODE_COLUMN
+    for font, text in lines:
+        if font is not None:
+            qp.setFont(font)
+        fm = qp.fontMetrics()
+        step = fm.height() + 4
+        qp.drawText(QRectF(x0 + 15, y, text_w, step), Qt.AlignLeft | Qt.AlignVCenter,
+                    fm.elidedText(str(text), Qt.ElideRight, int(text_w)))
+        y += step
+
+    # KÓDOK: QR (rendelésszám|cikkszám|mennyiség), alatta cikkszám és rendelésszám vonalkód
+    cx = x0 + w - CODE_COLUMN + 10
+    paint_code(qp, QRectF(x0 + w - QR_SIZE - 15, y0 + 12, QR_SIZE, QR_SIZE), "qr",
+               barcodes.payload((d[0], d[3], f"{qty:g}")))
+    by = y0 + 12 + QR_SIZE + 15
+    qp.setFont(_font(12))
+    for value in (d[3], d[0]):
+        if by + BARCODE_H + 16 > y0 + h:
+            break
+        if value:
+            paint_code(qp, QRectF(cx, by, CODE_COLUMN - 25, BARCODE_H), "code128", str(value))
+            qp.drawText(QRectF(cx, by + BARCODE_H, CODE_COLUMN - 25, 16), Qt.AlignCenter, str(value))
+        by += BARCODE_H + 24
+
+
+def paint_page(qp: QPainter, target: QRectF, labels, quantities, logo: QPixmap,
+               per_page: int = LABELS_PER_PAGE, today: str = None):
+    """Egy lapnyi címke (legfeljebb per_page) a cél téglalapba méretezve; az üres helyek keretet kapnak."""
+    today = today or date.today().isoformat()
+    qp.save()
+    qp.translate(target.x(), target.y())
+    qp.scale(target.width() / PAGE_W, target.height() / PAGE_H)
+    block_h = (PAGE_H - (per_page + 1) * MARGIN) / per_page
+    block_w = PAGE_W - 2 * MARGIN
+    for i in range(per_page):
+        rect = QRectF(MARGIN, MARGIN + i * (block_h + MARGIN), block_w, block_h)
+        if i < len(labels):
+            paint_label(qp, rect, labels[i], quantities[i], logo, today)
+        else:
+            qp.setPen(Qt.black)
+            qp.setBrush(Qt.white)
+            qp.drawRect(rect)
+    qp.restore()
+
 
 class LabelPreviewDialog(QDialog):
-    def __init__(self, label_data, parent=None):
+    def __init__(self, label_data, parent=None, per_page: int = LABELS_PER_PAGE):
         super().__init__(parent)
-        self.setWindowTitle("Címke előnézet (A4 - 3 db egymás alatt)")
+        self.setWindowTitle(f"Címke előnézet (A4 - {per_page} db egymás alatt)")
         # Engedélyezzük a szabad átméretezést
         self.setSizeGripEnabled(True)
-        # (Opcionálisan beállíthatsz minimumméretet is:)
-        # self.setMinimumSize(600, 400)
 
-        self.label_data = label_data[:3]
-        self.logo_path   = os.path.join(BASE_DIR, "logo.png")
+        self.per_page   = per_page
+        self.label_data = [list(row) for row in label_data]
+        self.logo_path  = os.path.join(BASE_DIR, "logo.png")
         self.current_quantities = []
         for row in self.label_data:
             try:
                 self.current_quantities.append(float(row[4]))
-            except:
+            except (TypeError, ValueError, IndexError):
                 self.current_quantities.append(0.0)
 
         main_v = QVBoxLayout(self)
         main_v.setContentsMargins(12,12,12,12)
-        main_v.addWidget(QLabel("<b>Címke előnézet (egy A4-en három címke egymás alatt)</b>"))
+        main_v.addWidget(QLabel(f"<b>Címke előnézet (egy A4-en {per_page} címke egymás alatt, "
+                                f"összesen {len(self.label_data)} címke)</b>"))
 
         hl = QHBoxLayout()
         self.canvas = LabelCanvas(self.label_data,
                                   self.current_quantities,
-                                  self.logo_path, self)
+                                  self.logo_path, self, per_page)
         hl.addWidget(self.canvas, 1)
 
         gb = QVBoxLayout()
-        for i in range(3):
-            btn = QPushButton(f"Mennyiség módosítása ({i+1}. címke)")
+        self.qty_buttons = []
+        for i in range(per_page):
+            btn = QPushButton()
             btn.setFixedWidth(180)
-            btn.clicked.connect(lambda _, idx=i: self.modify_quantity(idx))
+            btn.clicked.connect(lambda _, slot=i: self.modify_quantity(self.canvas.page * self.per_page + slot))
             gb.addWidget(btn)
             gb.addSpacing(12)
+            self.qty_buttons.append(btn)
+
+        nav = QHBoxLayout()
+        self.btn_prev = QPushButton("◀")
+        self.btn_next = QPushButton("▶")
+        for b in (self.btn_prev, self.btn_next):
+            b.setFixedWidth(36)
+        self.page_lbl = QLabel(alignment=Qt.AlignCenter)
+        self.btn_prev.clicked.connect(lambda: self.show_page(self.canvas.page - 1))
+        self.btn_next.clicked.connect(lambda: self.show_page(self.canvas.page + 1))
+        nav.addWidget(self.btn_prev)
+        nav.addWidget(self.page_lbl, 1)
+        nav.addWidget(self.btn_next)
+        gb.addLayout(nav)
+
         gb.addStretch()
         btn_print = QPushButton("Nyomtatási előnézet")
         btn_print.setFixedWidth(180)
@@ -70,7 +245,24 @@ class LabelPreviewDialog(QDialog):
         footer.addWidget(btn_close)
         main_v.addLayout(footer)
 
+        self.show_page(0)
+
+    def show_page(self, page: int):
+        pages = page_count(len(self.label_data), self.per_page)
+        page = max(0, min(page, pages - 1))
+        self.canvas.page = page
+        self.canvas.update()
+        self.page_lbl.setText(f"{page + 1} / {pages}")
+        self.btn_prev.setEnabled(page > 0)
+        self.btn_next.setEnabled(page < pages - 1)
+        for slot, btn in enumerate(self.qty_buttons):
+            idx = page * self.per_page + slot
+            btn.setText(f"Mennyiség ({idx+1}. címke)")
+            btn.setEnabled(idx < len(self.label_data))
+
     def modify_quantity(self, idx):
+        if idx >= len(self.label_data):
+            return
         old = self.current_quantities[idx]
         val, ok = QInputDialog.getDouble(
             self, "Mennyiség módosítása",
@@ -80,7 +272,6 @@ class LabelPreviewDialog(QDialog):
         if ok:
             self.current_quantities[idx] = val
             self.label_data[idx][4] = f"{val:g}"
-            self.canvas.current_quantities[idx] = val
             self.canvas.update()
 
     def print_preview(self):
@@ -93,79 +284,44 @@ class LabelPreviewDialog(QDialog):
         dlg.exec_()
 
     def _render(self, printer):
+        """Vektoros nyomat: minden lap közvetlenül a nyomtató festőjére rajzolódik."""
         painter = QPainter(printer)
-        rect = printer.pageRect()
-        pix  = self.canvas.grab()
-        pix  = pix.scaled(rect.width(), rect.height(),
-                          Qt.IgnoreAspectRatio,
-                          Qt.SmoothTransformation)
-        painter.drawPixmap(0, 0, pix)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect  = QRectF(printer.pageRect(QPrinter.DevicePixel))
+        logo  = logo_pixmap(self.logo_path)
+        today = date.today().isoformat()
+        n = self.per_page
+        for page in range(page_count(len(self.label_data), n)):
+            if page:
+                printer.newPage()
+            lo = page * n
+            paint_page(painter, QRectF(0, 0, rect.width(), rect.height()),
+                       self.label_data[lo:lo + n], self.current_quantities[lo:lo + n],
+                       logo, n, today)
         painter.end()
 
 class LabelCanvas(QWidget):
-    def __init__(self, labels, quantities, logo_path, parent=None):
+    """Az aktuális lap (page) címkéi a képernyőn – ugyanazzal a rajzolóval, mint a nyomat."""
+
+    def __init__(self, labels, quantities, logo_path, parent=None, per_page: int = LABELS_PER_PAGE):
         super().__init__(parent)
         self.labels             = labels
         self.current_quantities = quantities
         self.logo_path          = logo_path
+        self.per_page           = per_page
+        self.page               = 0
         # Opcionálisan állíthatsz minimumméretet is:
-        self.setMinimumSize(800, 900)
+        self.setMinimumSize(560, 792)
 
     def paintEvent(self, e):
         qp = QPainter(self)
         qp.setRenderHint(QPainter.Antialiasing)
-
-        W, H = self.width(), self.height()
-        M    = 30
-        block_h = (H - 4*M) / 3
-        block_w = W - 2*M
-
-        f_big  = QFont("Arial", 14, QFont.Bold)
-        f_mid  = QFont("Arial", 12, QFont.Bold)
-        f_norm = QFont("Arial", 11)
-        today  = date.today().isoformat()
-
-        for i in range(3):
-            x0 = M
-            y0 = M + i*(block_h+M)
-            qp.setPen(Qt.black)
-            qp.setBrush(Qt.white)
-            qp.drawRect(QRectF(x0, y0, block_w, block_h))
-
-            d = self.labels[i]
-            if not any(d):
-                continue
-
-            # LOGO
-            if os.path.exists(self.logo_path):
-                pix = QPixmap(self.logo_path).scaled(70,70,
-                                                    Qt.KeepAspectRatio,
-                                                    Qt.SmoothTransformation)
-                qp.drawPixmap(int(x0+10), int(y0+10), pix)
-
-            # CÉGNÉV
-            qp.setFont(f_big)
-            qp.drawText(QRectF(x0+95, y0+20, block_w-105, 30),
-                        Qt.AlignLeft, "Dr. Köcher Kft.")
-            y = y0 + 20 + 30 + 30
-
-            # Vevő és termék
-            qp.setFont(f_mid)
-            qp.drawText(int(x0+15), int(y),     d[1]);           y+=24
-            qp.drawText(int(x0+15), int(y),     f"Termék: {d[2]}"); y+=24
-
-            # Részletek
-            qp.setFont(f_norm)
-            qp.drawText(int(x0+15), int(y),     f"Cikkszám: {d[3]}");                y+=20
-            qp.drawText(int(x0+15), int(y),     f"Mennyiség: {self.current_quantities[i]:g} {d[5]}"); y+=20
-            qp.drawText(int(x0+15), int(y),     f"Rend. szám: {d[0]}");               y+=20
-            qp.drawText(int(x0+15), int(y),     f"Beérkezés: {d[6]}");               y+=20
-            qp.drawText(int(x0+15), int(y),     f"Elkészülés ideje: {today}");       y+=20
-            qp.drawText(int(x0+15), int(y),     f"Címzett: {d[8]}");                 y+=20
-            qp.drawText(int(x0+15), int(y),     f"Cím: {d[9]}")
-
+        # A4 arányú terület a widget közepén
+        s = min(self.width() / PAGE_W, self.height() / PAGE_H)
+        w, h = PAGE_W * s, PAGE_H * s
+        target = QRectF((self.width() - w) / 2, (self.height() - h) / 2, w, h)
+        lo = self.page * self.per_page
+        paint_page(qp, target, self.labels[lo:lo + self.per_page],
+                   self.current_quantities[lo:lo + self.per_page],
+                   logo_pixmap(self.logo_path), self.per_page)
         qp.end()
-
-
-
-
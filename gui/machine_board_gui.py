@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+from datetime import datetime
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtWidgets import (
+    QApplication, QMainWindow, QWidget,
+    QVBoxLayout, QHBoxLayout, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+
+# Projekt gyökér hozzáadása a path-hoz
+this_dir = os.path.dirname(__file__)
+project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from modules.manufacturing_module.inventory_db import MACHINES, current_shift, previous_shift
+from modules.service import backend
+from gui import asset_cache
+
+# Oszlopok: gép, állapot, termék, cikkszám, futásidő, és az utolsó lezárt műszak
+# lövés/selejt számai (a műszaknapló csak a műszak végén íródik)
+COLUMNS = ["Gép", "Állapot", "Termék", "Cikkszám", "Futásidő",
+           "Lövés (előző műszak)", "Selejt (előző műszak)", "Selejtarány (előző műszak)"]
+COL_RUNTIME = 4
+
+# Időzítő: ennyi ms-onként nézzük meg a PRAGMA data_version-t
+POLL_MS = 2000
+
+
+def _fmt_runtime(start_at, now: datetime) -> str:
+    if not start_at:
+        return "—"
+    secs = int((now - datetime.fromisoformat(start_at)).total_seconds())
+    if secs < 0:
+        return "—"
+    h, rem = divmod(secs, 3600)
+    return f"{h}:{rem // 60:02d}"
+
+
+class MachineBoardWindow(QMainWindow):
+    """
+    Élő gépállapot tábla. Az adatbázist csak akkor kérdezi le újra, ha a
+    PRAGMA data_version (más kapcsolat írt), a termékkatalógus bélyege vagy a
+    műszak változott; a futásidő oszlop a memóriában tartott kezdési időből frissül.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Dr. Köcher Kft. – Öntöde Üzem | Gépállapot")
+        self.resize(1100, 360)
+
+        self.inv_db = backend.inventory()
+        self._version = None
+        self._shift   = None
+        self._rows    = {}   # gép → utolsó megjelenített sor (dict)
+
+        central = QWidget()
+        self.setCentralWidget(central)
+        main_layout = QVBoxLayout(central)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(10)
+
+        # Fejléc (logó + cím)
+        header_layout = QHBoxLayout()
+        logo_path = os.path.join(project_dir, "logo.png")
+        if os.path.exists(logo_path):
+            pix = asset_cache.shared().scaled_to_height(logo_path, 50)
+            logo_lbl = QLabel()
+            logo_lbl.setPixmap(pix)
+            header_layout.addWidget(logo_lbl)
+        title_lbl = QLabel(
+            '<span style="font-size:15pt;font-weight:bold;">'
+            'Dr. Köcher Kft. – Öntöde Üzem</span>'
+        )
+        title_lbl.setFont(QFont("Arial", 13, QFont.Bold))
+        header_layout.addWidget(title_lbl, alignment=Qt.AlignVCenter)
+        header_layout.addStretch()
+        self.shift_lbl = QLabel()
+        self.shift_lbl.setFont(QFont("Arial", 11, QFont.Bold))
+        header_layout.addWidget(self.shift_lbl, alignment=Qt.AlignVCenter)
+        main_layout.addLayout(header_layout)
+
+        # Tábla: gépenként egy fix sor
+        self.table = QTableWidget(len(MACHINES), len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for r, m in enumerate(MACHINES):
+            self.table.setItem(r, 0, QTableWidgetItem(m))
+            for c in range(1, len(COLUMNS)):
+                self.table.setItem(r, c, QTableWidgetItem("—"))
+        main_layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(POLL_MS)
+        self.poll()
+
+    def poll(self):
+        now = datetime.now()
+        shift = current_shift(now)
+        version = (self.inv_db.data_version(), self.inv_db.catalog_version())
+        if version != self._version or shift != self._shift:
+            if shift != self._shift:
+                prev = previous_shift(now)
+                self.shift_lbl.setText(f"Műszak: {shift[0]} {shift[1]}  |  "
+                                       f"előző műszak: {prev[0]} {prev[1]}")
+            self._version, self._shift = version, shift
+            self.reload(now)
+        else:
+            self._update_runtimes(now)
+
+    def reload(self, now: datetime):
+        board = {r["machine"]: r for r in self.inv_db.machine_board(*previous_shift(now))}
+        for r, machine in enumerate(MACHINES):
+            row = board.get(machine)
+            if row == self._rows.get(machine):
+                continue
+            self._rows[machine] = row
+            active = bool(row) and row["status"] == "active"
+            values = [
+                "fut" if active else "áll",
+                (row["megnevezes"] or "—") if active else "—",
+                (row["cikkszam"] or "—") if active else "—",
+                _fmt_runtime(row["start_at"], now) if active else "—",
+                str(row["shots"]) if row else "0",
+                str(row["scrap_shots"]) if row else "0",
+                f"{row['scrap_rate'] * 100:.1f} %" if row else "—",
+            ]
+            for c, val in enumerate(values, start=1):
+                self._set_cell(r, c, val)
+            color = QColor("#e8f5e9") if active else QColor("#fafafa")
+            for c in range(len(COLUMNS)):
+                self.table.item(r, c).setBackground(color)
+        self._update_runtimes(now)
+
+    def _update_runtimes(self, now: datetime):
+        for r, machine in enumerate(MACHINES):
+            row = self._rows.get(machine)
+            if row and row["status"] == "active":
+                self._set_cell(r, COL_RUNTIME, _fmt_runtime(row["start_at"], now))
+
+    def _set_cell(self, r: int, c: int, text: str):
+        item = self.table.item(r, c)
+        if item.text() != text:
+            item.setText(text)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        # újra megnyitott (rejtve megtartott) ablak: a frissítés folytatódik
+        if not self.timer.isActive():
+            self.timer.start(POLL_MS)
+            self.poll()
+        super().showEvent(event)
+
+
+def main():
+    app = QApplication(sys.argv)
+    w = MachineBoardWindow()
+    w.show()
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
 import sys
 import os
-import sqlite3
 from pathlib import Path
 from PyQt5.QtCore import Qt, QSize
-from PyQt5.QtGui import QFont, QPixmap, QStandardItemModel, QStandardItem
+from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QLineEdit, QSpinBox, QPushButton, QMessageBox,
@@ -15,7 +14,9 @@ project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-from modules.manufacturing_module.inventory_db import InventoryDB
+from modules.manufacturing_module.inventory_db import MACHINES
+from modules.service import backend
+from gui import asset_cache
 
 class ManufacturingWindow(QMainWindow):
     def __init__(self):
@@ -34,14 +35,9 @@ class ManufacturingWindow(QMainWindow):
         """)
 
         # adatbázisok
-        self.inv_db   = InventoryDB()
-        self.prod_db  = os.path.join(project_dir, "modules", "product_module", "products.db")
-        self.machines = [
-            "OMS 950T öntőgép",
-            "OMS 500T öntőgép",
-            "CLOO 400T öntőgép",
-            "CLOO 250T függőleges öntőgép"
-        ]
+        self.inv_db   = backend.inventory()
+        self.products = {}   # id → Termek (a katalógusból, load_customers tölti)
+        self.machines = MACHINES
 
         # --- Central widget és layout ---
         central = QWidget()
@@ -59,7 +55,7 @@ class ManufacturingWindow(QMainWindow):
         header = QHBoxLayout()
         logo_path = os.path.join(project_dir, "logo.png")
         if os.path.exists(logo_path):
-            pix = QPixmap(logo_path).scaled(54, 54, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            pix = asset_cache.shared().pixmap(logo_path, QSize(54, 54))
             lbl_logo = QLabel()
             lbl_logo.setPixmap(pix)
             header.addWidget(lbl_logo, alignment=Qt.AlignLeft)
@@ -174,20 +170,19 @@ class ManufacturingWindow(QMainWindow):
 
     def refresh_machine_list(self):
         model = QStandardItemModel()
+        active = self.inv_db.active_jobs()
         for m in self.machines:
             item = QStandardItem(m)
-            if self.inv_db.has_active_job(m):
+            if m in active:
                 item.setEnabled(False)
                 item.setToolTip("Foglalt: futó gyártás van rajta")
             model.appendRow(item)
         self.machine_cb.setModel(model)
 
     def load_customers(self):
+        self.products = {t.id: t for t in backend.products().termek_katalogus()}
         self.customer_cb.clear()
-        con = sqlite3.connect(self.prod_db); cur = con.cursor()
-        cur.execute("SELECT DISTINCT vevo_nev FROM products ORDER BY vevo_nev")
-        names = [r[0] for r in cur.fetchall() if r[0]]
-        con.close()
+        names = sorted({t.vevo_nev for t in self.products.values() if t.vevo_nev})
         self.customer_cb.addItem("Összes vevő", None)
         for n in names:
             self.customer_cb.addItem(n, n)
@@ -195,21 +190,18 @@ class ManufacturingWindow(QMainWindow):
     def load_products(self):
         cust = self.customer_cb.currentData()
         self.product_cb.clear()
-        con = sqlite3.connect(self.prod_db); cur = con.cursor()
-        sql = "SELECT id, megnevezes FROM products WHERE uzem_lanc LIKE '%Öntöde%' COLLATE NOCASE"
-        params = []
-        if cust:
-            sql += " AND vevo_nev = ?"; params.append(cust)
-        sql += " ORDER BY megnevezes"
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-        con.close()
+        # öntödei termékek (az üzemláncban szerepel az Öntöde), név szerint
+        rows = sorted(
+            (t for t in self.products.values()
+             if any("öntöde" in u.lower() for u in t.uzem_lanc)
+             and (not cust or t.vevo_nev == cust)),
+            key=lambda t: t.megnevezes or "")
         if not rows:
             self.product_cb.addItem("— nincs termék —", -1)
             self.on_product_changed(0)
         else:
-            for pid, name in rows:
-                self.product_cb.addItem(name, pid)
+            for t in rows:
+                self.product_cb.addItem(t.megnevezes, t.id)
             self.on_product_changed(0)
 
     def on_product_changed(self, idx):
@@ -227,30 +219,18 @@ class ManufacturingWindow(QMainWindow):
         self.tooling_le.setText(tooling)
 
         # Egyéb termékinfók + kép
-        con = sqlite3.connect(self.prod_db)
-        con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("""
-            SELECT foto, cikkszam, suly, suly_mertekegyseg,
-                   csokosuly, csokosuly_mertekegyseg, feszekszam
-              FROM products WHERE id=?
-        """, (pid,))
-        row = cur.fetchone()
-        con.close()
+        row = self.products.get(pid)
 
         # Fénykép egységes, középre illesztett
         self.photo_label.clear()
         self.photo_label.setText("<i>Nincs kép</i>")
-        if row and row["foto"]:
-            p = row["foto"]
+        if row and row.foto:
+            p = row.foto
             if not os.path.isabs(p): p = os.path.join(project_dir, p)
             if os.path.exists(p):
-                pix = QPixmap(p)
-                if not pix.isNull():
-                    # Egységesen 320x320 px méretű keretbe igazítva (kitöltés nélkül, arányosan!)
-                    scaled = pix.scaled(
-                        320, 320, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                    )
+                # Egységesen 320x320 px méretű keretbe igazítva (kitöltés nélkül, arányosan!)
+                scaled = asset_cache.shared().thumbnail(p, QSize(320, 320))
+                if not scaled.isNull():
                     self.photo_label.setPixmap(scaled)
                     self.photo_label.setAlignment(Qt.AlignCenter)
                     self.photo_label.setStyleSheet("""
@@ -261,12 +241,14 @@ class ManufacturingWindow(QMainWindow):
                     """)
             # else: meghagyjuk az <i>Nincs kép</i>-t
 
-        self.sku_lbl.setText(f"Cikkszám: {row['cikkszam'] or '—'}")
-        self.weight_lbl.setText(f"Súly: {row['suly'] or 0} {row['suly_mertekegyseg'] or ''}")
+        if row is None:
+            return
+        self.sku_lbl.setText(f"Cikkszám: {row.cikkszam or '—'}")
+        self.weight_lbl.setText(f"Súly: {row.suly or 0} {row.suly_mertekegyseg or ''}")
         self.bunch_weight_lbl.setText(
-            f"Csokor súly: {row['csokosuly'] or 0} {row['csokosuly_mertekegyseg'] or ''}"
+            f"Csokor súly: {row.csokosuly or 0} {row.csokosuly_mertekegyseg or ''}"
         )
-        self.fesz_lbl.setText(f"Feszékszám: {row['feszekszam'] or 0}")
+        self.fesz_lbl.setText(f"Feszékszám: {row.feszekszam or 0}")
 
     def save_norm(self):
         pid = self.product_cb.currentData()
@@ -312,7 +294,8 @@ class ManufacturingWindow(QMainWindow):
         self.refresh_machine_list()
 
     def stop_production(self):
-        active = [m for m in self.machines if self.inv_db.has_active_job(m)]
+        jobs   = self.inv_db.active_jobs()
+        active = [m for m in self.machines if m in jobs]
         if not active:
             QMessageBox.information(self, "Nincs aktív munka",
                 "Egyik gépen sincs futó gyártás."); return
@@ -7,35 +7,32 @@ this_dir = os.path.dirname(__file__)
 BASE_DIR = os.path.abspath(os.path.join(this_dir, os.pardir))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
-import sqlite3
 import textwrap as _tw
 from datetime import datetime
 from typing import List, Dict, Set, Tuple
 from pathlib import Path
 
-from PyQt5.QtCore import Qt, QDate, QSignalBlocker
-from PyQt5.QtGui import QPixmap, QDoubleValidator
+from PyQt5.QtCore import Qt, QDate, QSignalBlocker, QSize
+from PyQt5.QtGui import QDoubleValidator
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QLabel, QTableWidget, QTableWidgetItem, QTableView, QHeaderView,
     QLineEdit, QTextEdit, QPushButton, QDateEdit, QComboBox,
     QMessageBox, QDialog, QFormLayout, QAbstractItemView, QFileDialog
 )
 
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
-
-from modules.product_module.product_module import Termek, osszes_termek, aktualis_ar
-from modules.order_module.order_module import (
-    Order, Tetel, osszes_megrendeles,
-    hozzaad_megrendeles, frissit_megrendeles,
-    torol_megrendeles, uj_id
-)
+from modules.product_module.product_module import Termek, aktualis_ar
+from modules.order_module.order_module import Order, Tetel
+from modules.service import backend
+from modules.shared import events, rendering
+from gui.async_loader import AsyncLoader, LoadingLabel
+from gui.event_relay import EventRelay
+from gui.table_model import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui import asset_cache
 
 # ha order_gui.py a gui/ mappában van, akkor ERP1.0 a parent
 this_dir = os.path.dirname(__file__)
 BASE_DIR = os.path.abspath(os.path.join(this_dir, os.pardir))
-PRODUCTS_DB = os.path.join(BASE_DIR, "modules", "product_module", "products.db")
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
@@ -50,6 +47,44 @@ def plants(prods: List[Termek]) -> List[str]:
 def customers(prods: List[Termek]) -> List[str]:
     return sorted({p.vevo_nev for p in prods})
 
+# táblasor oszlopai (a sor tuple indexei)
+COL_VEVO, COL_TERMEK, COL_CIKK, COL_UZEM, COL_HATARIDO = 2, 3, 4, 11, 13
+
+def order_row(o: Order, p: Termek, tet: Tetel) -> tuple:
+    """Egy nyitott rendeléstétel nyers táblasora (a formázás megjelenítéskor történik)."""
+    ar, valuta = aktualis_ar(p) or (0.0, "")
+    return (
+        o.id, o.megrendeles_szam, o.vevo_nev, p.megnevezes,
+        p.cikkszam, tet.qty, p.mennyisegi_egyseg,
+        tet.fennmarado_mennyiseg, p.mennyisegi_egyseg,
+        ar, valuta, tuple(p.uzem_lanc),
+        o.beerkezes, o.szall_hatarido,
+        p.customer_name, p.customer_address,
+        p.customer_tax_number, p.customer_eu_tax_number,
+        p.customer_country,
+        p.shipping_name, p.shipping_address,
+        p.shipping_country
+    )
+
+def order_rows(termekek: List[Termek], orders: List[Order]) -> Tuple[list, list]:
+    """A nyitott tételek (fennmaradó > 0) táblasorai és kulcsai (rendelés id)."""
+    by_id = {p.id: p for p in termekek}
+    rows, keys = [], []
+    for o in orders:
+        if not o.tetelek: continue
+        tet = o.tetelek[0]
+        if tet.fennmarado_mennyiseg <= 0: continue
+        p = by_id.get(tet.product_id)
+        if not p: continue
+        rows.append(order_row(o, p, tet))
+        keys.append(o.id)
+    return rows, keys
+
+def load_orders():
+    """Munkaszálon: termékek, rendelések és a tábla sorai (saját kapcsolatokkal)."""
+    termekek, orders = backend.products().termek_katalogus(), backend.orders().osszes_megrendeles()
+    return (termekek, orders) + order_rows(termekek, orders)
+
 
 class OrderWin(QMainWindow):
     def __init__(self):
@@ -57,16 +92,23 @@ class OrderWin(QMainWindow):
         self.setWindowTitle("Dr. Köcher Kft. – Megrendelés-nyilvántartó")
         self.resize(1800, 860)
 
-        # adatok
-        self.termekek: List[Termek] = osszes_termek()
-        self.orders:    List[Order] = osszes_megrendeles()
+        # adatok (háttérben töltődnek)
+        self.termekek: List[Termek] = []
+        self.orders:    List[Order] = []
         self.sort_reverse = False
 
         # PDF-sablonok helye
         self.template_dir = os.path.join(BASE_DIR, "templates")
 
         self._build_ui()
-        self._apply_filter()
+        self.loader = AsyncLoader(self, self.loading_lbl)
+        # mentés / kiszállítás után csak az érintett rendelés sora frissül
+        self.relay = EventRelay(self, {
+            events.OrderItemChanged: self._on_item_changed,
+            events.OrderChanged:     self._on_order_changed,
+            events.OrderDeleted:     self._on_order_deleted,
+        })
+        self._refresh_products()
 
 
     def _build_ui(self):
@@ -78,39 +120,38 @@ class OrderWin(QMainWindow):
         header = QHBoxLayout()
         logo_path = os.path.join(BASE_DIR, "logo.png")
         if os.path.exists(logo_path):
-            pix = QPixmap(logo_path).scaled(80, 80,
-                                            Qt.KeepAspectRatio,
-                                            Qt.SmoothTransformation)
+            pix = asset_cache.shared().pixmap(logo_path, QSize(80, 80))
             header.addWidget(QLabel(pixmap=pix))
         col = QVBoxLayout()
         col.addWidget(QLabel("<h2>Dr. Köcher Kft.</h2>"))
         col.addWidget(QLabel("Megrendelés-nyilvántartó   •   Fejlesztő: Polgár Tibor"))
         header.addLayout(col)
         header.addStretch()
+        self.loading_lbl = LoadingLabel()
+        header.addWidget(self.loading_lbl)
         main.addLayout(header)
 
         # szűrők
         flt = QHBoxLayout()
         self.cb_vevo = QComboBox()
         self.cb_vevo.addItem("Mind")
-        self.cb_vevo.addItems(customers(self.termekek))
         self.cb_vevo.currentTextChanged.connect(self._apply_filter)
         flt.addWidget(self.cb_vevo)
 
+        self._filter_later = Debouncer(self._apply_filter, parent=self)
         self.le_cikk = QLineEdit()
         self.le_cikk.setPlaceholderText("Cikkszám")
-        self.le_cikk.textChanged.connect(self._apply_filter)
+        self.le_cikk.textChanged.connect(self._filter_later)
         flt.addWidget(self.le_cikk)
 
         self.cb_uzem = QComboBox()
         self.cb_uzem.addItem("Mind")
-        self.cb_uzem.addItems(plants(self.termekek))
         self.cb_uzem.currentTextChanged.connect(self._apply_filter)
         flt.addWidget(self.cb_uzem)
 
         self.le_termek = QLineEdit()
         self.le_termek.setPlaceholderText("Terméknév")
-        self.le_termek.textChanged.connect(self._apply_filter)
+        self.le_termek.textChanged.connect(self._filter_later)
         flt.addWidget(self.le_termek)
 
         self.cb_sort = QComboBox()
@@ -133,9 +174,18 @@ class OrderWin(QMainWindow):
             "Customer EU Tax No","Customer Country",
             "Shipping Name","Shipping Address","Shipping Country"
         ]
-        self.tbl = QTableWidget(0, len(cols))
-        self.tbl.setHorizontalHeaderLabels(cols)
+        qty = lambda v: f"{v:g}"
+        self.model = RowTableModel(cols, self, formats={
+            5: qty, 7: qty, 9: lambda v: f"{v:.2f}", COL_UZEM: lambda v: ", ".join(v),
+        })
+        self.model.sort(COL_HATARIDO, Qt.AscendingOrder)
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        configure_view(self.tbl, row_height=26)
         head = self.tbl.horizontalHeader()
+        head.setSortIndicator(COL_HATARIDO, Qt.AscendingOrder)
         head.setSectionResizeMode(QHeaderView.Interactive)
         head.resizeSection(3, 380)
         head.resizeSection(4, 170)
@@ -159,86 +209,91 @@ class OrderWin(QMainWindow):
 
     def _on_sort_changed(self, index: int):
         self.sort_reverse = (index == 1)
-        self._apply_filter()
+        order = Qt.DescendingOrder if self.sort_reverse else Qt.AscendingOrder
+        self.tbl.sortByColumn(COL_HATARIDO, order)
 
 
     def _refresh_products(self):
-        self.termekek = osszes_termek()
-        with QSignalBlocker(self.cb_vevo):
-            self.cb_vevo.clear()
-            self.cb_vevo.addItem("Mind")
-            self.cb_vevo.addItems(customers(self.termekek))
-        with QSignalBlocker(self.cb_uzem):
-            self.cb_uzem.clear()
-            self.cb_uzem.addItem("Mind")
-            self.cb_uzem.addItems(plants(self.termekek))
+        # termékek és rendelések a szálkészletben (saját kapcsolatokkal)
+        self.loader.load("orders", load_orders,
+                         self._on_loaded, label="Megrendelések betöltése")
+
+
+    def _on_loaded(self, result):
+        self.termekek, self.orders, rows, keys = result
+        for cb, items in ((self.cb_vevo, customers(self.termekek)),
+                          (self.cb_uzem, plants(self.termekek))):
+            with QSignalBlocker(cb):
+                sel = cb.currentText()
+                cb.clear()
+                cb.addItem("Mind")
+                cb.addItems(items)
+                cb.setCurrentText(sel)
+        self.model.set_rows(rows, keys)
         self._apply_filter()
 
 
+    # --- változásesemények ---
+    def _find_order(self, order_id: int) -> int:
+        return next((i for i, o in enumerate(self.orders) if o.id == order_id), -1)
+
+    def _update_order_row(self, order: Order):
+        """Egy rendelés sora: csere / hozzáfűzés, vagy törlés, ha már nincs nyitott tétele."""
+        rows, keys = order_rows(self.termekek, [order])
+        if rows:
+            self.model.upsert(order.id, rows[0])
+        else:
+            self.model.remove_keys([order.id])
+
+    def _on_item_changed(self, ev):
+        i = self._find_order(ev.order_id)
+        if i < 0:
+            return
+        for t in self.orders[i].tetelek:
+            if t.product_id == ev.product_id:
+                t.fennmarado_mennyiseg = ev.remaining_qty
+        self._update_order_row(self.orders[i])
+
+    def _on_order_changed(self, ev):
+        oid = ev.order_id
+        self.loader.load(f"order_{oid}", lambda: backend.orders().megrendeles(oid),
+                         lambda order: self._on_order_loaded(oid, order),
+                         label="Megrendelés frissítése")
+
+    def _on_order_loaded(self, order_id: int, order: Order | None):
+        if order is None:
+            self._on_order_deleted(events.OrderDeleted(order_id))
+            return
+        i = self._find_order(order_id)
+        if i < 0:
+            self.orders.append(order)
+        else:
+            self.orders[i] = order
+        self._update_order_row(order)
+
+    def _on_order_deleted(self, ev):
+        self.orders = [o for o in self.orders if o.id != ev.order_id]
+        self.model.remove_keys([ev.order_id])
+
+
     def _apply_filter(self):
         v = None if self.cb_vevo.currentText()=="Mind" else self.cb_vevo.currentText().lower()
         c = self.le_cikk.text().lower()
         u = None if self.cb_uzem.currentText()=="Mind" else self.cb_uzem.currentText().lower()
         t = self.le_termek.text().lower()
-
-        filtered = []
-        for o in osszes_megrendeles():
-            if not o.tetelek: continue
-            tet = o.tetelek[0]
-            if tet.fennmarado_mennyiseg <= 0: continue
-            p = next((x for x in self.termekek if x.id==tet.product_id), None)
-            if not p: continue
-            if v and v not in o.vevo_nev.lower():        continue
-            if c and c not in p.cikkszam.lower():         continue
-            if t and t not in p.megnevezes.lower():       continue
-            if u and u not in " ".join(p.uzem_lanc).lower(): continue
-            filtered.append((o,p,tet))
-
-        filtered.sort(key=lambda x: x[0].szall_hatarido or "", reverse=self.sort_reverse)
-
-        self.tbl.setRowCount(0)
-        for o, p, tet in filtered:
-            conn = sqlite3.connect(PRODUCTS_DB)
-            conn.row_factory = sqlite3.Row
-            rec = conn.execute("""
-                SELECT customer_name, customer_address, customer_tax_number,
-                       customer_eu_tax_number, customer_country,
-                       shipping_name, shipping_address, shipping_country
-                  FROM products WHERE id = ?
-            """, (p.id,)).fetchone()
-            conn.close()
-
-            ar_valuta = aktualis_ar(p) or (0.0, "")
-            ar, valuta = f"{ar_valuta[0]:.2f}", ar_valuta[1]
-
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-            vals = [
-                str(o.id), o.megrendeles_szam, o.vevo_nev, p.megnevezes,
-                p.cikkszam, f"{tet.qty:g}", p.mennyisegi_egyseg,
-                f"{tet.fennmarado_mennyiseg:g}", p.mennyisegi_egyseg,
-                ar, valuta, ", ".join(p.uzem_lanc),
-                o.beerkezes, o.szall_hatarido,
-                rec["customer_name"] or "", rec["customer_address"] or "",
-                rec["customer_tax_number"] or "", rec["customer_eu_tax_number"] or "",
-                rec["customer_country"] or "",
-                rec["shipping_name"] or "", rec["shipping_address"] or "",
-                rec["shipping_country"] or ""
-            ]
-            for col, txt in enumerate(vals):
-                it = QTableWidgetItem(txt)
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                if col == 0:
-                    it.setData(Qt.UserRole, (o.id, p.id))
-                self.tbl.setItem(r, col, it)
-            self.tbl.setRowHeight(r, 26)
+        if not (v or c or u or t):
+            self.proxy.set_predicate(None)
+            return
+        self.proxy.set_predicate(lambda row: (
+            (not v or v in row[COL_VEVO].lower())
+            and (not c or c in row[COL_CIKK].lower())
+            and (not t or t in row[COL_TERMEK].lower())
+            and (not u or u in " ".join(row[COL_UZEM]).lower())
+        ))
 
 
     def _selected_ids(self) -> Set[int]:
-        return {
-            self.tbl.item(i.row(), 0).data(Qt.UserRole)[0]
-            for i in self.tbl.selectionModel().selectedRows()
-        }
+        return {i.data(Qt.UserRole) for i in self.tbl.selectionModel().selectedRows()}
 
 
     def _new(self):
@@ -260,15 +315,13 @@ class OrderWin(QMainWindow):
         for pid, qty in dlg.checked.items():
             egys = next(p.mennyisegi_egyseg for p in self.termekek if p.id==pid)
             order = Order(
-                id=uj_id(),
+                id=backend.orders().uj_id(),
                 tetelek=[Tetel(product_id=pid, qty=qty,
                                fennmarado_mennyiseg=qty,
                                mennyisegi_egyseg=egys)],
                 **meta,
             )
-            hozzaad_megrendeles(order)
-            self.orders.append(order)
-        self._apply_filter()
+            backend.orders().hozzaad_megrendeles(order)   # OrderChanged → a sor betöltődik
 
 
     def _edit(self):
@@ -296,8 +349,7 @@ class OrderWin(QMainWindow):
         order.szall_hatarido = dlg.base_sz
         order.megrendeles_szam = dlg.base_nr
         order.megjegyzes = dlg.base_mj
-        frissit_megrendeles(order)
-        self._apply_filter()
+        backend.orders().frissit_megrendeles(order)
 
 
     def _delete(self):
@@ -312,30 +364,12 @@ class OrderWin(QMainWindow):
         ) != QMessageBox.Yes:
             return
         for rid in ids:
-            torol_megrendeles(rid)
-        self.orders = [o for o in self.orders if o.id not in ids]
-        self._apply_filter()
+            backend.orders().torol_megrendeles(rid)   # OrderDeleted → a sor kikerül
 
 
     def _pdf(self):
-        # 1) Szűrés: fennmaradó >0 és filterfeltételek
-        v = None if self.cb_vevo.currentText()=="Mind" else self.cb_vevo.currentText().lower()
-        c = self.le_cikk.text().lower()
-        u = None if self.cb_uzem.currentText()=="Mind" else self.cb_uzem.currentText().lower()
-        t = self.le_termek.text().lower()
-
-        rows = []
-        for o in self.orders:
-            if not o.tetelek: continue
-            tet = o.tetelek[0]
-            if tet.fennmarado_mennyiseg <= 0: continue
-            p = next((x for x in self.termekek if x.id==tet.product_id), None)
-            if not p: continue
-            if v and v not in o.vevo_nev.lower():        continue
-            if c and c not in p.cikkszam.lower():         continue
-            if t and t not in p.megnevezes.lower():       continue
-            if u and u not in " ".join(p.uzem_lanc).lower(): continue
-            rows.append((o,p,tet))
+        # 1) A táblában látható (szűrt, rendezett) sorok
+        rows = [self.model.row(r) for r in self.proxy.source_rows()]
 
         if not rows:
             QMessageBox.information(self, "PDF", "Nincs mit exportálni.")
@@ -355,20 +389,22 @@ class OrderWin(QMainWindow):
         ]
         thead = "".join(f"<th>{h}</th>" for h in headers)
         tbody = ""
-        for o, p, t in rows:
+        for row in rows:
+            (oid, nr, vevo, nev, cikk, qty, egys, fennm, _, _, _, uzem,
+             beerk, hatarido) = row[:14]
             cells = "".join([
-                f"<td>{o.id}</td>",
-                f"<td>{o.megrendeles_szam}</td>",
-                f"<td>{o.vevo_nev}</td>",
-                f"<td>{p.megnevezes}</td>",
-                f"<td>{p.cikkszam}</td>",
-                f"<td>{t.qty:g}</td>",
-                f"<td>{p.mennyisegi_egyseg}</td>",
-                f"<td>{t.fennmarado_mennyiseg:g}</td>",
-                f"<td>{p.mennyisegi_egyseg}</td>",
-                f"<td>{', '.join(p.uzem_lanc)}</td>",
-                f"<td>{o.beerkezes}</td>",
-                f"<td>{o.szall_hatarido}</td>",
+                f"<td>{oid}</td>",
+                f"<td>{nr}</td>",
+                f"<td>{vevo}</td>",
+                f"<td>{nev}</td>",
+                f"<td>{cikk}</td>",
+                f"<td>{qty:g}</td>",
+                f"<td>{egys}</td>",
+                f"<td>{fennm:g}</td>",
+                f"<td>{egys}</td>",
+                f"<td>{', '.join(uzem)}</td>",
+                f"<td>{beerk}</td>",
+                f"<td>{hatarido}</td>",
             ])
             tbody += f"<tr>{cells}</tr>"
 
@@ -380,8 +416,7 @@ class OrderWin(QMainWindow):
         """
 
         # 4) Jinja2 render és PDF
-        env  = Environment(loader=FileSystemLoader(self.template_dir))
-        tmpl = env.get_template("base.html")
+        tmpl = rendering.get_template("base.html", self.template_dir)
         logo_uri = Path(BASE_DIR, "logo.png").absolute().as_uri()
         html = tmpl.render(
             logo_path=logo_uri,
@@ -391,7 +426,7 @@ class OrderWin(QMainWindow):
         )
 
         try:
-            HTML(string=html).write_pdf(path)
+            rendering.write_pdf(html, path)
             QMessageBox.information(self, "PDF", f"Sikeresen elmentve:\n{path}")
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{e}")
@@ -418,15 +453,16 @@ class OrderDialog(QDialog):
         lay = QVBoxLayout(self)
 
         sf = QHBoxLayout()
+        self._filter_later = Debouncer(self._filter, parent=self)
         self.le_v = QLineEdit()
         self.le_v.setPlaceholderText("Vevő")
-        self.le_v.textChanged.connect(self._filter)
+        self.le_v.textChanged.connect(self._filter_later)
         self.le_c = QLineEdit()
         self.le_c.setPlaceholderText("Cikkszám")
-        self.le_c.textChanged.connect(self._filter)
+        self.le_c.textChanged.connect(self._filter_later)
         self.le_t = QLineEdit()
         self.le_t.setPlaceholderText("Termék")
-        self.le_t.textChanged.connect(self._filter)
+        self.le_t.textChanged.connect(self._filter_later)
         self.cb_u = QComboBox()
         self.cb_u.addItem("Mind")
         self.cb_u.addItems(plants(self.prods))
@@ -552,21 +588,15 @@ class OrderDialog(QDialog):
                 self.valuta_label.setText("-")
 
     def _update_form_fields(self, pid: int):
-        conn = sqlite3.connect(PRODUCTS_DB)
-        conn.row_factory = sqlite3.Row
-        rec = conn.execute("""
-            SELECT customer_name, customer_address, customer_tax_number,
-                   shipping_name, shipping_address
-              FROM products WHERE id = ?
-        """, (pid,)).fetchone()
-        conn.close()
+        # a vevői/szállítási adatok a már betöltött katalógusból
+        rec = next((x for x in self.prods if x.id == pid), None)
         if not rec:
             return
-        self.le_vevo_nev.setText(rec["customer_name"] or "")
-        self.le_vevo_cim.setPlainText(rec["customer_address"] or "")
-        self.le_vevo_adoszam.setText(rec["customer_tax_number"] or "")
-        self.le_szallitasi_nev.setText(rec["shipping_name"] or "")
-        self.le_szallitasi_cim.setPlainText(rec["shipping_address"] or "")
+        self.le_vevo_nev.setText(rec.customer_name or "")
+        self.le_vevo_cim.setPlainText(rec.customer_address or "")
+        self.le_vevo_adoszam.setText(rec.customer_tax_number or "")
+        self.le_szallitasi_nev.setText(rec.shipping_name or "")
+        self.le_szallitasi_cim.setPlainText(rec.shipping_address or "")
 
     def _clear_form_fields(self):
         self.le_vevo_nev.clear()
@@ -1,28 +1,67 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 #
-# Dr. Köcher Kft. – Címkenyomtatás két címke A4-en (nyitott tételek)
+# Dr. Köcher Kft. – Címkenyomtatás nyitott tételekre (dobozonként egy címke, két címke A4-en)
 
 import sys
 import os
-from datetime import datetime
-from PyQt5.QtCore import Qt, QSortFilterProxyModel, QUrl
-from PyQt5.QtGui import QFont, QPixmap, QStandardItemModel, QStandardItem
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QTableView, QLineEdit, QPushButton, QHeaderView, QFrame,
-    QFileDialog, QInputDialog, QMessageBox, QComboBox
+    QFileDialog, QMessageBox, QComboBox, QDialog, QDialogButtonBox, QCheckBox
 )
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
 
 # projekt gyökér eléréséhez
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from modules.product_module.product_module import osszes_termek
+from modules.service                       import backend
 from modules.order_module.order_db         import OrderDB
+from modules.order_module                  import labels
+from modules.shared                        import cancel, events
+from gui.async_loader                      import AsyncLoader, LoadingLabel
+from gui.event_relay                       import EventRelay
+from gui.table_model                       import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui                                   import asset_cache
+
+HEADERS = ["Rend.szám", "Vevő", "Termék", "Cikkszám", "Fennm.", "Egység",
+           "Beérk.", "Határidő", "Címzett", "Cím"]
+COL_REMAINING = 4
+
+
+def label_row(r: dict) -> tuple:
+    return (
+        r["order_number"] or "", r["vevo_nev"] or "", r["product_name"] or "",
+        r["item_number"] or "", r["remaining_qty"], r["unit"] or "",
+        r["beerkezes"] or "", r["szall_hatarido"] or "",
+        r["shp_name"] or "", r["shp_address"] or "",
+    )
+
+
+def load_label_items(order_id: int = None):
+    """
+    Munkaszálon (közvetlen módban saját kapcsolattal): a nyitott tételek
+    (order_id, product_id) szerint és a táblasoraik.
+    """
+    db = backend.order_items()
+    if isinstance(db, OrderDB):
+        try:
+            with cancel.watch(db.conn, db.prod_conn, db.deliv_conn):
+                all_items = db.get_all_order_items(order_id)
+        finally:
+            db.close()
+    else:
+        all_items = db.get_all_order_items(order_id)
+    items = {(r["order_id"], r["product_id"]): r for r in all_items if r["remaining_qty"] > 0}
+    return items, [label_row(r) for r in items.values()]
+
+
+def load_label_data():
+    """Munkaszálon: termékek és nyitott rendeléstételek."""
+    return (backend.products().termek_katalogus(),) + load_label_items()
 
 
 class OrderLabelViewer(QMainWindow):
@@ -31,10 +70,16 @@ class OrderLabelViewer(QMainWindow):
         self.setWindowTitle("Dr. Köcher Kft. – Címkenyomtatás")
         self.resize(1180, 740)
 
-        self.order_db = OrderDB()
-        self.products = osszes_termek()
+        self.products = []
+        self.items    = {}   # (order_id, product_id) → nyitott tétel
 
         self._build_ui()
+        self.loader = AsyncLoader(self, self.loading_lbl)
+        self.relay = EventRelay(self, {
+            events.OrderItemChanged: self._on_item_changed,
+            events.OrderChanged:     self._on_order_changed,
+            events.OrderDeleted:     self._on_order_deleted,
+        })
         self._load_table()
 
     def _build_ui(self):
@@ -49,7 +94,7 @@ class OrderLabelViewer(QMainWindow):
         logo_path = os.path.join(BASE_DIR, "logo.png")
         if os.path.exists(logo_path):
             logo_lbl = QLabel()
-            pix = QPixmap(logo_path).scaledToHeight(55, Qt.SmoothTransformation)
+            pix = asset_cache.shared().scaled_to_height(logo_path, 55)
             logo_lbl.setPixmap(pix)
             header.addWidget(logo_lbl)
         header.addWidget(QLabel(
@@ -64,7 +109,9 @@ class OrderLabelViewer(QMainWindow):
         self.lang_combo.addItem("Magyar címke", "hu")
         self.lang_combo.addItem("Német címke", "de")
         header.addWidget(self.lang_combo)
-        
+        self.loading_lbl = LoadingLabel()
+        header.addWidget(self.loading_lbl)
+
         main.addLayout(header)
 
         line = QFrame()
@@ -76,30 +123,30 @@ class OrderLabelViewer(QMainWindow):
         filter_bar = QHBoxLayout()
         filter_bar.addWidget(QLabel("Szűrés:"))
         self.filter_inputs = {}
+        self._filter_later = Debouncer(self._apply_filter, parent=self)
         for label, col in [("Vevő", 1), ("Termék", 2), ("Cikkszám", 3), ("Határidő", 7)]:
             le = QLineEdit()
             le.setPlaceholderText(label)
             le.setFixedWidth(160)
-            le.textChanged.connect(self._apply_filter)
+            le.textChanged.connect(self._filter_later)
             filter_bar.addWidget(le)
             self.filter_inputs[col] = le
         filter_bar.addStretch()
         main.addLayout(filter_bar)
 
         # modell és proxy
-        self.model = QStandardItemModel(0, 10, self)
-        self.model.setHorizontalHeaderLabels([
-            "Rend.szám", "Vevő", "Termék", "Cikkszám", "Fennm.", "Egység",
-            "Beérk.", "Határidő", "Címzett", "Cím"
-        ])
-        self.proxy = QSortFilterProxyModel(self)
+        self.model = RowTableModel(
+            HEADERS, self,
+            formats={COL_REMAINING: lambda v: f"{v:g}"},
+            align={c: Qt.AlignCenter for c in range(len(HEADERS))},
+        )
+        self.proxy = RowFilterProxy(self)
         self.proxy.setSourceModel(self.model)
-        self.proxy.setFilterKeyColumn(-1)
-        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
 
         # táblázat nézet
         self.view = QTableView()
         self.view.setModel(self.proxy)
+        configure_view(self.view, sorting=False)
         self.view.setSelectionBehavior(QTableView.SelectRows)
         self.view.setAlternatingRowColors(True)
         self.view.setStyleSheet("alternate-background-color:#f9f9f9; background:white;")
@@ -118,118 +165,177 @@ class OrderLabelViewer(QMainWindow):
         main.addLayout(btnbar)
 
     def _load_table(self):
-        self.model.setRowCount(0)
-        items = self.order_db.get_all_order_items()
-        for row in items:
-            if row["remaining_qty"] <= 0:
-                continue
-            vals = [
-                row["order_number"] or "",
-                row["vevo_nev"] or "",
-                row["product_name"] or "",
-                row["item_number"] or "",
-                f"{row['remaining_qty']:g}",
-                row["unit"] or "",
-                row["beerkezes"] or "",
-                row["szall_hatarido"] or "",
-                row["shp_name"] or "",
-                row["shp_address"] or ""
-            ]
-            items = [QStandardItem(str(v)) for v in vals]
-            for it in items:
-                it.setEditable(False)
-                it.setTextAlignment(Qt.AlignCenter)
-            self.model.appendRow(items)
+        self.loader.load("items", load_label_data, self._fill_table,
+                         label="Címketételek betöltése")
+
+    def _fill_table(self, data):
+        self.products, self.items, rows = data
+        self.model.set_rows(rows, keys=list(self.items))
+
+    # --- változásesemények: csak az érintett sorok ---
+    def _on_item_changed(self, ev):
+        key = (ev.order_id, ev.product_id)
+        item = self.items.get(key)
+        if ev.remaining_qty <= 0:
+            self._remove_keys([key])
+        elif item is None:
+            self._on_order_changed(ev)
+        else:
+            item["remaining_qty"] = ev.remaining_qty
+            self.model.upsert(key, label_row(item))
+
+    def _on_order_changed(self, ev):
+        oid = ev.order_id
+        self.loader.load(f"order_{oid}", lambda: load_label_items(oid),
+                         lambda result: self._on_order_loaded(oid, result),
+                         label="Címketételek frissítése")
+
+    def _on_order_loaded(self, order_id, result):
+        items, rows = result
+        self._remove_keys([k for k in self.items if k[0] == order_id and k not in items])
+        for (key, item), row in zip(items.items(), rows):
+            self.items[key] = item
+            self.model.upsert(key, row)
+
+    def _on_order_deleted(self, ev):
+        self._remove_keys([k for k in self.items if k[0] == ev.order_id])
+
+    def _remove_keys(self, keys):
+        for k in keys:
+            self.items.pop(k, None)
+        self.model.remove_keys(keys)
 
     def _apply_filter(self):
-        class RowFilter(QSortFilterProxyModel):
-            def __init__(self, outer):
-                super().__init__(outer)
-                self.outer = outer
-
-            def filterAcceptsRow(self, source_row, source_parent):
-                for col, le in self.outer.filter_inputs.items():
-                    txt = le.text().strip().lower()
-                    if txt:
-                        idx = self.sourceModel().index(source_row, col, source_parent)
-                        cell = self.sourceModel().data(idx)
-                        if not cell or txt not in cell.lower():
-                            return False
-                return True
-
-        proxy = RowFilter(self)
-        proxy.setSourceModel(self.model)
-        proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
-        self.view.setModel(proxy)
-        self.proxy = proxy
+        needles = [(col, le.text().strip().lower()) for col, le in self.filter_inputs.items()]
+        needles = [(col, txt) for col, txt in needles if txt]
+        if not needles:
+            self.proxy.set_predicate(None)
+            return
+        self.proxy.set_predicate(lambda row: all(txt in str(row[col]).lower() for col, txt in needles))
+
+    def _selected_keys(self) -> list:
+        keys = [self.proxy.data(idx, Qt.UserRole) for idx in self.view.selectionModel().selectedRows()]
+        if not keys and self.proxy.rowCount() > 0:
+            keys = [self.proxy.data(self.proxy.index(0, 0), Qt.UserRole)]
+        return [k for k in keys if k in self.items]
 
     def _export_pdf(self):
-        selected_rows = [idx.row() for idx in self.view.selectionModel().selectedRows()]
-        if not selected_rows and self.proxy.rowCount() > 0:
-            selected_rows = [0]
-        if not selected_rows:
+        keys = self._selected_keys()
+        if not keys:
             QMessageBox.information(self, "Figyelem", "Nincs kiválasztott tétel.")
             return
+        products = {p.id: p for p in self.products}
+        dlg = LabelJobDialog([self.items[k] for k in keys], labels.box_sizes(), self)
+        if dlg.exec_() != QDialog.Accepted:
+            return
+        if dlg.remember.isChecked():
+            labels.save_box_sizes(dlg.box_sizes())
 
-        # max 2 címke, ha csak egy sor, akkor a második ugyanaz lesz
-        if len(selected_rows) == 1:
-            selected_rows.append(selected_rows[0])
-
-        labels = []
-        today = datetime.now().strftime("%Y.%m.%d")
-        for r in selected_rows[:2]:
-            rec = [self.proxy.data(self.proxy.index(r, c)) for c in range(10)]
-            qty, ok = QInputDialog.getInt(
-                self, f"Mennyiség megadása ({rec[2]})",
-                "Add meg a mennyiséget a címkéhez:", 1, 1
-            )
-            if not ok:
-                return
-            # mennyiségi egység keresése a termékek között cikkszám alapján
-            prod = next((p for p in self.products if p.cikkszam == rec[3]), None)
-            unit = prod.mennyisegi_egyseg if prod else rec[5]
-            felulet = getattr(prod, "felulet", "") if prod else ""
-            cim_country = getattr(prod, "vevo_orszag", "") if prod else ""
-            labels.append({
-                "order_number": rec[0],
-                "vevo": rec[1],
-                "termek": rec[2],
-                "cikkszam": rec[3],
-                "darab": qty,
-                "egyseg": unit,
-                "beerkezes": rec[6],
-                "hatarido": rec[7],
-                "felulet": felulet,
-                "created": today,
-                "cimzett": rec[8],
-                "cim": rec[9],
-                "cim_country": cim_country
-            })
-
-        # sablon betöltése nyelv alapján
-        env = Environment(loader=FileSystemLoader(os.path.join(BASE_DIR, "templates")))
-        lang = self.lang_combo.currentData()
-        if lang == "de":
-            tmpl_name = "label_base_de.html"
-        else:
-            tmpl_name = "label_base.html"
-        tmpl = env.get_template(tmpl_name)
-
-        html = tmpl.render(labels=labels, logo_uri=QUrl.fromLocalFile(os.path.join(BASE_DIR, "logo.png")).toString())
-
-        # PDF mentése
         path, _ = QFileDialog.getSaveFileName(self, "Címkék PDF mentése", "labels.pdf", "PDF fájl (*.pdf)")
         if not path:
             return
         if not path.lower().endswith(".pdf"):
             path += ".pdf"
-        try:
-            HTML(string=html).write_pdf(path)
-            # Windows-on megnyitás automatikusan
-            if sys.platform.startswith("win"):
-                os.startfile(path)
-        except Exception as e:
-            QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{e}")
+
+        lines = []
+        for key, qty, per_box in dlg.quantities():
+            item = self.items[key]
+            prod = products.get(item["product_id"])
+            lines.append(labels.LabelLine(
+                order_number=item["order_number"] or "",
+                vevo=item["vevo_nev"] or "",
+                termek=item["product_name"] or "",
+                cikkszam=item["item_number"] or "",
+                quantity=qty,
+                egyseg=(prod.mennyisegi_egyseg if prod else None) or item["unit"] or "",
+                per_box=per_box,
+                beerkezes=item["beerkezes"] or "",
+                hatarido=item["szall_hatarido"] or "",
+                felulet=prod.felulet if prod else "",
+                cimzett=item["shp_name"] or "",
+                cim=item["shp_address"] or "",
+                cim_country=prod.shipping_country if prod else "",
+            ))
+        lang = self.lang_combo.currentData()
+        logo_uri = QUrl.fromLocalFile(os.path.join(BASE_DIR, "logo.png")).toString()
+        # a renderelés háttérszálon fut, az ablak közben használható
+        self.loader.load("pdf", lambda: labels.write_labels_pdf(lines, path, lang, logo_uri),
+                         lambda n: self._pdf_done(path, n),
+                         lambda msg: QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{msg}"),
+                         label="Címkék PDF generálása")
+
+    def _pdf_done(self, path: str, count: int):
+        self.statusBar().showMessage(f"{count} címke mentve: {path}", 8000)
+        # Windows-on megnyitás automatikusan
+        if sys.platform.startswith("win"):
+            os.startfile(path)
+
+
+class LabelJobDialog(QDialog):
+    """Címkézendő tételek: mennyiség és doboz mennyiség soronként, a címkék száma élőben."""
+
+    COL_QTY, COL_PER_BOX, COL_COUNT = 4, 5, 6
+
+    def __init__(self, items: list, box_sizes: dict, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Címkék – mennyiségek")
+        self.resize(820, 420)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("A mennyiség és a db/doboz szerkeszthető (0: egy címke a teljes mennyiségre)."))
+
+        self.model = RowTableModel(
+            ["Rend.szám", "Termék", "Cikkszám", "Fennm.", "Mennyiség", "Db/doboz", "Címkék"], self,
+            formats={c: (lambda v: f"{v:g}") for c in (3, 4, 5)},
+            align={c: Qt.AlignCenter for c in range(7)},
+            editable=(self.COL_QTY, self.COL_PER_BOX),
+        )
+        rows, keys = [], []
+        for it in items:
+            qty = float(it["remaining_qty"])
+            per_box = float(box_sizes.get(it["item_number"] or "", 0.0))
+            rows.append((it["order_number"] or "", it["product_name"] or "", it["item_number"] or "",
+                         qty, qty, per_box, labels.label_count(qty, per_box)))
+            keys.append((it["order_id"], it["product_id"]))
+        self.model.set_rows(rows, keys=keys)
+        self.model.dataChanged.connect(self._recount)
+
+        view = QTableView()
+        view.setModel(self.model)
+        view.verticalHeader().hide()
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(view, stretch=1)
+
+        self.total_lbl = QLabel()
+        layout.addWidget(self.total_lbl)
+        self.remember = QCheckBox("Doboz mennyiségek megjegyzése cikkszámonként")
+        self.remember.setChecked(True)
+        layout.addWidget(self.remember)
+        btns = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+        self._update_total()
+
+    def _recount(self, top_left, bottom_right):
+        for r in range(top_left.row(), bottom_right.row() + 1):
+            row = self.model.row(r)
+            count = labels.label_count(row[self.COL_QTY], row[self.COL_PER_BOX])
+            if row[self.COL_COUNT] != count:
+                self.model.update_row(r, row[:self.COL_COUNT] + (count,))
+        self._update_total()
+
+    def _update_total(self):
+        total = sum(row[self.COL_COUNT] for row in self.model.rows())
+        pages = -(-total // labels.LABELS_PER_SHEET)
+        self.total_lbl.setText(f"<b>Összesen: {total} címke, {pages} oldal</b>")
+
+    def quantities(self) -> list:
+        """[(kulcs, mennyiség, db/doboz)] a nem nulla mennyiségű sorokra."""
+        return [(key, row[self.COL_QTY], row[self.COL_PER_BOX] or None)
+                for key, row in zip(self.model.keys(), self.model.rows()) if row[self.COL_QTY] > 0]
+
+    def box_sizes(self) -> dict:
+        return {row[2]: row[self.COL_PER_BOX] for row in self.model.rows() if row[2]}
 
 
 def main():
@@ -1,12 +1,18 @@
 # gui/pdf_gui.py
 
 import os
+import sys
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QLabel,
     QFileDialog, QMessageBox
 )
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+
+# sys.path patch a projekt gyökérre
+project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+from modules.shared.report_writer import Column, Report, Section, write_report
 
 
 class PDFGui(QWidget):
@@ -92,36 +98,21 @@ class PDFGui(QWidget):
             return
 
         try:
-            html = self._render_html(self.data_rows)
-            HTML(string=html).write_pdf(self.output_path)
+            # hosszú táblánál darabolva, párhuzamos folyamatokban renderel
+            write_report(self._report(self.data_rows), self.output_path, "pdf", base_url=project_dir)
             QMessageBox.information(self, "Kész", f"PDF elkészült:\n{self.output_path}")
         except Exception as e:
             QMessageBox.critical(self, "Hiba", f"PDF generálás sikertelen:\n{e}")
 
-    def _render_html(self, rows):
-        # Betöltjük a sablont
-        env = Environment(loader=FileSystemLoader("templates"))
-        tmpl = env.get_template("base.html")
-
-        # Táblázat HTML generálása
-        headers = rows[0].keys() if rows else []
-        thead = "".join(f"<th>{h}</th>" for h in headers)
-        tbody = ""
-        for row in rows:
-            cells = "".join(f"<td>{row.get(h, '')}</td>" for h in headers)
-            tbody += f"<tr>{cells}</tr>"
-
-        table_html = f"""
-        <table>
-          <thead><tr>{thead}</tr></thead>
-          <tbody>{tbody}</tbody>
-        </table>
-        """
-
-        return tmpl.render(
-            logo_path="static/logo.png",
-            report_title="Automatikus Jelentés",
-            content_table=table_html
+    def _report(self, rows):
+        # oszlopok az első sor kulcsaiból, a sorok lustán alakulnak át
+        headers = list(rows[0].keys()) if rows else []
+        return Report(
+            "Automatikus Jelentés",
+            [Section("", [Column(h) for h in headers],
+                     (tuple(row.get(h, "") for h in headers) for row in rows))],
+            company="",
+            logo_path=os.path.join(project_dir, "logo.png"),
         )
 
 
@@ -14,25 +14,23 @@ import textwrap as _tw
 os.environ["QT_OPENGL"] = "software"  # OpenGL-konfliktusok elkerülése
 
 from datetime import date
-from pathlib import Path
 from typing import List
 
-import pandas as pd
-from PyQt5.QtCore  import Qt, QEvent, QSignalBlocker, QDate
-from PyQt5.QtGui   import QPixmap, QPalette, QColor
+from PyQt5.QtCore  import Qt, QEvent, QSignalBlocker, QDate, QSize
+from PyQt5.QtGui   import QPalette, QColor
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QHBoxLayout,
     QFrame, QGroupBox, QLineEdit, QPushButton, QComboBox, QFileDialog, QMessageBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QDialog, QFormLayout,
+    QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QDialog, QFormLayout,
     QSpinBox, QDoubleSpinBox, QTabWidget, QToolTip, QTextEdit,
     QDateEdit, QDialogButtonBox, QScrollArea
 )
 
-from modules.product_module.product_module import (
-    Termek, ArSor,
-    osszes_termek, hozzaad_termek, frissit_termek, torol_termek,
-    aktualis_ar
-)
+from modules.product_module.product_module import Termek, ArSor, aktualis_ar
+from modules.service import backend
+from gui.async_loader import AsyncLoader, LoadingLabel
+from gui.table_model import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui import asset_cache
 
 IMG_MAX = 300  # Tooltip max méret px
 NO_LOAD_OPTION = "--- Nincs betöltés ---"
@@ -57,14 +55,40 @@ def num(v, dec=3):
 def plants(lst):
     return sorted({p for t in lst for p in t.uzem_lanc})
 
+def joined(v):
+    return ", ".join(v)
+
+# táblasor oszlopai (a sor tuple indexei)
+COL_VEVO, COL_NEV, COL_CIKK, COL_UZEM, COL_FOTO = 0, 1, 2, 10, 16
+
+def product_row(t: Termek) -> tuple:
+    """Egy termék nyers táblasora; a formázás a modellben, megjelenítéskor történik."""
+    ar, val = aktualis_ar(t) or (0, "")
+    return (
+        t.vevo_nev, t.megnevezes, t.cikkszam, t.mennyisegi_egyseg, t.felulet,
+        tuple(t.alapanyagok), ar, val, t.suly, t.suly_mertekegyseg,
+        tuple(t.uzem_lanc), t.feszekszam, t.csokosuly, t.csokosuly_mertekegyseg,
+        getattr(t, "shipping_name", ""), getattr(t, "shipping_address", ""), t.foto
+    )
+
+def load_products():
+    """Munkaszálon: termékek és a hozzájuk tartozó táblasorok."""
+    products = backend.products().termek_katalogus()
+    return products, [product_row(t) for t in products]
+
 class ProductWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Dr. Köcher Kft. – Termékkezelő")
         self.resize(1580, 800)
         self.products: List[Termek] = []
+        self.missing_photos: set = set()   # a bélyegkép futás szerint nem létező fotók
         self._build_ui()
-        self._load_products()  # Első adatbetöltés
+        self.loader = AsyncLoader(self, self.loading_lbl)
+        # a bélyegképek csendben készülnek: nincs jelző, homokóra
+        self.thumb_loader = AsyncLoader(self, busy_cursor=False)
+        self._thumb_photos = frozenset()   # a legutóbb feldolgozott fotók
+        self._load_products()  # Első adatbetöltés (háttérben)
 
     def _build_ui(self):
         cw = QWidget()
@@ -86,7 +110,7 @@ class ProductWindow(QMainWindow):
 
         logo_path = os.path.join(base_dir, "logo.png")
         if os.path.exists(logo_path):
-            pix = QPixmap(logo_path).scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            pix = asset_cache.shared().pixmap(logo_path, QSize(80, 80))
             header_layout.addWidget(QLabel(pixmap=pix))
 
         col = QVBoxLayout()
@@ -96,6 +120,9 @@ class ProductWindow(QMainWindow):
 
         header_layout.addStretch()
 
+        self.loading_lbl = LoadingLabel()
+        header_layout.addWidget(self.loading_lbl)
+
         btn_refresh = QPushButton("Adatbázis frissítése")
         btn_refresh.clicked.connect(self._on_refresh_database)
         header_layout.addWidget(btn_refresh)
@@ -114,15 +141,54 @@ class ProductWindow(QMainWindow):
         """)
 
     def _on_refresh_database(self):
+        self._load_products(lambda: QMessageBox.information(
+            self, "Frissítés", "Adatbázis sikeresen frissítve!"))
+
+    def reactivate(self):
+        """Újra megnyitáskor (WindowRegistry): a termékek háttérben frissülnek, a nézet állapota marad."""
         self._load_products()
-        QMessageBox.information(self, "Frissítés", "Adatbázis sikeresen frissítve!")
 
-    def _load_products(self):
-        try:
-            self.products = osszes_termek()
-            self._refresh()
-        except Exception as e:
-            QMessageBox.critical(self, "Hiba", f"Nem sikerült betölteni az adatbázist:\n{e}")
+    def _load_products(self, on_loaded=None):
+        """A terméklista a szálkészletben töltődik; megérkezéskor frissül a tábla."""
+        def done(result):
+            self.products, rows = result
+            self._refresh(rows)
+            self._pregenerate_thumbnails()
+            if on_loaded:
+                on_loaded()
+
+        self.loader.load(
+            "products", load_products, done,
+            on_error=lambda msg: QMessageBox.critical(
+                self, "Hiba", f"Nem sikerült betölteni az adatbázist:\n{msg}"),
+            label="Termékek betöltése",
+        )
+
+    def _pregenerate_thumbnails(self):
+        """
+        A katalógus (és import) után a fotók bélyegképei háttérben, folyamatokban
+        készülnek; ha a fotók köre nem változott (pl. újra megnyitás), nem indul újra.
+        """
+        photos = frozenset(t.foto for t in self.products if clean(t.foto))
+        if not photos or photos == self._thumb_photos:
+            return
+        self._thumb_photos = photos
+
+        def done(result):
+            self.missing_photos = set(result["missing"])
+            if result["missing"] or result["failed"]:
+                self.statusBar().showMessage(
+                    f"Termékfotók: {len(result['missing'])} hiányzik, "
+                    f"{len(result['failed'])} nem olvasható", 10000)
+
+        def failed(msg):
+            self._thumb_photos = frozenset()   # a következő betöltés újrapróbálja
+            self.statusBar().showMessage(f"Bélyegkép hiba: {msg}", 10000)
+
+        self.thumb_loader.load(
+            "thumbnails", lambda: asset_cache.pregenerate(sorted(photos)), done,
+            on_error=failed, label="Bélyegképek készítése",
+        )
 
     def _search(self, box):
         grp = QGroupBox("Keresés")
@@ -130,8 +196,9 @@ class ProductWindow(QMainWindow):
         l.setSpacing(10)
         self.en, self.ec, self.ev = QLineEdit(), QLineEdit(), QLineEdit()
         self.cb = QComboBox()
+        self._filter_later = Debouncer(self._filter, parent=self)
         for e in (self.en, self.ec, self.ev):
-            e.textChanged.connect(self._filter)
+            e.textChanged.connect(self._filter_later)
         self.cb.currentTextChanged.connect(self._filter)
 
         l.addWidget(QLabel("Megnevezés:")); l.addWidget(self.en)
@@ -150,9 +217,18 @@ class ProductWindow(QMainWindow):
             "Ár", "Valuta", "Súly", "Egys.", "Üzemlánc", "Fészkek",
             "Csokosúly", "Cs.egys.", "Szállítási név", "Szállítási cím", "_foto"
         ]
-        self.tbl = QTableWidget(0, len(headers))
-        self.tbl.setHorizontalHeaderLabels(headers)
-        self.tbl.setColumnHidden(len(headers) - 1, True)
+        formats = {c: clean for c in range(len(headers))}
+        formats.update({
+            COL_NEV: wrap, 5: joined, 6: lambda v: num(v, 2), 8: num,
+            COL_UZEM: joined, 11: str, 12: num,
+        })
+        self.model = RowTableModel(headers, self, formats=formats)
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        configure_view(self.tbl, row_height=50)
+        self.tbl.setColumnHidden(COL_FOTO, True)
 
         h = self.tbl.horizontalHeader()
         h.setSectionResizeMode(QHeaderView.Interactive)
@@ -161,8 +237,8 @@ class ProductWindow(QMainWindow):
         self.tbl.setAlternatingRowColors(True)
         self.tbl.setWordWrap(True)
         self.tbl.verticalHeader().setVisible(False)
-        self.tbl.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tbl.itemDoubleClicked.connect(self._edit)
+        self.tbl.setSelectionBehavior(QTableView.SelectRows)
+        self.tbl.doubleClicked.connect(self._edit)
         self.tbl.viewport().installEventFilter(self)
         box.addWidget(self.tbl)
 
@@ -180,84 +256,59 @@ class ProductWindow(QMainWindow):
         if obj is self.tbl.viewport() and event.type() == QEvent.ToolTip:
             idx = self.tbl.indexAt(event.pos())
             if idx.isValid():
-                foto = self.tbl.item(idx.row(), self.tbl.columnCount() - 1).text()
-                if foto and Path(foto).exists():
-                    img = QPixmap(foto)
-                    if not img.isNull():
-                        if img.width() > IMG_MAX or img.height() > IMG_MAX:
-                            img = img.scaled(IMG_MAX, IMG_MAX, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        html = f"<img src='{foto}' width='{img.width()}'/>"
+                foto = clean(self.model.row(self.proxy.source_row(idx.row()))[COL_FOTO])
+                if foto and asset_cache.photo_path(foto) not in self.missing_photos:
+                    # a tooltip a lemezen tárolt bélyegképből, nem a teljes fotóból
+                    thumb = asset_cache.shared().thumbnail_path(foto)
+                    img = asset_cache.shared().pixmap(thumb, QSize(IMG_MAX, IMG_MAX)) if thumb else None
+                    if img is not None and not img.isNull():
+                        html = f"<img src='{thumb}' width='{img.width()}'/>"
                         QToolTip.showText(event.globalPos(), html,
-                            self.tbl, self.tbl.visualItemRect(self.tbl.item(idx.row(), idx.column())))
+                            self.tbl, self.tbl.visualRect(idx))
                         return True
             QToolTip.hideText()
         return super().eventFilter(obj, event)
 
-    def _refresh(self, rows: List[Termek] | None = None):
-        full = rows is None
-        rows = rows or self.products
-        self.tbl.setRowCount(0)
-        for t in rows:
-            ar, val = aktualis_ar(t) or (0, "")
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-            cells = [
-                clean(t.vevo_nev),
-                wrap(t.megnevezes),
-                clean(t.cikkszam),
-                clean(t.mennyisegi_egyseg),
-                clean(t.felulet),
-                ", ".join(t.alapanyagok),
-                num(ar, 2),
-                clean(val),
-                num(t.suly, 3),
-                clean(t.suly_mertekegyseg),
-                ", ".join(t.uzem_lanc),
-                str(t.feszekszam),
-                num(t.csokosuly, 3),
-                clean(t.csokosuly_mertekegyseg),
-                clean(getattr(t, "shipping_name", "")),
-                clean(getattr(t, "shipping_address", "")),
-                t.foto
-            ]
-            for c, v in enumerate(cells):
-                it = QTableWidgetItem(v)
-                it.setFlags(it.flags() ^ Qt.ItemIsEditable)
-                if c == 0:
-                    it.setData(Qt.UserRole, t.id)
-                self.tbl.setItem(r, c, it)
-            self.tbl.setRowHeight(r,
-                min(150, max(50, 20 * math.ceil(len(str(t.megnevezes)) / 35))))
-        if full:
-            with QSignalBlocker(self.cb):
-                self.cb.clear()
-                self.cb.addItem("Mind")
-                self.cb.addItems(plants(self.products))
+    def _refresh(self, rows=None):
+        """A teljes terméklista a modellbe (egy reset); a szűrést a proxy végzi."""
+        if rows is None:
+            rows = [product_row(t) for t in self.products]
+        self.model.set_rows(rows, keys=[t.id for t in self.products])
+        with QSignalBlocker(self.cb):
+            sel = self.cb.currentText()
+            self.cb.clear()
+            self.cb.addItem("Mind")
+            self.cb.addItems(plants(self.products))
+            self.cb.setCurrentText(sel)
+        self._filter()
 
     def _filter(self):
         n, c, v, p = (self.en.text().lower(), self.ec.text().lower(),
                       self.ev.text().lower(), self.cb.currentText())
-        rows = [
-            t for t in self.products
-            if (not n or n in t.megnevezes.lower())
-            and (not c or c in t.cikkszam.lower())
-            and (not v or v in t.vevo_nev.lower())
-            and (p == "Mind" or p in t.uzem_lanc)
-        ]
-        self._refresh(rows)
+        if not (n or c or v) and p in ("Mind", ""):
+            self.proxy.set_predicate(None)
+            return
+        self.proxy.set_predicate(lambda row: (
+            (not n or n in clean(row[COL_NEV]).lower())
+            and (not c or c in clean(row[COL_CIKK]).lower())
+            and (not v or v in clean(row[COL_VEVO]).lower())
+            and (p in ("Mind", "") or p in row[COL_UZEM])
+        ))
 
     def _clear(self):
         for w in (self.en, self.ec, self.ev):
-            w.clear()
-        self.cb.setCurrentText("Mind")
-        self._refresh()
+            with QSignalBlocker(w):
+                w.clear()
+        with QSignalBlocker(self.cb):
+            self.cb.setCurrentText("Mind")
+        self._filter()
 
     def _sel_id(self):
-        r = self.tbl.currentRow()
-        if r < 0:
+        idx = self.tbl.currentIndex()
+        if not idx.isValid():
             QMessageBox.warning(self, "Figyelem", "Válassz egy sort!")
             return None
-        return self.tbl.item(r, 0).data(Qt.UserRole)
+        return idx.data(Qt.UserRole)
 
     def _new(self):
         dlg = ProductDialog(self)
@@ -266,7 +317,7 @@ class ProductWindow(QMainWindow):
                 max_id = max((p.id for p in self.products), default=0)
                 dlg.result.id = max_id + 1
             try:
-                hozzaad_termek(dlg.result)
+                backend.products().hozzaad_termek(dlg.result)
             except Exception as e:
                 QMessageBox.critical(self, "Hiba",
                     f"Hiba a termék hozzáadásakor:\n{e}")
@@ -281,7 +332,7 @@ class ProductWindow(QMainWindow):
         dlg = ProductDialog(self, prod)
         if dlg.exec_() == QDialog.Accepted:
             try:
-                frissit_termek(dlg.result)
+                backend.products().frissit_termek(dlg.result)
             except Exception as e:
                 QMessageBox.critical(self, "Hiba",
                     f"Hiba a termék frissítésekor:\n{e}")
@@ -294,7 +345,7 @@ class ProductWindow(QMainWindow):
             return
         if QMessageBox.question(self, "Törlés", f"Törlöd ID={pid}?") == QMessageBox.Yes:
             try:
-                torol_termek(pid)
+                backend.products().torol_termek(pid)
             except Exception as e:
                 QMessageBox.critical(self, "Hiba",
                     f"Hiba a termék törlésekor:\n{e}")
@@ -307,6 +358,7 @@ class ProductWindow(QMainWindow):
         if not path:
             return
         try:
+            import pandas as pd   # nehéz import: csak Excel betöltéskor
             df = pd.read_excel(path)
         except Exception as e:
             QMessageBox.critical(self, "Hiba", str(e))
@@ -360,7 +412,7 @@ class ProductWindow(QMainWindow):
                     shipping_name=cell(row, mp.get("shipping_name", NO_LOAD_OPTION)),
                     shipping_address=cell(row, mp.get("shipping_address", NO_LOAD_OPTION))
                 )
-                hozzaad_termek(t)
+                backend.products().hozzaad_termek(t)
                 next_id += 1
             except Exception as ex:
                 print(f"Hiba az importálás során: {ex}")
@@ -588,7 +640,7 @@ class AddPriceDialog(QDialog):
 
 
 class MappingDialog(QDialog):
-    def __init__(self, parent, dataframe: pd.DataFrame):
+    def __init__(self, parent, dataframe: "pd.DataFrame"):
         super().__init__(parent)
         self.setWindowTitle("Oszlopok hozzárendelése")
         self.df = dataframe
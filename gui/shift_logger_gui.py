@@ -1,14 +1,12 @@
 import sys
 import os
-import sqlite3
 from datetime import datetime
 from pathlib import Path
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QComboBox, QDateEdit, QSpinBox, QPushButton,
-    QMessageBox, QLineEdit, QDoubleSpinBox, QFrame
+    QMessageBox, QLineEdit, QDoubleSpinBox, QFrame, QFileDialog
 )
 
 # sys.path patch a projekt gyökérre
@@ -17,7 +15,9 @@ project_dir = os.path.abspath(os.path.join(this_dir, os.pardir))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-from modules.manufacturing_module.inventory_db import InventoryDB
+from modules.manufacturing_module.inventory_db import MACHINES
+from modules.service import backend
+from gui import asset_cache
 
 class ShiftLoggerWindow(QMainWindow):
     def __init__(self):
@@ -25,10 +25,9 @@ class ShiftLoggerWindow(QMainWindow):
         self.setWindowTitle("Dr. Köcher Kft. – Műszaknapló | Öntöde Üzem")
         self.resize(680, 720)
 
-        self.inv_db = InventoryDB()
-        self.prod_db = os.path.join(
-            project_dir, "modules", "product_module", "products.db"
-        )
+        self.inv_db = backend.inventory()
+        # termékadatok gyorsítótára (id → Termek), hogy a gépváltás ne kérdezzen le újra
+        self._prod_cache = {}
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -41,7 +40,7 @@ class ShiftLoggerWindow(QMainWindow):
         logo_path = os.path.join(project_dir, "logo.png")
         if os.path.exists(logo_path):
             lbl_logo = QLabel()
-            pix = QPixmap(logo_path).scaledToHeight(38, Qt.SmoothTransformation)
+            pix = asset_cache.shared().scaled_to_height(logo_path, 38)
             lbl_logo.setPixmap(pix)
             header.addWidget(lbl_logo)
         company_title = QLabel(
@@ -63,14 +62,9 @@ class ShiftLoggerWindow(QMainWindow):
         h1 = QHBoxLayout()
         h1.addWidget(QLabel("Gép:"))
         self.machine_cb = QComboBox()
-        machines = [
-            "OMS 950T öntőgép",
-            "OMS 500T öntőgép",
-            "CLOO 400T öntőgép",
-            "CLOO 250T függőleges öntőgép"
-        ]
-        for m in machines:
-            if self.inv_db.has_active_job(m):
+        active = self.inv_db.active_jobs()
+        for m in MACHINES:
+            if m in active:
                 self.machine_cb.addItem(m)
         self.machine_cb.currentIndexChanged.connect(self.on_machine_changed)
         h1.addWidget(self.machine_cb)
@@ -183,7 +177,14 @@ class ShiftLoggerWindow(QMainWindow):
         # Műszak rögzítése gomb
         btn = QPushButton("Műszak rögzítése")
         btn.clicked.connect(self.save_shift)
-        layout.addWidget(btn, alignment=Qt.AlignCenter)
+        btn_import = QPushButton("Számláló export betöltése (CSV)…")
+        btn_import.clicked.connect(self.import_counters)
+        hb = QHBoxLayout()
+        hb.addStretch()
+        hb.addWidget(btn)
+        hb.addWidget(btn_import)
+        hb.addStretch()
+        layout.addLayout(hb)
 
         # fejlesztő alul balra
         lbl_dev = QLabel("Fejlesztő: Polgár Tibor")
@@ -201,27 +202,27 @@ class ShiftLoggerWindow(QMainWindow):
             self.prod_photo.clear()
             self.prod_photo.setText("<i>Nincs kép</i>")
             return
-        con = sqlite3.connect(self.prod_db); con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("SELECT megnevezes,cikkszam,foto FROM products WHERE id=?", (pid,))
-        row = cur.fetchone(); con.close()
-        name = row["megnevezes"] if row else "—"
-        sku  = row["cikkszam"]   if row else "—"
-        photo= row["foto"]      if row else None
+        row = self._product_info(pid)
+        name = row.megnevezes if row else "—"
+        sku  = row.cikkszam   if row else "—"
+        photo= row.foto       if row else None
         self.prod_name_lbl.setText(f"Termék: {name}")
         self.prod_sku_lbl.setText(f"Cikkszám: {sku}")
         if photo:
             p = photo if os.path.isabs(photo) else os.path.join(project_dir, photo)
             if os.path.exists(p):
-                pix = QPixmap(p).scaled(
-                    self.prod_photo.width(), self.prod_photo.height(),
-                    Qt.KeepAspectRatio, Qt.SmoothTransformation
-                )
+                pix = asset_cache.shared().thumbnail(p, self.prod_photo.size())
                 self.prod_photo.setPixmap(pix)
                 return
         self.prod_photo.clear()
         self.prod_photo.setText("<i>Nincs kép</i>")
 
+    def _product_info(self, pid):
+        """Egy termék a katalógusból (Termek vagy None); ismeretlen id-nél a katalógust újraolvassuk."""
+        if pid not in self._prod_cache:
+            self._prod_cache = {t.id: t for t in backend.products().termek_katalogus()}
+        return self._prod_cache.get(pid)
+
     def add_operator(self):
         name = self.new_op_le.text().strip()
         if not name:
@@ -244,12 +245,14 @@ class ShiftLoggerWindow(QMainWindow):
         shots      = self.shots_sb.value()
         scrap      = self.scrap_sb.value()
 
-        pid = self.inv_db.get_active_job_product(machine)
-        con = sqlite3.connect(self.prod_db); con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("SELECT feszekszam FROM products WHERE id = ?", (pid,))
-        row = cur.fetchone(); con.close()
-        fesz = row["feszekszam"] if row else 0
+        # a műszak idején futó termék a gyártási előzményekből
+        pid = self.inv_db.shift_product(machine, date, shift_type)
+        if pid is None:
+            QMessageBox.warning(self, "Hiba",
+                                "A műszak idején nem futott gyártás ezen a gépen – "
+                                "előbb indítsd el a gyártást (Gyártás indítása)."); return
+        row = self._product_info(pid)
+        fesz = (row.feszekszam or 0) if row else 0
 
         good_qty  = shots * fesz
         scrap_qty = scrap * fesz
@@ -257,7 +260,8 @@ class ShiftLoggerWindow(QMainWindow):
         # alap műszaknapló
         self.inv_db.add_shift_log(
             machine, operator, date, shift_type,
-            shots, scrap, good_qty, scrap_qty
+            shots, scrap, good_qty, scrap_qty,
+            product_id=pid
         )
 
         # állásidők mentése a shift_downtimes táblába
@@ -280,6 +284,27 @@ class ShiftLoggerWindow(QMainWindow):
             cb.setCurrentIndex(0)
             sb.setValue(0)
 
+    def import_counters(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Számláló exportok", "", "CSV fájl (*.csv);;Minden fájl (*)"
+        )
+        if not paths:
+            return
+        try:
+            # a fájlok ezen a gépen vannak; szolgáltatás módban a sorokat a szolgáltatás írja
+            result = backend.import_counters(paths, self.inv_db)
+        except Exception as e:
+            QMessageBox.critical(self, "Hiba", f"Import sikertelen:\n{e}"); return
+
+        details = [result.summary()]
+        if result.duplicates:
+            details.append("\nMár rögzített műszakok (kihagyva):")
+            details += [f"  {m} – {d} {s}" for m, d, s in result.duplicates[:20]]
+        if result.errors:
+            details.append("\nHibás sorok:")
+            details += [f"  {f}:{n}: {msg}" for f, n, msg in result.errors[:20]]
+        QMessageBox.information(self, "Import kész", "\n".join(details))
+
 def main():
     app = QApplication(sys.argv)
     # NINCS .setFont()
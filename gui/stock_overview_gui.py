@@ -2,15 +2,13 @@
 
 import sys
 import os
-import sqlite3
 from datetime import datetime
 from pathlib import Path
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap, QTextDocument
-from PyQt5.QtPrintSupport import QPrinter
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QDialog, QWidget,
-    QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QHBoxLayout, QLabel, QTableView,
     QPushButton, QHeaderView, QSpacerItem, QSizePolicy,
     QDialogButtonBox, QComboBox, QFileDialog, QMessageBox, QLineEdit, QFrame
 )
@@ -22,16 +20,22 @@ if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
 from modules.manufacturing_module.inventory_db import InventoryDB
-from modules.delivery_module.delivery_note_db import DeliveryNoteDB
+from modules.manufacturing_module import reports
+from modules.shared.sql_trace import traced_action
+from modules.service import backend
+from modules.shared import events
+from modules.shared.report_writer import write_report
+from gui.event_relay import EventRelay
+from gui.table_model import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui import asset_cache
 
 # ---------------------------------------------------
 # Hozzáadott dialógus: Készlet módosítása
 # ---------------------------------------------------
 class StockAdjustDialog(QDialog):
-    def __init__(self, inv_db: InventoryDB, prod_db_path: str, parent=None):
+    def __init__(self, inv_db: InventoryDB, parent=None):
         super().__init__(parent)
-        self.inv_db       = inv_db
-        self.prod_db_path = prod_db_path
+        self.inv_db = inv_db
         self.setWindowTitle("Készlet módosítása")
         self.resize(400, 130)
 
@@ -60,13 +64,8 @@ class StockAdjustDialog(QDialog):
         layout.addWidget(btns)
 
     def _load_products(self):
-        con = sqlite3.connect(self.prod_db_path)
-        con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("SELECT id, megnevezes FROM products ORDER BY megnevezes")
-        for r in cur.fetchall():
-            self.prod_cb.addItem(r["megnevezes"], userData=r["id"])
-        con.close()
+        for t in sorted(backend.products().termek_katalogus(), key=lambda t: t.megnevezes or ""):
+            self.prod_cb.addItem(t.megnevezes, userData=t.id)
 
     def on_accept(self):
         # Érvényes szám?
@@ -78,30 +77,17 @@ class StockAdjustDialog(QDialog):
 
         prod_id = self.prod_cb.currentData()
 
-        # shift_logs táblába bejegyzés – most már end_time-ot is adunk
-        cur = self.inv_db.conn.cursor()
-        cur.execute("""
-            INSERT INTO shift_logs
-                (product_id, date, start_time, end_time, machine, good_qty, scrap_qty, operator)
-            VALUES
-                (?, DATE('now'), TIME('now'), TIME('now'), ?, ?, 0, ?)
-        """, (
-            prod_id,    # product_id
-            "GUI",      # machine
-            delta,      # good_qty
-            "GUI"       # operator
-        ))
-        self.inv_db.conn.commit()
+        # shift_logs bejegyzés (a ShiftLogged eseményt az adatréteg küldi)
+        self.inv_db.adjust_stock(prod_id, delta)
         QMessageBox.information(self, "Siker", f"{delta:+} mennyiség hozzáadva a készlethez.")
         self.accept()
 
 
 class MonthlyReportDialog(QDialog):
-    def __init__(self, inv_db: InventoryDB, prod_db: str, delivery_db: DeliveryNoteDB, parent=None):
+    def __init__(self, inv_db: InventoryDB, parent=None):
         super().__init__(parent)
         self.inv_db      = inv_db
-        self.prod_db     = prod_db
-        self.delivery_db = delivery_db
+        self.rollup      = backend.rollup() if backend.mode() == "service" else inv_db.rollup
         self.setWindowTitle("Havi riport – Öntöde Üzem")
         self.resize(800, 600)
 
@@ -112,170 +98,104 @@ class MonthlyReportDialog(QDialog):
         ctl = QHBoxLayout()
         ctl.addWidget(QLabel("Hónap:"))
         self.month_cb = QComboBox()
+        # aktuális év hónapjai + minden hónap, amihez van rollup adat
         year = datetime.now().year
-        for m in range(1,13):
-            self.month_cb.addItem(f"{year}-{m:02d}")
+        months = {f"{year}-{m:02d}" for m in range(1,13)} | set(self.rollup.months())
+        for m in sorted(months):
+            self.month_cb.addItem(m)
+        self.month_cb.setCurrentText(datetime.now().strftime("%Y-%m"))
+        self.month_cb.currentIndexChanged.connect(self.load_data)
         ctl.addWidget(self.month_cb)
         btn_reload = QPushButton("Frissítés")
         btn_reload.clicked.connect(self.load_data)
         ctl.addWidget(btn_reload)
+        btn_rebuild = QPushButton("Újraszámolás")
+        btn_rebuild.setToolTip("A havi összesítők újraszámolása a műszaknaplókból és szállítólevelekből")
+        btn_rebuild.clicked.connect(self.rebuild_rollup)
+        ctl.addWidget(btn_rebuild)
         ctl.addStretch()
         btn_export = QPushButton("Export")
         btn_export.clicked.connect(self.export_report)
         ctl.addWidget(btn_export)
         layout.addLayout(ctl)
 
-        # Öntés-tábla
-        self.tbl_cast = QTableWidget(0,6)
-        self.tbl_cast.setHorizontalHeaderLabels([
-            "Termék","Cikkszám","Db","Egységnyi súly",
-            "Mértékegység","Össz súly"
-        ])
-        self.tbl_cast.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Öntés- és kiszállítás-tábla (közös fejléc)
+        headers = reports.MONTHLY_HEADERS
+        self.cast_model, self.tbl_cast = self._report_table(headers)
         layout.addWidget(QLabel("<b>Gyártott (Öntés)</b>"))
         layout.addWidget(self.tbl_cast, stretch=1)
 
-        # Kiszállítás-tábla
-        self.tbl_deliv = QTableWidget(0,6)
-        self.tbl_deliv.setHorizontalHeaderLabels([
-            "Termék","Cikkszám","Db","Egységnyi súly",
-            "Mértékegység","Össz súly"
-        ])
-        self.tbl_deliv.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.deliv_model, self.tbl_deliv = self._report_table(headers)
         layout.addWidget(QLabel("<b>Kiszállított</b>"))
         layout.addWidget(self.tbl_deliv, stretch=1)
 
+        # előző év azonos hónapja
+        self.lbl_yoy = QLabel()
+        layout.addWidget(self.lbl_yoy)
+
         btns = QDialogButtonBox(QDialogButtonBox.Close)
         btns.rejected.connect(self.reject)
         layout.addWidget(btns)
 
         self.load_data()
 
+    def _report_table(self, headers):
+        model = RowTableModel(headers, self)
+        proxy = RowFilterProxy(self)
+        proxy.setSourceModel(model)
+        view = QTableView()
+        view.setModel(proxy)
+        configure_view(view)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return model, view
+
+    @traced_action("Havi riport betöltése")
     def load_data(self):
         mon = self.month_cb.currentText()
-        self.tbl_cast.setRowCount(0)
-        self.tbl_deliv.setRowCount(0)
-
-        # gyártott havonta
-        cur = self.inv_db.conn.cursor()
-        cur.execute("""
-            SELECT product_id, SUM(good_qty+scrap_qty) AS qty
-              FROM shift_logs
-             WHERE substr(date,1,7)=?
-             GROUP BY product_id
-        """, (mon,))
-        made = {r["product_id"]: r["qty"] for r in cur.fetchall()}
-
-        # kiszállított havonta
-        cur_dn = self.delivery_db.conn.cursor()
-        cur_dn.execute("""
-            SELECT dni.product_id, SUM(dni.quantity) AS qty
-              FROM delivery_note_items AS dni
-              JOIN delivery_notes AS dn ON dn.id=dni.delivery_note_id
-             WHERE substr(dn.shipping_date,1,7)=?
-             GROUP BY dni.product_id
-        """, (mon,))
-        delivered = {r["product_id"]: r["qty"] for r in cur_dn.fetchall()}
-
-        # termékadatok
-        con_p = sqlite3.connect(self.prod_db)
-        con_p.row_factory = sqlite3.Row
-        cur_p = con_p.cursor()
-        cur_p.execute("""
-            SELECT id, megnevezes, cikkszam, suly, suly_mertekegyseg
-              FROM products
-             WHERE uzem_lanc LIKE '%Öntöde%' COLLATE NOCASE
-        """)
-        prods = {r["id"]: r for r in cur_p.fetchall()}
-        con_p.close()
-
-        # összesített listázás
-        all_ids = sorted(set(made.keys()) | set(delivered.keys()))
-        for pid in all_ids:
-            info = prods.get(pid)
-            if not info: continue
-            name = info["megnevezes"]
-            sku  = info["cikkszam"]
-            w    = info["suly"] or 0
-            u    = info["suly_mertekegyseg"] or ""
-# gui/stock_overview_gui.py (2/2)
-
-            # Öntés
-            qty_m = made.get(pid, 0)
-            tot_m = qty_m * w
-            r = self.tbl_cast.rowCount()
-            self.tbl_cast.insertRow(r)
-            for c, val in enumerate((name, sku, qty_m, w, u, tot_m)):
-                it = QTableWidgetItem(str(val))
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                self.tbl_cast.setItem(r, c, it)
-
-            # Kiszállítás
-            qty_d = delivered.get(pid, 0)
-            tot_d = qty_d * w
-            r2 = self.tbl_deliv.rowCount()
-            self.tbl_deliv.insertRow(r2)
-            for c, val in enumerate((name, sku, qty_d, w, u, tot_d)):
-                it = QTableWidgetItem(str(val))
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                self.tbl_deliv.setItem(r2, c, it)
+
+        # havi rollup: gyártott és kiszállított termékenként, Öntöde üzemláncra szűrve
+        rows = self.rollup.month_report(mon, plant="Öntöde")
+        self.cast_model.set_rows(reports.monthly_rows(rows, "made"))
+        self.deliv_model.set_rows(reports.monthly_rows(rows, "delivered"))
+
+        yoy = self.rollup.year_over_year(mon, plant="Öntöde")
+        cur, prev = yoy["month"], yoy["prev_month"]
+        self.lbl_yoy.setText(
+            f"<b>{cur['month']}</b>: gyártott {cur['made_weight']:.2f} kg, "
+            f"kiszállított {cur['delivered_weight']:.2f} kg &nbsp;|&nbsp; "
+            f"<b>{prev['month']}</b>: gyártott {prev['made_weight']:.2f} kg, "
+            f"kiszállított {prev['delivered_weight']:.2f} kg"
+        )
+
+    def rebuild_rollup(self):
+        self.rollup.rebuild()
+        self.load_data()
 
     def export_report(self):
-        path, fmt = QFileDialog.getSaveFileName(
+        path, _ = QFileDialog.getSaveFileName(
             self, "Riport exportálása", "",
-            "HTML fájl (*.html);;PDF fájl (*.pdf)"
+            "HTML fájl (*.html);;PDF fájl (*.pdf);;Excel fájl (*.xlsx);;CSV fájl (*.csv)"
         )
         if not path:
             return
+        if os.path.splitext(path)[1].lower() not in (".html", ".pdf", ".xlsx", ".csv"):
+            path += ".html"
 
-        def make_table(tbl, title):
-            s  = f"<h2>{title}</h2><table border='1' cellpadding='4'>"
-            s += "<tr>" + "".join(f"<th>{tbl.horizontalHeaderItem(i).text()}</th>"
-                                  for i in range(tbl.columnCount())) + "</tr>"
-            total_weight = 0.0
-            for r in range(tbl.rowCount()):
-                s += "<tr>"
-                for c in range(tbl.columnCount()):
-                    v = tbl.item(r,c).text()
-                    s += f"<td>{v}</td>"
-                try:
-                    w = float(tbl.item(r, tbl.columnCount()-1).text())
-                except:
-                    w = 0.0
-                total_weight += w
-                s += "</tr>"
-            s += "</table>"
-            s += f"<p><b>Összes súly ({title}): {total_weight:.2f}</b></p>"
-            return s
-
-        html = "<html><head><meta charset='utf-8'></head><body>"
-        html += f"<h1>Havi riport: {self.month_cb.currentText()}</h1>"
-        html += make_table(self.tbl_cast, "Gyártott (Öntés)")
-        html += make_table(self.tbl_deliv, "Kiszállított")
-        html += "</body></html>"
-
-        if path.lower().endswith(".html"):
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(html)
-            QMessageBox.information(self, "Export kész", f"HTML mentve: {path}")
-        else:
-            doc = QTextDocument()
-            doc.setHtml(html)
-            printer = QPrinter(QPrinter.HighResolution)
-            printer.setOutputFormat(QPrinter.PdfFormat)
-            printer.setOutputFileName(path)
-            doc.print_(printer)
-            QMessageBox.information(self, "Export kész", f"PDF mentve: {path}")
+        # a sorok közvetlenül a rollupból jönnek, nem a tábla widgetekből
+        report = reports.monthly_report(self.rollup, self.month_cb.currentText())
+        try:
+            write_report(report, path, base_url=project_dir)
+        except Exception as e:
+            QMessageBox.critical(self, "Hiba", f"Export sikertelen:\n{e}")
+            return
+        QMessageBox.information(self, "Export kész", f"Riport mentve: {path}")
 class StockOverviewWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Raktárkészlet áttekintés – Öntöde Üzem")
         self.resize(1080, 700)
 
-        self.inv_db      = InventoryDB()
-        self.prod_db     = os.path.join(project_dir,
-                                        "modules","product_module","products.db")
-        self.delivery_db = DeliveryNoteDB()
+        self.inv_db      = backend.inventory()
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -288,7 +208,7 @@ class StockOverviewWindow(QMainWindow):
         logo_path = os.path.join(project_dir, "logo.png")
         if os.path.exists(logo_path):
             lbl_logo = QLabel()
-            pix = QPixmap(logo_path).scaledToHeight(42, Qt.SmoothTransformation)
+            pix = asset_cache.shared().scaled_to_height(logo_path, 42)
             lbl_logo.setPixmap(pix)
             hdr_layout.addWidget(lbl_logo)
         title = QLabel(
@@ -310,14 +230,15 @@ class StockOverviewWindow(QMainWindow):
 
         # Szűrők
         filter_layout = QHBoxLayout()
+        self._filter_later = Debouncer(self._apply_filter, parent=self)
         self.vevo_le = QLineEdit();    self.vevo_le.setPlaceholderText("Vevő keresés…")
-        self.vevo_le.textChanged.connect(self.load_stock)
+        self.vevo_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.vevo_le)
         self.termek_le = QLineEdit();  self.termek_le.setPlaceholderText("Termék keresés…")
-        self.termek_le.textChanged.connect(self.load_stock)
+        self.termek_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.termek_le)
         self.sku_le = QLineEdit();     self.sku_le.setPlaceholderText("Cikkszám keresés…")
-        self.sku_le.textChanged.connect(self.load_stock)
+        self.sku_le.textChanged.connect(self._filter_later)
         filter_layout.addWidget(self.sku_le)
         filter_layout.addItem(QSpacerItem(20,20,QSizePolicy.Expanding,QSizePolicy.Minimum))
         main.addLayout(filter_layout)
@@ -339,89 +260,66 @@ class StockOverviewWindow(QMainWindow):
 
         main.addLayout(ctl)
 
-        # Táblázat
-        self.tbl = QTableWidget(0,4)
-        headers = ["Vevő","Termék","Cikkszám","Akt. készlet"]
-        self.tbl.setHorizontalHeaderLabels(headers)
+        # Táblázat (termék id a kulcs; a szűrés a proxyban, újratöltés nélkül)
+        self.model = RowTableModel(["Vevő","Termék","Cikkszám","Akt. készlet"], self)
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        configure_view(self.tbl)
         for i in range(4):
             self.tbl.horizontalHeader().setSectionResizeMode(i, QHeaderView.Stretch)
         main.addWidget(self.tbl)
 
+        # gyártás és kiszállítás után csak az érintett termék készlete változik
+        self.relay = EventRelay(self, {
+            events.ShiftLogged:           self._on_shift_logged,
+            events.DeliveryNoteItemAdded: self._on_item_delivered,
+        })
         self.load_stock()
 
+    @traced_action("Készlet betöltése")
     def load_stock(self):
-        self.tbl.setRowCount(0)
-
-        # (1) Lekérdezzük az "öntöde üzem" lánc termékeit
-        con = sqlite3.connect(self.prod_db)
-        con.row_factory = sqlite3.Row
-        cur = con.cursor()
-        cur.execute("""
-            SELECT id, vevo_nev, megnevezes, cikkszam
-              FROM products
-             WHERE uzem_lanc LIKE '%öntöde%'
-                OR uzem_lanc LIKE '%Öntöde%'
-             ORDER BY vevo_nev, megnevezes
-        """)
-        prods = cur.fetchall()
-        con.close()
-
-        # (2) Kiszállított mennyiség előkészítése
-        cur_dn = self.delivery_db.conn.cursor()
-        cur_dn.execute("""
-            SELECT product_id, SUM(quantity) AS qty
-              FROM delivery_note_items
-             GROUP BY product_id
-        """)
-        delivered_map = {r["product_id"]: r["qty"] for r in cur_dn.fetchall()}
-
-        # (3) A GUI-be tölti csak ezt a szűrt listát
+        # készlet = gyártott - selejt - kiszállított; minden sor a modellbe, a szűrés a proxyban
+        rows, keys = backend.stock_rows(self.inv_db)
+        self.model.set_rows(rows, keys)
+        self._apply_filter()
+        self.tbl.resizeColumnsToContents()
+
+    def _apply_filter(self):
         vevo_f   = self.vevo_le.text().lower()
         termek_f = self.termek_le.text().lower()
         sku_f    = self.sku_le.text().lower()
+        if not (vevo_f or termek_f or sku_f):
+            self.proxy.set_predicate(None)
+            return
+        self.proxy.set_predicate(lambda row: (
+            (not vevo_f or vevo_f in row[0].lower())
+            and (not termek_f or termek_f in (row[1] or "").lower())
+            and (not sku_f or sku_f in (row[2] or "").lower())
+        ))
 
-        for p in prods:
-            pid   = p["id"]
-            vevo  = p["vevo_nev"] or "—"
-            name  = p["megnevezes"]
-            sku   = p["cikkszam"]
-
-            # opcionális szöveges-szűrés a mezőkben
-            if vevo_f and vevo_f not in vevo.lower(): continue
-            if termek_f and termek_f not in name.lower(): continue
-            if sku_f and sku_f not in sku.lower(): continue
-
-            # készletszámítás shift_logs + delivery_note_items alapján
-            cur2 = self.inv_db.conn.cursor()
-            cur2.execute("""
-                SELECT SUM(good_qty) AS g, SUM(scrap_qty) AS s
-                  FROM shift_logs
-                 WHERE product_id=?
-            """, (pid,))
-            r2 = cur2.fetchone()
-            good_all  = r2["g"] or 0.0
-            scrap_all = r2["s"] or 0.0
-            delivered_all = delivered_map.get(pid, 0.0)
-            stock = good_all - scrap_all - delivered_all
-
-            # sor beszúrása
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-            for c, val in enumerate((vevo, name, sku, stock)):
-                it = QTableWidgetItem(str(val))
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                self.tbl.setItem(r, c, it)
+    # --- változásesemények: egy termék készletének módosítása ---
+    def _add_stock(self, product_id: int, delta: float):
+        r = self.model.row_of_key(product_id)
+        if r < 0:
+            return   # nem öntödei termék
+        row = self.model.row(r)
+        self.model.update_row(r, row[:3] + (row[3] + delta,))
 
-        self.tbl.resizeColumnsToContents()
+    def _on_shift_logged(self, ev):
+        self._add_stock(ev.product_id, (ev.good_qty or 0) - (ev.scrap_qty or 0))
+
+    def _on_item_delivered(self, ev):
+        self._add_stock(ev.product_id, -(ev.quantity or 0))
 
     def open_monthly_report(self):
-        dlg = MonthlyReportDialog(self.inv_db, self.prod_db, self.delivery_db, parent=self)
+        dlg = MonthlyReportDialog(self.inv_db, parent=self)
         dlg.exec_()
 
     def open_stock_adjust(self):
-        dlg = StockAdjustDialog(self.inv_db, self.prod_db, parent=self)
-        if dlg.exec_():
-            self.load_stock()
+        dlg = StockAdjustDialog(self.inv_db, parent=self)
+        dlg.exec_()   # a ShiftLogged esemény frissíti a sort
 
 def main():
     app = QApplication(sys.argv)
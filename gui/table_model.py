@@ -0,0 +1,342 @@
+# gui/table_model.py
+#
+# Közös táblamodell a listázó ablakokhoz (QTableView + proxy), a soronkénti
+# QTableWidgetItem feltöltés helyett. A sorok tömör tuple-ök nyers értékekkel;
+# a megjelenített szöveg, szín és igazítás csak akkor készül el, amikor a nézet
+# egy látható cellát kirajzol (lazy data()).
+#
+# Rendezés: a modell maga rendez (Python list.sort kulccsal), a proxy csak
+# továbbítja – így 50 000 sornál sem hívódik cellánként Python kód az
+# összehasonlításokhoz. Szűrés: a proxy egy soronkénti predikátummal szűr.
+#
+#     self.model = RowTableModel(["Név", "Ár"], formats={1: lambda v: f"{v:.2f}"})
+#     self.proxy = RowFilterProxy(self)
+#     self.proxy.setSourceModel(self.model)
+#     self.view.setModel(self.proxy)
+#     self.model.set_rows([("Csavar", 12.5), ...], keys=[17, ...])
+#     self.proxy.set_predicate(lambda row: "csav" in row[0].lower())
+#
+# Változásesemény után nem kell újratölteni: upsert(kulcs, sor) egy sort cserél
+# vagy hozzáfűz, remove_keys(kulcsok) sorokat töröl – a nézet csak ezeket rajzolja újra.
+#
+# A szűrőmezők gépelését Debouncer vonja össze: gyors gépelésnél nem szűrünk
+# minden billentyűleütésre, csak a megállás után egyszer.
+
+from PyQt5.QtCore import (Qt, QObject, QTimer, QAbstractTableModel, QModelIndex,
+                          QSortFilterProxyModel)
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QHeaderView
+
+# a nyers (formázatlan) érték szerepe – rendezéshez, exporthoz
+RAW_ROLE = Qt.UserRole + 1
+
+
+def _text(v) -> str:
+    return "" if v is None else str(v)
+
+
+def _sort_key(v):
+    # None / üres a lista végére; vegyes oszlopban a számok a szövegek elé kerülnek
+    # (a középső elem miatt szám és szöveg sosem hasonlítódik össze közvetlenül)
+    empty = v is None or v == ""
+    if isinstance(v, (int, float)):
+        return (empty, 0, v)
+    return (empty, 1, str(v).lower())
+
+
+class RowTableModel(QAbstractTableModel):
+    """
+    Tuple sorokra épülő, csak olvasható (vagy oszloponként szerkeszthető) modell.
+
+    headers   – oszlopfejlécek; a sor tuple hosszabb is lehet (rejtett mezők a szűréshez)
+    formats   – {oszlop: f(érték) -> str} megjelenítés; alapból str()
+    colors    – {oszlop: f(érték) -> színnév | None} háttérszín
+    align     – {oszlop: Qt.Alignment}
+    editable  – szerkeszthető oszlopok; az EditRole a nyers értéket adja (típushelyes szerkesztő)
+    checkable – jelölőnégyzetes oszlop indexe (a kulcsok halmazában tárolva)
+    Qt.UserRole a sor kulcsát adja (pl. adatbázis id).
+    """
+
+    def __init__(self, headers, parent=None, formats=None, colors=None, align=None,
+                 editable=(), checkable=None):
+        super().__init__(parent)
+        self._headers   = list(headers)
+        self._formats   = formats or {}
+        self._colors    = colors or {}
+        self._align     = align or {}
+        self._editable  = set(editable)
+        self._checkable = checkable
+        self._rows      = []
+        self._keys      = []
+        self._checked   = set()
+        self._sort      = (-1, Qt.AscendingOrder)
+        self._color_cache = {}
+        self._key_index = None   # kulcs → sorindex, lustán épül, változáskor eldobjuk
+
+    # --- adatok ---
+    def set_rows(self, rows, keys=None):
+        """Teljes csere egy reset-tel (a nézet csak a látható sorokat kéri le); a rendezés megmarad."""
+        self.beginResetModel()
+        self._rows = [tuple(r) for r in rows]
+        self._keys = list(keys) if keys is not None else list(range(len(self._rows)))
+        self._checked &= set(self._keys)
+        if self._sort[0] >= 0:
+            perm = self._permutation(*self._sort)
+            self._rows = [self._rows[i] for i in perm]
+            self._keys = [self._keys[i] for i in perm]
+        self._key_index = None
+        self.endResetModel()
+
+    def row(self, r: int) -> tuple:
+        return self._rows[r]
+
+    def key(self, r: int):
+        return self._keys[r]
+
+    def rows(self):
+        return self._rows
+
+    def keys(self):
+        return self._keys
+
+    def row_of_key(self, key) -> int:
+        if self._key_index is None:
+            self._key_index = {k: i for i, k in enumerate(self._keys)}
+        return self._key_index.get(key, -1)
+
+    def update_row(self, r: int, values):
+        """Egy sor cseréje (pl. mentés után) – csak az adott sor rajzolódik újra."""
+        self._rows[r] = tuple(values)
+        self.dataChanged.emit(self.index(r, 0), self.index(r, self.columnCount() - 1))
+
+    def upsert(self, key, values) -> int:
+        """
+        A kulcs sorának cseréje, vagy ha még nincs, beszúrása: aktív rendezésnél a
+        rendezett helyére, különben a végére. A sor indexét adja.
+        """
+        r = self.row_of_key(key)
+        if r >= 0:
+            self.update_row(r, values)
+            return r
+        values = tuple(values)
+        r = self._insert_pos(values)
+        self.beginInsertRows(QModelIndex(), r, r)
+        self._rows.insert(r, values)
+        self._keys.insert(r, key)
+        if r == len(self._rows) - 1:
+            self._key_index[key] = r
+        else:
+            self._key_index = None   # a beszúrás utáni sorok indexe eltolódott
+        self.endInsertRows()
+        return r
+
+    def _insert_pos(self, values) -> int:
+        """Bináris keresés az aktív rendezés szerint; egyenlő kulcsnál a meglévők után."""
+        column, order = self._sort
+        if column < 0:
+            return len(self._rows)
+        k = _sort_key(values[column])
+        desc = order == Qt.DescendingOrder
+        lo, hi = 0, len(self._rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            m = _sort_key(self._rows[mid][column])
+            if (k > m) if desc else (k < m):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def remove_keys(self, keys):
+        """A kulcsok sorainak törlése; az ismeretlen kulcsokat kihagyja."""
+        rows = sorted({self.row_of_key(k) for k in keys} - {-1}, reverse=True)
+        for r in rows:
+            self.beginRemoveRows(QModelIndex(), r, r)
+            del self._rows[r]
+            self._checked.discard(self._keys.pop(r))
+            self.endRemoveRows()
+        if rows:
+            self._key_index = None
+
+    def checked_keys(self) -> set:
+        return set(self._checked)
+
+    def set_checked(self, key, checked: bool = True):
+        (self._checked.add if checked else self._checked.discard)(key)
+        r = self.row_of_key(key)
+        if r >= 0 and self._checkable is not None:
+            idx = self.index(r, self._checkable)
+            self.dataChanged.emit(idx, idx, [Qt.CheckStateRole])
+
+    def header(self, col: int) -> str:
+        return self._headers[col]
+
+    def display(self, r: int, col: int) -> str:
+        """A cella megjelenített szövege (exporthoz is)."""
+        v = self._rows[r][col]
+        fmt = self._formats.get(col)
+        return fmt(v) if fmt else _text(v)
+
+    # --- Qt modell interfész ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            if c == self._checkable:
+                return None
+            return self.display(r, c)
+        if role == Qt.EditRole or role == RAW_ROLE:
+            return self._rows[r][c]
+        if role == Qt.UserRole:
+            return self._keys[r]
+        if role == Qt.BackgroundRole and c in self._colors:
+            name = self._colors[c](self._rows[r][c])
+            if not name:
+                return None
+            color = self._color_cache.get(name)
+            if color is None:
+                color = self._color_cache[name] = QColor(name)
+            return color
+        if role == Qt.TextAlignmentRole and c in self._align:
+            return self._align[c]
+        if role == Qt.CheckStateRole and c == self._checkable:
+            return Qt.Checked if self._keys[r] in self._checked else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        f = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() in self._editable:
+            f |= Qt.ItemIsEditable
+        if index.column() == self._checkable:
+            f |= Qt.ItemIsUserCheckable
+        return f
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        r, c = index.row(), index.column()
+        if role == Qt.CheckStateRole and c == self._checkable:
+            self.set_checked(self._keys[r], value == Qt.Checked)
+            return True
+        if role == Qt.EditRole and c in self._editable:
+            row = list(self._rows[r])
+            row[c] = value
+            self._rows[r] = tuple(row)
+            self.dataChanged.emit(index, index)
+            return True
+        return False
+
+    def _permutation(self, column, order):
+        rows = self._rows
+        return sorted(range(len(rows)), key=lambda i: _sort_key(rows[i][column]),
+                      reverse=(order == Qt.DescendingOrder))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort = (column, order)
+        if column < 0 or not self._rows:
+            return
+        self.layoutAboutToBeChanged.emit()
+        perm = self._permutation(column, order)
+        self._rows = [self._rows[i] for i in perm]
+        self._keys = [self._keys[i] for i in perm]
+        self._key_index = None
+        old = self.persistentIndexList()
+        if old:
+            new_pos = {o: n for n, o in enumerate(perm)}
+            self.changePersistentIndexList(
+                old, [self.index(new_pos[i.row()], i.column()) for i in old])
+        self.layoutChanged.emit()
+
+
+class RowFilterProxy(QSortFilterProxyModel):
+    """
+    Predikátumos szűrő a RowTableModel fölé; a rendezést a forrásmodellnek adja át.
+    A predikátum a sor tuple-t kapja; None = minden sor látszik.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._predicate = None
+
+    def set_predicate(self, predicate):
+        self._predicate = predicate
+        # invalidate(): egy lépésben újratérképez; az invalidateFilter() sok
+        # elrejtett sornál tartományonként jelez a nézetnek, és nagyságrenddel lassabb
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._predicate is None:
+            return True
+        return bool(self._predicate(self.sourceModel().row(source_row)))
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def source_row(self, proxy_row: int) -> int:
+        return self.mapToSource(self.index(proxy_row, 0)).row()
+
+    def source_rows(self):
+        """A látható sorok forrásindexei, megjelenítési sorrendben."""
+        return [self.source_row(r) for r in range(self.rowCount())]
+
+
+FILTER_DELAY_MS = 250
+
+
+class Debouncer(QObject):
+    """
+    Egymás utáni hívások összevonása: fn csak ms ezredmásodperc nyugalom után, egyszer fut.
+        self._filter_later = Debouncer(self._apply_filter, parent=self)
+        le.textChanged.connect(self._filter_later)
+    """
+
+    def __init__(self, fn, ms: int = FILTER_DELAY_MS, parent=None):
+        super().__init__(parent)
+        self._fn = fn
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(ms)
+        self._timer.timeout.connect(self._fire)
+
+    def __call__(self, *_):
+        self._timer.start()   # újraindítás: a számlálás elölről kezdődik
+
+    def pending(self) -> bool:
+        return self._timer.isActive()
+
+    def flush(self):
+        """A függőben lévő hívás azonnali végrehajtása (pl. Enter lenyomásakor)."""
+        if self._timer.isActive():
+            self._timer.stop()
+            self._fire()
+
+    def _fire(self):
+        self._fn()
+
+
+def configure_view(view, row_height: int = 24, sorting: bool = True):
+    """
+    Nagy táblákhoz illő nézetbeállítás: egyforma sormagasság (nincs soronkénti
+    méretezés), és az oszlopszélesség-becslés csak az első 200 sort nézi.
+    """
+    vh = view.verticalHeader()
+    vh.setSectionResizeMode(QHeaderView.Fixed)
+    vh.setDefaultSectionSize(row_height)
+    hh = view.horizontalHeader()
+    hh.setResizeContentsPrecision(200)
+    hh.setSortIndicator(-1, Qt.AscendingOrder)   # betöltési sorrend, amíg nem kattintanak
+    view.setSortingEnabled(sorting)
@@ -7,10 +7,10 @@ from pathlib import Path
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QTableWidget, QTableWidgetItem, QPushButton, QHeaderView
+    QLabel, QLineEdit, QTableView, QPushButton, QHeaderView, QMessageBox
 )
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QDesktopServices
+from PyQt5.QtCore import Qt, QTimer, QUrl, QSize
 
 # ─── 1) APP_DIR meghatározása ────────────────────────────────────────────
 if getattr(sys, "frozen", False):
@@ -20,10 +20,17 @@ else:
 
 # ─── 2) Importútvonal ────────────────────────────────────────────────────
 sys.path.insert(0, str(APP_DIR / "modules"))
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
 
-from delivery_module.delivery_note_db import DeliveryNoteDB
-from product_module.product_module       import osszes_termek
-from order_module.order_module           import osszes_megrendeles
+from modules.delivery_module.delivery_note_db import DeliveryNoteDB
+from modules.delivery_module.pdf_archive      import PdfArchive
+from modules.service                             import backend
+from modules.shared                              import cancel, events
+from gui.async_loader                    import AsyncLoader, LoadingLabel
+from gui.event_relay                     import EventRelay
+from gui.table_model                     import RowTableModel, RowFilterProxy, Debouncer, configure_view
+from gui                                 import asset_cache
 
 def get_note_value(note, key, default=None):
     # sqlite3.Row fallback getter
@@ -32,16 +39,110 @@ def get_note_value(note, key, default=None):
     except Exception:
         return default
 
+
+# táblasor: a 8 megjelenített oszlop, utána a szűréshez használt szállítási nap
+# és az újranyomtatáshoz a szállítólevél azonosítója (rejtett mezők)
+HEADERS = [
+    "Szállítás dátuma",
+    "Szállítólevél száma",
+    "Vevő neve",
+    "Megrendelési szám",
+    "Termék megnevezése",
+    "Cikkszám",
+    "Szállított mennyiség",
+    "Egység",
+]
+COL_NOTE, COL_CUST, COL_ORDER, COL_PROD, COL_SKU, COL_SHIP_DATE, COL_NOTE_ID = 1, 2, 3, 4, 5, 8, 9
+
+
+def delivery_row(note, note_id, product_id, quantity, orders: dict, products: dict) -> tuple:
+    """Egy szállítólevél tétel táblasora a fejléc, a rendelés és a termék adataival."""
+    raw = get_note_value(note, "shipping_date") or get_note_value(note, "created_at") or ""
+    try:
+        dt = datetime.fromisoformat(raw)
+        ship_date, shipped_at = dt.strftime("%Y.%m.%d"), dt.strftime("%Y.%m.%d %H:%M")
+    except Exception:
+        ship_date = shipped_at = raw
+
+    order_id = get_note_value(note, "order_id")
+    od   = orders.get(order_id)
+    prod = products.get(product_id)
+    return (
+        shipped_at,
+        get_note_value(note, "note_number", "") or "",
+        get_note_value(note, "customer_name", "") or "",
+        od.megrendeles_szam if od else str(order_id),
+        prod.megnevezes        if prod else "",
+        prod.cikkszam          if prod else "",
+        quantity,
+        prod.mennyisegi_egyseg if prod else "",
+        ship_date,
+        note_id,
+    )
+
+
+def _close(db):
+    # közvetlen módban saját kapcsolat; a szolgáltatás névterének nincs mit zárni
+    if isinstance(db, DeliveryNoteDB):
+        db.conn.close()
+
+
+def load_delivery_rows():
+    """
+    Munkaszálon fut: szállítólevél tételenként egy sor, a fejlécekkel együtt egy
+    lekérdezésben (közvetlen módban saját kapcsolattal). A termék- és
+    rendelésszótárat is visszaadja – az új tételek sorai ezekből készülnek.
+    """
+    db       = backend.delivery_notes()
+    products = {p.id: p for p in backend.products().termek_katalogus()}
+    orders   = {o.id: o for o in backend.orders().osszes_megrendeles()}
+    rows, keys = [], []
+    try:
+        if isinstance(db, DeliveryNoteDB):
+            with cancel.watch(db.conn):
+                items = db.get_all_delivery_note_rows()
+        else:
+            items = db.get_all_delivery_note_rows()
+        for ti in items:
+            cancel.check()
+            rows.append(delivery_row(ti, ti["delivery_note_id"], ti["product_id"], ti["quantity"],
+                                     orders, products))
+            keys.append(ti["id"])
+    finally:
+        _close(db)
+    return products, orders, rows, keys
+
+
+def load_added_rows(added, products: dict, orders: dict):
+    """
+    Munkaszálon: DeliveryNoteItemAdded események sorai. Csak a hiányzó
+    rendeléseket kérdezi le egyenként; ismeretlen termék esetén a terméklistát.
+    """
+    db    = backend.delivery_notes()
+    notes = {}
+    rows  = []
+    try:
+        if any(ev.product_id not in products for ev in added):
+            products = {p.id: p for p in backend.products().termek_katalogus()}
+        for ev in added:
+            if ev.note_id not in notes:
+                notes[ev.note_id] = db.get_delivery_note(ev.note_id)[0]
+            order_id = get_note_value(notes[ev.note_id], "order_id")
+            if order_id not in orders:
+                orders[order_id] = backend.orders().megrendeles(order_id)
+            rows.append(delivery_row(notes[ev.note_id], ev.note_id, ev.product_id, ev.quantity,
+                                     orders, products))
+    finally:
+        _close(db)
+    return products, orders, rows, [ev.item_id for ev in added]
+
 class ViewDeliveriesWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Dr. Köcher Kft. – Kiszállítások áttekintése")
         self.resize(900, 550)
 
-        # adatbázis és cache
-        self.db            = DeliveryNoteDB()
-        self._all_products = osszes_termek()
-        self._orders       = osszes_megrendeles()
+        # a sorok háttérben töltődnek (load_delivery_rows), a szűrést a proxy végzi
 
         # UI összeállítása
         central = QWidget()
@@ -52,14 +153,17 @@ class ViewDeliveriesWindow(QMainWindow):
         header = QHBoxLayout()
         logo_path = APP_DIR / "logo.png"
         if logo_path.exists():
-            pix = QPixmap(str(logo_path)).scaled(50, 50, Qt.KeepAspectRatio)
+            pix = asset_cache.shared().pixmap(str(logo_path), QSize(50, 50))
             header.addWidget(QLabel(pixmap=pix))
         header.addWidget(QLabel("<h2>Kiszállítások</h2>"))
         header.addStretch()
+        self.loading_lbl = LoadingLabel()
+        header.addWidget(self.loading_lbl)
         v.addLayout(header)
 
-        # szűrők sor
+        # szűrők sor (gépelés közben csak a megállás után szűrünk)
         filter_layout = QHBoxLayout()
+        self._filter_later = Debouncer(self.load_data, parent=self)
         for label_text, attr, placeholder in [
             ("Dátum:",       "filter_date",     "YYYY.MM.DD"),
             ("Vevő:",        "filter_customer", "részlet"),
@@ -72,87 +176,105 @@ class ViewDeliveriesWindow(QMainWindow):
             le.setPlaceholderText(placeholder)
             setattr(self, attr, le)
             filter_layout.addWidget(le)
-            le.textChanged.connect(self.load_data)
+            le.textChanged.connect(self._filter_later)
         v.addLayout(filter_layout)
 
         # táblázat: 8 oszlop
-        self.tbl = QTableWidget(0, 8)
-        self.tbl.setHorizontalHeaderLabels([
-            "Szállítás dátuma",
-            "Szállítólevél száma",
-            "Vevő neve",
-            "Megrendelési szám",
-            "Termék megnevezése",
-            "Cikkszám",
-            "Szállított mennyiség",
-            "Egység",
-        ])
+        self.model = RowTableModel(HEADERS, self)
+        self.proxy = RowFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.tbl = QTableView()
+        self.tbl.setModel(self.proxy)
+        configure_view(self.tbl)
         self.tbl.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         v.addWidget(self.tbl)
 
-        # Frissítés gomb
+        # gombok: újranyomtatás az archívumból, frissítés
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        btn_reprint = QPushButton("Szállítólevél újranyomtatása")
+        btn_reprint.clicked.connect(self.reprint)
+        buttons.addWidget(btn_reprint)
         btn_refresh = QPushButton("Frissítés")
-        btn_refresh.clicked.connect(self.load_data)
-        v.addWidget(btn_refresh, alignment=Qt.AlignRight)
+        btn_refresh.clicked.connect(self.reload)
+        buttons.addWidget(btn_refresh)
+        v.addLayout(buttons)
+
+        # első adatbetöltés (háttérben)
+        self.products, self.orders = {}, {}
+        self._added = []    # még be nem töltött új tételek (egy szállítólevél = egy köteg)
+        self._batch = 0
+        self.loader = AsyncLoader(self, self.loading_lbl)
+        self.relay = EventRelay(self, {events.DeliveryNoteItemAdded: self._on_item_added})
+        self.reload()
+
+    def reload(self):
+        """A kiszállítás sorok összeállítása a szálkészletben; utána szűrés és kitöltés."""
+        self.loader.load("deliveries", load_delivery_rows, self._on_rows_loaded,
+                         label="Kiszállítások betöltése")
 
-        # első adatbetöltés
+    def _on_rows_loaded(self, result):
+        self.products, self.orders, rows, keys = result
+        self.model.set_rows(rows, keys)
         self.load_data()
 
-    def load_data(self):
-        self.tbl.setRowCount(0)
+    def _on_item_added(self, ev):
+        # az egy mentésben érkező tételeket egyetlen háttérlekérdezésbe gyűjtjük
+        if not self._added:
+            QTimer.singleShot(0, self._load_added)
+        self._added.append(ev)
+
+    def _load_added(self):
+        added, self._added = self._added, []
+        self._batch += 1
+        products, orders = self.products, dict(self.orders)
+        self.loader.load(f"added_{self._batch}", lambda: load_added_rows(added, products, orders),
+                         self._on_added_loaded, label="Új kiszállítások betöltése")
+
+    def _on_added_loaded(self, result):
+        self.products, orders, rows, keys = result
+        self.orders.update(orders)
+        for key, row in zip(keys, rows):
+            self.model.upsert(key, row)
 
+    def reprint(self):
+        """A kijelölt sor szállítólevelének archivált PDF-je – újrarenderelés nélkül."""
+        idx = self.tbl.currentIndex()
+        if not idx.isValid():
+            QMessageBox.information(self, "Figyelem", "Válassz ki egy szállítólevél tételt.")
+            return
+        row = self.model.row(self.proxy.source_row(idx.row()))
+        note_number = row[COL_NOTE]
+        archive = PdfArchive()
+        try:
+            path = archive.note_pdf(delivery_note_id=row[COL_NOTE_ID])
+        finally:
+            archive.close()
+        if path is None:
+            QMessageBox.information(self, "Nincs archivált PDF",
+                                    f"A(z) {note_number} szállítólevélhez nincs archivált PDF "
+                                    "(az archívum bevezetése előtt készült).")
+            return
+        if not QDesktopServices.openUrl(QUrl.fromLocalFile(path)):
+            QMessageBox.warning(self, "Hiba", f"A PDF nem nyitható meg:\n{path}")
+
+    def load_data(self):
         date_f = self.filter_date.text().strip()
         cust_f = self.filter_customer.text().strip().lower()
         sku_f  = self.filter_sku.text().strip().lower()
         prod_f = self.filter_product.text().strip().lower()
         order_f= self.filter_order.text().strip().lower()
+        if not (date_f or cust_f or sku_f or prod_f or order_f):
+            self.proxy.set_predicate(None)
+            return
 
-        for ti in self.db.get_all_delivery_note_items():
-            note_id = ti["delivery_note_id"]
-            note, _ = self.db.get_delivery_note(note_id)
-
-            raw = get_note_value(note, "shipping_date") or get_note_value(note, "created_at") or ""
-            try:
-                dt = datetime.fromisoformat(raw)
-                ship_date = dt.strftime("%Y.%m.%d")
-            except Exception:
-                ship_date = raw
-
-            customer_name = get_note_value(note, "customer_name", "")
-            order_id      = get_note_value(note, "order_id")
-            od            = next((o for o in self._orders if o.id == order_id), None)
-            order_number  = od.megrendeles_szam if od else str(order_id)
-
-            prod = next((p for p in self._all_products if p.id == ti["product_id"]), None)
-            product_name  = prod.megnevezes        if prod else ""
-            cikkszam       = prod.cikkszam          if prod else ""
-            unit           = prod.mennyisegi_egyseg if prod else ""
-            ship_qty       = ti["quantity"]
-
-            # szűrők
-            if date_f  and date_f not in ship_date:          continue
-            if cust_f  and cust_f not in customer_name.lower(): continue
-            if order_f and order_f not in order_number.lower(): continue
-            if sku_f   and sku_f not in cikkszam.lower():    continue
-            if prod_f  and prod_f not in product_name.lower(): continue
-
-            r = self.tbl.rowCount()
-            self.tbl.insertRow(r)
-
-            vals = [
-                dt.strftime("%Y.%m.%d %H:%M") if raw else "",
-                get_note_value(note, "note_number", ""),   # <-- Ezt tedd ide!
-                customer_name,
-                order_number,
-                product_name,
-                cikkszam,
-                ship_qty,
-                unit
-            ]
-            for c, v in enumerate(vals):
-                it = QTableWidgetItem(str(v))
-                it.setFlags(it.flags() & ~Qt.ItemIsEditable)
-                self.tbl.setItem(r, c, it)
+        self.proxy.set_predicate(lambda row: (
+            (not date_f  or date_f in row[COL_SHIP_DATE])
+            and (not cust_f  or cust_f in row[COL_CUST].lower())
+            and (not order_f or order_f in row[COL_ORDER].lower())
+            and (not sku_f   or sku_f in row[COL_SKU].lower())
+            and (not prod_f  or prod_f in row[COL_PROD].lower())
+        ))
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,85 @@
+# gui/window_registry.py
+#
+# A főablakból nyitott ablakok nyilvántartása. Kulcsonként egy példány:
+# ha már nyitva van, előre hozzuk; ha be lett zárva, a rejtett példányt
+# mutatjuk újra – a betöltött modellel, szűrőkkel, rendezéssel együtt, azonnal.
+#
+# A bezárt (rejtett) ablakokból legfeljebb max_hidden darabot tartunk meg,
+# a legrégebben bezártat (LRU) felszabadítjuk – így a memória egész nap korlátos.
+# A rejtett ablakok a változáseseményekből (gui/event_relay) frissek maradnak;
+# amelyiknek ez nem elég, reactivate() metódusa újra megjelenéskor hívódik.
+# Az űrlap jellegű ablakokat (keep=False) bezáráskor rögtön felszabadítjuk.
+#
+#     self.windows = WindowRegistry(self, max_hidden=4)
+#     self.windows.open("orders", OrderWin)
+
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QEvent
+
+
+class WindowRegistry(QObject):
+
+    def __init__(self, parent=None, max_hidden: int = 4):
+        super().__init__(parent)
+        self.max_hidden = max_hidden
+        self._windows = {}              # kulcs → ablak
+        self._keep    = set()           # bezáráskor megtartható ablakok kulcsai
+        self._hidden  = OrderedDict()   # bezárt ablakok kulcsai, a legrégebbi elöl
+
+    def open(self, key, factory, keep: bool = True):
+        """A kulcs ablakának megjelenítése; ha még nincs (vagy felszabadult), factory() hozza létre."""
+        w = self._windows.get(key)
+        if w is None:
+            w = factory()
+            self._windows[key] = w
+            if keep:
+                self._keep.add(key)
+            w.installEventFilter(self)
+            w.destroyed.connect(lambda _=None, k=key: self._forget(k))
+        elif key in self._hidden:
+            del self._hidden[key]
+            if hasattr(w, "reactivate"):
+                w.reactivate()
+        if w.isMinimized():
+            w.showNormal()
+        else:
+            w.show()
+        w.raise_()
+        w.activateWindow()
+        return w
+
+    def get(self, key):
+        return self._windows.get(key)
+
+    def hidden_keys(self) -> list:
+        return list(self._hidden)
+
+    def eventFilter(self, obj, event):
+        # bezárás / elrejtés (a kis méretre állítás nem: az ablak látható marad)
+        if event.type() == QEvent.Hide and not obj.isVisible():
+            key = next((k for k, w in self._windows.items() if w is obj), None)
+            if key is None:
+                pass
+            elif key not in self._keep:
+                self._release(key)
+            else:
+                self._hidden[key] = None
+                self._hidden.move_to_end(key)
+                while len(self._hidden) > self.max_hidden:
+                    self._release(next(iter(self._hidden)))
+        return False
+
+    def _release(self, key):
+        self._hidden.pop(key, None)
+        self._keep.discard(key)
+        w = self._windows.pop(key, None)
+        if w is not None:
+            w.removeEventFilter(self)
+            w.destroyed.disconnect()
+            w.deleteLater()
+
+    def _forget(self, key):
+        self._windows.pop(key, None)
+        self._keep.discard(key)
+        self._hidden.pop(key, None)
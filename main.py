@@ -6,8 +6,8 @@ import os
 import sqlite3
 from pathlib import Path
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap, QPainter
+from PyQt5.QtCore import Qt, QTimer, QRect, QPoint
+from PyQt5.QtGui import QFont, QPainter
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout,
@@ -44,6 +44,16 @@ def _patched_connect(database, *args, **kwargs):
     return _orig_connect(database, *args, **kwargs)
 sqlite3.connect = _patched_connect
 
+# ─── 2b) opcionális SQL mérés (ERP_SQL_TRACE=1) ───────────────────────────
+from modules.shared import sql_trace
+sql_trace.install_from_env()
+
+# ─── 2c) közös segédek (az adatréteg és a szolgáltatás kliens első használatkor töltődik) ─
+from modules.shared import warmup
+from modules.service import backend
+from gui.window_registry import WindowRegistry
+from gui import asset_cache
+
 # ─── LOGIN DIALÓGUS ───────────────────────────────────────────────────────
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
@@ -87,9 +97,6 @@ class DBAuthDialog(QDialog):
     def get_credentials(self):
         return self.user_edit.text(), self.pw_edit.text()
 
-# ─── DB VIEWER import ─────────────────────────────────────────────────────
-from gui.db_viewer import DatabaseViewer
-
 # ─── FŐABLAK ──────────────────────────────────────────────────────────────
 class MainWindow(QMainWindow):
     def __init__(self, current_user):
@@ -99,7 +106,12 @@ class MainWindow(QMainWindow):
             f"ERP Főképernyő – Dr. Köcher Kft.  (Bejelentkezve: {self.current_user})"
         )
         self.resize(800, 600)
-        self._children = []
+        # kulcsonként egy ablak; a bezártak közül a legutóbbi néhány rejtve megmarad
+        self.windows = WindowRegistry(self, max_hidden=4)
+        # szolgáltatás módban (ERP_SERVICE) a többi munkaállomás változásai is ideérnek
+        if backend.mode() == "service":
+            self._event_sync = QTimer(self, interval=2000, timeout=self._sync_events)
+            self._event_sync.start()
 
         central = QWidget()
         self.setCentralWidget(central)
@@ -126,6 +138,7 @@ class MainWindow(QMainWindow):
             ("Műszaknapló...",          self._open_shift_logger),
             ("Műszakgyártások",         self._open_foundry_products),
             ("Készletnyilvántartás",    self._open_stock_overview),
+            ("Gépállapot",              self._open_machine_board),
         ]
 
         left_layout  = QVBoxLayout()
@@ -137,7 +150,7 @@ class MainWindow(QMainWindow):
             btn = QPushButton(text)
             btn.setFont(btn_font)
             btn.setMinimumHeight(60)
-            btn.clicked.connect(handler)
+            btn.clicked.connect(sql_trace.traced_action(text)(handler))
             left_layout.addWidget(btn)
         left_layout.addStretch()
 
@@ -150,7 +163,7 @@ class MainWindow(QMainWindow):
             btn = QPushButton(text)
             btn.setFont(btn_font)
             btn.setMinimumHeight(60)
-            btn.clicked.connect(handler)
+            btn.clicked.connect(sql_trace.traced_action(text)(handler))
             right_layout.addWidget(btn)
         label = QLabel("Öntöde")
         label.setFont(QFont("Arial", 32, QFont.Bold))
@@ -170,18 +183,24 @@ class MainWindow(QMainWindow):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.SmoothPixmapTransform)
         if os.path.exists(self.logo_path):
-            pix = QPixmap(self.logo_path).scaled(
-                self.size() * 0.6,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            painter.setOpacity(0.1)
-            x = (self.width() - pix.width()) // 2
-            y = (self.height() - pix.height()) // 2
-            painter.drawPixmap(x, y, pix)
+            # méretlépcsőnként egyszer dekódolva, a pontos méretre rajzoláskor skálázva
+            target = self.size() * 0.6
+            pix = asset_cache.shared().pixmap(self.logo_path, asset_cache.size_bucket(target))
+            if not pix.isNull():
+                size = pix.size().scaled(target, Qt.KeepAspectRatio)
+                painter.setOpacity(0.1)
+                x = (self.width() - size.width()) // 2
+                y = (self.height() - size.height()) // 2
+                painter.drawPixmap(QRect(QPoint(x, y), size), pix)
         painter.setOpacity(1.0)
         super().paintEvent(event)
 
+    def _sync_events(self):
+        try:
+            backend.sync_events()
+        except OSError as e:
+            self.statusBar().showMessage(f"ERP szolgáltatás nem érhető el: {e}", 5000)
+
     def _open_db_viewer(self):
         auth = DBAuthDialog(self)
         if auth.exec_() != QDialog.Accepted:
@@ -190,50 +209,53 @@ class MainWindow(QMainWindow):
         if user.lower() != "polgartibor" or pw != "12345678":
             QMessageBox.warning(self, "Hiba", "Érvénytelen felhasználó vagy jelszó!")
             return
-        w = DatabaseViewer(parent=self)
-        w.show()
-        self._children.append(w)
+        from gui.db_viewer import DatabaseViewer   # QtSql csak itt kell
+        self.windows.open("db_viewer", lambda: DatabaseViewer(parent=self), keep=False)
 
     # ─── további modulok ─────────────────────────────────────────────────
     def _open_products(self):
         from gui.product_gui import ProductWindow
-        w = ProductWindow(); w.show(); self._children.append(w)
+        self.windows.open("products", ProductWindow)
 
     def _open_orders(self):
         from gui.order_gui import OrderWin
-        w = OrderWin(); w.show(); self._children.append(w)
+        self.windows.open("orders", OrderWin)
 
     def _open_delivery_note_input(self):
         from gui.delivery_note_input import DeliveryNoteInputWindow
-        w = DeliveryNoteInputWindow(); w.show(); self._children.append(w)
+        self.windows.open("delivery_note_input", DeliveryNoteInputWindow, keep=False)
 
     def _open_delivery(self):
         from gui.delivery_gui import DeliveryWindow
-        w = DeliveryWindow(); w.show(); self._children.append(w)
+        self.windows.open("delivery", DeliveryWindow)
 
     def _open_view_deliveries(self):
         from gui.view_deliveries_gui import ViewDeliveriesWindow
-        w = ViewDeliveriesWindow(); w.show(); self._children.append(w)
+        self.windows.open("view_deliveries", ViewDeliveriesWindow)
 
     def _open_label_maker(self):
         from gui.order_label_viewer import OrderLabelViewer
-        w = OrderLabelViewer(); w.show(); self._children.append(w)
+        self.windows.open("label_maker", OrderLabelViewer)
 
     def _open_manufacturing(self):
         from gui.manufacturing_gui import ManufacturingWindow
-        w = ManufacturingWindow(); w.show(); self._children.append(w)
+        self.windows.open("manufacturing", ManufacturingWindow, keep=False)
 
     def _open_shift_logger(self):
         from gui.shift_logger_gui import ShiftLoggerWindow
-        w = ShiftLoggerWindow(); w.show(); self._children.append(w)
+        self.windows.open("shift_logger", ShiftLoggerWindow, keep=False)
 
     def _open_foundry_products(self):
         from gui.foundry_products_gui import FoundryProductsWindow
-        w = FoundryProductsWindow(); w.show(); self._children.append(w)
+        self.windows.open("foundry_products", FoundryProductsWindow)
 
     def _open_stock_overview(self):
         from gui.stock_overview_gui import StockOverviewWindow
-        w = StockOverviewWindow(); w.show(); self._children.append(w)
+        self.windows.open("stock_overview", StockOverviewWindow)
+
+    def _open_machine_board(self):
+        from gui.machine_board_gui import MachineBoardWindow
+        self.windows.open("machine_board", MachineBoardWindow)
 
 
 def main():
@@ -244,6 +266,8 @@ def main():
 
     app = QApplication(sys.argv)
 
+    # amíg a felhasználó választ: katalógus és sablonok a háttérben
+    warmup.start()
     login = LoginDialog()
     if login.exec_() != QDialog.Accepted:
         sys.exit(0)
@@ -2,6 +2,10 @@
 
 import sqlite3
 import os
+from datetime import datetime
+
+from .delivery_note_db import ensure_indexes, ensure_pdf_archive, ensure_rollup
+from ..shared import events
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "delivery_notes.db")
@@ -44,7 +48,10 @@ class DeliveryNoteDB:
             "customer_country":      "TEXT",
             "shipping_name":         "TEXT",
             "shipping_address":      "TEXT",
-            "shipping_country":      "TEXT"
+            "shipping_country":      "TEXT",
+            "created_at":            "TEXT NOT NULL DEFAULT ''",
+            "status":                "TEXT NOT NULL DEFAULT 'pending'",
+            "shipping_date":         "TEXT NOT NULL DEFAULT ''"
         }
         cur = self.conn.execute("PRAGMA table_info(delivery_notes)")
         existing = {row["name"] for row in cur.fetchall()}
@@ -54,15 +61,20 @@ class DeliveryNoteDB:
                 self.conn.execute(f"ALTER TABLE delivery_notes ADD COLUMN {col} {coltype}")
 
         self.conn.commit()
+        ensure_indexes(self.conn)
+        ensure_rollup(self.conn)
+        ensure_pdf_archive(self.conn)
 
     def get_existing_numbers(self, prefix: str) -> list[str]:
         """
         Visszaadja azokat a note_number-öket, amelyek a megadott prefixszel kezdődnek.
         """
+        # GLOB: kis-/nagybetű érzékeny, így a note_number indexen tartományként fut
+        # (a LIKE az alap BINARY index mellett teljes táblát olvasna)
         cur = self.conn.execute("""
             SELECT note_number FROM delivery_notes
-            WHERE note_number LIKE ?
-        """, (prefix + '%',))
+            WHERE note_number GLOB ?
+        """, (prefix + '*',))
         return [row["note_number"] for row in cur.fetchall() if row["note_number"]]
 
     def exists_delivery_note_number(self, note_number: str) -> bool:
@@ -78,30 +90,68 @@ class DeliveryNoteDB:
                                          order_id: int,
                                          customer_info: dict,
                                          shipping_info: dict,
-                                         note_number: str) -> int:
+                                         note_number: str,
+                                         shipping_date: str = None) -> int:
         """
         Beszúr egy új delivery_notes sort a kézi note_number-rel, visszaadja az új ID-t.
+        A created_at a beszúrás időpontja; a shipping_date (YYYY-MM-DD) a választott
+        szállítási nap, ennek hiányában szintén a beszúrás időpontja (a havi riport
+        hónapja ez alapján).
         """
+        note_id = self._insert_note(order_id, customer_info, shipping_info, note_number, shipping_date)
+        self.conn.commit()
+        events.publish(events.DeliveryNoteCreated(note_id, order_id, note_number))
+        return note_id
+
+    def _insert_note(self, order_id, customer_info, shipping_info, note_number, shipping_date) -> int:
+        now = datetime.now().isoformat(timespec='seconds')
         cursor = self.conn.cursor()
         cursor.execute("""
             INSERT INTO delivery_notes (
                 order_id, note_number,
+                created_at, shipping_date,
                 customer_name, customer_address, customer_tax_number,
                 customer_eu_tax_number, customer_country,
                 shipping_name, shipping_address, shipping_country
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             order_id,
             note_number,
+            now, shipping_date or now,
             customer_info["name"],       customer_info["address"],
             customer_info["tax_number"], customer_info["eu_tax_number"],
             customer_info["country"],
             shipping_info["name"],       shipping_info["address"],
             shipping_info["country"]
         ))
-        self.conn.commit()
         return cursor.lastrowid
 
+    def create_delivery_note(self,
+                             order_id: int,
+                             customer_info: dict,
+                             shipping_info: dict,
+                             note_number: str,
+                             items: list,
+                             shipping_date: str = None) -> int:
+        """
+        Szállítólevél a tételeivel ([(product_id, quantity)]) egyetlen tranzakcióban;
+        a havi kiszállítás összesítőt (delivery_rollup) ugyanez a tranzakció
+        frissíti a triggereken át. Az események csak a commit után mennek ki.
+        """
+        with self.conn:
+            note_id = self._insert_note(order_id, customer_info, shipping_info, note_number, shipping_date)
+            item_ids = [
+                self.conn.execute("""
+                    INSERT INTO delivery_note_items (delivery_note_id, product_id, quantity)
+                    VALUES (?, ?, ?)
+                """, (note_id, product_id, quantity)).lastrowid
+                for product_id, quantity in items
+            ]
+        events.publish(events.DeliveryNoteCreated(note_id, order_id, note_number))
+        for item_id, (product_id, quantity) in zip(item_ids, items):
+            events.publish(events.DeliveryNoteItemAdded(note_id, item_id, product_id, quantity))
+        return note_id
+
     def insert_delivery_note_item(self,
                                   delivery_note_id: int,
                                   product_id: int,
@@ -109,11 +159,13 @@ class DeliveryNoteDB:
         """
         Beszúr egy tételt a delivery_note_items táblába.
         """
-        self.conn.execute("""
+        cur = self.conn.execute("""
             INSERT INTO delivery_note_items (delivery_note_id, product_id, quantity)
             VALUES (?, ?, ?)
         """, (delivery_note_id, product_id, quantity))
         self.conn.commit()
+        events.publish(events.DeliveryNoteItemAdded(
+            delivery_note_id, cur.lastrowid, product_id, quantity))
 
 
 class DeliveryModule:
@@ -125,27 +177,17 @@ class DeliveryModule:
                                          customer_info: dict,
                                          shipping_info: dict,
                                          entries: list[dict],
-                                         note_number: str) -> int:
+                                         note_number: str,
+                                         shipping_date: str = None) -> int:
         """
-        Létrehoz egy szállítólevelet a rendeléshez a megadott note_number-rel,
-        majd visszaadja az új delivery_note ID-t.
+        Létrehoz egy szállítólevelet a rendeléshez a megadott note_number-rel
+        (fejléc és tételek egy tranzakcióban), majd visszaadja az új delivery_note ID-t.
         """
-        # Beszúrjuk a fejléces sort a felhasználó által bevitt számmal
-        note_id = self.delivery_db.insert_delivery_note_with_number(
-            order_id,
-            customer_info,
-            shipping_info,
-            note_number
+        return self.delivery_db.create_delivery_note(
+            order_id, customer_info, shipping_info, note_number,
+            [(e["product_id"], e["quantity"]) for e in entries], shipping_date
         )
 
-        # Beszúrjuk a tételsorokat
-        for e in entries:
-            self.delivery_db.insert_delivery_note_item(
-                note_id, e["product_id"], e["quantity"]
-            )
-
-        return note_id
-
 
 
 
@@ -2,13 +2,174 @@ import sqlite3
 import os
 from datetime import datetime
 
+from ..shared import events
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "delivery_notes.db")
 
+
+def ensure_indexes(conn):
+    """
+    A szállítólevél táblák indexei (rendelésenkénti kiszállítás, tételek
+    szállítólevelenként és termékenként, számozás). Több modul is nyitja ezt az
+    adatbázist, mindegyik ezt hívja (friss, még tábla nélküli adatbázisnál nem tesz semmit).
+    """
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if not {"delivery_notes", "delivery_note_items"} <= tables:
+        return
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_notes_order
+            ON delivery_notes(order_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_notes_note_number
+            ON delivery_notes(note_number)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_note_items_note_product
+            ON delivery_note_items(delivery_note_id, product_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_note_items_product
+            ON delivery_note_items(product_id, quantity)
+    """)
+    conn.commit()
+
+
+# delivery_rollup változása egy tétel (r: NEW/OLD) miatt, a szállítólevél hónapjában
+_ITEM_DELTA = """
+    INSERT INTO delivery_rollup (month, product_id, qty)
+    SELECT substr(n.shipping_date, 1, 7), {r}.product_id, {sign}{r}.quantity
+      FROM delivery_notes n
+     WHERE n.id = {r}.delivery_note_id AND length(n.shipping_date) >= 7
+    ON CONFLICT(month, product_id) DO UPDATE SET qty = qty + excluded.qty;
+    DELETE FROM delivery_rollup
+     WHERE product_id = {r}.product_id AND abs(qty) < 1e-9
+       AND month = (SELECT substr(shipping_date, 1, 7) FROM delivery_notes WHERE id = {r}.delivery_note_id);
+"""
+
+# egy szállítólevél összes tétele a (régi/új) szállítási hónapban
+_NOTE_DELTA = """
+    INSERT INTO delivery_rollup (month, product_id, qty)
+    SELECT substr({r}.shipping_date, 1, 7), i.product_id, {sign}SUM(i.quantity)
+      FROM delivery_note_items i
+     WHERE i.delivery_note_id = {r}.id AND length({r}.shipping_date) >= 7
+     GROUP BY i.product_id
+    ON CONFLICT(month, product_id) DO UPDATE SET qty = qty + excluded.qty;
+    DELETE FROM delivery_rollup
+     WHERE month = substr({r}.shipping_date, 1, 7) AND abs(qty) < 1e-9;
+"""
+
+
+def ensure_rollup(conn, schema: str = "main"):
+    """
+    Havi kiszállítás összesítő (delivery_rollup: hónap × termék → mennyiség) a
+    szállítólevél adatbázisban. Triggerek vezetik: a tétel beszúrása, módosítása,
+    törlése, a szállítólevél törlése és a szállítási dátum módosítása ugyanabban a
+    tranzakcióban frissíti, bármelyik kapcsolatról jön. A havi riport
+    (report_rollup) ezt csatolja (schema: a csatolt adatbázis neve).
+    """
+    tables = {r[0] for r in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type='table'")}
+    if not {"delivery_notes", "delivery_note_items"} <= tables:
+        return
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.delivery_rollup (
+            month       TEXT    NOT NULL,   -- 'YYYY-MM' (shipping_date)
+            product_id  INTEGER NOT NULL,
+            qty         REAL    NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, product_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {schema}.trg_delivery_items_rollup_ins
+        AFTER INSERT ON delivery_note_items
+        BEGIN {_ITEM_DELTA.format(r="NEW", sign="")} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {schema}.trg_delivery_items_rollup_del
+        AFTER DELETE ON delivery_note_items
+        BEGIN {_ITEM_DELTA.format(r="OLD", sign="-")} END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {schema}.trg_delivery_items_rollup_upd
+        AFTER UPDATE OF delivery_note_id, product_id, quantity ON delivery_note_items
+        BEGIN
+          {_ITEM_DELTA.format(r="OLD", sign="-")}
+          {_ITEM_DELTA.format(r="NEW", sign="")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {schema}.trg_delivery_notes_rollup_month
+        AFTER UPDATE OF shipping_date ON delivery_notes
+        WHEN substr(OLD.shipping_date, 1, 7) IS NOT substr(NEW.shipping_date, 1, 7)
+        BEGIN
+          {_NOTE_DELTA.format(r="OLD", sign="-")}
+          {_NOTE_DELTA.format(r="NEW", sign="")}
+        END
+    """)
+    # a szállítólevél törlése a tételeit is törli (BEFORE: a tétel trigger még látja a hónapot)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {schema}.trg_delivery_notes_rollup_del
+        BEFORE DELETE ON delivery_notes
+        BEGIN
+          DELETE FROM delivery_note_items WHERE delivery_note_id = OLD.id;
+        END
+    """)
+    if "delivery_rollup" not in tables:
+        rebuild_rollup(conn, schema)
+    conn.commit()
+
+
+def ensure_pdf_archive(conn):
+    """
+    Az archivált szállítólevél PDF-ek indextáblája (pdf_archive.PdfArchive).
+    A szállítólevél adatbázis sémájával együtt jön létre, így az archívum
+    megnyitása (gombnyomásonként, munkaszálanként) nem futtat DDL-t.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS delivery_note_pdfs (
+            id               INTEGER PRIMARY KEY AUTOINCREMENT,
+            delivery_note_id INTEGER,
+            note_number      TEXT,
+            context_hash     TEXT    NOT NULL,
+            pdf_hash         TEXT    NOT NULL,
+            template         TEXT    NOT NULL DEFAULT '',
+            size             INTEGER NOT NULL DEFAULT 0,
+            created_at       TEXT    NOT NULL DEFAULT ''
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_note_pdfs_context
+            ON delivery_note_pdfs(context_hash)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_note_pdfs_note
+            ON delivery_note_pdfs(delivery_note_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_delivery_note_pdfs_number
+            ON delivery_note_pdfs(note_number)
+    """)
+    conn.commit()
+
+
+def rebuild_rollup(conn, schema: str = "main"):
+    """A delivery_rollup újraszámolása a tételekből (commit nélkül: a hívó tranzakciójában)."""
+    conn.execute(f"DELETE FROM {schema}.delivery_rollup")
+    conn.execute(f"""
+        INSERT INTO {schema}.delivery_rollup (month, product_id, qty)
+        SELECT substr(n.shipping_date, 1, 7), i.product_id, SUM(i.quantity)
+          FROM {schema}.delivery_note_items i
+          JOIN {schema}.delivery_notes n ON n.id = i.delivery_note_id
+         WHERE length(n.shipping_date) >= 7
+         GROUP BY substr(n.shipping_date, 1, 7), i.product_id
+    """)
+
+
 class DeliveryNoteDB:
-    def __init__(self):
+    def __init__(self, db_path: str = None):
         # Megnyitjuk (vagy létrehozzuk) az adatbázist
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = sqlite3.connect(db_path or DB_PATH)
         self.conn.row_factory = sqlite3.Row
         self.create_tables()
 
@@ -26,8 +187,11 @@ class DeliveryNoteDB:
             customer_name        TEXT,
             customer_address     TEXT,
             customer_tax_number  TEXT,
+            customer_eu_tax_number TEXT     DEFAULT '',
+            customer_country     TEXT       DEFAULT '',
             shipping_name        TEXT,
             shipping_address     TEXT,
+            shipping_country     TEXT       DEFAULT '',
             shipping_date        TEXT       NOT NULL DEFAULT ''
         )
         """)
@@ -73,6 +237,9 @@ class DeliveryNoteDB:
                 "ALTER TABLE delivery_notes "
                 "ADD COLUMN shipping_date TEXT NOT NULL DEFAULT ''"
             )
+        for col in ("customer_eu_tax_number", "customer_country", "shipping_country"):
+            if col not in cols:
+                cur.execute(f"ALTER TABLE delivery_notes ADD COLUMN {col} TEXT DEFAULT ''")
 
         # 4) Backfill: régi sorokra töltsük fel a hiányzó dátumokat
         #   - created_at: ha üres, mostani időpont
@@ -89,6 +256,9 @@ class DeliveryNoteDB:
         """)
 
         self.conn.commit()
+        ensure_indexes(self.conn)
+        ensure_rollup(self.conn)
+        ensure_pdf_archive(self.conn)
 
     def insert_delivery_note(self, order_id, customer_info, shipping_info, note_number):
         """
@@ -113,15 +283,18 @@ class DeliveryNoteDB:
             now
         ))
         self.conn.commit()
+        events.publish(events.DeliveryNoteCreated(cur.lastrowid, order_id, note_number))
         return cur.lastrowid
 
     def insert_delivery_note_item(self, delivery_note_id, product_id, quantity):
-        self.conn.execute("""
+        cur = self.conn.execute("""
             INSERT INTO delivery_note_items
                 (delivery_note_id, product_id, quantity)
             VALUES (?, ?, ?)
         """, (delivery_note_id, product_id, quantity))
         self.conn.commit()
+        events.publish(events.DeliveryNoteItemAdded(
+            delivery_note_id, cur.lastrowid, product_id, quantity))
 
     def get_delivery_note(self, delivery_note_id):
         note = self.conn.execute("""
@@ -175,6 +348,30 @@ class DeliveryNoteDB:
         """)
         return cur.fetchall()
 
+    def get_all_delivery_note_rows(self):
+        """
+        A kiszállítások listájához: tételenként egy sor a szállítólevél fejlécével
+        (egy lekérdezés – szolgáltatás módban egy hívás).
+        """
+        cur = self.conn.execute("""
+            SELECT i.id, i.delivery_note_id, i.product_id, i.quantity,
+                   n.order_id, n.note_number, n.customer_name,
+                   n.created_at, n.shipping_date
+              FROM delivery_note_items i
+              JOIN delivery_notes n ON n.id = i.delivery_note_id
+             ORDER BY i.delivery_note_id
+        """)
+        return cur.fetchall()
+
+    def delivered_by_product(self) -> dict:
+        """Összes kiszállított mennyiség termékenként: {product_id: qty}."""
+        cur = self.conn.execute("""
+            SELECT product_id, SUM(quantity) AS qty
+              FROM delivery_note_items
+             GROUP BY product_id
+        """)
+        return {r["product_id"]: r["qty"] for r in cur.fetchall()}
+
 
 
 
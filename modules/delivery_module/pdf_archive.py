@@ -0,0 +1,153 @@
+# modules/delivery_module/pdf_archive.py
+#
+# Tartalom szerint címzett PDF archívum a szállítólevelekhez. Minden elkészült
+# PDF a delivery_notes.db melletti pdf_archive/ mappába kerül, a fájlnév a
+# tartalom SHA-256 hash-e (pdf_archive/ab/ab12….pdf) – azonos PDF csak egyszer
+# tárolódik. A delivery_note_pdfs tábla köti a szállítólevélhez (id és szám);
+# a táblát a szállítólevél adatbázis sémája hozza létre (delivery_note_db.
+# ensure_pdf_archive), az archívum megnyitása nem ír az adatbázisba.
+#
+# A renderelés előtt a sablon, a kontextus és a PDF-be kerülő képek (logo.png)
+# hash-ét (context_hash) is megnézzük: ha ugyanez a szállítólevél ugyanazzal a
+# sablonnal és logóval már elkészült, a tárolt fájlt adjuk vissza, weasyprint nélkül.
+#
+#     archive = PdfArchive()
+#     path, rendered = archive.render_note("delivery_base_hu.html", context,
+#                                          delivery_note_id=note_id, note_number=note)
+#     archive.note_pdf(delivery_note_id=note_id)   # újranyomtatás
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from . import delivery_note_db
+from ..shared import rendering
+
+ARCHIVE_DIRNAME = "pdf_archive"
+
+# a sablonok által hivatkozott képek (logo_uri): tartalmuk is a context_hash része
+ASSETS = (os.path.join(rendering.PROJECT_DIR, "logo.png"),)
+
+
+@functools.lru_cache(maxsize=32)
+def _digest(path: str, stamp: tuple) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_digest(path: str, missing: str = None) -> str:
+    """A fájl tartalmának hash-e (módosítási idő + méret szerint gyorsítótárazva)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        if missing is None:
+            raise
+        return missing
+    return _digest(path, (st.st_mtime_ns, st.st_size))
+
+
+def context_hash(template_name: str, context: dict, template_dir: str = None) -> str:
+    """
+    A sablon (név + tartalom), a kontextus és a képek (ASSETS) hash-e; bármelyik
+    változása új PDF-et jelent.
+    """
+    path = os.path.join(template_dir or rendering.TEMPLATE_DIR, template_name)
+    h = hashlib.sha256()
+    h.update(template_name.encode("utf-8"))
+    h.update(file_digest(path).encode("ascii"))
+    for asset in ASSETS:
+        h.update(file_digest(asset, missing="-").encode("ascii"))
+    h.update(json.dumps(context, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class PdfArchive:
+
+    def __init__(self, db_path: str = None, root: str = None):
+        self.db_path = db_path or delivery_note_db.DB_PATH
+        self.root    = root or os.path.join(os.path.dirname(os.path.abspath(self.db_path)), ARCHIVE_DIRNAME)
+        # a delivery_note_pdfs táblát a DeliveryNoteDB sémája hozza létre
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+
+    def close(self):
+        self.conn.close()
+
+    # --- fájlok ---
+    def path_for(self, pdf_hash: str) -> str:
+        return os.path.join(self.root, pdf_hash[:2], pdf_hash + ".pdf")
+
+    def store(self, pdf: bytes) -> str:
+        """A PDF tárolása (ha még nincs ilyen tartalmú); a hash-ét adja."""
+        digest = hashlib.sha256(pdf).hexdigest()
+        path = self.path_for(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp, path)
+        return digest
+
+    # --- index ---
+    def lookup(self, ctx_hash: str):
+        """A kontextus hash legutóbbi, a lemezen is meglévő bejegyzése (vagy None)."""
+        for row in self.conn.execute("""
+            SELECT * FROM delivery_note_pdfs WHERE context_hash = ? ORDER BY id DESC
+        """, (ctx_hash,)):
+            if os.path.exists(self.path_for(row["pdf_hash"])):
+                return row
+        return None
+
+    def link(self, ctx_hash: str, pdf_hash: str, delivery_note_id=None, note_number=None,
+             template: str = "", size: int = 0) -> int:
+        cur = self.conn.execute("""
+            INSERT INTO delivery_note_pdfs
+                (delivery_note_id, note_number, context_hash, pdf_hash, template, size, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (delivery_note_id, note_number, ctx_hash, pdf_hash, template, size,
+              datetime.now().isoformat(timespec='seconds')))
+        self.conn.commit()
+        return cur.lastrowid
+
+    def render_note(self, template_name: str, context: dict, delivery_note_id=None,
+                    note_number=None, template_dir: str = None, base_url: str = None,
+                    html: str = None):
+        """
+        A szállítólevél PDF-je az archívumból, vagy renderelve és archiválva.
+        html: a sablon már renderelt kimenete (pl. az előnézetből), ha van.
+        (archív útvonal, renderelt-e) párt ad.
+        """
+        ctx_hash = context_hash(template_name, context, template_dir)
+        hit = self.lookup(ctx_hash)
+        if hit is not None:
+            if delivery_note_id is not None and hit["delivery_note_id"] != delivery_note_id:
+                self.link(ctx_hash, hit["pdf_hash"], delivery_note_id, note_number,
+                          template_name, hit["size"])
+            return self.path_for(hit["pdf_hash"]), False
+
+        if html is None:
+            html = rendering.get_template(template_name, template_dir).render(**context)
+        pdf = rendering.write_pdf(html, base_url=base_url)
+        digest = self.store(pdf)
+        self.link(ctx_hash, digest, delivery_note_id, note_number, template_name, len(pdf))
+        return self.path_for(digest), True
+
+    def note_pdf(self, delivery_note_id=None, note_number=None):
+        """A szállítólevél legutóbb archivált PDF-jének útvonala (id vagy szám alapján), ha van."""
+        if delivery_note_id is not None:
+            rows = self.conn.execute("""
+                SELECT pdf_hash FROM delivery_note_pdfs WHERE delivery_note_id = ? ORDER BY id DESC
+            """, (delivery_note_id,))
+        else:
+            rows = self.conn.execute("""
+                SELECT pdf_hash FROM delivery_note_pdfs WHERE note_number = ? ORDER BY id DESC
+            """, (note_number,))
+        for row in rows:
+            path = self.path_for(row["pdf_hash"])
+            if os.path.exists(path):
+                return path
+        return None
@@ -2,17 +2,66 @@
 
 import sqlite3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from .report_rollup import ReportRollup
+from ..shared import events
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "production_inventory.db")
 
+# Műszakok: (kezdő óra, hossz órában) – az éjszakás műszak átnyúlik a következő napra
+SHIFT_WINDOWS = {
+    "délelőtt": (6, 8),
+    "délután":  (14, 8),
+    "éjszaka":  (22, 8),
+}
+
+# Az öntöde gépei (a gyártás, műszaknapló és gépállapot ablakok közös listája)
+MACHINES = [
+    "OMS 950T öntőgép",
+    "OMS 500T öntőgép",
+    "CLOO 400T öntőgép",
+    "CLOO 250T függőleges öntőgép",
+]
+
+
+def current_shift(now: datetime = None) -> tuple[str, str]:
+    """
+    Az adott időpont műszaka: (dátum 'YYYY-MM-DD', műszak neve).
+    Éjfél és 6 óra között az előző napi éjszakás műszak tart.
+    """
+    now = now or datetime.now()
+    if 6 <= now.hour < 14:
+        return now.date().isoformat(), "délelőtt"
+    if 14 <= now.hour < 22:
+        return now.date().isoformat(), "délután"
+    day = now.date() if now.hour >= 22 else now.date() - timedelta(days=1)
+    return day.isoformat(), "éjszaka"
+
+
+def previous_shift(now: datetime = None) -> tuple[str, str]:
+    """Az utolsó lezárt műszak (az aktuálisat megelőző): (dátum, műszak neve)."""
+    now = now or datetime.now()
+    day, shift_type = current_shift(now)
+    start = datetime.fromisoformat(day) + timedelta(hours=SHIFT_WINDOWS[shift_type][0])
+    return current_shift(start - timedelta(minutes=1))
+
+
 class InventoryDB:
-    def __init__(self):
+    def __init__(self, db_path: str = None, ensure_schema: bool = True):
         # Csatlakozás és row_factory beállítása
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = sqlite3.connect(db_path or DB_PATH)
         self.conn.row_factory = sqlite3.Row
-        self._ensure_tables()
+        # ensure_schema=False: háttérszálak olvasó példánya, a sémát a GUI szál
+        # InventoryDB-je már létrehozta (így nincs séma-ellenőrzés és backfill írás)
+        if ensure_schema:
+            self._ensure_tables()
+        # Havi gyártás/kiszállítás rollup (a shift_logs triggerek is itt jönnek létre)
+        self.rollup = ReportRollup(self.conn, ensure_schema=ensure_schema)
+
+    def close(self):
+        self.conn.close()
 
     def _ensure_tables(self):
         cur = self.conn.cursor()
@@ -69,6 +118,18 @@ class InventoryDB:
         )
         """)
 
+        # 5b) machine_job_history (append-only gyártási előzmények, intervallumokkal)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS machine_job_history (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            machine     TEXT    NOT NULL,
+            product_id  INTEGER NOT NULL,
+            start_at    TEXT    NOT NULL,
+            end_at      TEXT,               -- NULL, amíg fut
+            status      TEXT    NOT NULL    -- 'active', 'stopped' vagy 'replaced'
+        )
+        """)
+
         # 6) operators
         cur.execute("""
         CREATE TABLE IF NOT EXISTS operators (
@@ -107,6 +168,109 @@ class InventoryDB:
         )
         """)
 
+        # Generált hónap oszlop (YYYY-MM) – tartomány- és indexbarát havi szűréshez
+        # (a table_info nem mutatja a generált oszlopokat, ezért table_xinfo)
+        for table in ("shift_logs", "shift_downtimes"):
+            cols = {r["name"] for r in cur.execute(f"PRAGMA table_xinfo({table})")}
+            if "month" not in cols:
+                cur.execute(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN month TEXT GENERATED ALWAYS AS (substr(date, 1, 7)) VIRTUAL
+                """)
+
+        # Indexek a gyakori lekérdezésekhez
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_logs_machine_date_shift
+                ON shift_logs(machine, date, shift_type)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_logs_product_date
+                ON shift_logs(product_id, date)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_logs_date
+                ON shift_logs(date)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_logs_month_product
+                ON shift_logs(month, product_id)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_downtimes_machine_date_shift
+                ON shift_downtimes(machine, date, shift_type)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_downtimes_month
+                ON shift_downtimes(month)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_shift_downtimes_cause
+                ON shift_downtimes(cause)
+        """)
+        # Készletszámítás: bevételezések termékenként, kiadások a bevételezés sorához
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_production_inventory_product
+                ON production_inventory(product_id, quantity)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_inventory_movements_inventory
+                ON inventory_movements(inventory_id, movement_type)
+        """)
+        # Intervallum-lekérdezésekhez: gépenként kezdés szerint, ill. időszak-átfedéshez
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_job_history_machine_start
+                ON machine_job_history(machine, start_at, end_at)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_job_history_start
+                ON machine_job_history(start_at, end_at)
+        """)
+        # a még futó munkák (kevés sor): a régen indult nyitott munkákhoz
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_job_history_open
+                ON machine_job_history(machine) WHERE end_at IS NULL
+        """)
+
+        # Leghosszabb lezárt munka (napokban): az átfedés-lekérdezések alsó korlátja a
+        # kezdésre (start_at >= időszak eleje - max_days), triggerek vezetik
+        span_exists = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'machine_job_span'"
+        ).fetchone()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS machine_job_span (
+            id          INTEGER PRIMARY KEY CHECK (id = 1),
+            max_days    REAL    NOT NULL DEFAULT 0
+        )
+        """)
+        if not span_exists:
+            cur.execute("""
+                INSERT INTO machine_job_span (id, max_days)
+                SELECT 1, COALESCE(MAX(julianday(end_at) - julianday(start_at)), 0)
+                  FROM machine_job_history
+                 WHERE end_at IS NOT NULL
+            """)
+        for name, event in (("ins", "INSERT"), ("upd", "UPDATE OF start_at, end_at")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_job_history_span_{name}
+                AFTER {event} ON machine_job_history
+                WHEN NEW.end_at IS NOT NULL
+                BEGIN
+                  UPDATE machine_job_span
+                     SET max_days = MAX(max_days, julianday(NEW.end_at) - julianday(NEW.start_at))
+                   WHERE id = 1;
+                END
+            """)
+
+        # Régi adatbázis: a machine_jobs aktív sorai kerüljenek be az előzményekbe
+        cur.execute("""
+            INSERT INTO machine_job_history (machine, product_id, start_at, end_at, status)
+            SELECT mj.machine, mj.product_id, mj.start_at, NULL, 'active'
+              FROM machine_jobs mj
+             WHERE mj.status = 'active'
+               AND NOT EXISTS (SELECT 1 FROM machine_job_history h
+                                WHERE h.machine = mj.machine AND h.end_at IS NULL)
+        """)
+
         # Backfill a régi rekordoknál
         cur.execute("UPDATE production_inventory SET created_at = datetime('now') WHERE created_at = ''")
         cur.execute("UPDATE inventory_movements  SET movement_at = datetime('now')   WHERE movement_at = ''")
@@ -227,9 +391,67 @@ class InventoryDB:
         row = cur.fetchone()
         return row["product_id"] if row else None
 
+    def active_jobs(self) -> dict:
+        """Minden aktív gépmunka egy lekérdezéssel: {gép: product_id}."""
+        cur = self.conn.execute("SELECT machine, product_id FROM machine_jobs WHERE status = 'active'")
+        return {r["machine"]: r["product_id"] for r in cur.fetchall()}
+
+    def data_version(self) -> int:
+        """
+        PRAGMA data_version: megváltozik, ha egy másik kapcsolat módosította az adatbázist.
+        Olcsó, így időzítőből is lekérdezhető a teljes frissítés helyett.
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def catalog_version(self):
+        """
+        A termékkatalógus (products.db) bélyege: a gépállapot tábla a data_version
+        mellett ezt figyeli, mert az átnevezés nem ebbe az adatbázisba ír.
+        """
+        return self.rollup.products_stamp()
+
+    def machine_board(self, date: str, shift_type: str) -> list[dict]:
+        """
+        Gépállapot tábla egy lekérdezéssel: a machine_jobs sorai a termék nevével,
+        cikkszámával és az adott (lezárt) műszak lövés/selejt számaival – a műszaknapló
+        a műszak végén íródik, ezért a tábla az előző műszakot kéri (previous_shift).
+        A termék dimenziót előbb a katalógushoz igazítjuk (sync_products).
+        """
+        self.rollup.sync_products()
+        cur = self.conn.execute("""
+            SELECT mj.machine, mj.product_id, mj.start_at, mj.status,
+                   rp.megnevezes, rp.cikkszam,
+                   COALESCE(SUM(sl.shots), 0)       AS shots,
+                   COALESCE(SUM(sl.scrap_shots), 0) AS scrap_shots
+              FROM machine_jobs mj
+              LEFT JOIN rollup_products rp ON rp.product_id = mj.product_id
+              LEFT JOIN shift_logs sl
+                ON sl.machine = mj.machine AND sl.date = ? AND sl.shift_type = ?
+             GROUP BY mj.machine
+        """, (date, shift_type))
+        board = []
+        for r in cur.fetchall():
+            row = dict(r)
+            row["scrap_rate"] = row["scrap_shots"] / row["shots"] if row["shots"] else 0.0
+            board.append(row)
+        return board
+
     def start_job(self, machine: str, product_id: int):
+        """
+        Elindít egy gyártást a gépen. A machine_jobs az aktuális állapotot tartja,
+        a machine_job_history-ba új intervallum kerül; a gépen futó előző munka lezárul.
+        """
         now = datetime.now().isoformat(timespec='seconds')
         cur = self.conn.cursor()
+        cur.execute("""
+            UPDATE machine_job_history
+               SET end_at = ?, status = 'replaced'
+             WHERE machine = ? AND end_at IS NULL
+        """, (now, machine))
+        cur.execute("""
+            INSERT INTO machine_job_history (machine, product_id, start_at, end_at, status)
+            VALUES (?, ?, ?, NULL, 'active')
+        """, (machine, product_id, now))
         cur.execute("""
             INSERT INTO machine_jobs(machine, product_id, start_at, status)
             VALUES (?, ?, ?, 'active')
@@ -239,12 +461,123 @@ class InventoryDB:
               status     = 'active'
         """, (machine, product_id, now))
         self.conn.commit()
+        # a gépállapot tábla a rollup termék dimenzióból veszi a nevet/cikkszámot
+        self.rollup.ensure_product(product_id)
 
     def stop_job(self, machine: str):
+        now = datetime.now().isoformat(timespec='seconds')
         cur = self.conn.cursor()
         cur.execute("UPDATE machine_jobs SET status = 'stopped' WHERE machine = ?", (machine,))
+        cur.execute("""
+            UPDATE machine_job_history
+               SET end_at = ?, status = 'stopped'
+             WHERE machine = ? AND end_at IS NULL
+        """, (now, machine))
         self.conn.commit()
 
+    # ──────────────────────────────────────────────────────────
+    # Gyártási előzmények (machine_job_history)
+    # ──────────────────────────────────────────────────────────
+
+    def job_at(self, machine: str, ts: str):
+        """
+        A gépen a ts (ISO időbélyeg) időpontban futó munka sora, vagy None.
+        """
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT *
+              FROM machine_job_history
+             WHERE machine = ? AND start_at <= ?
+             ORDER BY start_at DESC
+             LIMIT 1
+        """, (machine, ts))
+        row = cur.fetchone()
+        if row is None or (row["end_at"] is not None and row["end_at"] <= ts):
+            return None
+        return row
+
+    def product_at(self, machine: str, ts: str):
+        row = self.job_at(machine, ts)
+        return row["product_id"] if row else None
+
+    def _overlap_floor(self, date_from: str) -> str:
+        """
+        Alsó korlát a kezdésre: az időszakot átfedő lezárt munka legfeljebb a
+        leghosszabb lezárt munkával (+1 nap a formátumok miatt) indult korábban.
+        """
+        row = self.conn.execute("SELECT max_days FROM machine_job_span WHERE id = 1").fetchone()
+        span = row["max_days"] if row else 0.0
+        return (datetime.fromisoformat(date_from) - timedelta(days=span + 1)).date().isoformat()
+
+    # az időszakot átfedő munkák: kezdés szerint korlátos tartomány + a régebben indult,
+    # még futó munkák; a két ág diszjunkt. A második ágban a '+' kikapcsolja a
+    # (machine, start_at) indexet, így a kis részleges index (idx_job_history_open) fut.
+    _OVERLAP_SQL = """
+            SELECT {cols}
+              FROM machine_job_history
+             WHERE start_at >= :floor AND start_at < :to
+               AND (end_at IS NULL OR end_at > :from){machine}
+            UNION ALL
+            SELECT {cols}
+              FROM machine_job_history
+             WHERE end_at IS NULL AND +start_at < :floor{open_machine}
+    """
+
+    def jobs_between(self, date_from: str, date_to: str, machine: str = None):
+        """
+        Minden munka, amelynek intervalluma átfedi a [date_from, date_to) időszakot.
+        """
+        sql = self._OVERLAP_SQL.format(
+            cols="*",
+            machine=" AND machine = :machine" if machine else "",
+            open_machine=" AND +machine = :machine" if machine else "",
+        ) + " ORDER BY start_at"
+        cur = self.conn.cursor()
+        cur.execute(sql, {"floor": self._overlap_floor(date_from), "from": date_from,
+                          "to": date_to, "machine": machine})
+        return cur.fetchall()
+
+    def machine_utilization(self, date_from: str, date_to: str) -> dict:
+        """
+        Gépenkénti kihasználtság a [date_from, date_to) időszakra:
+        {machine: {"run_hours", "period_hours", "utilization", "jobs", "changeovers"}}.
+        A futási idő az időszakra vágva számolódik; átállás = termékváltás két egymást
+        követő munka között, ha az új munka az időszakon belül indult.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        cur = self.conn.cursor()
+        overlap = self._OVERLAP_SQL.format(cols="machine, product_id, start_at, end_at",
+                                           machine="", open_machine="")
+        # az időszakot átfedő munkák előbb indexszel szűrve, csak utána jön az ablakfüggvény
+        cur.execute(f"""
+            WITH j AS MATERIALIZED ({overlap})
+            SELECT machine,
+                   SUM(julianday(MIN(COALESCE(end_at, :now), :to))
+                       - julianday(MAX(start_at, :from))) * 24 AS run_hours,
+                   COUNT(*) AS jobs,
+                   SUM(CASE WHEN start_at >= :from
+                             AND prev_product IS NOT NULL
+                             AND prev_product <> product_id THEN 1 ELSE 0 END) AS changeovers
+              FROM (
+                    SELECT j.*,
+                           LAG(product_id) OVER (PARTITION BY machine ORDER BY start_at) AS prev_product
+                      FROM j
+                   )
+             GROUP BY machine
+        """, {"floor": self._overlap_floor(date_from), "from": date_from, "to": date_to, "now": now})
+        period_h = (datetime.fromisoformat(date_to) - datetime.fromisoformat(date_from)).total_seconds() / 3600
+        stats = {}
+        for r in cur.fetchall():
+            run_h = max(0.0, r["run_hours"] or 0.0)
+            stats[r["machine"]] = {
+                "run_hours":    run_h,
+                "period_hours": period_h,
+                "utilization":  run_h / period_h if period_h > 0 else 0.0,
+                "jobs":         r["jobs"],
+                "changeovers":  r["changeovers"] or 0,
+            }
+        return stats
+
     # ──────────────────────────────────────────────────────────
     # Operátorok kezelése
     # ──────────────────────────────────────────────────────────
@@ -265,9 +598,18 @@ class InventoryDB:
 
     def add_shift_log(self, machine: str, operator: str, date: str,
                       shift_type: str, shots: int, scrap_shots: int,
-                      good_qty: float, scrap_qty: float) -> int:
+                      good_qty: float, scrap_qty: float,
+                      product_id: int = None) -> int:
+        """
+        Műszaknapló sor rögzítése. Ha nincs megadva product_id, a gyártási
+        előzményekből vesszük, hogy a műszak idején mi futott a gépen.
+        """
         now = datetime.now().isoformat(timespec='seconds')
-        pid = self.get_active_job_product(machine)
+        pid = product_id if product_id is not None else self.shift_product(machine, date, shift_type)
+        if pid is None:
+            raise ValueError(f"{machine}: {date} {shift_type} műszakban nem futott gyártás")
+        # A havi riport a termék nevét és egységsúlyát a dimenzióból veszi, ezért legyen benne
+        self.rollup.ensure_product(pid)
         start_ts = f"{date} 00:00:00"
         end_ts   = f"{date} 23:59:59"
         cur = self.conn.cursor()
@@ -284,16 +626,111 @@ class InventoryDB:
             now
         ))
         self.conn.commit()
+        events.publish(events.ShiftLogged(cur.lastrowid, pid, good_qty, scrap_qty))
         return cur.lastrowid
 
-    def list_shift_logs(self, machine: str = None):
+    def adjust_stock(self, product_id: int, delta: float) -> int:
+        """
+        Kézi készletmódosítás (±): 'GUI' gépű műszaknapló sor a mai nappal, hogy a
+        készlet (gyártott - selejt - kiszállított) és a havi összesítő is kövesse.
+        """
+        self.rollup.ensure_product(product_id)
         cur = self.conn.cursor()
+        cur.execute("""
+            INSERT INTO shift_logs
+                (product_id, date, start_time, end_time, machine, good_qty, scrap_qty, operator)
+            VALUES
+                (?, DATE('now'), TIME('now'), TIME('now'), 'GUI', ?, 0, 'GUI')
+        """, (product_id, delta))
+        self.conn.commit()
+        events.publish(events.ShiftLogged(cur.lastrowid, product_id, delta, 0))
+        return cur.lastrowid
+
+    def shift_product(self, machine: str, date: str, shift_type: str):
+        """
+        A műszak alatt a gépen legtovább futó termék a gyártási előzményekből
+        (a műszakot átfedő munkák közül a legnagyobb átfedésű; egyenlőségnél a
+        később indult), vagy None, ha a műszak alatt nem futott munka (a hívó dönt:
+        hiba vagy kézi termékválasztás). A még futó munka a műszak végéig számít.
+        """
+        start_h, length_h = SHIFT_WINDOWS.get(shift_type, (0, 24))
+        start = datetime.fromisoformat(date) + timedelta(hours=start_h)
+        date_from = start.isoformat(timespec='seconds')
+        date_to   = (start + timedelta(hours=length_h)).isoformat(timespec='seconds')
+        overlap = self._OVERLAP_SQL.format(cols="product_id, start_at, end_at",
+                                           machine=" AND machine = :machine",
+                                           open_machine=" AND +machine = :machine")
+        row = self.conn.execute(f"""
+            SELECT product_id
+              FROM ({overlap})
+             ORDER BY julianday(MIN(COALESCE(end_at, :to), :to))
+                      - julianday(MAX(start_at, :from)) DESC,
+                      start_at DESC
+             LIMIT 1
+        """, {"floor": self._overlap_floor(date_from), "from": date_from,
+              "to": date_to, "machine": machine}).fetchone()
+        return row["product_id"] if row else None
+
+    def list_shift_logs(self, machine: str = None,
+                        date_from: str = None, date_to: str = None):
+        """
+        Műszaknapló sorok dátum szerint csökkenő sorrendben.
+        A date_from/date_to (YYYY-MM-DD, mindkettő zárt) tartományszűrés indexet használ.
+        """
+        where, params = [], []
         if machine:
-            cur.execute("SELECT * FROM shift_logs WHERE machine = ? ORDER BY date DESC", (machine,))
-        else:
-            cur.execute("SELECT * FROM shift_logs ORDER BY date DESC")
+            where.append("machine = ?"); params.append(machine)
+        if date_from:
+            where.append("date >= ?"); params.append(date_from)
+        if date_to:
+            where.append("date <= ?"); params.append(date_to)
+        sql = "SELECT * FROM shift_logs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY date DESC"
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
         return cur.fetchall()
 
+    def produced_by_product(self) -> dict:
+        """Összes gyártott mennyiség termékenként, a selejt levonásával: {product_id: good - scrap}."""
+        cur = self.conn.execute("""
+            SELECT product_id, SUM(good_qty) AS g, SUM(scrap_qty) AS s
+              FROM shift_logs
+             GROUP BY product_id
+        """)
+        return {r["product_id"]: (r["g"] or 0.0) - (r["s"] or 0.0) for r in cur.fetchall()}
+
+    def update_shift_counts(self, counts) -> None:
+        """Műszaknaplók lövés- és selejtlövés számának javítása: [(napló id, lövés, selejt lövés)]."""
+        self.conn.executemany(
+            "UPDATE shift_logs SET shots = ?, scrap_shots = ? WHERE id = ?",
+            [(shots, scrap, log_id) for log_id, shots, scrap in counts]
+        )
+        self.conn.commit()
+
+    def downtime_causes(self) -> list[str]:
+        """Az állásidő okok (a műszakgyártás tábla dinamikus oszlopai)."""
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT cause FROM shift_downtimes")]
+
+    def list_logged_machines(self) -> list[str]:
+        """A műszaknaplóban szereplő gépek."""
+        cur = self.conn.execute("SELECT DISTINCT machine FROM shift_logs")
+        return [r["machine"] for r in cur.fetchall()]
+
+    def get_monthly_production(self, month: str) -> dict:
+        """
+        Egy hónap (YYYY-MM) gyártott mennyisége termékenként: {product_id: good_qty+scrap_qty}.
+        """
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT product_id, SUM(good_qty + scrap_qty) AS qty
+              FROM shift_logs
+             WHERE month = ?
+             GROUP BY product_id
+        """, (month,))
+        return {r["product_id"]: r["qty"] for r in cur.fetchall()}
+
     # ──────────────────────────────────────────────────────────
     # Állásidő kezelés
     # ──────────────────────────────────────────────────────────
@@ -318,6 +755,19 @@ class InventoryDB:
         row = cur.fetchone()
         return row["total"] or 0.0
 
+    def list_shift_downtimes(self, machine: str, date: str, shift_type: str) -> dict:
+        """
+        Egy műszak állásidői okonként: {cause: hours}.
+        """
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT cause, SUM(hours) AS hours
+              FROM shift_downtimes
+             WHERE machine = ? AND date = ? AND shift_type = ?
+             GROUP BY cause
+        """, (machine, date, shift_type))
+        return {r["cause"]: r["hours"] for r in cur.fetchall()}
+
 
 
 
@@ -0,0 +1,441 @@
+# modules/manufacturing_module/report_rollup.py
+#
+# Havi előre-aggregált riport adatok (rollup): termékenként és hónaponként a
+# gyártott ('made') és kiszállított ('delivered') mennyiség és súly.
+#   - gyártott: monthly_rollup a production_inventory.db-ben, a shift_logs
+#     változásait triggerek vezetik át,
+#   - kiszállított: delivery_rollup a delivery_notes.db-ben (delivery_note_db.
+#     ensure_rollup), a tételek és a szállítási dátum változásait szintén
+#     triggerek vezetik át – így a szállítólevéllel egy tranzakcióban íródik,
+#     és a törlés/módosítás is levonódik,
+#   - a kapcsolathoz csatolt ("dn") szállítólevél adatbázissal a rollup_facts
+#     ideiglenes nézet adja a kettőt együtt; mindkét rész csak mennyiséget tárol,
+#     a súly a lekérdezéskor számolódik az aktuális egységsúlyból (egységsúly
+#     változás után sem marad eltérés),
+#   - rebuild() mindent újraszámol a nyers táblákból, egy tranzakcióban.
+# A termékadatok (vevő, üzemlánc, egységsúly) kis dimenziótáblában vannak
+# lemásolva a products.db-ből.
+
+import sqlite3
+import os
+
+from ..product_module.weights import kg_per_unit
+from ..delivery_module import delivery_note_db
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_DB = os.path.abspath(os.path.join(BASE_DIR, os.pardir, "product_module", "products.db"))
+DELIV_DB    = os.path.abspath(os.path.join(BASE_DIR, os.pardir, "delivery_module", "delivery_notes.db"))
+
+# A rollup séma verziója (rollup_meta 'schema_version'); régebbi adatbázisnál a
+# monthly_rollup és triggerei egyszer újraépülnek.
+#   1: 'made' és 'delivered' sorok súllyal együtt a monthly_rollup-ban
+#   2: csak 'made' sorok, csak mennyiség (a súly a rollup_facts nézetben számolódik)
+SCHEMA_VERSION = 2
+_MADE_TRIGGERS = ("trg_shift_logs_rollup_ins", "trg_shift_logs_rollup_del",
+                  "trg_shift_logs_rollup_upd")
+
+
+def _plant_list(uzem_lanc) -> list[str]:
+    return [p.strip() for p in (uzem_lanc or "").split(",") if p.strip()]
+
+
+class ReportRollup:
+    def __init__(self, conn: sqlite3.Connection = None,
+                 products_db: str = None, delivery_db: str = None,
+                 ensure_schema: bool = True):
+        # Alapból az InventoryDB kapcsolatát használjuk (az hozza létre a shift_logs táblát);
+        # az InventoryDB a saját kapcsolatát adja át
+        if conn is None:
+            from .inventory_db import InventoryDB
+            conn = InventoryDB().conn
+        self.conn        = conn
+        self.products_db = products_db or PRODUCTS_DB
+        self.delivery_db = delivery_db or DELIV_DB
+        self.has_deliveries = False   # csatolva van-e a delivery_rollup ("dn" séma)
+        if ensure_schema:
+            self._ensure_tables()
+        self._attach_deliveries(ensure_schema)
+
+    def _ensure_tables(self):
+        cur = self.conn.cursor()
+
+        # 0) meta kulcsok: séma verzió, a dimenzió forrásának (products.db) bélyege
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_meta (
+            key    TEXT PRIMARY KEY,
+            value  TEXT
+        )
+        """)
+        self._migrate()
+
+        # 1) gyártott mennyiség: hónap × termék
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_rollup (
+            month       TEXT    NOT NULL,   -- 'YYYY-MM'
+            kind        TEXT    NOT NULL,   -- 'made'
+            product_id  INTEGER NOT NULL,
+            qty         REAL    NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, kind, product_id)
+        ) WITHOUT ROWID
+        """)
+
+        # 2) termék dimenzió (products.db másolat a riporthoz szükséges mezőkkel)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_products (
+            product_id        INTEGER PRIMARY KEY,
+            megnevezes        TEXT,
+            cikkszam          TEXT,
+            customer          TEXT,
+            suly              REAL,
+            suly_mertekegyseg TEXT,
+            unit_weight       REAL NOT NULL DEFAULT 0   -- 1 db súlya kg-ban
+        )
+        """)
+
+        # 3) termék ↔ üzem kapcsolótábla (az uzem_lanc vesszős lista szétbontva)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS rollup_product_plants (
+            plant_key   TEXT    NOT NULL,   -- kisbetűs üzemnév a szűréshez
+            product_id  INTEGER NOT NULL,
+            plant       TEXT    NOT NULL,
+            PRIMARY KEY (plant_key, product_id)
+        ) WITHOUT ROWID
+        """)
+
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_monthly_rollup_kind_month
+                ON monthly_rollup(kind, month)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_monthly_rollup_product
+                ON monthly_rollup(product_id, month)
+        """)
+        # üzem szerinti csoportosításhoz és a termék sorainak cseréjéhez
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS idx_rollup_product_plants_product
+                ON rollup_product_plants(product_id, plant)
+        """)
+
+        # 4) shift_logs → monthly_rollup ('made') triggerek: csak mennyiség
+        made = """
+            INSERT INTO monthly_rollup (month, kind, product_id, qty)
+            VALUES (substr({r}.date, 1, 7), 'made', {r}.product_id,
+                    {sign}({r}.good_qty + {r}.scrap_qty))
+            ON CONFLICT(month, kind, product_id) DO UPDATE SET
+              qty = qty + excluded.qty;
+        """
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_shift_logs_rollup_ins
+            AFTER INSERT ON shift_logs
+            BEGIN {made.format(r="NEW", sign="")} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_shift_logs_rollup_del
+            AFTER DELETE ON shift_logs
+            BEGIN {made.format(r="OLD", sign="-")} END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_shift_logs_rollup_upd
+            AFTER UPDATE OF date, product_id, good_qty, scrap_qty ON shift_logs
+            BEGIN
+              {made.format(r="OLD", sign="-")}
+              {made.format(r="NEW", sign="")}
+            END
+        """)
+        self.conn.commit()
+
+        # Első indulás: ha még üres a rollup, de van napló, töltsük fel
+        has_rollup = cur.execute("SELECT 1 FROM monthly_rollup LIMIT 1").fetchone()
+        has_logs   = cur.execute("SELECT 1 FROM shift_logs LIMIT 1").fetchone()
+        if has_logs and not has_rollup:
+            self.rebuild()
+
+    def _migrate(self):
+        """
+        Régebbi séma verziónál a monthly_rollup és a triggerei eldobása (a tábla
+        származtatott adat: utána az első indulás szerinti rebuild tölti fel).
+        Verzió egyezésnél csak egy kulcs olvasás.
+        """
+        row = self.conn.execute(
+            "SELECT value FROM rollup_meta WHERE key = 'schema_version'").fetchone()
+        if row is not None and int(row[0]) >= SCHEMA_VERSION:
+            return
+        with self.conn:
+            for trg in _MADE_TRIGGERS:
+                self.conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+            self.conn.execute("DROP TABLE IF EXISTS monthly_rollup")
+            self.conn.execute("""
+                INSERT OR REPLACE INTO rollup_meta (key, value) VALUES ('schema_version', ?)
+            """, (str(SCHEMA_VERSION),))
+
+    def _attach_deliveries(self, ensure_schema: bool):
+        """
+        A szállítólevél adatbázis csatolása ("dn") és a rollup_facts nézet:
+        gyártott a monthly_rollup-ból, kiszállított a dn.delivery_rollup-ból.
+        Nem létező szállítólevél adatbázisnál csak a gyártott rész látszik.
+        """
+        attached = {r["name"] for r in self.conn.execute("PRAGMA database_list")}
+        if "dn" not in attached and os.path.exists(self.delivery_db):
+            self.conn.execute("ATTACH DATABASE ? AS dn", (self.delivery_db,))
+            attached.add("dn")
+        if "dn" in attached:
+            if ensure_schema:
+                delivery_note_db.ensure_rollup(self.conn, "dn")
+            self.has_deliveries = self.conn.execute(
+                "SELECT 1 FROM dn.sqlite_master WHERE type = 'table' AND name = 'delivery_rollup'"
+            ).fetchone() is not None
+        delivered = """
+            UNION ALL
+            SELECT d.month, 'delivered', d.product_id, d.qty,
+                   d.qty * COALESCE(rp.unit_weight, 0)
+              FROM dn.delivery_rollup d
+              LEFT JOIN main.rollup_products rp ON rp.product_id = d.product_id
+        """ if self.has_deliveries else ""
+        self.conn.execute("DROP VIEW IF EXISTS temp.rollup_facts")
+        self.conn.execute(f"""
+            CREATE TEMP VIEW rollup_facts AS
+            SELECT m.month, m.kind, m.product_id, m.qty,
+                   m.qty * COALESCE(rp.unit_weight, 0) AS weight
+              FROM main.monthly_rollup m
+              LEFT JOIN main.rollup_products rp ON rp.product_id = m.product_id
+            {delivered}
+        """)
+
+    # ──────────────────────────────────────────────────────────
+    # Termék dimenzió
+    # ──────────────────────────────────────────────────────────
+
+    def _product_rows(self, product_id: int = None):
+        if not os.path.exists(self.products_db):
+            return []
+        con = sqlite3.connect(self.products_db)
+        con.row_factory = sqlite3.Row
+        sql = """
+            SELECT id, megnevezes, cikkszam, vevo_nev, uzem_lanc, suly, suly_mertekegyseg
+              FROM products
+        """
+        params = ()
+        if product_id is not None:
+            sql += " WHERE id = ?"
+            params = (product_id,)
+        rows = con.execute(sql, params).fetchall()
+        con.close()
+        return rows
+
+    def products_stamp(self):
+        """A products.db (és WAL fájlja) módosítási ideje és mérete szövegként, vagy None."""
+        parts = []
+        for p in (self.products_db, self.products_db + "-wal"):
+            try:
+                st = os.stat(p)
+                parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+            except OSError:
+                parts.append("-")
+        return None if parts[0] == "-" else "|".join(parts)
+
+    def sync_products(self):
+        """
+        Ha a products.db a legutóbbi átmásolás óta változott (új, átnevezett, törölt
+        termék), a teljes dimenzió újratöltése; különben csak egy bélyeg összevetés.
+        A riport lekérdezések előtt hívódik, így a dimenzió a katalógust követi.
+        """
+        stamp = self.products_stamp()
+        if stamp is None:
+            return
+        row = self.conn.execute(
+            "SELECT value FROM rollup_meta WHERE key = 'products_stamp'").fetchone()
+        if row is not None and row[0] == stamp:
+            return
+        rows = self._product_rows()
+        with self.conn:
+            self._replace_products(rows)
+            self._set_stamp(stamp)
+
+    def _set_stamp(self, stamp):
+        self.conn.execute("""
+            INSERT OR REPLACE INTO rollup_meta (key, value) VALUES ('products_stamp', ?)
+        """, (stamp,))
+
+    def _store_products(self, rows):
+        cur = self.conn.cursor()
+        cur.executemany("""
+            INSERT OR REPLACE INTO rollup_products
+              (product_id, megnevezes, cikkszam, customer, suly, suly_mertekegyseg, unit_weight)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (r["id"], r["megnevezes"], r["cikkszam"], r["vevo_nev"],
+             r["suly"], r["suly_mertekegyseg"], kg_per_unit(r["suly"], r["suly_mertekegyseg"]))
+            for r in rows
+        ])
+        cur.executemany("DELETE FROM rollup_product_plants WHERE product_id = ?",
+                        [(r["id"],) for r in rows])
+        cur.executemany("""
+            INSERT OR IGNORE INTO rollup_product_plants (plant_key, product_id, plant)
+            VALUES (?, ?, ?)
+        """, [
+            (p.lower(), r["id"], p)
+            for r in rows for p in _plant_list(r["uzem_lanc"])
+        ])
+
+    def ensure_product(self, product_id: int):
+        """
+        Ha a termék még nincs a dimenzióban, átmásolja a products.db-ből
+        (a riport így a termék nevét és egységsúlyát is látja).
+        """
+        if product_id is None:
+            return
+        row = self.conn.execute(
+            "SELECT 1 FROM rollup_products WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        if row is None:
+            self._store_products(self._product_rows(product_id))
+            self.conn.commit()
+
+    def ensure_products(self, product_ids):
+        """Több termék egyszerre: a hiányzókat egyetlen products.db olvasással pótolja."""
+        ids = {pid for pid in product_ids if pid is not None}
+        if not ids:
+            return
+        known = {r["product_id"] for r in self.conn.execute(
+            "SELECT product_id FROM rollup_products")}
+        missing = ids - known
+        if missing:
+            self._store_products([r for r in self._product_rows() if r["id"] in missing])
+            self.conn.commit()
+
+    def refresh_products(self):
+        """A teljes termék dimenzió újratöltése a products.db-ből."""
+        stamp, rows = self.products_stamp(), self._product_rows()
+        with self.conn:
+            self._replace_products(rows)
+            self._set_stamp(stamp)
+
+    def _replace_products(self, rows):
+        self.conn.execute("DELETE FROM rollup_product_plants")
+        self.conn.execute("DELETE FROM rollup_products")
+        self._store_products(rows)
+
+    # ──────────────────────────────────────────────────────────
+    # Karbantartás
+    # ──────────────────────────────────────────────────────────
+
+    def rebuild(self):
+        """
+        Teljes újraszámolás egy tranzakcióban: termék dimenzió, gyártás (shift_logs)
+        és kiszállítás (dn.delivery_rollup) a nyers táblákból. Hiba esetén semmi sem
+        változik (a csatolt adatbázisra is kiterjedő commit/rollback).
+        """
+        stamp, rows = self.products_stamp(), self._product_rows()
+        with self.conn:
+            self._replace_products(rows)
+            self._set_stamp(stamp)
+            self._rebuild_made()
+            if self.has_deliveries:
+                delivery_note_db.rebuild_rollup(self.conn, "dn")
+
+    def _rebuild_made(self):
+        cur = self.conn.cursor()
+        cur.execute("DELETE FROM monthly_rollup")
+        cur.execute("""
+            INSERT INTO monthly_rollup (month, kind, product_id, qty)
+            SELECT substr(sl.date, 1, 7), 'made', sl.product_id,
+                   SUM(sl.good_qty + sl.scrap_qty)
+              FROM shift_logs sl
+             WHERE length(sl.date) >= 7
+             GROUP BY substr(sl.date, 1, 7), sl.product_id
+        """)
+
+    # ──────────────────────────────────────────────────────────
+    # Lekérdezések
+    # ──────────────────────────────────────────────────────────
+
+    def months(self) -> list[str]:
+        self.sync_products()
+        cur = self.conn.execute("SELECT DISTINCT month FROM rollup_facts ORDER BY month")
+        return [r["month"] for r in cur.fetchall()]
+
+    def month_report(self, month: str, plant: str = None) -> list[dict]:
+        """
+        Egy hónap termékenként: név, cikkszám, egységsúly, gyártott és kiszállított
+        mennyiség/súly. plant: üzemnév szűrés (pl. 'Öntöde'), kis-nagybetű független.
+        """
+        self.sync_products()
+        sql = """
+            SELECT r.product_id,
+                   rp.megnevezes, rp.cikkszam, rp.customer,
+                   rp.suly, rp.suly_mertekegyseg,
+                   SUM(CASE WHEN r.kind = 'made'      THEN r.qty    ELSE 0 END) AS made_qty,
+                   SUM(CASE WHEN r.kind = 'made'      THEN r.weight ELSE 0 END) AS made_weight,
+                   SUM(CASE WHEN r.kind = 'delivered' THEN r.qty    ELSE 0 END) AS delivered_qty,
+                   SUM(CASE WHEN r.kind = 'delivered' THEN r.weight ELSE 0 END) AS delivered_weight
+              FROM rollup_facts r
+              JOIN rollup_products rp ON rp.product_id = r.product_id
+        """
+        params = []
+        if plant:
+            sql += """
+              JOIN rollup_product_plants pp
+                ON pp.product_id = r.product_id AND pp.plant_key = ?
+            """
+            params.append(plant.lower())
+        sql += """
+             WHERE r.month = ?
+             GROUP BY r.product_id
+             ORDER BY r.product_id
+        """
+        params.append(month)
+        return [dict(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def totals(self, month: str, by: str = "customer", plant: str = None) -> list[dict]:
+        """
+        Havi összesítés vevőnként (by='customer') vagy üzemenként (by='plant'):
+        [{key, made_qty, made_weight, delivered_qty, delivered_weight}].
+        """
+        self.sync_products()
+        if by == "plant":
+            key, join, params = "pp.plant", """
+              JOIN rollup_product_plants pp ON pp.product_id = r.product_id
+            """, []
+            if plant:
+                join += " AND pp.plant_key = ?"
+                params.append(plant.lower())
+        else:
+            key, join, params = "rp.customer", "", []
+            if plant:
+                join = """
+              JOIN rollup_product_plants pp
+                ON pp.product_id = r.product_id AND pp.plant_key = ?
+                """
+                params.append(plant.lower())
+        cur = self.conn.execute(f"""
+            SELECT {key} AS key,
+                   SUM(CASE WHEN r.kind = 'made'      THEN r.qty    ELSE 0 END) AS made_qty,
+                   SUM(CASE WHEN r.kind = 'made'      THEN r.weight ELSE 0 END) AS made_weight,
+                   SUM(CASE WHEN r.kind = 'delivered' THEN r.qty    ELSE 0 END) AS delivered_qty,
+                   SUM(CASE WHEN r.kind = 'delivered' THEN r.weight ELSE 0 END) AS delivered_weight
+              FROM rollup_facts r
+              JOIN rollup_products rp ON rp.product_id = r.product_id
+              {join}
+             WHERE r.month = ?
+             GROUP BY {key}
+             ORDER BY {key}
+        """, params + [month])
+        return [dict(r) for r in cur.fetchall()]
+
+    def year_over_year(self, month: str, plant: str = None) -> dict:
+        """
+        Az adott hónap és az előző év azonos hónapjának összesített súlyai/mennyiségei:
+        {"month": {...}, "prev_month": {...}} – mindkettő made_/delivered_ qty/weight.
+        """
+        prev = f"{int(month[:4]) - 1}{month[4:]}"
+        result = {}
+        for label, m in (("month", month), ("prev_month", prev)):
+            rows = self.month_report(m, plant)
+            result[label] = {
+                "month":            m,
+                "made_qty":         sum(r["made_qty"] for r in rows),
+                "made_weight":      sum(r["made_weight"] for r in rows),
+                "delivered_qty":    sum(r["delivered_qty"] for r in rows),
+                "delivered_weight": sum(r["delivered_weight"] for r in rows),
+            }
+        return result
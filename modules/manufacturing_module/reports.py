@@ -0,0 +1,255 @@
+# modules/manufacturing_module/reports.py
+#
+# Az öntöde riportjai közvetlenül az adatrétegből (ReportRollup, shift_logs),
+# a modules/shared/report_writer streaming írójával – a GUI exportjai és a
+# parancssor ugyanezt használják, látható tábla nélkül:
+#
+#     python -m modules.manufacturing_module.reports monthly 2025-03 -o havi.xlsx
+#     python -m modules.manufacturing_module.reports foundry --date 2025-03 -o muszak.pdf
+#
+# Formátum a kimenet kiterjesztéséből: .html, .csv, .xlsx, .pdf.
+
+import argparse
+import os
+import sqlite3
+import sys
+
+from .inventory_db import InventoryDB
+from . import report_rollup
+from ..shared import cancel, rendering
+from ..shared.report_writer import Column, Report, Section, write_report
+
+COMPANY   = "Dr. Köcher Kft. – Öntöde Üzem"
+LOGO_PATH = os.path.join(rendering.PROJECT_DIR, "logo.png")
+
+# műszakgyártás sorok oszlopai (a tábla oszlopai után az állásidő okok jönnek)
+COL_DATE, COL_OP, COL_MACHINE, COL_NAME, COL_SKU = 0, 1, 2, 3, 4
+COL_SHOTS, COL_PERF, COL_SCRAP_SH, COL_SCRAP = 6, 8, 10, 11
+FOUNDRY_HEADERS = [
+    "Dátum", "Operátor", "Gép", "Termék", "Cikkszám",
+    "Műszak", "Öntött lövés", "Előírt norma", "Teljesítmény (%)",
+    "Jó darabszám", "Selejt lövés", "Selejt (%)", "Aktív munkaidő",
+]
+
+MONTHLY_HEADERS = ["Termék", "Cikkszám", "Db", "Egységnyi súly", "Mértékegység", "Össz súly (kg)"]
+
+
+def perf_color(v):
+    return 'lightgreen' if v >= 0.80 else 'yellow' if v >= 0.60 else 'red'
+
+
+def scrap_color(v):
+    return 'lightgreen' if v <= 0.07 else 'yellow' if v <= 0.10 else 'red'
+
+
+# ──────────────────────────────────────────────────────────
+# Havi riport (rollup)
+# ──────────────────────────────────────────────────────────
+
+def monthly_rows(rows: list, kind: str):
+    """A month_report sorai táblasorként; kind: 'made' vagy 'delivered'."""
+    for row in rows:
+        yield (row["megnevezes"], row["cikkszam"], row[f"{kind}_qty"],
+               row["suly"] or 0, row["suly_mertekegyseg"] or "", row[f"{kind}_weight"])
+
+
+def yoy_text(yoy: dict) -> str:
+    cur, prev = yoy["month"], yoy["prev_month"]
+    return (f"{cur['month']}: gyártott {cur['made_weight']:.2f} kg, "
+            f"kiszállított {cur['delivered_weight']:.2f} kg | "
+            f"{prev['month']}: gyártott {prev['made_weight']:.2f} kg, "
+            f"kiszállított {prev['delivered_weight']:.2f} kg")
+
+
+def monthly_report(rollup, month: str, plant: str = "Öntöde") -> Report:
+    """Havi riport: gyártott és kiszállított termékenként, az előző év azonos hónapjával."""
+    rows = rollup.month_report(month, plant=plant)
+    columns = [Column(h) for h in MONTHLY_HEADERS]
+    sections = [
+        Section(title, columns, monthly_rows(rows, kind), total=5,
+                total_label=f"Összes súly ({title})")
+        for title, kind in (("Gyártott (Öntés)", "made"), ("Kiszállított", "delivered"))
+    ]
+    return Report(f"Havi riport: {month}", sections, company=COMPANY, logo_path=LOGO_PATH,
+                  notes=[yoy_text(rollup.year_over_year(month, plant=plant))])
+
+
+# ──────────────────────────────────────────────────────────
+# Öntödei készlet
+# ──────────────────────────────────────────────────────────
+
+def foundry_products(prod_db: str) -> list:
+    """Az öntöde üzemláncú termékek (id, vevo_nev, megnevezes, cikkszam) vevő és név szerint."""
+    con = sqlite3.connect(prod_db)
+    con.row_factory = sqlite3.Row
+    try:
+        return con.execute("""
+            SELECT id, vevo_nev, megnevezes, cikkszam
+              FROM products
+             WHERE uzem_lanc LIKE '%öntöde%'
+                OR uzem_lanc LIKE '%Öntöde%'
+             ORDER BY vevo_nev, megnevezes
+        """).fetchall()
+    finally:
+        con.close()
+
+
+def stock_rows(prod_db: str, inv_db: InventoryDB, delivery_db) -> tuple[list, list]:
+    """
+    Öntödei készlet táblasorai és kulcsai (product_id):
+    (vevő, termék, cikkszám, gyártott - selejt - kiszállított).
+    """
+    delivered = delivery_db.delivered_by_product()
+    produced  = inv_db.produced_by_product()
+    rows, keys = [], []
+    for p in foundry_products(prod_db):
+        pid = p["id"]
+        rows.append((p["vevo_nev"] or "—", p["megnevezes"], p["cikkszam"],
+                     produced.get(pid, 0.0) - delivered.get(pid, 0.0)))
+        keys.append(pid)
+    return rows, keys
+
+
+# ──────────────────────────────────────────────────────────
+# Műszakgyártások (shift_logs)
+# ──────────────────────────────────────────────────────────
+
+def downtime_causes(conn) -> list:
+    return [r[0] for r in conn.execute("SELECT DISTINCT cause FROM shift_downtimes")]
+
+
+def iter_foundry_rows(prod_db: str, causes: list, inv_db_path: str = None):
+    """
+    Saját kapcsolatokkal (munkaszálon / parancssorból is): műszaknaplónként
+    (napló id, cellaértékek). A termékadatokat termékenként egyszer kérdezzük le.
+    """
+    inv_db = InventoryDB(inv_db_path, ensure_schema=False)
+    con = sqlite3.connect(prod_db)
+    con.row_factory = sqlite3.Row
+    products = {}
+    try:
+        with cancel.watch(inv_db.conn, con):
+            for log in inv_db.list_shift_logs():
+                cancel.check()
+                # Termékadatok – a naplósorba rögzített termék alapján
+                pid = log["product_id"]
+                name, sku, unit, cav = "—", "—", "", 1
+                if pid:
+                    if pid not in products:
+                        products[pid] = con.execute(
+                            "SELECT megnevezes,cikkszam,mennyisegi_egyseg,feszekszam "
+                            "FROM products WHERE id=?", (pid,)
+                        ).fetchone()
+                    prow = products[pid]
+                    if prow:
+                        name = prow["megnevezes"]
+                        sku = prow["cikkszam"]
+                        unit = prow["mennyisegi_egyseg"] or ""
+                        cav = int(prow["feszekszam"] or 1)
+
+                shots = log["shots"]
+                scrap_sh = log["scrap_shots"]
+                total_q = shots * cav
+                good_q = (shots - scrap_sh) * cav
+                scrap_q = scrap_sh * cav
+                scrap_pct = (scrap_q / total_q * 100) if total_q > 0 else 0
+
+                norma = inv_db.get_norm(pid) or 0
+                shift_h = 8.0
+                dt_list = inv_db.list_shift_downtimes(
+                    log["machine"], log["date"], log["shift_type"]
+                )
+                sum_dt = sum(dt_list.values())
+                eff_h = max(0.0, shift_h - sum_dt)
+
+                adj_norm = norma * (eff_h / shift_h) if shift_h > 0 else norma
+                perf_pct = ((shots * cav) / adj_norm) if adj_norm > 0 else 0
+                scrap_frac = scrap_pct / 100.0
+
+                yield log["id"], (
+                    log["date"], log["operator"], log["machine"],
+                    name, sku, log["shift_type"], shots,
+                    norma, perf_pct, f"{good_q} {unit}",
+                    scrap_sh, scrap_frac, f"{eff_h:.2f} h"
+                ) + tuple(dt_list.get(c, 0.0) for c in causes)
+    finally:
+        con.close()
+        inv_db.close()
+
+
+def load_foundry_rows(prod_db: str, causes: list) -> list[tuple]:
+    """Az összes műszaknapló sor listában (a GUI háttérbetöltése)."""
+    return list(iter_foundry_rows(prod_db, causes))
+
+
+def foundry_filter(operator: str = "", machine: str = "", date: str = "",
+                   product: str = "", sku: str = ""):
+    """Sor predikátum a szűrőkből (None, ha nincs szűrés); a tábla proxyja és a parancssor is ezt használja."""
+    product, sku = product.lower(), sku.lower()
+    if not (operator or machine or date or product or sku):
+        return None
+    return lambda row: (
+        (not operator or row[COL_OP] == operator)
+        and (not machine or row[COL_MACHINE] == machine)
+        and (not date or row[COL_DATE].startswith(date))
+        and (not product or product in row[COL_NAME].lower())
+        and (not sku or sku in row[COL_SKU].lower())
+    )
+
+
+def foundry_columns(causes: list) -> list:
+    cols = [Column(h) for h in FOUNDRY_HEADERS + list(causes)]
+    cols[COL_PERF]  = Column(FOUNDRY_HEADERS[COL_PERF], ".1%", perf_color)
+    cols[COL_SCRAP] = Column(FOUNDRY_HEADERS[COL_SCRAP], ".1%", scrap_color)
+    return cols
+
+
+def foundry_report(rows, causes: list) -> Report:
+    """Műszakgyártások riport; rows: cellaérték sorok (bármilyen iterálható)."""
+    return Report("Műszakgyártások áttekintése",
+                  [Section("Műszakgyártások", foundry_columns(causes), rows)],
+                  company=COMPANY, logo_path=LOGO_PATH)
+
+
+# ──────────────────────────────────────────────────────────
+# Parancssor
+# ──────────────────────────────────────────────────────────
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Öntöde riportok exportja (html/csv/xlsx/pdf).")
+    sub = ap.add_subparsers(dest="report", required=True)
+    m = sub.add_parser("monthly", help="havi gyártott/kiszállított riport")
+    m.add_argument("month", help="YYYY-MM")
+    m.add_argument("--plant", default="Öntöde")
+    f = sub.add_parser("foundry", help="műszakgyártások")
+    f.add_argument("--operator", default="")
+    f.add_argument("--machine", default="")
+    f.add_argument("--date", default="", help="dátum előtag, pl. 2025-03")
+    f.add_argument("--product", default="")
+    f.add_argument("--sku", default="")
+    for p in (m, f):
+        p.add_argument("-o", "--output", required=True, help="kimeneti fájl (.html/.csv/.xlsx/.pdf)")
+    args = ap.parse_args(argv)
+
+    inv_db = InventoryDB()
+    try:
+        if args.report == "monthly":
+            report = monthly_report(inv_db.rollup, args.month, args.plant)
+        else:
+            causes = downtime_causes(inv_db.conn)
+            keep = foundry_filter(args.operator, args.machine, args.date, args.product, args.sku)
+            rows = (vals for _, vals in iter_foundry_rows(report_rollup.PRODUCTS_DB, causes)
+                    if keep is None or keep(vals))
+            report = foundry_report(rows, causes)
+        n = write_report(report, args.output, base_url=rendering.PROJECT_DIR)
+    except (ValueError, OSError, ImportError) as e:
+        print(f"Hiba: {e}", file=sys.stderr)
+        return 1
+    finally:
+        inv_db.close()
+    print(f"{n} sor mentve: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# modules/manufacturing_module/shift_import.py
+#
+# Gépi lövésszámláló exportok (CSV, gépenként/műszakonként) tömeges betöltése
+# a shift_logs és shift_downtimes táblákba.
+#
+# A fájlokat soronként olvassuk (nem töltjük be egyben), a fészekszámot egy
+# egyszer felépített termék katalógusból vesszük (a benne nem szereplő termék
+# hibás sor), az írás pedig kötegenként executemany-vel, egyetlen tranzakcióban
+# történik – a feldolgozott sorok nem gyűlnek listába. A már rögzített (gép,
+# dátum, műszak) kombinációkat nem írjuk felül, hanem duplikátumként jelentjük.
+#
+# Elvárt oszlopok (fejléc alapján, ';' vagy ',' elválasztó):
+#   gep, datum, muszak, operator, loves, selejt_loves
+#   opcionális: product_id, allas1_ok, allas1_ora, allas2_ok, allas2_ora, allas3_ok, allas3_ora
+# Angol fejlécek is elfogadottak (machine, date, shift_type, shots, scrap_shots, ...).
+
+import csv
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+from .inventory_db import SHIFT_WINDOWS
+from ..shared import events
+
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_DB = os.path.abspath(os.path.join(BASE_DIR, os.pardir, "product_module", "products.db"))
+
+# fejléc aliasok → belső mezőnév
+HEADER_ALIASES = {
+    "gep": "machine",        "gép": "machine",        "machine": "machine",
+    "datum": "date",         "dátum": "date",         "date": "date",
+    "muszak": "shift_type",  "műszak": "shift_type",  "shift": "shift_type", "shift_type": "shift_type",
+    "operator": "operator",  "operátor": "operator",
+    "loves": "shots",        "lövés": "shots",        "shots": "shots",
+    "selejt_loves": "scrap_shots", "selejt lövés": "scrap_shots", "scrap_shots": "scrap_shots",
+    "product_id": "product_id", "termek_id": "product_id",
+}
+for _i in (1, 2, 3):
+    HEADER_ALIASES[f"allas{_i}_ok"]  = f"cause{_i}"
+    HEADER_ALIASES[f"allas{_i}_ora"] = f"hours{_i}"
+    HEADER_ALIASES[f"cause{_i}"]     = f"cause{_i}"
+    HEADER_ALIASES[f"hours{_i}"]     = f"hours{_i}"
+
+# műszak rövidítések a gépi exportokból
+SHIFT_ALIASES = {
+    "1": "délelőtt", "de": "délelőtt", "délelőtt": "délelőtt", "delelott": "délelőtt",
+    "2": "délután",  "du": "délután",  "délután": "délután",   "delutan": "délután",
+    "3": "éjszaka",  "éj": "éjszaka",  "éjszaka": "éjszaka",   "ejszaka": "éjszaka",
+}
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class ImportResult:
+    logs:       int = 0
+    downtimes:  int = 0
+    duplicates: list = field(default_factory=list)   # [(gép, dátum, műszak)]
+    errors:     list = field(default_factory=list)   # [(fájl, sor, hibaüzenet)]
+
+    def summary(self) -> str:
+        return (f"{self.logs} műszaknapló, {self.downtimes} állásidő rögzítve; "
+                f"{len(self.duplicates)} duplikátum, {len(self.errors)} hibás sor.")
+
+
+def _norm_date(value: str) -> str:
+    value = value.strip().replace(".", "-").rstrip("-")
+    return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+
+
+def _norm_shift(value: str) -> str:
+    shift = SHIFT_ALIASES.get(value.strip().lower())
+    if shift is None or shift not in SHIFT_WINDOWS:
+        raise ValueError(f"ismeretlen műszak: {value!r}")
+    return shift
+
+
+def _to_int(value) -> int:
+    return int(float(str(value).strip().replace(",", "."))) if str(value or "").strip() else 0
+
+
+def _to_float(value) -> float:
+    return float(str(value).strip().replace(",", ".")) if str(value or "").strip() else 0.0
+
+
+def read_counter_file(path: str):
+    """
+    Egy számláló export sorai generátorként: (sorszám, mezők dict) –
+    a fájl soronként olvasva, az elválasztót az első sorból állapítjuk meg.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        delimiter = ";" if first.count(";") >= first.count(",") else ","
+        header = [HEADER_ALIASES.get(h.strip().lower(), h.strip().lower())
+                  for h in next(csv.reader([first], delimiter=delimiter))]
+        for lineno, values in enumerate(csv.reader(f, delimiter=delimiter), start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield lineno, dict(zip(header, values))
+
+
+def read_counter_rows(paths):
+    """Több export sorai egymás után: (fájlnév, sorszám, mezők dict)."""
+    for path in paths:
+        name = os.path.basename(path)
+        for lineno, row in read_counter_file(path):
+            yield name, lineno, row
+
+
+class ShiftImporter:
+    def __init__(self, inv_db, products_db: str = None):
+        self.inv_db      = inv_db
+        self.conn        = inv_db.conn
+        self.products_db = products_db or PRODUCTS_DB
+        self._cavities   = None   # product_id → feszekszam
+        self._products   = {}     # (gép, dátum, műszak) → product_id
+
+    def cavities(self) -> dict:
+        """Fészekszám katalógus, egyetlen products.db lekérdezéssel, importonként egyszer."""
+        if self._cavities is None:
+            self._cavities = {}
+            if os.path.exists(self.products_db):
+                con = sqlite3.connect(self.products_db)
+                self._cavities = {pid: fesz or 0 for pid, fesz in
+                                  con.execute("SELECT id, feszekszam FROM products")}
+                con.close()
+        return self._cavities
+
+    def _product_for(self, machine: str, date: str, shift_type: str):
+        key = (machine, date, shift_type)
+        if key not in self._products:
+            self._products[key] = self.inv_db.shift_product(machine, date, shift_type)
+        return self._products[key]
+
+    def _existing_keys(self, dates) -> set:
+        """A köteg dátumtartományában már rögzített (gép, dátum, műszak) kulcsok."""
+        if not dates:
+            return set()
+        cur = self.conn.execute("""
+            SELECT machine, date, shift_type FROM shift_logs
+             WHERE date BETWEEN ? AND ?
+        """, (min(dates), max(dates)))
+        return {(r["machine"], r["date"], r["shift_type"]) for r in cur.fetchall()}
+
+    def parse(self, rows, result: ImportResult):
+        """
+        A (fájlnév, sorszám, mezők) sorok ellenőrizve, termékkel és fészekszámmal
+        feloldva, generátorként; a hibás sorok a result.errors-ba kerülnek.
+        """
+        cavities = self.cavities()
+        for name, lineno, row in rows:
+            try:
+                machine    = row["machine"].strip()
+                if not machine:
+                    raise ValueError("hiányzó gép")
+                date       = _norm_date(row["date"])
+                shift_type = _norm_shift(row["shift_type"])
+                shots      = _to_int(row.get("shots"))
+                scrap      = _to_int(row.get("scrap_shots"))
+                pid        = (_to_int(row["product_id"]) if (row.get("product_id") or "").strip()
+                              else self._product_for(machine, date, shift_type))
+                if pid is None:
+                    raise ValueError("nem állapítható meg a termék (a műszakban nem futott gyártás)")
+                if pid not in cavities:
+                    raise ValueError(f"ismeretlen termék: {pid}")
+                downtimes = []
+                for i in (1, 2, 3):
+                    cause = (row.get(f"cause{i}") or "").strip()
+                    hours = _to_float(row.get(f"hours{i}"))
+                    if cause and hours > 0:
+                        downtimes.append((cause, hours))
+            except (KeyError, ValueError) as e:
+                result.errors.append((name, lineno, str(e)))
+                continue
+            fesz = cavities[pid]
+            yield {
+                "machine": machine, "date": date, "shift_type": shift_type,
+                "operator": (row.get("operator") or "").strip(),
+                "product_id": pid, "shots": shots, "scrap_shots": scrap,
+                "good_qty": shots * fesz, "scrap_qty": scrap * fesz,
+                "downtimes": downtimes,
+            }
+
+    def import_files(self, paths) -> ImportResult:
+        """
+        Fájlok betöltése. Duplikátum a már rögzített és a fájlokon belül
+        ismétlődő (gép, dátum, műszak) – ezeket kihagyjuk és jelentjük.
+        """
+        return self.import_rows(read_counter_rows(paths))
+
+    def import_rows(self, rows) -> ImportResult:
+        """
+        Már beolvasott (fájlnév, sorszám, mezők) sorok betöltése – import_files,
+        szolgáltatás. A sorok BATCH_SIZE-os kötegekben, egyetlen tranzakcióban íródnak.
+        """
+        result = ImportResult()
+        # érvényes termék csak a katalógusból jöhet: a riport dimenziójában is legyen meg
+        self.inv_db.rollup.ensure_products(self.cavities())
+
+        now    = datetime.now().isoformat(timespec='seconds')
+        seen   = set()
+        totals = {}   # product_id → (jó, selejt)
+        records = self.parse(rows, result)
+        with self.conn:
+            while True:
+                batch = list(islice(records, BATCH_SIZE))
+                if not batch:
+                    break
+                seen |= self._existing_keys({r["date"] for r in batch})
+                fresh = []
+                for r in batch:
+                    key = (r["machine"], r["date"], r["shift_type"])
+                    if key in seen:
+                        result.duplicates.append(key)
+                        continue
+                    seen.add(key)
+                    fresh.append(r)
+                    g, s = totals.get(r["product_id"], (0, 0))
+                    totals[r["product_id"]] = (g + r["good_qty"], s + r["scrap_qty"])
+                self._write(fresh, now, result)
+
+        # termékenként egy összesített esemény (a nyitott készletnézetekhez)
+        for pid, (good, scrap) in totals.items():
+            events.publish(events.ShiftLogged(None, pid, good, scrap))
+        return result
+
+    def _write(self, batch: list, now: str, result: ImportResult):
+        """Egy köteg naplósora és állásideje executemany-vel (a hívó tranzakciójában)."""
+        self.conn.executemany("""
+            INSERT INTO shift_logs
+              (machine, product_id, operator,
+               start_time, end_time, date, shift_type,
+               shots, scrap_shots, good_qty, scrap_qty, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (r["machine"], r["product_id"], r["operator"],
+             f"{r['date']} 00:00:00", f"{r['date']} 23:59:59", r["date"], r["shift_type"],
+             r["shots"], r["scrap_shots"], r["good_qty"], r["scrap_qty"], now)
+            for r in batch
+        ])
+        downtimes = [
+            (r["machine"], r["date"], r["shift_type"], cause, hours)
+            for r in batch for cause, hours in r["downtimes"]
+        ]
+        self.conn.executemany("""
+            INSERT INTO shift_downtimes
+              (machine, date, shift_type, cause, hours)
+            VALUES (?, ?, ?, ?, ?)
+        """, downtimes)
+        result.logs      += len(batch)
+        result.downtimes += len(downtimes)
@@ -0,0 +1,161 @@
+# modules/order_module/labels.py
+#
+# Címkemotor: tetszőleges számú rendeléstétel → dobozonként egy címke →
+# A4 lapok (LABELS_PER_SHEET címke laponként) → egyetlen PDF.
+#
+# A tétel mennyiségét a doboz mennyiség (db/doboz) osztja fel: teli dobozok és
+# a maradék, minden címkén "i / n" dobozszámmal. A címkék lustán (generátorral)
+# készülnek, a PDF CHUNK_SHEETS lapos darabokban renderelődik – egy 500 dobozos
+# szállítmánynál sem épül egyetlen óriási HTML dokumentum. A darabok külön
+# folyamatokban önálló PDF-ek lesznek, és pypdf fűzi őket össze
+# (rendering.write_pdf_parallel), így a WeasyPrint tördelt lapjai sem gyűlnek
+# össze egy folyamatban; pypdf nélkül egymás után, egy folyamatban készülnek,
+# ekkor a kész lapok a PDF kiírásáig a memóriában maradnak.
+#
+#     lines = [LabelLine(order_number="R-12", termek="Fedél", cikkszam="F-1",
+#                        quantity=12000, per_box=24, ...)]
+#     n = write_labels_pdf(lines, "cimkek.pdf", lang="de", logo_uri=uri)
+#
+# A termékenkénti doboz mennyiség a delivery_settings.json "box_qty" kulcsában
+# él (cikkszám → db/doboz), a címkenyomtató ablak menti vissza.
+
+import json
+import math
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from ..product_module.weights import SETTINGS_PATH
+from ..shared import cancel, rendering
+
+LABELS_PER_SHEET = 2     # két címke egy A4 lapon
+CHUNK_SHEETS     = 25    # ennyi lap megy egy renderelési lépésbe
+MAX_LABELS       = 5000  # elírt doboz mennyiség (pl. 1 db/doboz) elleni védelem
+
+TEMPLATES = {"hu": "label_base.html", "de": "label_base_de.html"}
+
+
+@dataclass
+class LabelLine:
+    order_number: str
+    vevo: str
+    termek: str
+    cikkszam: str
+    quantity: float
+    egyseg: str = ""
+    per_box: Optional[float] = None   # None / 0: egy címke a teljes mennyiségre
+    beerkezes: str = ""
+    hatarido: str = ""
+    felulet: str = ""
+    cimzett: str = ""
+    cim: str = ""
+    cim_country: str = ""
+
+
+def label_count(quantity: float, per_box: float = None) -> int:
+    """Hány doboz (címke) kell a mennyiséghez."""
+    if quantity <= 0:
+        return 0
+    if not per_box or per_box <= 0 or per_box >= quantity:
+        return 1
+    return math.ceil(quantity / per_box - 1e-9)
+
+
+def box_quantities(quantity: float, per_box: float = None) -> Iterator[float]:
+    """A dobozok mennyiségei sorban: teli dobozok, a végén a maradék."""
+    n = label_count(quantity, per_box)
+    if n <= 1:
+        if n:
+            yield quantity
+        return
+    for _ in range(n - 1):
+        yield per_box
+    yield quantity - per_box * (n - 1)
+
+
+def iter_labels(lines: Iterable[LabelLine], created: str = None) -> Iterator[dict]:
+    """Címkénként egy sablon szótár (a LabelLine mezői + darab, doboz, dobozok, created)."""
+    created = created or datetime.now().strftime("%Y.%m.%d")
+    for line in lines:
+        base = asdict(line)
+        n = label_count(line.quantity, line.per_box)
+        for i, qty in enumerate(box_quantities(line.quantity, line.per_box), 1):
+            yield dict(base, darab=f"{qty:g}", doboz=i, dobozok=n, created=created)
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_chunks(lines: Iterable[LabelLine], lang: str = "hu", logo_uri: str = "",
+                  created: str = None, chunk_sheets: int = CHUNK_SHEETS,
+                  template_dir: str = None) -> Iterator[str]:
+    """A címkelapok HTML-je CHUNK_SHEETS lapos darabokban (minden darab önálló dokumentum)."""
+    tmpl = rendering.get_template(TEMPLATES.get(lang, TEMPLATES["hu"]), template_dir)
+    for labels in chunked(iter_labels(lines, created), LABELS_PER_SHEET * chunk_sheets):
+        cancel.check()
+        yield tmpl.render(sheets=list(chunked(labels, LABELS_PER_SHEET)), logo_uri=logo_uri)
+
+
+def total_labels(lines: Iterable[LabelLine]) -> int:
+    return sum(label_count(l.quantity, l.per_box) for l in lines)
+
+
+def write_labels_pdf(lines: List[LabelLine], target, lang: str = "hu", logo_uri: str = "",
+                     created: str = None, chunk_sheets: int = CHUNK_SHEETS,
+                     template_dir: str = None) -> int:
+    """Az összes címke egy PDF-be; a címkék számát adja. Túl sok címkénél ValueError."""
+    n = total_labels(lines)
+    if n == 0:
+        raise ValueError("Nincs nyomtatandó címke.")
+    if n > MAX_LABELS:
+        raise ValueError(f"Túl sok címke ({n}, legfeljebb {MAX_LABELS}) – ellenőrizd a doboz mennyiségeket.")
+    rendering.write_pdf_parallel(
+        render_chunks(lines, lang, logo_uri, created, chunk_sheets, template_dir), target)
+    return n
+
+
+# ──────────────────────────────────────────────────────────
+# Doboz mennyiségek (delivery_settings.json)
+# ──────────────────────────────────────────────────────────
+
+def _read_settings(settings_path: str) -> dict:
+    try:
+        with open(settings_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def box_sizes(settings_path: str = None) -> dict:
+    """Cikkszám → db/doboz a beállításokból (hibás értékek kihagyva)."""
+    out = {}
+    for k, v in _read_settings(settings_path or SETTINGS_PATH).get("box_qty", {}).items():
+        try:
+            out[k] = float(v)
+        except (TypeError, ValueError):
+            pass
+    return out
+
+
+def save_box_sizes(sizes: dict, settings_path: str = None) -> None:
+    """A megadott cikkszámok doboz mennyiségének mentése; a többi beállítás megmarad."""
+    path = settings_path or SETTINGS_PATH
+    data = _read_settings(path)
+    box = data.setdefault("box_qty", {})
+    for k, v in sizes.items():
+        if k and v and v > 0:
+            box[k] = v
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
@@ -1,6 +1,9 @@
 import sqlite3
 import os
-from PyQt5.QtCore import Qt
+
+from .order_module import ensure_indexes
+from ..delivery_module.delivery_note_db import ensure_indexes as ensure_delivery_indexes
+from ..shared import cancel, events
 
 BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
 ORDERS_DB    = os.path.join(BASE_DIR, "orders.db")
@@ -15,15 +18,22 @@ class OrderDB:
         self.prod_conn.row_factory = sqlite3.Row
         self.deliv_conn = sqlite3.connect(DELIV_DB)
         self.deliv_conn.row_factory = sqlite3.Row
+        ensure_indexes(self.conn)
+        ensure_delivery_indexes(self.deliv_conn)
+
+    def close(self):
+        for conn in (self.conn, self.prod_conn, self.deliv_conn):
+            conn.close()
 
-    def get_all_order_items(self) -> list[dict]:
+    def get_all_order_items(self, order_id: int = None) -> list[dict]:
         """
-        Visszaad minden rendelés-tételt az orders.db-ből,
-        majd minden sorhoz hozzáfűzi a products.db-ből a termék-,
-        ügyfél- és szállítási adatokat.
+        Visszaad minden rendelés-tételt az orders.db-ből (order_id megadásakor
+        csak az adott rendelését), majd minden sorhoz hozzáfűzi a products.db-ből
+        a termék-, ügyfél- és szállítási adatokat.
         """
-        # 1) Lekérdezzük az összes rendelés-tételt
-        cur = self.conn.execute("""
+        # 1) Lekérdezzük a rendelés-tételeket
+        where, params = ("WHERE o.id = ?", (order_id,)) if order_id is not None else ("", ())
+        cur = self.conn.execute(f"""
             SELECT
               o.id               AS order_id,
               o.megrendeles_szam AS order_number,
@@ -40,12 +50,14 @@ class OrderDB:
               oi.mennyisegi_egyseg    AS unit
             FROM orders o
             JOIN order_items oi ON o.id = oi.order_id
+            {where}
             ORDER BY o.id, oi.product_id
-        """)
+        """, params)
         base_rows = [dict(r) for r in cur.fetchall()]
 
         result = []
         for r in base_rows:
+            cancel.check()
             # 2) Kiegészítjük a products.db-ből
             p = self.prod_conn.execute("""
                 SELECT
@@ -274,6 +286,8 @@ class OrderDB:
              WHERE order_id = ? AND product_id = ?
         """, (qty, order_id, product_id))
         self.conn.commit()
+        events.publish(events.OrderItemChanged(
+            order_id, product_id, self.get_remaining_qty(order_id, product_id)))
 
     def get_remaining_qty(self, order_id: int, product_id: int) -> float:
         cur = self.conn.execute("""
@@ -290,6 +304,7 @@ class OrderDB:
              WHERE order_id = ? AND product_id = ?
         """, (order_id, product_id))
         self.conn.commit()
+        events.publish(events.OrderChanged(order_id))
 
     def count_items(self, order_id: int) -> int:
         cur = self.conn.execute("""
@@ -302,6 +317,7 @@ class OrderDB:
     def delete_order(self, order_id: int):
         self.conn.execute("DELETE FROM orders WHERE id = ?", (order_id,))
         self.conn.commit()
+        events.publish(events.OrderDeleted(order_id))
 
 
 
@@ -4,13 +4,29 @@ from typing import List
 import sqlite3
 import os
 
+from ..shared import cancel, events
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "orders.db")
 
-def init_order_db() -> None:
-    """Létrehozza vagy frissíti az orders adatbázist a szükséges mezőkkel."""
-    need_init = not os.path.exists(DB_PATH)
-    with sqlite3.connect(DB_PATH) as conn:
+def ensure_indexes(conn) -> None:
+    """
+    A rendelés táblák indexei. A fennmaradó tételek listája (WHERE fennmarado_mennyiseg > 0)
+    részleges indexet kap, így csak a nyitott tételeket olvassa, rendelés szerint rendezve.
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='order_items'").fetchone():
+        return
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_order_items_pending
+            ON order_items(order_id) WHERE fennmarado_mennyiseg > 0
+    """)
+    conn.commit()
+
+def init_order_db(path: str = None) -> None:
+    """Létrehozza vagy frissíti az orders adatbázist a szükséges mezőkkel (path: alapból DB_PATH)."""
+    path = path or DB_PATH
+    need_init = not os.path.exists(path)
+    with sqlite3.connect(path) as conn:
         c = conn.cursor()
         if need_init:
             c.execute("""
@@ -19,8 +35,11 @@ def init_order_db() -> None:
                     vevo_nev TEXT,
                     vevo_cim TEXT,
                     vevo_adoszam TEXT,
+                    vevo_eu_adoszam TEXT DEFAULT '',
+                    vevo_orszag TEXT DEFAULT '',
                     szallitasi_nev TEXT,
                     szallitasi_cim TEXT,
+                    szallitasi_orszag TEXT DEFAULT '',
                     beerkezes TEXT,
                     megrendeles_szam TEXT,
                     szall_hatarido TEXT,
@@ -49,11 +68,15 @@ def init_order_db() -> None:
                 "vevo_adoszam": "TEXT",
                 "szallitasi_nev": "TEXT",
                 "szallitasi_cim": "TEXT",
+                "vevo_eu_adoszam": "TEXT",
+                "vevo_orszag": "TEXT",
+                "szallitasi_orszag": "TEXT",
             }
             for col_name, col_type in needed_cols.items():
                 if col_name not in existing_cols:
                     c.execute(f"ALTER TABLE orders ADD COLUMN {col_name} {col_type} DEFAULT ''")
             conn.commit()
+        ensure_indexes(conn)
 
 @dataclass
 class Tetel:
@@ -90,20 +113,40 @@ def _row_to_order(row, tetelek_rows) -> Order:
 def osszes_megrendeles() -> List[Order]:
     if not os.path.exists(DB_PATH):
         return []
-    with sqlite3.connect(DB_PATH) as conn:
+    with sqlite3.connect(DB_PATH) as conn, cancel.watch(conn):
         c = conn.cursor()
         c.execute("""SELECT id, vevo_nev, vevo_cim, vevo_adoszam, szallitasi_nev, szallitasi_cim,
                      beerkezes, megrendeles_szam, szall_hatarido, megjegyzes FROM orders""")
         orders_rows = c.fetchall()
 
+        # az összes tétel egy lekérdezéssel, rendelésenként csoportosítva
+        tetelek = {}
+        c.execute("""SELECT order_id, product_id, qty, fennmarado_mennyiseg, mennyisegi_egyseg
+                     FROM order_items ORDER BY order_id""")
+        for order_id, *tetel_row in c.fetchall():
+            tetelek.setdefault(order_id, []).append(tetel_row)
+
         orders = []
         for o_row in orders_rows:
-            order_id = o_row[0]
-            c.execute("SELECT product_id, qty, fennmarado_mennyiseg, mennyisegi_egyseg FROM order_items WHERE order_id = ?", (order_id,))
-            tetel_rows = c.fetchall()
-            orders.append(_row_to_order(o_row, tetel_rows))
+            cancel.check()
+            orders.append(_row_to_order(o_row, tetelek.get(o_row[0], [])))
         return orders
 
+def megrendeles(order_id: int) -> Order | None:
+    """Egy megrendelés a tételeivel (pl. változásesemény után az egy sor frissítéséhez)."""
+    if not os.path.exists(DB_PATH):
+        return None
+    with sqlite3.connect(DB_PATH) as conn:
+        c = conn.cursor()
+        c.execute("""SELECT id, vevo_nev, vevo_cim, vevo_adoszam, szallitasi_nev, szallitasi_cim,
+                     beerkezes, megrendeles_szam, szall_hatarido, megjegyzes FROM orders WHERE id = ?""",
+                  (order_id,))
+        o_row = c.fetchone()
+        if o_row is None:
+            return None
+        c.execute("SELECT product_id, qty, fennmarado_mennyiseg, mennyisegi_egyseg FROM order_items WHERE order_id = ?", (order_id,))
+        return _row_to_order(o_row, c.fetchall())
+
 def uj_id() -> int:
     if not os.path.exists(DB_PATH):
         return 1
@@ -128,6 +171,7 @@ def hozzaad_megrendeles(o: Order) -> None:
                 VALUES (?, ?, ?, ?, ?)
             """, (o.id, t.product_id, t.qty, t.fennmarado_mennyiseg, t.mennyisegi_egyseg))
         conn.commit()
+    events.publish(events.OrderChanged(o.id))
 
 def frissit_megrendeles(o: Order) -> None:
     with sqlite3.connect(DB_PATH) as conn:
@@ -146,6 +190,7 @@ def frissit_megrendeles(o: Order) -> None:
                 VALUES (?, ?, ?, ?, ?)
             """, (o.id, t.product_id, t.qty, t.fennmarado_mennyiseg, t.mennyisegi_egyseg))
         conn.commit()
+    events.publish(events.OrderChanged(o.id))
 
 def torol_megrendeles(rid: int) -> None:
     with sqlite3.connect(DB_PATH) as conn:
@@ -153,6 +198,7 @@ def torol_megrendeles(rid: int) -> None:
         c.execute("DELETE FROM order_items WHERE order_id = ?", (rid,))
         c.execute("DELETE FROM orders WHERE id = ?", (rid,))
         conn.commit()
+    events.publish(events.OrderDeleted(rid))
 
 def frissit_megrendeles_tetel(order_id: int, product_id: int, uj_fennmarado: float) -> None:
     """Frissíti az adott megrendelés adott termékének fennmaradó mennyiségét."""
@@ -164,6 +210,7 @@ def frissit_megrendeles_tetel(order_id: int, product_id: int, uj_fennmarado: flo
             WHERE order_id = ? AND product_id = ?
         """, (uj_fennmarado, order_id, product_id))
         conn.commit()
+    events.publish(events.OrderItemChanged(order_id, product_id, uj_fennmarado))
 
 
 
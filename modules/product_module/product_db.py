@@ -4,43 +4,59 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "products.db")
 
-def init_db():
-    if os.path.exists(DB_PATH):
+# a termék tábla később bővült vevői és szállítási mezőkkel (régi adatbázisnál pótoljuk)
+CUSTOMER_COLUMNS = [
+    "customer_name", "customer_address", "customer_tax_number", "customer_eu_tax_number",
+    "customer_country", "shipping_name", "shipping_address", "shipping_country",
+]
+
+def create_tables(conn):
+    """A products és arak tábla (hiányzó oszlopok pótlásával) és az árak indexe."""
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY,
+            vevo_nev TEXT,
+            megnevezes TEXT,
+            cikkszam TEXT,
+            mennyisegi_egyseg TEXT,
+            felulet TEXT,
+            alapanyagok TEXT,
+            suly REAL,
+            suly_mertekegyseg TEXT,
+            uzem_lanc TEXT,
+            feszekszam INTEGER,
+            csokosuly REAL,
+            csokosuly_mertekegyseg TEXT,
+            foto TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS arak (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            ar REAL,
+            valuta TEXT,
+            kezdet TEXT,
+            veg TEXT,
+            FOREIGN KEY(product_id) REFERENCES products(id)
+        )
+    """)
+    existing = {row[1] for row in c.execute("PRAGMA table_info(products)")}
+    for col in CUSTOMER_COLUMNS:
+        if col not in existing:
+            c.execute(f"ALTER TABLE products ADD COLUMN {col} TEXT DEFAULT ''")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_arak_product_kezdet ON arak(product_id, kezdet)")
+    conn.commit()
+
+def init_db(path: str = None):
+    path = path or DB_PATH
+    if os.path.exists(path):
         print("Adatbázis már létezik, nem hozom létre újra.")
         return
 
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE products (
-                id INTEGER PRIMARY KEY,
-                vevo_nev TEXT,
-                megnevezes TEXT,
-                cikkszam TEXT,
-                mennyisegi_egyseg TEXT,
-                felulet TEXT,
-                alapanyagok TEXT,
-                suly REAL,
-                suly_mertekegyseg TEXT,
-                uzem_lanc TEXT,
-                feszekszam INTEGER,
-                csokosuly REAL,
-                csokosuly_mertekegyseg TEXT,
-                foto TEXT
-            )
-        """)
-        c.execute("""
-            CREATE TABLE arak (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_id INTEGER,
-                ar REAL,
-                valuta TEXT,
-                kezdet TEXT,
-                veg TEXT,
-                FOREIGN KEY(product_id) REFERENCES products(id)
-            )
-        """)
-        conn.commit()
+    with sqlite3.connect(path) as conn:
+        create_tables(conn)
         print("Adatbázis létrehozva.")
 
 if __name__ == "__main__":
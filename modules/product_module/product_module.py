@@ -2,8 +2,13 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from typing import List, Optional
+import copy
 import sqlite3
 import os
+import threading
+
+from ..shared import cancel
+from .product_db import CUSTOMER_COLUMNS
 
 # Az abszolút útvonal használata az adatbázis eléréséhez:
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -53,10 +58,29 @@ def _str_to_list(s: Optional[str]) -> List[str]:
         return []
     return [x.strip() for x in s.split(",") if x.strip()]
 
+_indexed_dbs = set()
+
+def _ensure_schema(conn) -> None:
+    """
+    Régi adatbázis pótlása (adatbázisonként egyszer ellenőrizve): a vevői és szállítási
+    oszlopok, és az árak termékenkénti, kezdet szerint rendezett lekéréséhez index.
+    """
+    if DB_PATH in _indexed_dbs:
+        return
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+    for col in CUSTOMER_COLUMNS:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE products ADD COLUMN {col} TEXT DEFAULT ''")
+    # a (product_id, kezdet) index a régi (product_id) indexet is kiváltja
+    conn.execute("DROP INDEX IF EXISTS idx_arak_product_id")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_arak_product_kezdet ON arak(product_id, kezdet)")
+    _indexed_dbs.add(DB_PATH)
+
 def osszes_termek() -> List[Termek]:
     if not os.path.exists(DB_PATH):
         return []
-    with sqlite3.connect(DB_PATH) as conn:
+    with sqlite3.connect(DB_PATH) as conn, cancel.watch(conn):
+        _ensure_schema(conn)
         c = conn.cursor()
         c.execute("""SELECT id, vevo_nev, megnevezes, cikkszam, mennyisegi_egyseg, felulet,
                      alapanyagok, suly, suly_mertekegyseg, uzem_lanc, feszekszam,
@@ -66,17 +90,23 @@ def osszes_termek() -> List[Termek]:
                      FROM products""")
         products_rows = c.fetchall()
 
+        # az összes ár egy lekérdezéssel, termékenként kezdet szerint (idx_arak_product_kezdet)
+        arak_by_product = {}
+        c.execute("SELECT product_id, ar, valuta, kezdet, veg FROM arak ORDER BY product_id, kezdet")
+        for product_id, ar, valuta, kezdet, veg in c.fetchall():
+            arak_by_product.setdefault(product_id, []).append(
+                ArSor(ar=ar, valuta=valuta, kezdet=kezdet, veg=veg))
+
         termekek = []
         for row in products_rows:
+            cancel.check()
             (id_, vevo_nev, megnevezes, cikkszam, mennyisegi_egyseg, felulet,
              alapanyagok, suly, suly_mertekegyseg, uzem_lanc, feszekszam,
              csokosuly, csokosuly_mertekegyseg, foto,
              customer_name, customer_address, customer_tax_number, customer_eu_tax_number, customer_country,
              shipping_name, shipping_address, shipping_country) = row
 
-            c.execute("SELECT ar, valuta, kezdet, veg FROM arak WHERE product_id = ? ORDER BY kezdet", (id_,))
-            arak_rows = c.fetchall()
-            arak = [ArSor(ar=ar, valuta=valuta, kezdet=kezdet, veg=veg) for ar, valuta, kezdet, veg in arak_rows]
+            arak = arak_by_product.get(id_, [])
 
             termekek.append(
                 Termek(
@@ -107,6 +137,47 @@ def osszes_termek() -> List[Termek]:
             )
         return termekek
 
+# termékkatalógus gyorsítótár: DB_PATH → (fájl bélyeg, termékek)
+_catalog = {}
+_catalog_lock = threading.Lock()
+
+def _db_stamp() -> tuple:
+    """A products.db (és WAL fájlja) módosítási ideje és mérete – ha változik, a katalógus elavult."""
+    stamp = []
+    for p in (DB_PATH, DB_PATH + "-wal"):
+        try:
+            st = os.stat(p)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def _masolat(t: Termek) -> Termek:
+    """A Termek saját példánya: a listák és az ársorok is újak (az uj_ar helyben módosít)."""
+    m = copy.copy(t)
+    m.alapanyagok = list(t.alapanyagok)
+    m.uzem_lanc   = list(t.uzem_lanc)
+    m.arak        = [ArSor(a.ar, a.valuta, a.kezdet, a.veg) for a in t.arak]
+    return m
+
+def termek_katalogus() -> List[Termek]:
+    """
+    osszes_termek() gyorsítótárazva: amíg az adatbázis fájl nem változott, a már
+    felépített listából ad másolatot. Induláskor a háttér-bemelegítés tölti fel.
+    A hívó a saját Termek példányait kapja: a módosítás nem hat a gyorsítótárra,
+    sem más ablakok listájára – tartósan a mentés (frissit_termek) rögzíti.
+    """
+    stamp = _db_stamp()
+    with _catalog_lock:
+        hit = _catalog.get(DB_PATH)
+        if hit is None or hit[0] != stamp:
+            hit = _catalog[DB_PATH] = (stamp, osszes_termek())
+    return [_masolat(t) for t in hit[1]]
+
+def _invalidate_catalog() -> None:
+    with _catalog_lock:
+        _catalog.pop(DB_PATH, None)
+
 def hozzaad_termek(t: Termek) -> None:
     with sqlite3.connect(DB_PATH) as conn:
         c = conn.cursor()
@@ -152,6 +223,7 @@ def hozzaad_termek(t: Termek) -> None:
                 INSERT INTO arak (product_id, ar, valuta, kezdet, veg) VALUES (?, ?, ?, ?, ?)
             """, (t.id, ar.ar, ar.valuta, ar.kezdet, ar.veg))
         conn.commit()
+    _invalidate_catalog()
 
 def frissit_termek(t: Termek) -> None:
     with sqlite3.connect(DB_PATH) as conn:
@@ -198,6 +270,23 @@ def frissit_termek(t: Termek) -> None:
                 INSERT INTO arak (product_id, ar, valuta, kezdet, veg) VALUES (?, ?, ?, ?, ?)
             """, (t.id, ar.ar, ar.valuta, ar.kezdet, ar.veg))
         conn.commit()
+    _invalidate_catalog()
+
+def frissit_cimek(tids: List[int], adatok: dict) -> None:
+    """
+    Vevői és szállítási adatok tömeges beállítása a megadott termékeken
+    (adatok: a CUSTOMER_COLUMNS közül a módosítandó mezők).
+    """
+    cols = [c for c in CUSTOMER_COLUMNS if c in adatok]
+    if not cols or not tids:
+        return
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.executemany(
+            f"UPDATE products SET {', '.join(f'{c} = ?' for c in cols)} WHERE id = ?",
+            [[adatok[c] for c in cols] + [tid] for tid in tids]
+        )
+        conn.commit()
+    _invalidate_catalog()
 
 def torol_termek(tid: int) -> None:
     with sqlite3.connect(DB_PATH) as conn:
@@ -205,6 +294,7 @@ def torol_termek(tid: int) -> None:
         c.execute("DELETE FROM arak WHERE product_id = ?", (tid,))
         c.execute("DELETE FROM products WHERE id = ?", (tid,))
         conn.commit()
+    _invalidate_catalog()
 
 def aktualis_ar(t: Termek, nap: Optional[date] = None) -> Optional[tuple[float, str]]:
     nap = nap or date.today()
@@ -0,0 +1,127 @@
+# modules/product_module/weights.py
+#
+# Mértékegység-helyes súlyszámítás: a termékek súlyát (suly + suly_mertekegyseg,
+# csokosuly + csokosuly_mertekegyseg) egyszer kg-ra normáljuk, utána a
+# szállítólevelek és riportok tételeire csak egy szorzás + összegzés marad.
+# A raklapok önsúlya a delivery_settings.json-ból jön.
+
+import json
+import math
+import os
+import sqlite3
+
+BASE_DIR      = os.path.dirname(os.path.abspath(__file__))
+DB_PATH       = os.path.join(BASE_DIR, "products.db")
+SETTINGS_PATH = os.path.abspath(os.path.join(BASE_DIR, os.pardir, os.pardir, "delivery_settings.json"))
+
+# 1 egység hány kg
+UNIT_FACTORS = {
+    "kg":    1.0,
+    "g":     0.001,
+    "gr":    0.001,
+    "gramm": 0.001,
+    "dkg":   0.01,
+    "dag":   0.01,
+    "t":     1000.0,
+    "tonna": 1000.0,
+}
+
+# Raklap önsúlyok (kg), ha a beállításokban nincs megadva
+DEFAULT_PALLET_TARE = {
+    "euro":    24.0,
+    "egyutas": 14.0,
+}
+
+
+def unit_factor(unit) -> float:
+    """
+    A mértékegység kg-szorzója. Üres vagy ismeretlen egységnél kg-ot feltételezünk
+    (a korábbi számítás is így kezelte).
+    """
+    key = (unit or "").strip().lower().rstrip(".")
+    return UNIT_FACTORS.get(key, 1.0)
+
+
+def kg_per_unit(weight, unit) -> float:
+    """Egy darab súlya kg-ban."""
+    return (weight or 0.0) * unit_factor(unit)
+
+
+def pallet_tare(settings_path: str = None) -> dict:
+    """
+    Raklap önsúlyok kg-ban: {"euro": ..., "egyutas": ...}.
+    A delivery_settings.json "pallet_tare_kg" kulcsa felülírja az alapértékeket.
+    """
+    tare = dict(DEFAULT_PALLET_TARE)
+    try:
+        with open(settings_path or SETTINGS_PATH, encoding="utf-8") as f:
+            tare.update({k: float(v) for k, v in json.load(f).get("pallet_tare_kg", {}).items()})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return tare
+
+
+class WeightTable:
+    """
+    Termék id → 1 db súlya és csokorsúlya kg-ban. Egyszer épül fel,
+    utána a tételsorok súlya csak kikeresés + szorzás.
+    """
+
+    def __init__(self, unit_kg: dict, cluster_kg: dict = None):
+        self._unit_kg    = unit_kg
+        self._cluster_kg = cluster_kg or {}
+
+    @classmethod
+    def from_products(cls, products) -> "WeightTable":
+        """Termek objektumok listájából (osszes_termek())."""
+        unit_kg, cluster_kg = {}, {}
+        for p in products:
+            unit_kg[p.id]    = kg_per_unit(p.suly, p.suly_mertekegyseg)
+            # üres csokorsúly egységnél a termék súlyegysége érvényes (ahogy a termék űrlap menti)
+            cluster_kg[p.id] = kg_per_unit(p.csokosuly, p.csokosuly_mertekegyseg or p.suly_mertekegyseg)
+        return cls(unit_kg, cluster_kg)
+
+    @classmethod
+    def from_db(cls, db_path: str = None) -> "WeightTable":
+        """Egyetlen lekérdezéssel a products.db-ből."""
+        db_path = db_path or DB_PATH
+        if not os.path.exists(db_path):
+            return cls({})
+        con = sqlite3.connect(db_path)
+        con.row_factory = sqlite3.Row
+        rows = con.execute("""
+            SELECT id, suly, suly_mertekegyseg, csokosuly, csokosuly_mertekegyseg
+              FROM products
+        """).fetchall()
+        con.close()
+        return cls(
+            {r["id"]: kg_per_unit(r["suly"], r["suly_mertekegyseg"]) for r in rows},
+            {r["id"]: kg_per_unit(r["csokosuly"], r["csokosuly_mertekegyseg"] or r["suly_mertekegyseg"])
+             for r in rows},
+        )
+
+    def unit_kg(self, product_id) -> float:
+        """1 db súlya kg-ban (ismeretlen terméknél 0)."""
+        return self._unit_kg.get(product_id, 0.0)
+
+    def cluster_kg(self, product_id) -> float:
+        """Csokorsúly (egy lövés) kg-ban (ismeretlen terméknél 0)."""
+        return self._cluster_kg.get(product_id, 0.0)
+
+    def line_weights(self, lines) -> list[float]:
+        """lines: (product_id, qty) párok → tételenkénti súly kg-ban."""
+        get = self._unit_kg.get
+        return [(qty or 0) * get(pid, 0.0) for pid, qty in lines]
+
+    def net_weight(self, lines) -> float:
+        """A tételek összsúlya kg-ban."""
+        return math.fsum(self.line_weights(lines))
+
+    @staticmethod
+    def gross_weight(net: float, pallets: dict, tare: dict = None) -> float:
+        """
+        Bruttó súly: nettó + raklapok önsúlya.
+        pallets: {"euro": db, "egyutas": db}; tare alapból a beállításokból.
+        """
+        tare = tare if tare is not None else pallet_tare()
+        return net + math.fsum(n * tare.get(kind, 0.0) for kind, n in pallets.items())
@@ -0,0 +1,180 @@
+# modules/service/backend.py
+#
+# Az adatréteg belépési pontja a GUI számára: közvetlen adatbázis elérés vagy
+# a helyi szolgáltatás (modules/service/server.py). Konfiguráció környezeti
+# változóval, mint az ERP_SQL_* beállításoknál:
+#
+#     ERP_SERVICE=127.0.0.1:8765   szolgáltatás mód
+#     ERP_SERVICE_TOKEN=…          a szolgáltatás közös titka (hálózati címnél kötelező)
+#     (nincs megadva)              közvetlen mód – a modulok a saját SQLite fájljukat nyitják
+#
+#     backend.products().termek_katalogus()
+#     backend.orders().hozzaad_megrendeles(order)
+#     self.inv_db = backend.inventory()
+#     backend.order_items().decrease_item_qty(order_id, product_id, qty)
+#
+# A tiszta számító függvények (pl. aktualis_ar) és az adatosztályok (Termek,
+# Order) továbbra is közvetlenül a modulokból jönnek.
+#
+# Az adatréteg moduljai és a kliens (http.client) csak az első hozzáféréskor
+# töltődnek be: a mode() / address() olcsó környezeti változó vizsgálat, így a
+# főablak indulását nem lassítja.
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..manufacturing_module.inventory_db import InventoryDB
+    from ..manufacturing_module.shift_import import ImportResult
+    from .client import ServiceClient
+
+_lock       = threading.Lock()
+_client     = None
+_configured = None   # configure() értéke; None: a környezeti változó dönt
+_token      = None   # configure() tokenje; None: ERP_SERVICE_TOKEN
+
+
+def configure(address: str = None, token: str = None) -> None:
+    """
+    Mód beállítása kódból (pl. tesztben): "host:port" vagy "" a közvetlen módhoz;
+    None: ERP_SERVICE. A token (None: ERP_SERVICE_TOKEN) a szolgáltatás közös titka.
+    """
+    global _configured, _token, _client
+    with _lock:
+        _configured, _token = address, token
+        _client = None
+
+
+def address() -> str:
+    if _configured is not None:
+        return _configured
+    return os.environ.get("ERP_SERVICE", "").strip()
+
+
+def token() -> str:
+    if _token is not None:
+        return _token
+    return os.environ.get("ERP_SERVICE_TOKEN", "").strip()
+
+
+def mode() -> str:
+    return "service" if address() else "direct"
+
+
+def client() -> ServiceClient:
+    global _client
+    from .client import ServiceClient
+    host, _, port = address().rpartition(":")
+    with _lock:
+        if _client is None or (_client.host, _client.port) != (host, int(port)):
+            _client = ServiceClient(host, int(port), token=token())
+        return _client
+
+
+def products():
+    """product_module vagy a szolgáltatás "product" névtere (ugyanazokkal a függvénynevekkel)."""
+    if address():
+        return client().namespace("product")
+    from ..product_module import product_module
+    return product_module
+
+
+def orders():
+    if address():
+        return client().namespace("order")
+    from ..order_module import order_module
+    return order_module
+
+
+def order_items():
+    """OrderDB példány (nyitott tételek, kiszállított mennyiség levonása) vagy a szolgáltatás "order" névtere."""
+    if address():
+        return client().namespace("order")
+    from ..order_module.order_db import OrderDB
+    return OrderDB()
+
+
+def delivery():
+    """DeliveryModule példány (delivery_db-vel) vagy a szolgáltatás "delivery" névtere."""
+    if address():
+        from .client import RemoteDelivery
+        return RemoteDelivery(client(), "delivery")
+    from ..delivery_module.delivery_module import DeliveryModule
+    return DeliveryModule()
+
+
+def delivery_notes():
+    """
+    A kiszállítások listájának olvasása: DeliveryNoteDB példány (saját kapcsolat, a hívó
+    zárja) vagy a szolgáltatás "delivery_notes" névtere.
+    """
+    if address():
+        return client().namespace("delivery_notes")
+    from ..delivery_module.delivery_note_db import DeliveryNoteDB
+    return DeliveryNoteDB()
+
+
+def inventory():
+    """InventoryDB példány vagy a szolgáltatás "inventory" névtere (a conn itt nem érhető el)."""
+    if address():
+        return client().namespace("inventory")
+    from ..manufacturing_module.inventory_db import InventoryDB
+    return InventoryDB()
+
+
+def rollup():
+    """Havi összesítő (InventoryDB.rollup) vagy a szolgáltatás "rollup" névtere."""
+    if address():
+        return client().namespace("rollup")
+    from ..manufacturing_module.inventory_db import InventoryDB
+    return InventoryDB().rollup
+
+
+def stock_rows(inv_db: InventoryDB = None) -> tuple[list, list]:
+    """
+    Öntödei készlet táblasorai és kulcsai (reports.stock_rows); szolgáltatás módban
+    ott számolva (inv_db: közvetlen módban a hívó kapcsolata).
+    """
+    if address():
+        return tuple(client().namespace("report").stock_rows())
+    from ..manufacturing_module import reports
+    from ..product_module import product_module
+    from ..delivery_module.delivery_note_db import DeliveryNoteDB
+    from ..manufacturing_module.inventory_db import InventoryDB
+    notes = DeliveryNoteDB()
+    try:
+        return reports.stock_rows(product_module.DB_PATH, inv_db or InventoryDB(), notes)
+    finally:
+        notes.conn.close()
+
+
+def foundry_rows(causes: list) -> list:
+    """Műszakgyártás sorok (reports.load_foundry_rows): (napló id, cellaértékek) – munkaszálról is."""
+    if address():
+        return client().namespace("report").foundry_rows(causes)
+    from ..manufacturing_module import reports
+    from ..product_module import product_module
+    return reports.load_foundry_rows(product_module.DB_PATH, causes)
+
+
+def import_counters(paths, inv_db: InventoryDB = None) -> ImportResult:
+    """
+    Számláló exportok importja. A fájlok ezen a gépen vannak: beolvasás itt,
+    szolgáltatás módban a feloldás és az írás a szolgáltatásban fut (inv_db:
+    közvetlen módban a hívó kapcsolata).
+    """
+    from ..manufacturing_module.shift_import import ShiftImporter, ImportResult, read_counter_rows
+    if address():
+        rows = [list(r) for r in read_counter_rows(paths)]
+        return ImportResult(**client().namespace("inventory").import_counter_rows(rows))
+    from ..manufacturing_module.inventory_db import InventoryDB
+    return ShiftImporter(inv_db or InventoryDB()).import_files(paths)
+
+
+def sync_events() -> None:
+    """Szolgáltatás módban a más munkaállomások írásainak eseményei (közvetlen módban nincs teendő)."""
+    if address():
+        client().sync_events()
@@ -0,0 +1,190 @@
+# modules/service/client.py
+#
+# Kliens a helyi szolgáltatáshoz (modules/service/server.py). Szálanként egy
+# tartós HTTP kapcsolat (a GUI szál és a betöltő szálak párhuzamosan hívhatnak).
+#
+#     client = ServiceClient("127.0.0.1", 8765)      # token=…: a szolgáltatás közös titka
+#     orders = client.call("order.osszes_megrendeles")
+#     with client.batch() as b:                  # egy kérésben megy el
+#         p1 = b.call("inventory.get_norm", 12)
+#         p2 = b.call("inventory.get_tooling", 12)
+#     p1.value, p2.value
+#
+# A válaszokkal érkező változáseseményeket a kliens helyben újra kiküldi
+# (events.publish), így a nyitott ablakok ugyanúgy frissülnek, mint közvetlen
+# módban – a más munkaállomásokon történt írásokról is (sync_events()).
+
+import builtins
+import http.client
+import json
+import logging
+import sqlite3
+import threading
+
+from ..shared import events
+from . import protocol
+
+log = logging.getLogger("erp.service")
+
+
+class ServiceError(RuntimeError):
+    """A szolgáltatás oldali hiba, amelynek típusa itt nem ismert."""
+
+
+def _exception(err: dict) -> Exception:
+    # az ismert (beépített és sqlite3) kivételek eredeti típusukkal jönnek vissza
+    name, message = err.get("type", ""), err.get("message", "")
+    cls = getattr(sqlite3, name, None) or getattr(builtins, name, None)
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        return cls(message)
+    return ServiceError(f"{name}: {message}")
+
+
+class Pending:
+    """Egy kötegelt hívás eredménye; a köteg elküldése után olvasható."""
+
+    def __init__(self, op: str):
+        self.op = op
+        self._done = False
+        self._value = None
+        self._error = None
+
+    def _set(self, res: dict):
+        self._done = True
+        if "error" in res:
+            self._error = _exception(res["error"])
+        else:
+            self._value = protocol.decode(res.get("value"))
+
+    @property
+    def value(self):
+        if not self._done:
+            raise RuntimeError(f"A köteg még nincs elküldve: {self.op}")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class Batch:
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+
+    def call(self, op: str, *args, **kwargs) -> Pending:
+        p = Pending(op)
+        self._calls.append((p, {"op": op, "args": protocol.encode(args),
+                                "kwargs": protocol.encode(kwargs)}))
+        return p
+
+    def flush(self):
+        calls, self._calls = self._calls, []
+        if calls:
+            results = self._client._post([c for _, c in calls])
+            for (p, _), res in zip(calls, results):
+                p._set(res)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.flush()
+        return False
+
+
+class ServiceClient:
+
+    def __init__(self, host: str, port: int, timeout: float = 10.0, token: str = None):
+        self.host, self.port, self.timeout = host, port, timeout
+        self._headers = {"Content-Type": "application/json"}
+        if token:
+            self._headers[protocol.TOKEN_HEADER] = token
+        self._local = threading.local()
+        self._lock  = threading.Lock()
+        self._seq   = None   # az utoljára látott eseménysorszám
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _request(self, body: bytes) -> dict:
+        # egy újrapróbálás: a szerver bezárhatta a tétlen kapcsolatot
+        for attempt in (0, 1):
+            conn = self._conn()
+            try:
+                conn.request("POST", "/call", body, self._headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise ServiceError(f"HTTP {resp.status}: {data[:200]!r}")
+        return json.loads(data)
+
+    def _post(self, calls: list) -> list:
+        with self._lock:
+            since = self._seq
+        reply = self._request(json.dumps({"calls": calls, "since": since}).encode("utf-8"))
+        self._deliver(since, reply)
+        return reply["results"]
+
+    def _deliver(self, since, reply: dict):
+        with self._lock:
+            # párhuzamos kérések: csak az adhatja ki az eseményeket, amelyik elsőként lép előre
+            if self._seq != since or reply["seq"] == since:
+                return
+            self._seq = reply["seq"]
+        if reply.get("reset"):
+            log.warning("Elveszett változásesemények (a szolgáltatás naplója túlfutott)")
+        for e in reply.get("events", ()):
+            events.publish(protocol.decode(e))
+
+    def call(self, op: str, *args, **kwargs):
+        with self.batch() as b:
+            p = b.call(op, *args, **kwargs)
+        return p.value
+
+    def batch(self) -> Batch:
+        return Batch(self)
+
+    def sync_events(self):
+        """A más munkaállomásokon történt írások eseményeinek lekérése (időzítőből)."""
+        self._post([])
+
+    def namespace(self, prefix: str) -> "RemoteNamespace":
+        return RemoteNamespace(self, prefix)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RemoteNamespace:
+    """Modul / osztály helyettesítő: ns.fuggveny(*args) → client.call("prefix.fuggveny", *args)."""
+
+    def __init__(self, client: ServiceClient, prefix: str):
+        self._client = client
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        op = f"{self._prefix}.{name}"
+        return lambda *args, **kwargs: self._client.call(op, *args, **kwargs)
+
+
+class RemoteDelivery(RemoteNamespace):
+    """DeliveryModule helyettesítő: a delivery_db műveletei ugyanabban a névtérben vannak."""
+
+    @property
+    def delivery_db(self):
+        return self
@@ -0,0 +1,78 @@
+# modules/service/protocol.py
+#
+# A helyi szolgáltatás (modules/service/server.py) üzenetformátuma: JSON
+# HTTP POST /call törzsben.
+#
+#   kérés:   {"calls": [{"op": "order.megrendeles", "args": [12], "kwargs": {}}, ...],
+#             "since": 41}
+#   válasz:  {"results": [{"value": ...} | {"error": {"type": "ValueError", "message": "..."}}],
+#             "events": [...], "seq": 57, "reset": false}
+#
+# Egy kérés több hívást is vihet (kötegelés); a hívások sorrendben futnak, és
+# egyik hibája nem állítja meg a többit. A "since" az ügyfél által utoljára
+# látott eseménysorszám – a válasz az azóta (bármelyik munkaállomásról)
+# keletkezett változáseseményeket is visszaadja.
+#
+# Hitelesítés: ha a szolgáltatás tokennel fut (ERP_SERVICE_TOKEN), minden /call
+# kérésnek a TOKEN_HEADER fejlécben kell vinnie ugyanazt a közös titkot.
+#
+# A modulok dataclass-ai (Termek, Order, ...) és az események {"__type__": név}
+# mezős objektumként utaznak; a nem szöveg kulcsú szótárak (pl. {product_id: qty})
+# és a sqlite3.Row sorok is oda-vissza alakíthatók.
+
+import dataclasses
+import sqlite3
+
+from ..product_module.product_module import Termek, ArSor
+from ..order_module.order_module import Order, Tetel
+from ..shared import events
+
+TOKEN_HEADER = "X-ERP-Token"
+
+TYPES = {cls.__name__: cls for cls in (
+    Termek, ArSor, Order, Tetel,
+    events.OrderItemChanged, events.OrderChanged, events.OrderDeleted,
+    events.DeliveryNoteCreated, events.DeliveryNoteItemAdded, events.ShiftLogged,
+)}
+
+EVENT_TYPES = tuple(cls for cls in TYPES.values() if cls.__module__ == events.__name__)
+
+
+def encode(obj):
+    """Python érték → JSON-ba írható érték."""
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if dataclasses.is_dataclass(obj) and type(obj).__name__ in TYPES:
+        out = {f.name: encode(getattr(obj, f.name)) for f in dataclasses.fields(obj)}
+        out["__type__"] = type(obj).__name__
+        return out
+    if isinstance(obj, sqlite3.Row):
+        return {k: encode(obj[k]) for k in obj.keys()}
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: encode(v) for k, v in obj.items()}
+        return {"__items__": [[encode(k), encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, (list, tuple, set)):
+        return [encode(v) for v in obj]
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", "replace")
+    raise TypeError(f"Nem küldhető típus: {type(obj).__name__}")
+
+
+def decode(obj):
+    """encode() visszafelé: a JSON-ból olvasott értékből Python érték."""
+    if isinstance(obj, list):
+        return [decode(v) for v in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if "__items__" in obj and len(obj) == 1:
+        return {_key(decode(k)): decode(v) for k, v in obj["__items__"]}
+    if "__type__" in obj:
+        cls = TYPES[obj["__type__"]]
+        return cls(**{k: decode(v) for k, v in obj.items() if k != "__type__"})
+    return {k: decode(v) for k, v in obj.items()}
+
+
+def _key(k):
+    # a JSON tömbből jött kulcs lehet lista – szótárkulcsnak tuple kell
+    return tuple(k) if isinstance(k, list) else k
@@ -0,0 +1,437 @@
+# modules/service/server.py
+#
+# Opcionális helyi szolgáltatás több munkaállomáshoz. Az irodai gépek és a
+# műhelyterminálok nem nyitják meg közvetlenül az SQLite fájlokat: a
+# szolgáltatás birtokolja a kapcsolatokat és a gyorsítótárakat, a kliensek
+# JSON-t küldenek HTTP-n (formátum: modules/service/protocol.py).
+#
+#   - Minden adatbázis művelet egyetlen DB szálon fut, így a munkaállomások
+#     írásai nem versenyeznek a zárakért (nincs "database is locked").
+#   - Kötegelés: egy kérés több hívást vihet, és amíg a DB szál dolgozik, az
+#     összes közben beérkezett kérés a következő körben együtt fut le; egy körön
+#     belül az azonos olvasó hívások (pl. öt terminál gépállapot lekérése) csak
+#     egyszer futnak.
+#   - A termékkatalógus és a megrendelések listája kész JSON szövegként
+#     gyorsítótárban van, a fájl bélyegével ellenőrizve és íráskor törölve.
+#   - Az írások változáseseményei (modules/shared/events) sorszámozott naplóba
+#     kerülnek; minden válasz visszaadja a kliens által még nem látottakat.
+#
+#     python -m modules.service.server --port 8765
+#     ERP_SERVICE=127.0.0.1:8765 python main.py        # a GUI szolgáltatás módban
+#
+# Hálózati (nem localhost) címen csak közös titokkal indul: a szolgáltatás és a
+# munkaállomások ugyanazt az ERP_SERVICE_TOKEN értéket kapják (vagy --token),
+# a token nélküli / hibás tokenű kérésekre 401 a válasz.
+#
+#     ERP_SERVICE_TOKEN=… python -m modules.service.server --host 192.168.1.10
+#     ERP_SERVICE=192.168.1.10:8765 ERP_SERVICE_TOKEN=… python main.py
+#
+# Tesztekhez localhoston: server = start_in_thread(port=0); server.port
+
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ..product_module import product_module
+from ..order_module import order_module
+from ..order_module.order_db import OrderDB
+from ..delivery_module.delivery_module import DeliveryModule
+from ..delivery_module.delivery_note_db import DeliveryNoteDB
+from ..manufacturing_module.inventory_db import InventoryDB
+from ..manufacturing_module.shift_import import ShiftImporter
+from ..manufacturing_module import reports
+from ..shared import events
+from . import protocol
+
+log = logging.getLogger("erp.service")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BATCH    = 100    # egy DB körben legfeljebb ennyi kérés
+EVENT_LOG    = 2000   # ennyi eseményt őrzünk a kliensek lekérdezéséhez
+
+PRODUCT_OPS = {
+    "osszes_termek", "termek_katalogus", "hozzaad_termek", "frissit_termek", "torol_termek",
+    "frissit_cimek",
+}
+ORDER_OPS = {
+    "osszes_megrendeles", "megrendeles", "uj_id",
+    "hozzaad_megrendeles", "frissit_megrendeles", "torol_megrendeles", "frissit_megrendeles_tetel",
+}
+# rendelés tételek (OrderDB): nyitott tételek és a kiszállított mennyiség levonása
+ORDER_ITEM_OPS = {"get_all_order_items", "get_remaining_qty", "decrease_item_qty"}
+DELIVERY_OPS = {
+    "generate_delivery_note_for_order",
+    "get_existing_numbers", "exists_delivery_note_number",
+    "insert_delivery_note_with_number", "insert_delivery_note_item", "create_delivery_note",
+}
+# kiszállítások listája (delivery_note_db.DeliveryNoteDB)
+DELIVERY_NOTE_OPS = {
+    "get_delivery_note", "get_all_delivery_notes", "get_all_delivery_note_items",
+    "get_all_delivery_note_rows", "delivered_by_product",
+}
+INVENTORY_OPS = {
+    "add_production", "log_movement", "get_current_stock",
+    "set_tooling", "get_tooling", "set_norm", "get_norm",
+    "has_active_job", "get_active_job_product", "active_jobs", "data_version", "catalog_version", "machine_board",
+    "start_job", "stop_job", "job_at", "product_at", "jobs_between", "machine_utilization",
+    "list_operators", "add_operator", "add_shift_log", "shift_product", "list_shift_logs",
+    "get_monthly_production", "add_downtime", "get_shift_downtime", "list_shift_downtimes",
+    "import_counter_rows", "adjust_stock", "update_shift_counts",
+    "downtime_causes", "list_logged_machines",
+}
+# havi összesítő (InventoryDB.rollup)
+ROLLUP_OPS = {"months", "month_report", "totals", "year_over_year", "rebuild"}
+# több adatbázist olvasó riportok (modules/manufacturing_module/reports)
+REPORT_OPS = {"stock_rows", "foundry_rows"}
+
+# olvasó műveletek: egy körön belül összevonhatók; minden más írásnak számít
+READ_OPS = {
+    "product.osszes_termek", "product.termek_katalogus",
+    "order.osszes_megrendeles", "order.megrendeles",
+    "order.get_all_order_items", "order.get_remaining_qty",
+    "delivery.get_existing_numbers", "delivery.exists_delivery_note_number",
+    "delivery_notes.get_delivery_note", "delivery_notes.get_all_delivery_notes",
+    "delivery_notes.get_all_delivery_note_items", "delivery_notes.get_all_delivery_note_rows",
+    "delivery_notes.delivered_by_product",
+    "inventory.get_current_stock", "inventory.get_tooling", "inventory.get_norm",
+    "inventory.has_active_job", "inventory.get_active_job_product", "inventory.active_jobs",
+    "inventory.data_version", "inventory.catalog_version", "inventory.machine_board", "inventory.job_at", "inventory.product_at",
+    "inventory.jobs_between", "inventory.machine_utilization", "inventory.list_operators",
+    "inventory.shift_product", "inventory.list_shift_logs", "inventory.get_monthly_production",
+    "inventory.get_shift_downtime", "inventory.list_shift_downtimes",
+    "inventory.downtime_causes", "inventory.list_logged_machines",
+    "rollup.months", "rollup.month_report", "rollup.totals", "rollup.year_over_year",
+    "report.stock_rows", "report.foundry_rows",
+}
+
+
+# teljes listák: gyorsítótár kulcs (adatbázis fájl) és a betöltő függvény
+CACHED_LISTS = {
+    "product.osszes_termek":    (lambda: product_module.DB_PATH, lambda: product_module.termek_katalogus()),
+    "product.termek_katalogus": (lambda: product_module.DB_PATH, lambda: product_module.termek_katalogus()),
+    "order.osszes_megrendeles": (lambda: order_module.DB_PATH,   lambda: order_module.osszes_megrendeles()),
+}
+
+
+class _RawJSON(str):
+    """Már JSON-ná alakított érték (a válaszba változatlanul kerül)."""
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _result_json(res: dict) -> str:
+    value = res.get("value")
+    if isinstance(value, _RawJSON):
+        return '{"value": ' + value + '}'
+    return _dumps(res)
+
+
+def _file_stamp(path: str) -> tuple:
+    stamp = []
+    for p in (path, path + "-wal"):
+        try:
+            st = os.stat(p)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+class Backend:
+    """A szolgáltatás adatoldala: DB szál, kapcsolatok, gyorsítótárak, eseménynapló."""
+
+    def __init__(self):
+        # egy szál: az sqlite kapcsolatok ehhez a szálhoz kötöttek, az írások sorban futnak
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="erp-service-db")
+        self._inventory = None
+        self._delivery  = None
+        self._notes     = None
+        self._order_db  = None
+        self._lists     = {}        # adatbázis fájl → (fájl bélyeg, lista JSON-ként)
+        self._writes    = 0
+        self._lock   = threading.Lock()
+        self._events = deque(maxlen=EVENT_LOG)   # (sorszám, kódolt esemény)
+        self._seq    = 0
+        for event_type in protocol.EVENT_TYPES:
+            events.subscribe(event_type, self._record)
+
+    # ── DB szálon ──────────────────────────────────────────
+
+    @property
+    def inventory(self) -> InventoryDB:
+        if self._inventory is None:
+            self._inventory = InventoryDB()
+        return self._inventory
+
+    @property
+    def delivery(self) -> DeliveryModule:
+        if self._delivery is None:
+            self._delivery = DeliveryModule()
+        return self._delivery
+
+    @property
+    def delivery_notes(self) -> DeliveryNoteDB:
+        if self._notes is None:
+            self._notes = DeliveryNoteDB()
+        return self._notes
+
+    @property
+    def order_db(self) -> OrderDB:
+        if self._order_db is None:
+            self._order_db = OrderDB()
+        return self._order_db
+
+    def _cached_list(self, op: str):
+        path_fn, load = CACHED_LISTS[op]
+        path = path_fn()
+        stamp = _file_stamp(path)
+        hit = self._lists.get(path)
+        if hit is None or hit[0] != stamp:
+            hit = self._lists[path] = (stamp, _RawJSON(_dumps(protocol.encode(load()))))
+        return hit[1]
+
+    def dispatch(self, op: str, args: list, kwargs: dict):
+        ns, _, name = op.partition(".")
+        if op not in READ_OPS:
+            self._writes += 1
+            if ns == "product":
+                self._lists.pop(product_module.DB_PATH, None)
+            elif ns == "order":
+                self._lists.pop(order_module.DB_PATH, None)
+        if ns == "product" and name in PRODUCT_OPS:
+            fn = product_module.termek_katalogus if name == "osszes_termek" else getattr(product_module, name)
+        elif ns == "order" and name in ORDER_OPS:
+            fn = getattr(order_module, name)
+        elif ns == "order" and name in ORDER_ITEM_OPS:
+            fn = getattr(self.order_db, name)
+        elif ns == "delivery" and name in DELIVERY_OPS:
+            target = self.delivery if name == "generate_delivery_note_for_order" else self.delivery.delivery_db
+            fn = getattr(target, name)
+        elif ns == "delivery_notes" and name in DELIVERY_NOTE_OPS:
+            fn = getattr(self.delivery_notes, name)
+        elif ns == "inventory" and name in INVENTORY_OPS:
+            if name == "data_version":
+                # a PRAGMA data_version a saját kapcsolat írásait nem látja – ezeket külön számoljuk
+                return [self.inventory.data_version(), self._writes]
+            if name == "import_counter_rows":
+                # a fájlokat a kliens olvassa be, a feloldás és az írás itt fut
+                return dataclasses.asdict(ShiftImporter(self.inventory).import_rows(*args, **kwargs))
+            fn = getattr(self.inventory, name)
+        elif ns == "rollup" and name in ROLLUP_OPS:
+            fn = getattr(self.inventory.rollup, name)
+        elif ns == "report" and name in REPORT_OPS:
+            if name == "foundry_rows":
+                return reports.load_foundry_rows(product_module.DB_PATH, *args, **kwargs)
+            return reports.stock_rows(product_module.DB_PATH, self.inventory, self.delivery_notes)
+        else:
+            raise KeyError(f"Ismeretlen művelet: {op}")
+        return fn(*args, **kwargs)
+
+    def run_batch(self, batch: list) -> list:
+        """Kérések hívásai sorban; az azonos olvasások (írásig) egyszer futnak."""
+        memo, out = {}, []
+        for calls in batch:
+            results = []
+            for call in calls:
+                op = call.get("op", "")
+                key = None
+                if op in READ_OPS:
+                    key = (op, json.dumps(call.get("args", [])), json.dumps(call.get("kwargs", {}), sort_keys=True))
+                    if key in memo:
+                        results.append(memo[key])
+                        continue
+                try:
+                    if op in CACHED_LISTS:
+                        res = {"value": self._cached_list(op)}
+                    else:
+                        value = self.dispatch(op, protocol.decode(call.get("args", [])),
+                                              protocol.decode(call.get("kwargs", {})))
+                        res = {"value": protocol.encode(value)}
+                except Exception as e:
+                    log.warning("Hívás hiba %s: %s", op, e)
+                    res = {"error": {"type": type(e).__name__, "message": str(e)}}
+                if key is None:
+                    memo.clear()   # írás után az olvasások újra futnak
+                else:
+                    memo[key] = res
+                results.append(res)
+            out.append(results)
+        return out
+
+    # ── eseménynapló ───────────────────────────────────────
+
+    def _record(self, event):
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, protocol.encode(event)))
+
+    def events_since(self, since) -> tuple[list, int, bool]:
+        """(since utáni események, aktuális sorszám, elveszett-e esemény a napló végén)."""
+        with self._lock:
+            if since is None:
+                return [], self._seq, False
+            reset = bool(self._events) and since < self._events[0][0] - 1
+            return [e for seq, e in self._events if seq > since], self._seq, reset
+
+
+class ServiceServer:
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: str = None):
+        self.host, self.port = host, port
+        self.token   = token or None   # közös titok; None: nincs ellenőrzés (csak localhoston)
+        self.backend = Backend()
+        self._server = None
+        self._loop   = None
+        self._queue  = None
+
+    async def start(self):
+        self._loop  = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        log.info("ERP szolgáltatás: http://%s:%s", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._server.serve_forever()
+
+    def stop(self):
+        """Leállítás (más szálról is hívható)."""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    async def call(self, calls: list) -> list:
+        fut = self._loop.create_future()
+        await self._queue.put((calls, fut))
+        return await fut
+
+    async def _batch_loop(self):
+        while True:
+            pending = [await self._queue.get()]
+            while len(pending) < MAX_BATCH and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            try:
+                results = await self._loop.run_in_executor(
+                    self.backend.executor, self.backend.run_batch, [calls for calls, _ in pending])
+            except Exception as e:
+                log.exception("Köteg hiba")
+                results = [[{"error": {"type": type(e).__name__, "message": str(e)}}] * len(calls)
+                           for calls, _ in pending]
+            for (_, fut), res in zip(pending, results):
+                if not fut.done():
+                    fut.set_result(res)
+
+    # ── HTTP ───────────────────────────────────────────────
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if self._authorized(path, headers):
+                    status, payload = await self._route(method, path, body)
+                else:
+                    status, payload = "401 Unauthorized", _dumps({"error": "hiányzó vagy hibás token"})
+                data = payload.encode("utf-8")
+                writer.write((f"HTTP/1.1 {status}\r\n"
+                              "Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _authorized(self, path: str, headers: dict) -> bool:
+        """Tokennel futó szolgáltatásnál a /health kivételével minden kérés a közös titkot viszi."""
+        if self.token is None or path == "/health":
+            return True
+        sent = headers.get(protocol.TOKEN_HEADER.lower(), "")
+        return hmac.compare_digest(sent.encode("utf-8"), self.token.encode("utf-8"))
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[str, str]:
+        """(HTTP státusz, JSON válasz szöveg)."""
+        if method == "GET" and path == "/health":
+            return "200 OK", _dumps({"ok": True, "seq": self.backend.events_since(None)[1]})
+        if method != "POST" or path != "/call":
+            return "404 Not Found", _dumps({"error": f"{method} {path}"})
+        try:
+            req = json.loads(body or b"{}")
+            calls = req.get("calls", [])
+        except (ValueError, AttributeError) as e:
+            return "400 Bad Request", _dumps({"error": str(e)})
+        results = await self.call(calls) if calls else []
+        evs, seq, reset = self.backend.events_since(req.get("since"))
+        # a gyorsítótárazott listák kész JSON-ja változatlanul kerül a válaszba
+        tail = _dumps({"events": evs, "seq": seq, "reset": reset})
+        return "200 OK", '{"results": [' + ", ".join(map(_result_json, results)) + '], ' + tail[1:]
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def start_in_thread(host: str = DEFAULT_HOST, port: int = 0, token: str = None) -> ServiceServer:
+    """A szolgáltatás indítása démonszálon (tesztekhez, localhoston); a port: server.port."""
+    server = ServiceServer(host, port, token)
+    ready = threading.Event()
+
+    async def run():
+        await server.start()
+        ready.set()
+        with contextlib.suppress(asyncio.CancelledError):
+            await server._server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(run()), name="erp-service", daemon=True).start()
+    if not ready.wait(10):
+        raise RuntimeError("Az ERP szolgáltatás nem indult el")
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ERP helyi szolgáltatás")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--token", default=os.environ.get("ERP_SERVICE_TOKEN", "").strip(),
+                    help="közös titok a kérésekhez (alapból ERP_SERVICE_TOKEN)")
+    args = ap.parse_args()
+    if not args.token and not _is_loopback(args.host):
+        # hálózaton token nélkül bárki hívhatná az író műveleteket
+        ap.error("nem localhost címen ERP_SERVICE_TOKEN (vagy --token) megadása kötelező")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(ServiceServer(args.host, args.port, args.token).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+# modules/shared/barcodes.py
+#
+# Vonalkód (Code 128) és QR kód tisztán Pythonban, külső csomag nélkül.
+# A kódok modulokként (vonalszélességek / mátrix) készülnek, ebből:
+#
+#   - code128_svg() / qr_svg() SVG-t ad a HTML sablonoknak (a rendering
+#     "code128" és "qr" szűrői ezt használják, mm-ben megadott méretben);
+#   - code128_bars() / qr_runs() a Qt rajzolónak ad téglalapokat (vektoros
+#     nyomtatás a címke előnézetben).
+#
+# Az azonos tartalmú kódokat LRU gyorsítótár adja vissza – egy címkesorozatban
+# ugyanaz a cikkszám / rendelésszám csak egyszer kódolódik.
+#
+#     barcodes.code128_svg("CK-000283", height=12)
+#     barcodes.qr_svg(barcodes.payload(("R-12", "CK-000283", 24)), size=22)
+
+import functools
+import re
+
+CACHE_SIZE = 2048
+
+# ──────────────────────────────────────────────────────────
+# Code 128
+# ──────────────────────────────────────────────────────────
+
+# szimbólumonként vonal/köz szélességek (vonallal kezdve); 103–105: START A/B/C
+_C128 = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213", "122312", "132212", "221213",
+    "221312", "231212", "112232", "122132", "122231", "113222", "123122", "123221", "223211", "221132",
+    "221231", "213212", "223112", "312131", "311222", "321122", "321221", "312212", "322112", "322211",
+    "212123", "212321", "232121", "111323", "131123", "131321", "112313", "132113", "132311", "211313",
+    "231113", "231311", "112133", "112331", "132131", "113123", "113321", "133121", "313121", "211331",
+    "231131", "213113", "213311", "213131", "311123", "311321", "331121", "312113", "312311", "332111",
+    "314111", "221411", "431111", "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114", "413111", "241112", "134111",
+    "111242", "121142", "121241", "114212", "124112", "124211", "411212", "421112", "421211", "212141",
+    "214121", "412121", "111143", "111341", "131141", "114113", "114311", "411113", "411311", "113141",
+    "114131", "311141", "411131", "211412", "211214", "211232",
+)
+_C128_STOP = "2331112"
+_CODE_B, _CODE_C, _START_B, _START_C = 100, 99, 104, 105
+QUIET = 10   # csendes zóna modulokban, mindkét oldalon
+
+
+def _digit_run(data: str, i: int) -> int:
+    j = i
+    while j < len(data) and data[j].isdigit():
+        j += 1
+    return j - i
+
+
+def code128_values(data: str) -> list:
+    """A szimbólumértékek (START, adat, ellenőrző összeg, STOP nélkül a mintája). B kódkészlet,
+    hosszabb számsoroknál C (két számjegy egy szimbólum). Nem ASCII karakternél ValueError."""
+    if not data:
+        raise ValueError("Üres vonalkód tartalom.")
+    bad = [ch for ch in data if not 32 <= ord(ch) <= 126]
+    if bad:
+        raise ValueError(f"Code 128-ban nem kódolható karakter: {bad[0]!r}")
+
+    values, i, mode = [], 0, None
+    while i < len(data):
+        run = _digit_run(data, i)
+        # C-re csak megérő számsornál váltunk (elején/végén 4, közben 6 számjegy)
+        edge = i == 0 or i + run == len(data)
+        if run >= (4 if edge else 6):
+            run -= run % 2
+            if mode != "C":
+                values.append(_START_C if mode is None else _CODE_C)
+                mode = "C"
+            values.extend(int(data[k:k + 2]) for k in range(i, i + run, 2))
+            i += run
+            continue
+        if mode != "B":
+            values.append(_START_B if mode is None else _CODE_B)
+            mode = "B"
+        values.append(ord(data[i]) - 32)
+        i += 1
+
+    check = values[0] + sum(k * v for k, v in enumerate(values[1:], 1))
+    values.append(check % 103)
+    return values
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def code128_bars(data: str) -> tuple:
+    """(teljes szélesség modulban csendes zónával, ((x, szélesség), ...) a vonalakra)."""
+    widths = "".join(_C128[v] for v in code128_values(data)) + _C128_STOP
+    bars, x = [], QUIET
+    for k, w in enumerate(widths):
+        w = int(w)
+        if k % 2 == 0:
+            bars.append((x, w))
+        x += w
+    return x + QUIET, tuple(bars)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def code128_svg(data: str, height: float = 12.0, module: float = 0.33) -> str:
+    """Code 128 SVG; height és module (egy modul szélessége) mm-ben."""
+    total, bars = code128_bars(data)
+    d = "".join(f"M{x} 0h{w}v1h-{w}z" for x, w in bars)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" class="code128" viewBox="0 0 {total} 1" '
+            f'width="{total * module:.2f}mm" height="{height:.2f}mm" preserveAspectRatio="none" '
+            f'shape-rendering="crispEdges"><path d="{d}" fill="#000"/></svg>')
+
+
+# ──────────────────────────────────────────────────────────
+# QR kód (ISO/IEC 18004, bájt mód, 1–40. verzió)
+# ──────────────────────────────────────────────────────────
+
+_ECC_LEVELS = "LMQH"
+_FORMAT_BITS = {"L": 1, "M": 0, "Q": 3, "H": 2}
+
+# blokkonkénti hibajavító kódszavak és a blokkok száma, szintenként, verziónként (0. index kitöltés)
+_ECC_PER_BLOCK = (
+    (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+)
+_NUM_BLOCKS = (
+    (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+)
+
+# GF(256) szorzás log/exp táblákkal (primitív polinom 0x11D)
+_EXP = [0] * 512
+_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    _EXP[_i] = _x
+    _LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+del _x, _i
+
+
+def _gf_mul(a: int, b: int) -> int:
+    return 0 if a == 0 or b == 0 else _EXP[_LOG[a] + _LOG[b]]
+
+
+@functools.lru_cache(maxsize=None)
+def _rs_divisor(degree: int) -> tuple:
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_mul(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_mul(root, 2)
+    return tuple(result)
+
+
+def _rs_remainder(data, divisor) -> list:
+    result = [0] * len(divisor)
+    for b in data:
+        factor = b ^ result.pop(0)
+        result.append(0)
+        if factor:
+            lf = _LOG[factor]
+            for i, coef in enumerate(divisor):
+                if coef:
+                    result[i] ^= _EXP[_LOG[coef] + lf]
+    return result
+
+
+def _raw_modules(ver: int) -> int:
+    """Az adat + hibajavítás számára maradó modulok száma a verzióban."""
+    result = (16 * ver + 128) * ver + 64
+    if ver >= 2:
+        numalign = ver // 7 + 2
+        result -= (25 * numalign - 10) * numalign - 55
+        if ver >= 7:
+            result -= 36
+    return result
+
+
+def _data_codewords(ver: int, ecl: int) -> int:
+    return _raw_modules(ver) // 8 - _ECC_PER_BLOCK[ecl][ver] * _NUM_BLOCKS[ecl][ver]
+
+
+def _alignment_positions(ver: int) -> list:
+    if ver == 1:
+        return []
+    numalign = ver // 7 + 2
+    step = (ver * 8 + numalign * 3 + 5) // (numalign * 4 - 4) * 2
+    size = ver * 4 + 17
+    return [6] + sorted(size - 7 - i * step for i in range(numalign - 1))
+
+
+def _codewords(data: bytes, ver: int, ecl: int) -> list:
+    """Adatbitek → adatkódszavak kitöltéssel → blokkok + RS → összefésült kódszósor."""
+    bits = []
+
+    def put(value, n):
+        bits.extend((value >> i) & 1 for i in reversed(range(n)))
+
+    put(0b0100, 4)
+    put(len(data), 8 if ver <= 9 else 16)
+    for b in data:
+        put(b, 8)
+    capacity = _data_codewords(ver, ecl) * 8
+    put(0, min(4, capacity - len(bits)))
+    put(0, -len(bits) % 8)
+    words = [int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(words) < capacity // 8:
+        words.append(pad)
+        pad ^= 0xEC ^ 0x11
+
+    numblocks = _NUM_BLOCKS[ecl][ver]
+    ecclen = _ECC_PER_BLOCK[ecl][ver]
+    raw = _raw_modules(ver) // 8
+    numshort = numblocks - raw % numblocks
+    shortlen = raw // numblocks
+    divisor = _rs_divisor(ecclen)
+    blocks, k = [], 0
+    for i in range(numblocks):
+        dat = words[k:k + shortlen - ecclen + (0 if i < numshort else 1)]
+        k += len(dat)
+        ecc = _rs_remainder(dat, divisor)
+        if i < numshort:
+            dat.append(0)
+        blocks.append(dat + ecc)
+    out = []
+    for i in range(len(blocks[0])):
+        for j, blk in enumerate(blocks):
+            if i != shortlen - ecclen or j >= numshort:
+                out.append(blk[i])
+    return out
+
+
+@functools.lru_cache(maxsize=None)
+def _function_template(ver: int) -> "_Matrix":
+    return _Matrix(ver)
+
+
+_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+_MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+class _Matrix:
+
+    def __init__(self, ver: int, template: "_Matrix" = None):
+        self.ver  = ver
+        self.size = n = ver * 4 + 17
+        if template is not None:
+            self.mod  = [row[:] for row in template.mod]
+            self.func = [row[:] for row in template.func]
+            return
+        self.mod  = [[False] * n for _ in range(n)]
+        self.func = [[False] * n for _ in range(n)]
+        self._function_patterns()
+
+    @classmethod
+    def new(cls, ver: int) -> "_Matrix":
+        """Üres mátrix a verzió funkciómintáival (a minták verziónként egyszer készülnek)."""
+        return cls(ver, _function_template(ver))
+
+    def _set(self, x, y, dark):
+        self.mod[y][x] = dark
+        self.func[y][x] = True
+
+    def _function_patterns(self):
+        n = self.size
+        for i in range(n):
+            self._set(6, i, i % 2 == 0)
+            self._set(i, 6, i % 2 == 0)
+        for cx, cy in ((3, 3), (n - 4, 3), (3, n - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < n and 0 <= y < n:
+                        self._set(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+        pos = _alignment_positions(self.ver)
+        last = len(pos) - 1
+        for i, ax in enumerate(pos):
+            for j, ay in enumerate(pos):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self._set(ax + dx, ay + dy, max(abs(dx), abs(dy)) != 1)
+        self.format_bits("L", 0)   # helyfoglalás, a végleges a maszk után kerül be
+        if self.ver >= 7:
+            rem = self.ver
+            for _ in range(12):
+                rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+            bits = self.ver << 12 | rem
+            for i in range(18):
+                bit = (bits >> i) & 1 == 1
+                a, b = n - 11 + i % 3, i // 3
+                self._set(a, b, bit)
+                self._set(b, a, bit)
+
+    def format_bits(self, ecc: str, mask: int):
+        n = self.size
+        data = _FORMAT_BITS[ecc] << 3 | mask
+        rem = data
+        for _ in range(10):
+            rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+        bits = (data << 10 | rem) ^ 0x5412
+        bit = lambda i: (bits >> i) & 1 == 1
+        for i in range(6):
+            self._set(8, i, bit(i))
+        self._set(8, 7, bit(6))
+        self._set(8, 8, bit(7))
+        self._set(7, 8, bit(8))
+        for i in range(9, 15):
+            self._set(14 - i, 8, bit(i))
+        for i in range(8):
+            self._set(n - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self._set(8, n - 15 + i, bit(i))
+        self._set(8, n - 8, True)
+
+    def place(self, words: list):
+        n, i, total = self.size, 0, len(words) * 8
+        right = n - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            upward = (right + 1) & 2 == 0
+            for vert in range(n):
+                y = n - 1 - vert if upward else vert
+                for x in (right, right - 1):
+                    if not self.func[y][x] and i < total:
+                        self.mod[y][x] = (words[i >> 3] >> (7 - (i & 7))) & 1 == 1
+                        i += 1
+            right -= 2
+
+    def rows(self) -> tuple:
+        """(adat sorok, funkció sorok) egész számként: az x. oszlop a (size-1-x). bit."""
+        to_int = lambda row: int(bytes(row).translate(_BITS), 2)
+        return [to_int(r) for r in self.mod], [to_int(r) for r in self.func]
+
+
+@functools.lru_cache(maxsize=None)
+def _mask_rows(size: int, mask: int) -> tuple:
+    fn = _MASKS[mask]
+    return tuple(int("".join("1" if fn(x, y) else "0" for x in range(size)), 2) for y in range(size))
+
+
+_RUN = re.compile(r"0{5,}|1{5,}")
+
+
+def _penalty(rows: list, n: int) -> int:
+    """A szabvány négy büntetőpontja (futások, 2×2 blokkok, kereső-szerű minták, egyensúly)."""
+    strs = [format(r, f"0{n}b") for r in rows]
+    score = 0
+    for line in strs + ["".join(col) for col in zip(*strs)]:
+        score += sum(len(m) - 2 for m in _RUN.findall(line))
+        score += 40 * (line.count("10111010000") + line.count("00001011101"))
+    full, pair = (1 << n) - 1, (1 << (n - 1)) - 1
+    for a, b in zip(rows, rows[1:]):
+        same = ~(a ^ b) & full
+        score += 3 * bin(same & (same >> 1) & ~(a ^ (a >> 1)) & pair).count("1")
+    dark = sum(s.count("1") for s in strs)
+    total = n * n
+    score += abs(dark * 20 - total * 10) // total * 10
+    return score
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def qr_matrix(data: str, ecc: str = "M", mask: int = None) -> tuple:
+    """A QR kód moduljai soronként (True: sötét), csendes zóna nélkül. Túl hosszú tartalomnál ValueError."""
+    raw = data.encode("utf-8")
+    ecl = _ECC_LEVELS.index(ecc)
+    for ver in range(1, 41):
+        header = 4 + (8 if ver <= 9 else 16)
+        if header + 8 * len(raw) <= _data_codewords(ver, ecl) * 8:
+            break
+    else:
+        raise ValueError("Túl hosszú QR tartalom.")
+    m = _Matrix.new(ver)
+    m.place(_codewords(raw, ver, ecl))
+    n, best = m.size, None
+    for k in (range(8) if mask is None else (mask,)):
+        m.format_bits(ecc, k)
+        data, func = m.rows()
+        grid = [d ^ (p & ~f) for d, f, p in zip(data, func, _mask_rows(n, k))]
+        score = _penalty(grid, n) if mask is None else 0
+        if best is None or score < best[0]:
+            best = (score, grid)
+    return tuple(tuple(c == "1" for c in format(r, f"0{n}b")) for r in best[1])
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def qr_runs(data: str, ecc: str = "M") -> tuple:
+    """(oldalhossz modulban, ((x, y, hossz), ...)) – a sötét modulok soronkénti futásai, 4 modul csendes zónával."""
+    grid = qr_matrix(data, ecc)
+    runs = []
+    for y, row in enumerate(grid):
+        x = 0
+        while x < len(row):
+            if row[x]:
+                start = x
+                while x < len(row) and row[x]:
+                    x += 1
+                runs.append((start + 4, y + 4, x - start))
+            else:
+                x += 1
+    return len(grid) + 8, tuple(runs)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def qr_svg(data: str, size: float = 22.0, ecc: str = "M") -> str:
+    """QR kód SVG, size oldalhossz mm-ben (csendes zónával)."""
+    total, runs = qr_runs(data, ecc)
+    d = "".join(f"M{x} {y}h{w}v1h-{w}z" for x, y, w in runs)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" class="qr" viewBox="0 0 {total} {total}" '
+            f'width="{size:.2f}mm" height="{size:.2f}mm" shape-rendering="crispEdges">'
+            f'<path d="{d}" fill="#000"/></svg>')
+
+
+def payload(fields) -> str:
+    """Több mező egy QR tartalomba ("|" elválasztóval), pl. rendelésszám|cikkszám|mennyiség."""
+    if isinstance(fields, (list, tuple)):
+        return "|".join("" if f is None else str(f) for f in fields)
+    return str(fields)
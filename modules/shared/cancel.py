@@ -0,0 +1,111 @@
+# modules/shared/cancel.py
+#
+# Megszakítható lekérdezések. A háttérbetöltés (gui/async_loader) minden
+# futáshoz CancelToken-t ad, és a futás idejére a szál aktuális tokenjévé
+# teszi (bind). Az adatréteg a saját kapcsolatait watch()-csal köti hozzá:
+#
+#   - token.cancel() a futó lekérdezésre azonnal Connection.interrupt()-ot hív
+#     (ez más szálról is hívható);
+#   - őrként egy progress handler (PROGRESS_STEPS VM lépésenként) figyeli a
+#     tokent és a határidőt: a megszakítás után induló utasítás is rögtön leáll,
+#     és a határidőt túllépő lekérdezés is megszakad.
+#
+# A megszakított lekérdezés sqlite3.OperationalError("interrupted") hibája
+# Cancelled-ként jön ki. Token nélkül (GUI szál, szkriptek) a watch() hatástalan.
+#
+#     with sqlite3.connect(DB_PATH) as conn, cancel.watch(conn):
+#         ...
+
+import contextlib
+import sqlite3
+import threading
+import time
+
+PROGRESS_STEPS = 10_000   # ennyi SQLite VM lépésenként fut a progress handler
+
+_local = threading.local()
+
+
+class Cancelled(Exception):
+    """A lekérdezést egy újabb betöltés (vagy a határidő) megszakította."""
+
+
+class CancelToken:
+
+    def __init__(self, timeout: float = None):
+        self.deadline   = time.monotonic() + timeout if timeout else None
+        self._cancelled = False
+        self._lock  = threading.Lock()
+        self._conns = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or (self.deadline is not None and time.monotonic() > self.deadline)
+
+    def cancel(self):
+        """Bármelyik szálról: a figyelt kapcsolatok futó lekérdezése azonnal megszakad."""
+        with self._lock:
+            self._cancelled = True
+            conns = list(self._conns)
+        for conn in conns:
+            with contextlib.suppress(sqlite3.ProgrammingError):   # közben lezárt kapcsolat
+                conn.interrupt()
+
+    def check(self):
+        """Python ciklusokhoz: Cancelled, ha a tokent visszavonták."""
+        if self.cancelled:
+            raise Cancelled()
+
+    def _attach(self, conn):
+        with self._lock:
+            self._conns.append(conn)
+
+    def _detach(self, conn):
+        with self._lock:
+            self._conns.remove(conn)
+
+
+def current() -> CancelToken | None:
+    return getattr(_local, "token", None)
+
+
+@contextlib.contextmanager
+def bind(token: CancelToken):
+    """A token a blokk idejére a szál aktuális tokenje (a watch() ezt használja)."""
+    prev = current()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = prev
+
+
+def check():
+    token = current()
+    if token is not None:
+        token.check()
+
+
+@contextlib.contextmanager
+def watch(*conns):
+    """A kapcsolatok lekérdezései megszakíthatók a szál aktuális tokenjével."""
+    token = current()
+    if token is None:
+        yield
+        return
+    handler = lambda: 1 if token.cancelled else 0
+    for conn in conns:
+        token._attach(conn)
+        conn.set_progress_handler(handler, PROGRESS_STEPS)
+    try:
+        token.check()
+        yield
+    except sqlite3.OperationalError as e:
+        if token.cancelled:
+            raise Cancelled() from e
+        raise
+    finally:
+        for conn in conns:
+            token._detach(conn)
+            with contextlib.suppress(sqlite3.ProgrammingError):
+                conn.set_progress_handler(None, 0)
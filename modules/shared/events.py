@@ -0,0 +1,114 @@
+# modules/shared/events.py
+#
+# Folyamaton belüli változásértesítés. Az adatréteg (repository-k) írás után
+# típusos eseményt küld; a nyitott ablakok feliratkoznak, és csak az érintett
+# sorokat frissítik a teljes újratöltés helyett.
+#
+#     events.subscribe(events.OrderItemChanged, self._on_item_changed)
+#     events.publish(events.OrderItemChanged(order_id, product_id, remaining))
+#
+# A kezelők a küldő szálán, szinkron futnak; a GUI ablakok a gui/event_relay.py
+# EventRelay-én keresztül iratkoznak fel, ami a GUI szálra továbbít. A kötött
+# metódusokat gyengén hivatkozzuk, így egy bezárt és felszabadított ablak
+# feliratkozása magától megszűnik. Egy kezelő hibája nem akasztja meg a küldőt.
+
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+
+log = logging.getLogger("erp.events")
+
+
+# ──────────────────────────────────────────────────────────
+# Események
+# ──────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class OrderItemChanged:
+    """Egy rendeléstétel fennmaradó mennyisége változott (pl. kiszállítás után)."""
+    order_id: int
+    product_id: int
+    remaining_qty: float
+
+
+@dataclass(frozen=True)
+class OrderChanged:
+    """Új vagy módosított megrendelés (fejléc és tételek)."""
+    order_id: int
+
+
+@dataclass(frozen=True)
+class OrderDeleted:
+    order_id: int
+
+
+@dataclass(frozen=True)
+class DeliveryNoteCreated:
+    note_id: int
+    order_id: int
+    note_number: str
+
+
+@dataclass(frozen=True)
+class DeliveryNoteItemAdded:
+    note_id: int
+    item_id: int
+    product_id: int
+    quantity: float
+
+
+@dataclass(frozen=True)
+class ShiftLogged:
+    """
+    Új műszaknapló sor (a készlet good_qty - scrap_qty-val változik).
+    Tömeges importnál termékenként egy összesített esemény, log_id nélkül.
+    """
+    log_id: int | None
+    product_id: int
+    good_qty: float
+    scrap_qty: float
+
+
+# ──────────────────────────────────────────────────────────
+# Feliratkozás / küldés
+# ──────────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_subscribers = {}   # eseménytípus → [hivatkozás a kezelőre]
+
+
+def _ref(handler):
+    if hasattr(handler, "__self__") and hasattr(handler, "__func__"):
+        return weakref.WeakMethod(handler)
+    return lambda: handler
+
+
+def subscribe(event_type: type, handler) -> None:
+    with _lock:
+        _subscribers.setdefault(event_type, []).append(_ref(handler))
+
+
+def unsubscribe(event_type: type, handler) -> None:
+    with _lock:
+        refs = _subscribers.get(event_type, [])
+        refs[:] = [r for r in refs if r() is not None and r() != handler]
+
+
+def publish(event) -> None:
+    with _lock:
+        refs = list(_subscribers.get(type(event), ()))
+    dead = False
+    for ref in refs:
+        handler = ref()
+        if handler is None:
+            dead = True
+            continue
+        try:
+            handler(event)
+        except Exception:
+            log.exception("Eseménykezelő hiba: %r", event)
+    if dead:
+        with _lock:
+            refs = _subscribers.get(type(event), [])
+            refs[:] = [r for r in refs if r() is not None]
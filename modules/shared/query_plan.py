@@ -0,0 +1,173 @@
+# modules/shared/query_plan.py
+#
+# EXPLAIN QUERY PLAN segédek: egy hívás közben kiadott SELECT-ek elfogása
+# (captured_selects), és hibajelzés, ha valamelyik index nélkül olvas végig egy
+# táblát (pl. LIKE '%…%', substr(date,1,7), index nélküli JOIN), vagy nem az
+# elvárt indexet használja (assert_plan, check_plans).
+#
+# A valódi lekérdezések ellenőrzése generált adatbázison: tests/test_query_plans.py
+#     python -m pytest -q tests/test_query_plans.py
+
+import re
+import sqlite3
+
+
+# Az allow_scan listában: a lekérdezés ideiglenes B-fával rendezhet
+# (teljes lista kifejezés szerinti rendezéssel, vagy már szűrt, kis eredmény rendezése).
+SORT = "ORDER BY"
+
+# FROM/JOIN utáni szavak, amelyek nem alias-ok
+_KEYWORDS = {
+    "where", "on", "using", "join", "left", "right", "inner", "outer", "cross", "natural",
+    "group", "order", "limit", "union", "having", "window", "as", "set", "values",
+}
+
+
+def explain(conn: sqlite3.Connection, sql: str, params=()) -> list[str]:
+    """
+    Visszaadja az EXPLAIN QUERY PLAN 'detail' sorait (pl. 'SEARCH shift_logs USING INDEX ...').
+    """
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+
+
+def table_aliases(sql: str) -> dict:
+    """
+    alias → tábla a FROM/JOIN részekből. A terv az alias nevét írja ki
+    ('SCAN oi'), ezt kell a valódi táblára visszavezetni.
+    """
+    aliases = {}
+    for m in re.finditer(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.IGNORECASE):
+        table, alias = m.group(1), m.group(2)
+        aliases[table] = table
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(plan: list[str], tables=None, aliases=None, allow_sort: bool = False) -> list[str]:
+    """
+    A tervből azok a sorok, amelyek index nélkül olvassák végig a táblát
+    ('SCAN tábla' USING … nélkül), lekérdezésenként átmeneti indexet
+    építenek rá (AUTOMATIC INDEX – ez is teljes olvasás), vagy ideiglenes
+    B-fával rendeznek (allow_sort=True esetén ez megengedett). Ha tables meg van
+    adva, csak ezekre a valódi táblákra figyelünk (a CTE-k, al-lekérdezések
+    átmeneti eredményeit kihagyjuk); az aliases az alias → tábla feloldáshoz kell.
+    """
+    aliases = aliases or {}
+    bad = []
+    for detail in plan:
+        if detail.startswith("USE TEMP B-TREE FOR ORDER BY"):
+            if not allow_sort:
+                bad.append(detail)
+            continue
+        automatic = " USING AUTOMATIC " in detail
+        if not automatic and (not detail.startswith("SCAN ") or " USING " in detail):
+            continue
+        name = detail.split()[1]
+        if name.startswith("(") or name == "CONSTANT":
+            continue
+        if tables is not None and aliases.get(name, name) not in tables:
+            continue
+        bad.append(detail)
+    return bad
+
+
+def table_names(conn: sqlite3.Connection) -> set[str]:
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def uses_index(plan: list[str], index_name: str) -> bool:
+    return any(f"INDEX {index_name}" in d for d in plan)
+
+
+def assert_plan(conn: sqlite3.Connection, sql: str, params=(), index_name: str = None,
+                allow_scan=()):
+    """
+    AssertionError, ha a lekérdezés teljes táblát olvas (az allow_scan táblák kivételével),
+    ideiglenes B-fával rendez (ha az allow_scan nem tartalmazza a SORT-ot),
+    vagy nem a megadott indexet használja.
+    """
+    plan = explain(conn, sql, params)
+    bad = full_scans(plan, table_names(conn) - set(allow_scan), table_aliases(sql),
+                     allow_sort=SORT in allow_scan)
+    if bad:
+        raise AssertionError(f"Teljes táblaolvasás: {bad}\n  SQL: {' '.join(sql.split())}")
+    if index_name and not uses_index(plan, index_name):
+        raise AssertionError(f"Nem használja a(z) {index_name} indexet: {plan}\n  SQL: {' '.join(sql.split())}")
+    return plan
+
+
+def _db_file(conn: sqlite3.Connection) -> str:
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def captured_selects(call, conns=()) -> list[tuple[str, str]]:
+    """
+    Lefuttatja a call()-t, és visszaadja a közben kiadott SELECT (és WITH … SELECT) utasításokat
+    (adatbázis fájl, SQL) párokként, a paraméterek behelyettesítve, ahogy a trace callback adja.
+    A megadott kapcsolatok mellett a hívás közben nyitott új kapcsolatokat is figyeli
+    (pl. osszes_termek vagy a riport ablakok saját sqlite3.connect-je).
+    """
+    seen = []
+    orig_connect = sqlite3.connect
+
+    def tracer(conn, prev=None):
+        # a kapcsolat korábbi (felhasználói) callbackje is megkapja az utasítást
+        path = _db_file(conn)
+
+        def trace(sql):
+            seen.append((path, sql))
+            if prev is not None:
+                prev(sql)
+        return trace
+
+    def connect(*args, **kwargs):
+        conn = orig_connect(*args, **kwargs)
+        conn.set_trace_callback(tracer(conn))
+        return conn
+
+    # a TracedConnection (sql_trace) a saját mérését megtartja, a felhasználói
+    # callbackje a trace_callback-ben látszik; sima kapcsolatnál nincs előző
+    previous = [getattr(conn, "trace_callback", None) for conn in conns]
+    for conn, prev in zip(conns, previous):
+        conn.set_trace_callback(tracer(conn, prev))
+    sqlite3.connect = connect
+    try:
+        call()
+    finally:
+        sqlite3.connect = orig_connect
+        for conn, prev in zip(conns, previous):
+            conn.set_trace_callback(prev)
+    return [(path, s) for path, s in seen if s.lstrip().upper().startswith(("SELECT", "WITH"))]
+
+
+def check_plans(target, checks, conns=()) -> list[str]:
+    """
+    A checks minden elemére: a hívás SELECT-jei nem olvashatnak teljes táblát
+    (a megengedett táblák kivételével), és legalább egyiküknek az elvárt indexet kell használnia.
+    conns: a target már megnyitott kapcsolatai (ezeket is figyeljük).
+    """
+    errors = []
+    explain_conns = {_db_file(c): c for c in conns}
+    try:
+        for name, call, index_name, *rest in checks:
+            allow_scan = rest[0] if rest else ()
+            selects = captured_selects(lambda: call(target), conns)
+            if not selects:
+                errors.append(f"[{name}] nem adott ki SELECT-et")
+                continue
+            plans = []
+            for path, sql in selects:
+                if path not in explain_conns:
+                    explain_conns[path] = sqlite3.connect(path)
+                try:
+                    plans.append(assert_plan(explain_conns[path], sql, allow_scan=allow_scan))
+                except AssertionError as e:
+                    errors.append(f"[{name}] {e}")
+            if index_name and not any(uses_index(p, index_name) for p in plans):
+                errors.append(f"[{name}] nem használja a(z) {index_name} indexet: {plans}")
+    finally:
+        for path, conn in explain_conns.items():
+            if conn not in conns:
+                conn.close()
+    return errors
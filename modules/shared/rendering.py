@@ -0,0 +1,163 @@
+# modules/shared/rendering.py
+#
+# HTML sablonok (jinja2) és PDF (weasyprint) közös belépési pontja. Mindkét
+# könyvtár csak az első használatkor töltődik be – az indulást és a PDF-et nem
+# készítő ablakok megnyitását nem lassítják.
+#
+# Sablonkönyvtáranként egy Environment él, így a lefordított sablonok
+# gyorsítótárazódnak; a warm_up_templates() induláskor (háttérszálon) előre
+# lefordítja őket. A sablonokban a "code128" és "qr" szűrő vonalkódot / QR
+# kódot ad SVG-ként (modules/shared/barcodes).
+#
+#     html = rendering.get_template("base.html", self.template_dir).render(...)
+#     rendering.write_pdf(html, path)
+#     rendering.write_pdf_chunks(html_darabok, path)   # nagy dokumentum darabonként
+#     rendering.write_pdf_parallel(html_darabok, path) # darabok külön folyamatokban
+
+import collections
+import functools
+import io
+import itertools
+import logging
+import os
+import threading
+
+from . import barcodes, cancel
+
+PROJECT_DIR  = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+TEMPLATE_DIR = os.path.join(PROJECT_DIR, "templates")
+
+MAX_PDF_WORKERS = 4    # párhuzamos renderelő folyamatok felső korlátja
+
+log = logging.getLogger("erp.render")
+
+_env_lock = threading.Lock()
+
+
+def _code128_filter(value, height: float = 12.0, module: float = 0.33):
+    """{{ x | code128(height=10) }} – Code 128 SVG; nem kódolható / üres értéknél üres."""
+    from markupsafe import Markup
+    try:
+        return Markup(barcodes.code128_svg(str(value if value is not None else ""), height, module))
+    except ValueError:
+        return ""
+
+
+def _qr_filter(value, size: float = 22.0):
+    """{{ (rendelés, cikkszám, menny) | qr(size=24) }} – QR SVG, a mezők "|"-vel összefűzve."""
+    from markupsafe import Markup
+    try:
+        return Markup(barcodes.qr_svg(barcodes.payload(value), size))
+    except ValueError:
+        return ""
+
+
+@functools.lru_cache(maxsize=None)
+def _environment(template_dir: str):
+    from jinja2 import Environment, FileSystemLoader
+    env = Environment(loader=FileSystemLoader(template_dir))
+    env.filters["code128"] = _code128_filter
+    env.filters["qr"] = _qr_filter
+    return env
+
+
+def template_env(template_dir: str = None):
+    """A sablonkönyvtár (alapból a projekt templates/ mappája) közös Environment-je."""
+    with _env_lock:   # a bemelegítő szál és a GUI ne építsen kettőt
+        return _environment(os.path.abspath(template_dir or TEMPLATE_DIR))
+
+
+def get_template(name: str, template_dir: str = None):
+    return template_env(template_dir).get_template(name)
+
+
+def warm_up_templates(template_dir: str = None) -> int:
+    """Az összes .html sablon előfordítása; a lefordított sablonok számát adja."""
+    env = template_env(template_dir)
+    names = [n for n in env.list_templates() if n.endswith(".html")]
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def write_pdf(html: str, target=None, base_url: str = None):
+    """
+    HTML → PDF weasyprint-tel (első híváskor töltődik be). target: fájlútvonal
+    vagy fájlobjektum; None esetén a PDF bájtokat adja vissza.
+    """
+    from weasyprint import HTML
+    return HTML(string=html, base_url=base_url).write_pdf(target)
+
+
+def write_pdf_chunks(html_chunks, target=None, base_url: str = None):
+    """
+    Több HTML darab → egy PDF. A darabok egymás után renderelődnek, a darab
+    DOM-ja és stíluslapjai felszabadulnak, így nagy dokumentumnál sem kell
+    egyben felépíteni a teljes HTML-t. A kész (tördelt) lapok viszont a végső
+    kiírásig mind a memóriában maradnak – sok lapnál write_pdf_parallel.
+    """
+    from weasyprint import HTML
+    first, pages = None, []
+    for html in html_chunks:
+        doc = HTML(string=html, base_url=base_url).render()
+        first = first or doc
+        pages.extend(doc.pages)
+    if first is None:
+        raise ValueError("Üres dokumentum.")
+    return first.copy(pages).write_pdf(target)
+
+
+def _render_chunk(html: str, base_url: str = None) -> bytes:
+    """Renderelő folyamat: egy HTML darab → PDF bájtok."""
+    return write_pdf(html, None, base_url)
+
+
+def pdf_workers() -> int:
+    return max(1, min(MAX_PDF_WORKERS, (os.cpu_count() or 1) - 1))
+
+
+def write_pdf_parallel(html_chunks, target=None, base_url: str = None, workers: int = None):
+    """
+    Több HTML darab → egy PDF, a darabok külön folyamatokban renderelődnek, a
+    kész PDF-ek lapjai sorrendben egymás után fűződnek (pypdf). Egyszerre
+    legfeljebb 2×workers darab van úton, így a darabok lustán is jöhetnek.
+    Egyetlen darabnál, workers=1-nél vagy pypdf nélkül write_pdf_chunks
+    (ugyanabban a folyamatban, egymás után); a pypdf hiányát figyelmeztetés jelzi.
+    """
+    workers = workers or pdf_workers()
+    chunks = iter(html_chunks)
+    head = list(itertools.islice(chunks, 2))
+    PdfWriter = None
+    if len(head) >= 2 and workers >= 2:
+        try:
+            from pypdf import PdfWriter
+        except ImportError:
+            log.warning("pypdf nincs telepítve: a PDF darabok egy folyamatban, egymás után "
+                        "renderelődnek (pip install pypdf)")
+    if PdfWriter is None:
+        if len(head) == 1:
+            return write_pdf(head[0], target, base_url)
+        return write_pdf_chunks(itertools.chain(head, chunks), target, base_url)
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    merged  = PdfWriter()
+    pending = collections.deque()
+    # spawn: a GUI szálai mellett a fork nem biztonságos, Windows-on pedig csak ez van
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        try:
+            for html in itertools.chain(head, chunks):
+                cancel.check()
+                pending.append(pool.submit(_render_chunk, html, base_url))
+                if len(pending) >= 2 * workers:
+                    merged.append(io.BytesIO(pending.popleft().result()))
+            while pending:
+                merged.append(io.BytesIO(pending.popleft().result()))
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    if target is None:
+        buf = io.BytesIO()
+        merged.write(buf)
+        return buf.getvalue()
+    merged.write(target)
@@ -0,0 +1,277 @@
+# modules/shared/report_writer.py
+#
+# Táblázatos riportok közös, folyamatos (streaming) írója: HTML, CSV, XLSX, PDF.
+# A riport szakaszokból áll, a szakasz sorai tetszőleges iterálhatók (lista,
+# generátor, sqlite kurzor) – az író egyszer megy végig rajtuk, és közben
+# számolja az összesítőt. HTML-nél a lefordított report_table.html sablon
+# stream()-je STREAM_BUFFER soronként írja a fájlt; nincs cellánkénti
+# string összefűzés, és nem kell hozzá látható tábla widget.
+#
+#     report = Report("Havi riport: 2025-03", [
+#         Section("Gyártott", [Column("Termék"), Column("Súly (kg)", ".2f")],
+#                 rows, total=1, total_label="Összes súly"),
+#     ])
+#     write_report(report, "riport.xlsx")          # formátum a kiterjesztésből
+#
+# PDF-nél a sorok PDF_CHUNK_ROWS soros darabokra bomlanak (minden darab önálló
+# dokumentum, a fejléc minden lapon ismétlődik), a darabok párhuzamos
+# folyamatokban renderelődnek és egy PDF-be fűződnek (rendering.write_pdf_parallel,
+# pypdf nélkül egymás után). A három mód összevetése: python -m benchmarks.pdf_tables
+#
+# A sorok egyszer olvashatók: egy Report példány egyszer írható ki.
+
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from . import cancel, rendering
+
+FORMATS       = ("html", "csv", "xlsx", "pdf")
+STREAM_BUFFER = 200    # ennyi sablon darab (kb. sor) megy egyszerre a fájlba
+CHECK_ROWS    = 500    # ennyi soronként nézzük a megszakítást
+TEMPLATE      = "report_table.html"
+ROWS_PER_PAGE = 40     # kb. ennyi sor fér egy A3 fekvő lapra (base.html)
+PDF_CHUNK_ROWS = ROWS_PER_PAGE * 10   # PDF darab: kb. 10 lap
+
+# format spec → XLSX számformátum
+_XLSX_FORMATS = {".0f": "0", ".1f": "0.0", ".2f": "0.00", ".1%": "0.0%", ".2%": "0.00%"}
+
+
+@dataclass
+class Column:
+    title: str
+    fmt: object = None                       # format spec (".2f", ".1%") vagy callable
+    color: Optional[Callable] = None         # érték → háttérszín (HTML/PDF)
+
+    def text(self, value) -> str:
+        if value is None:
+            return ""
+        if self.fmt is None:
+            return str(value)
+        if callable(self.fmt):
+            return self.fmt(value)
+        try:
+            return format(value, self.fmt)
+        except (TypeError, ValueError):
+            return str(value)
+
+
+@dataclass
+class Section:
+    title: str
+    columns: List[Column]
+    rows: Iterable[tuple]
+    total: Optional[int] = None              # ennek az oszlopnak az összege kerül a végére
+    total_label: str = ""
+    total_fmt: str = "{:.2f} kg"
+    total_value: float = field(default=0.0, init=False)
+    count: int = field(default=0, init=False)
+
+    def iter_rows(self):
+        """A sorok egyszeri bejárása; közben összegez és figyeli a megszakítást."""
+        self.total_value, self.count = 0.0, 0
+        for row in self.rows:
+            if self.total is not None:
+                try:
+                    self.total_value += float(row[self.total] or 0)
+                except (TypeError, ValueError):
+                    pass
+            self.count += 1
+            if self.count % CHECK_ROWS == 0:
+                cancel.check()
+            yield row
+
+    def cells(self, row) -> list:
+        """Egy sor (szöveg, háttérszín) cellái a sablonnak."""
+        return [(c.text(v), c.color(v) if c.color and v is not None else None)
+                for c, v in zip(self.columns, row)]
+
+    def html_rows(self):
+        for row in self.iter_rows():
+            yield self.cells(row)
+
+    def text_rows(self):
+        cols = self.columns
+        for row in self.iter_rows():
+            yield [c.text(v) for c, v in zip(cols, row)]
+
+    def total_text(self) -> str:
+        return f"{self.total_label}: {self.total_fmt.format(self.total_value)}" if self.total_label else ""
+
+
+class _Part:
+    """Egy szakasz PDF darabja: a cím csak az elsőn, az összesítő csak az utolsón."""
+
+    def __init__(self, section: Section, rows: list, first: bool):
+        self.section = section
+        self.rows    = rows
+        self.title   = section.title if first or not section.title else f"{section.title} (folyt.)"
+        self.columns = section.columns
+        self.total_label = ""
+
+    def html_rows(self):
+        for row in self.rows:
+            yield self.section.cells(row)
+
+    def total_text(self) -> str:
+        return self.section.total_text()
+
+
+@dataclass
+class Report:
+    title: str
+    sections: List[Section]
+    company: str = "Dr. Köcher Kft."
+    logo_path: str = ""
+    notes: List[str] = field(default_factory=list)   # záró sorok (pl. előző év összevetés)
+
+
+def format_of(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in FORMATS:
+        raise ValueError(f"Ismeretlen riport formátum: .{ext} (támogatott: {', '.join(FORMATS)})")
+    return ext
+
+
+def write_report(report: Report, target, fmt: str = None, template_dir: str = None,
+                 base_url: str = None, workers: int = None) -> int:
+    """
+    A riport kiírása (target: útvonal vagy fájlobjektum; fmt alapból a kiterjesztésből).
+    workers: PDF renderelő folyamatok száma (alapból rendering.pdf_workers()).
+    Az összes kiírt sor számát adja.
+    """
+    fmt = fmt or format_of(target)
+    if fmt == "html":
+        _with_file(target, "w", lambda f: stream_html(report, f, template_dir))
+    elif fmt == "csv":
+        _with_file(target, "w", lambda f: write_csv(report, f), encoding="utf-8-sig", newline="")
+    elif fmt == "xlsx":
+        write_xlsx(report, target)
+    elif fmt == "pdf":
+        rendering.write_pdf_parallel(pdf_chunks(report, template_dir), target, base_url, workers)
+    else:
+        raise ValueError(f"Ismeretlen riport formátum: {fmt}")
+    return sum(s.count for s in report.sections)
+
+
+def _with_file(target, mode: str, write, **open_kw):
+    if hasattr(target, "write"):
+        return write(target)
+    tmp = f"{target}.{os.getpid()}.tmp"   # félkész fájl ne maradjon a cél helyén
+    try:
+        with open(tmp, mode, encoding=open_kw.pop("encoding", "utf-8"), **open_kw) as f:
+            write(f)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def stream_html(report: Report, f, template_dir: str = None) -> None:
+    """A lefordított sablon darabjai közvetlenül a fájlba (pufferelve)."""
+    stream = rendering.get_template(TEMPLATE, template_dir).stream(
+        _context(report, report.sections, report.notes))
+    stream.enable_buffering(STREAM_BUFFER)
+    stream.dump(f)
+
+
+def _context(report: Report, sections, notes) -> dict:
+    return dict(sections=sections, notes=notes, logo_path=report.logo_path,
+                company_name=report.company, report_title=report.title)
+
+
+def pdf_chunks(report: Report, template_dir: str = None, chunk_rows: int = PDF_CHUNK_ROWS):
+    """
+    A riport HTML-je chunk_rows soros önálló dokumentumokban. Az utolsó darabot
+    egy lépéssel később adjuk ki, hogy az már az összesítőkkel és a megjegyzésekkel menjen.
+    """
+    tmpl = rendering.get_template(TEMPLATE, template_dir)
+    held = []   # a legutóbbi darab szakaszai, kiadásra várva
+
+    for s in report.sections:
+        first = True
+        batch = []
+        for row in s.iter_rows():
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                if held:
+                    yield tmpl.render(_context(report, held, []))
+                held = [_Part(s, batch, first)]
+                batch, first = [], False
+        # a szakasz vége: az összeg már kész, az utolsó darabjára kerül
+        if not batch and held and held[-1].section is s:
+            held[-1].total_label = s.total_label
+            continue
+        part = _Part(s, batch, first)
+        part.total_label = s.total_label
+        if held and sum(len(p.rows) for p in held) + len(batch) > chunk_rows:
+            yield tmpl.render(_context(report, held, []))
+            held = []
+        held.append(part)
+    yield tmpl.render(_context(report, held, report.notes))
+
+
+def write_csv(report: Report, f) -> None:
+    """Szakaszonként: cím, fejléc, sorok, összesítő, üres sor (';' elválasztó, Excel-barát)."""
+    w = csv.writer(f, delimiter=";")
+    w.writerow([report.title])
+    for s in report.sections:
+        w.writerow([])
+        w.writerow([s.title])
+        w.writerow([c.title for c in s.columns])
+        w.writerows(s.text_rows())
+        if s.total_label:
+            w.writerow([s.total_text()])
+    for note in report.notes:
+        w.writerow([note])
+
+
+def _sheet_title(title: str, used: set) -> str:
+    name = "".join(ch for ch in title if ch not in '[]:*?/\\')[:31] or "Munkalap"
+    base, i = name, 2
+    while name in used:
+        name = f"{base[:28]} {i}"
+        i += 1
+    used.add(name)
+    return name
+
+
+def write_xlsx(report: Report, target) -> None:
+    """Szakaszonként egy munkalap, write-only módban (a sorok nem maradnak a memóriában)."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    used = set()
+    for s in report.sections:
+        ws = wb.create_sheet(_sheet_title(s.title, used))
+        bold = []
+        for c in s.columns:
+            cell = WriteOnlyCell(ws, value=c.title)
+            cell.font = Font(bold=True)
+            bold.append(cell)
+        ws.append(bold)
+        formats = [_XLSX_FORMATS.get(c.fmt) if isinstance(c.fmt, str) else None for c in s.columns]
+        for row in s.iter_rows():
+            out = []
+            for v, nf in zip(row, formats):
+                if nf and isinstance(v, (int, float)):
+                    cell = WriteOnlyCell(ws, value=v)
+                    cell.number_format = nf
+                    out.append(cell)
+                else:
+                    out.append(v)
+            ws.append(out)
+        if s.total_label:
+            ws.append([])
+            ws.append([s.total_label] + [None] * (s.total - 1) + [s.total_value]
+                      if s.total else [s.total_text()])
+    if report.notes:
+        ws = wb.create_sheet(_sheet_title("Megjegyzések", used))
+        for note in report.notes:
+            ws.append([note])
+    if not used:
+        wb.create_sheet("Riport")
+    wb.save(target)
@@ -0,0 +1,393 @@
+# modules/shared/sql_trace.py
+#
+# Opcionális SQL mérés: minden sqlite3 kapcsolat lekérdezéseit (szöveg, időtartam,
+# hívási hely) műveletenként (GUI akció) gyűjti, jelzi az N+1 gyanús ismétlődéseket,
+# és a lassú lekérdezéseket rotált naplófájlba írja.
+#
+# Bekapcsolás környezeti változóval (éles környezetben is):
+#     ERP_SQL_TRACE=1            mérés bekapcsolása
+#     ERP_SQL_SLOW_MS=50         lassú lekérdezés küszöb (ms)
+#     ERP_SQL_NPLUS1=10          ennél többször ismételt utasítás egy akción belül = N+1 gyanú
+#     ERP_SQL_LOG=logs/sql.log   naplófájl (alapból a projekt gyökér logs/ mappájában)
+#
+# Használat:
+#     sql_trace.install_from_env()           # induláskor, a kapcsolatok megnyitása előtt
+#     @sql_trace.traced_action("Kiszállítások betöltése")
+#     def load_data(self): ...
+#     with sql_trace.action("Riport"): ...
+#
+# Egy SELECT ideje a sorok lekérését (fetch*, iterálás) is tartalmazza: a sqlite3
+# az execute()-ban csak az első sort lépteti, a nagy olvasások munkája utána fut.
+#
+# Az akción kívüli lekérdezések szálanként gyűlnek; a szál következő akciója,
+# LOOSE_FLUSH lekérdezés vagy kilépéskor a flush() naplózza őket.
+
+import atexit
+import functools
+import inspect
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+LOG_PATH    = os.path.join(PROJECT_DIR, "logs", "sql.log")
+
+log = logging.getLogger("erp.sql")
+
+_settings = {"enabled": False, "slow_ms": 50.0, "nplus1": 10}
+_local    = threading.local()
+_orig_connect = None
+
+# akción kívüli gyűjtő: ennyi lekérdezés után naplózzuk és újat kezdünk
+LOOSE_FLUSH = 500
+_loose      = {}   # szál azonosító → akción kívüli gyűjtő (a flush-hoz)
+_loose_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _settings["enabled"]
+
+
+def normalize(sql: str) -> str:
+    """Összehasonlításhoz: szóközök összevonva, literálok helyén '?'."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(\.\d+)?\b", "?", sql)
+    return " ".join(sql.split())
+
+
+def _call_site() -> str:
+    """
+    Hívási hely: az első projektbeli keret (nem ez a modul), és ha az az adatréteg,
+    mellé az első GUI keret is ('modules/…:12 get_norm ← gui/…:80 load_data').
+    """
+    f = sys._getframe(2)
+    here = os.path.abspath(__file__)
+    sites = []
+    while f is not None and len(sites) < 2:
+        path = os.path.abspath(f.f_code.co_filename)
+        if path != here and path.startswith(PROJECT_DIR):
+            rel = os.path.relpath(path, PROJECT_DIR)
+            if not sites or not rel.startswith("modules"):
+                sites.append(f"{rel}:{f.f_lineno} {f.f_code.co_name}")
+                if not rel.startswith("modules"):
+                    break
+        f = f.f_back
+    return " ← ".join(sites) or "?"
+
+
+class _Action:
+    def __init__(self, name: str):
+        self.name    = name
+        self.start   = time.perf_counter()
+        self.count   = 0
+        self.total   = 0.0
+        self.repeats = Counter()
+        self.sites   = defaultdict(set)
+
+    def record(self, sql: str, ms: float, site: str):
+        key = normalize(sql)
+        self.count += 1
+        self.total += ms
+        self.repeats[key] += 1
+        self.sites[key].add(site)
+
+    def finish(self):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        log.info("[%s] %d lekérdezés, %.1f ms SQL / %.1f ms összesen",
+                 self.name, self.count, self.total, elapsed)
+        for sql, n in self.repeats.most_common():
+            if n <= _settings["nplus1"]:
+                break
+            log.warning("[%s] N+1 gyanú: %d× %s  (hívó: %s)",
+                        self.name, n, sql, ", ".join(sorted(self.sites[sql])))
+
+
+def _current() -> _Action:
+    stack = getattr(_local, "actions", None)
+    if not stack:
+        # akción kívüli lekérdezések: szálanként egy gyűjtő, amelyet a szál következő
+        # akciója, LOOSE_FLUSH lekérdezés vagy a kilépés (flush) zár le és naplóz
+        loose = getattr(_local, "loose", None)
+        if loose is None or loose.count >= LOOSE_FLUSH:
+            if loose is not None:
+                loose.finish()
+            loose = _local.loose = _Action("(akción kívül)")
+            with _loose_lock:
+                _loose[threading.get_ident()] = loose
+        return loose
+    return stack[-1]
+
+
+def _flush_loose():
+    """Az aktuális szál akción kívüli gyűjtőjének naplózása (ha volt benne lekérdezés)."""
+    loose = getattr(_local, "loose", None)
+    if loose is not None and loose.count:
+        loose.finish()
+        _local.loose = None
+        with _loose_lock:
+            _loose.pop(threading.get_ident(), None)
+
+
+def flush():
+    """Minden szál akción kívüli gyűjtőjének naplózása (kilépéskor az install regisztrálja)."""
+    with _loose_lock:
+        pending = list(_loose.values())
+        _loose.clear()
+    for loose in pending:
+        if loose.count:
+            loose.finish()
+
+
+def _log_slow(sql: str, ms: float, site: str):
+    log.warning("lassú (%.1f ms) %s  (hívó: %s)", ms, " ".join(sql.split()), site)
+
+
+def _record(conn, sql: str, ms: float):
+    site = _call_site()
+    _current().record(sql, ms, site)
+    if ms >= _settings["slow_ms"]:
+        # a trace callback által utoljára látott, paraméterekkel kifejtett szöveg
+        _log_slow(getattr(conn, "_last_sql", None) or sql, ms, site)
+
+
+class _Statement:
+    """Egy futó SELECT mérése: az execute() csak az első sort lépteti, a többi a lekéréskor fut."""
+    __slots__ = ("text", "site", "action", "ms")
+
+    def __init__(self, text: str, site: str, action: _Action, ms: float):
+        self.text, self.site, self.action, self.ms = text, site, action, ms
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Mért kurzor. Egy SELECT ideje az execute() és az összes lekérés (fetch*, iterálás)
+    együtt; a rekord a kurzor kimerülésekor, a következő execute()-nál vagy
+    bezáráskor zárul le (a lassú napló ekkor ír).
+    """
+    _stmt = None
+
+    def _begin(self, sql: str, ms: float):
+        self._finish()
+        site, act = _call_site(), _current()
+        act.record(sql, ms, site)
+        # a trace callback által utoljára látott, paraméterekkel kifejtett szöveg
+        stmt = _Statement(getattr(self.connection, "_last_sql", None) or sql, site, act, ms)
+        if self.description is None:   # nem ad vissza sorokat: kész
+            self._close_statement(stmt)
+        else:
+            self._stmt = stmt
+
+    def _fetched(self, t: float, done: bool):
+        stmt = self._stmt
+        if stmt is not None:
+            ms = (time.perf_counter() - t) * 1000
+            stmt.ms += ms
+            stmt.action.total += ms
+            if done:
+                self._finish()
+
+    def _finish(self):
+        stmt, self._stmt = self._stmt, None
+        if stmt is not None:
+            self._close_statement(stmt)
+
+    @staticmethod
+    def _close_statement(stmt: _Statement):
+        if stmt.ms >= _settings["slow_ms"]:
+            _log_slow(stmt.text, stmt.ms, stmt.site)
+
+    def execute(self, sql, parameters=()):
+        t = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._begin(sql, (time.perf_counter() - t) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        t = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._begin(sql, (time.perf_counter() - t) * 1000)
+
+    def executescript(self, sql_script):
+        self._finish()
+        t = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record(self.connection, sql_script, (time.perf_counter() - t) * 1000)
+
+    def fetchone(self):
+        t, row = time.perf_counter(), None
+        try:
+            row = super().fetchone()
+            return row
+        finally:
+            self._fetched(t, row is None)
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        t, rows = time.perf_counter(), ()
+        try:
+            rows = super().fetchmany(size)
+            return rows
+        finally:
+            self._fetched(t, len(rows) < size)
+
+    def fetchall(self):
+        t = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._fetched(t, True)
+
+    def __next__(self):
+        t = time.perf_counter()
+        try:
+            row = super().__next__()
+        except BaseException:
+            self._fetched(t, True)
+            raise
+        self._fetched(t, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()   # félig lekért SELECT: ami eddig futott, az számít
+        except Exception:
+            pass
+
+
+class TracedConnection(sqlite3.Connection):
+    """sqlite3.Connection, amelynek minden utasítása mérve van (TracedCursor-on át)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_sql = None
+        self.trace_callback = None
+        super().set_trace_callback(self._trace)
+
+    def set_trace_callback(self, callback):
+        """A mérés saját callbackje megmarad; a megadott (None: nincs) utána fut."""
+        self.trace_callback = callback
+
+    def _trace(self, statement: str):
+        self._last_sql = statement
+        if self.trace_callback is not None:
+            self.trace_callback(statement)
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TracedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def _traced_connect(database, *args, **kwargs):
+    # a factory a hatodik pozicionális paraméter (database, timeout, detect_types,
+    # isolation_level, check_same_thread, factory, …): args[4]
+    if "factory" not in kwargs and len(args) < 5:
+        kwargs["factory"] = TracedConnection
+    return _orig_connect(database, *args, **kwargs)
+
+
+def install(slow_ms: float = None, nplus1: int = None, log_path: str = LOG_PATH):
+    """
+    Bekapcsolja a mérést: a sqlite3.connect ettől kezdve mért kapcsolatot ad
+    (az esetleg már lecserélt connect-et – pl. main.py útvonal javító – megtartva),
+    és beállítja a rotált naplófájlt.
+    """
+    global _orig_connect
+    if slow_ms is not None:
+        _settings["slow_ms"] = slow_ms
+    if nplus1 is not None:
+        _settings["nplus1"] = nplus1
+    if _orig_connect is None:
+        _orig_connect = sqlite3.connect
+        sqlite3.connect = _traced_connect
+        atexit.register(flush)
+
+    if log_path and not log.handlers:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=2_000_000, backupCount=5, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+    _settings["enabled"] = True
+
+
+def install_from_env():
+    """Az ERP_SQL_* környezeti változók alapján kapcsol be (ha ERP_SQL_TRACE be van állítva)."""
+    if os.environ.get("ERP_SQL_TRACE", "").lower() not in ("1", "true", "yes", "igen"):
+        return False
+    install(
+        slow_ms=float(os.environ.get("ERP_SQL_SLOW_MS", _settings["slow_ms"])),
+        nplus1=int(os.environ.get("ERP_SQL_NPLUS1", _settings["nplus1"])),
+        log_path=os.environ.get("ERP_SQL_LOG", LOG_PATH),
+    )
+    return True
+
+
+class action:
+    """Egy GUI akció (gombnyomás, ablak betöltés) lekérdezéseinek csoportosítása."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._action = None
+
+    def __enter__(self):
+        if enabled():
+            if not getattr(_local, "actions", None):
+                _flush_loose()   # az előző akció óta gyűlt akción kívüli lekérdezések
+            self._action = _Action(self.name)
+            if not hasattr(_local, "actions"):
+                _local.actions = []
+            _local.actions.append(self._action)
+        return self._action
+
+    def __exit__(self, *exc):
+        if self._action is not None:
+            _local.actions.pop()
+            self._action.finish()
+        return False
+
+
+def traced_action(name: str = None):
+    """Dekorátor: a függvény futása egy akció (kikapcsolt mérésnél csak egy hívás)."""
+    def deco(fn):
+        label = name or fn.__qualname__
+        # Qt slotként a signal extra argumentumokat (pl. clicked(bool)) is átadhat;
+        # ahogy a PyQt teszi, a fölösleges pozicionális argumentumokat elhagyjuk
+        params = inspect.signature(fn).parameters.values()
+        max_args = (None if any(p.kind == p.VAR_POSITIONAL for p in params)
+                    else sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            if not enabled():
+                return fn(*args, **kwargs)
+            with action(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
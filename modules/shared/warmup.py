@@ -0,0 +1,52 @@
+# modules/shared/warmup.py
+#
+# Háttér-bemelegítés induláskor: amíg a bejelentkező ablak látszik, egy
+# démonszál felépíti a termékkatalógust (termek_katalogus) és lefordítja a
+# HTML sablonokat – az első ablak és az első PDF már ezeket használja.
+# Hiba esetén csak naplóz; az ablakok maguk is felépítik, ami hiányzik.
+#
+#     warmup.start()          # a LoginDialog.exec_() előtt
+
+import logging
+import threading
+import time
+
+log = logging.getLogger("erp.warmup")
+
+_thread = None
+timings = {}   # lépés → ms (méréshez)
+
+
+def _step(name, fn):
+    t = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        log.exception("Bemelegítés sikertelen: %s", name)
+    timings[name] = round((time.perf_counter() - t) * 1000, 1)
+
+
+def warm_up():
+    from ..product_module.product_module import termek_katalogus
+    from ..service import backend
+    from . import rendering
+    if backend.mode() == "direct":   # szolgáltatás módban a katalógus a szolgáltatásé
+        _step("katalogus", termek_katalogus)
+    _step("sablonok", rendering.warm_up_templates)
+
+
+def start() -> threading.Thread:
+    """A bemelegítő szál indítása (egyszer); a szálat adja vissza."""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=warm_up, name="erp-warmup", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def wait(timeout: float = None) -> bool:
+    """Megvárja a bemelegítést (méréshez, tesztekhez); True, ha befejeződött."""
+    if _thread is None:
+        return False
+    _thread.join(timeout)
+    return not _thread.is_alive()
@@ -0,0 +1,33 @@
+# tests/test_asset_cache.py
+#
+# Termékfotó: a relatív útvonal a projekt könyvtárhoz képest értendő a
+# bélyegképnél és a THUMB_SIZE-nál nagyobb, az eredetiből olvasott méretnél is.
+
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtGui = pytest.importorskip("PyQt5.QtGui")
+from PyQt5.QtCore import QSize
+
+from gui import asset_cache
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+
+def test_relative_photo_any_size(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_cache, "PROJECT_DIR", str(tmp_path))
+    img = QtGui.QImage(800, 600, QtGui.QImage.Format_RGB32)
+    img.fill(0x336699)
+    assert img.save(str(tmp_path / "foto.png"))
+    cache = asset_cache.AssetCache(thumb_dir=str(tmp_path / "thumbs"))
+
+    small = cache.thumbnail("foto.png", QSize(100, 100))
+    large = cache.thumbnail("foto.png", QSize(640, 640))
+    assert (small.width(), small.height()) == (100, 75)
+    assert (large.width(), large.height()) == (640, 480)
+    assert cache.thumbnail("", QSize(640, 640)).isNull()
@@ -0,0 +1,54 @@
+# tests/test_inventory_db.py
+#
+# Műszak termék: a műszak alatt legtovább futó munka terméke, nem a műszak
+# közepén futóé.
+
+import pytest
+
+from modules.manufacturing_module import report_rollup
+from modules.manufacturing_module.inventory_db import InventoryDB
+
+GEP = "G1"
+
+
+@pytest.fixture
+def inv(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_rollup, "PRODUCTS_DB", str(tmp_path / "nincs_products.db"))
+    monkeypatch.setattr(report_rollup, "DELIV_DB", str(tmp_path / "nincs_delivery.db"))
+    db = InventoryDB(str(tmp_path / "inv.db"))
+    yield db
+    db.close()
+
+
+def _jobs(inv, *jobs):
+    with inv.conn:
+        inv.conn.executemany("""
+            INSERT INTO machine_job_history (machine, product_id, start_at, end_at, status)
+            VALUES (?, ?, ?, ?, 'done')
+        """, [(GEP, pid, start, end) for pid, start, end in jobs])
+
+
+def test_longest_overlap_wins_over_midpoint(inv):
+    # a műszak közepén (10:00) a rövid 2-es munka fut, de az 1-es futott a legtovább
+    _jobs(inv, (1, "2025-01-02T05:00:00", "2025-01-02T09:55:00"),
+               (2, "2025-01-02T09:55:00", "2025-01-02T10:05:00"),
+               (3, "2025-01-02T10:05:00", "2025-01-02T11:00:00"))
+    assert inv.shift_product(GEP, "2025-01-02", "délelőtt") == 1
+
+
+def test_job_not_running_at_midpoint(inv):
+    _jobs(inv, (4, "2025-01-02T11:00:00", "2025-01-02T13:30:00"))
+    assert inv.shift_product(GEP, "2025-01-02", "délelőtt") == 4
+
+
+def test_open_job_started_earlier(inv):
+    _jobs(inv, (5, "2025-01-01T10:00:00", "2025-01-02T07:00:00"),
+               (6, "2025-01-02T07:00:00", None))
+    assert inv.shift_product(GEP, "2025-01-02", "délelőtt") == 6
+    assert inv.shift_product(GEP, "2025-01-01", "éjszaka") == 5
+
+
+def test_no_overlapping_job(inv):
+    _jobs(inv, (7, "2025-01-02T14:00:00", "2025-01-02T16:00:00"))
+    assert inv.shift_product(GEP, "2025-01-02", "délelőtt") is None
+    assert inv.shift_product("másik gép", "2025-01-02", "délután") is None
@@ -0,0 +1,22 @@
+# tests/test_labels.py
+#
+# Címkék: 500 doboz CHUNK_SHEETS lapos, önálló HTML darabokban megy a
+# darabonként renderelő és összefűző PDF íróhoz.
+
+from modules.order_module import labels
+from modules.shared import rendering
+
+
+def test_500_boxes_rendered_per_chunk(monkeypatch):
+    got = {}
+
+    def fake_parallel(chunks, target, *args, **kwargs):
+        got["chunks"], got["target"] = list(chunks), target
+
+    monkeypatch.setattr(rendering, "write_pdf_parallel", fake_parallel)
+    line = labels.LabelLine(order_number="R-12", vevo="Vevő", termek="Fedél",
+                            cikkszam="F-1", quantity=12000, per_box=24)
+    assert labels.write_labels_pdf([line], "cimkek.pdf") == 500
+    sheets = 500 // labels.LABELS_PER_SHEET
+    assert len(got["chunks"]) == -(-sheets // labels.CHUNK_SHEETS)
+    assert got["target"] == "cimkek.pdf"
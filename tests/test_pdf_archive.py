@@ -0,0 +1,44 @@
+# tests/test_pdf_archive.py
+#
+# PDF archívum: a tábla a szállítólevél sémával jön létre (a megnyitás nem ír),
+# a context_hash a logó változását is követi, az újranyomtatás azonosító szerint keres.
+
+import pytest
+
+from modules.delivery_module import delivery_note_db, pdf_archive
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "delivery_notes.db")
+    delivery_note_db.DeliveryNoteDB(path).conn.close()
+    return path
+
+
+def test_open_runs_no_ddl(db_path, tmp_path):
+    archive = pdf_archive.PdfArchive(db_path, root=str(tmp_path / "arch"))
+    assert archive.note_pdf(delivery_note_id=1) is None
+    assert archive.conn.total_changes == 0
+    archive.close()
+
+
+def test_context_hash_follows_logo(tmp_path, monkeypatch):
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"regi")
+    monkeypatch.setattr(pdf_archive, "ASSETS", (str(logo),))
+    ctx = {"note_number": "DRK-20250102-001"}
+    before = pdf_archive.context_hash("delivery_base_hu.html", ctx)
+    assert pdf_archive.context_hash("delivery_base_hu.html", ctx) == before
+    logo.write_bytes(b"uj logo")
+    assert pdf_archive.context_hash("delivery_base_hu.html", ctx) != before
+
+
+def test_note_pdf_by_id(db_path, tmp_path):
+    archive = pdf_archive.PdfArchive(db_path, root=str(tmp_path / "arch"))
+    digest = archive.store(b"%PDF-1.7 elso")
+    archive.link("c1", digest, delivery_note_id=1, note_number="DRK-1")
+    other = archive.store(b"%PDF-1.7 masik")
+    archive.link("c2", other, delivery_note_id=2, note_number="DRK-1")   # ismétlődő szám
+    assert archive.note_pdf(delivery_note_id=1) == archive.path_for(digest)
+    assert archive.note_pdf(delivery_note_id=2) == archive.path_for(other)
+    archive.close()
@@ -0,0 +1,255 @@
+# tests/test_query_plans.py
+#
+# EXPLAIN QUERY PLAN regressziós teszt: az OrderDB, a szállítólevél DB-k, az
+# InventoryDB és a riport ablakok valódi lekérdezései egy generált
+# (benchmarks.datagen) adatbázison nem olvashatnak végig táblát index nélkül,
+# és az elvárt indexet használják (modules.shared.query_plan).
+#
+# Nagyobb adatbázison: QUERY_PLAN_SCALE=10k python -m pytest -q tests/test_query_plans.py
+
+import os
+
+import pytest
+
+from benchmarks.datagen import SCALES, generate
+from benchmarks.run import use_databases
+from modules.shared.query_plan import SORT, check_plans
+
+# Ellenőrzések: (név, hívás(target), elvárt index vagy None[, teljesen olvasható táblák]).
+# A valódi metódusokat hívjuk, így a teszt a ténylegesen kiadott SQL-t ellenőrzi.
+# Teljes olvasás csak a teljes listát adó lekérdezéseknél és a törzsadatoknál
+# (products, gépek) megengedett – ezt a negyedik elem sorolja fel; a SORT elem
+# az ideiglenes B-fás rendezést engedi meg.
+
+# InventoryDB: műszaknapló, állásidő, gépmunka, készlet, havi összesítő
+INVENTORY_CHECKS = [
+    ("get_shift_downtime",
+     lambda db: db.get_shift_downtime("OMS 950T öntőgép", "2025-01-02", "délelőtt"),
+     "idx_shift_downtimes_machine_date_shift"),
+    ("list_shift_downtimes",
+     lambda db: db.list_shift_downtimes("OMS 950T öntőgép", "2025-01-02", "délelőtt"),
+     "idx_shift_downtimes_machine_date_shift"),
+    ("list_shift_logs",
+     lambda db: db.list_shift_logs(),
+     "idx_shift_logs_date"),
+    ("list_shift_logs(machine)",
+     lambda db: db.list_shift_logs("OMS 950T öntőgép"),
+     "idx_shift_logs_machine_date_shift"),
+    ("list_shift_logs(range)",
+     lambda db: db.list_shift_logs(date_from="2025-01-01", date_to="2025-01-31"),
+     "idx_shift_logs_date"),
+    ("get_monthly_production",
+     lambda db: db.get_monthly_production("2025-01"),
+     "idx_shift_logs_month_product"),
+    ("job_at",
+     lambda db: db.job_at("OMS 950T öntőgép", "2025-01-02T10:00:00"),
+     "idx_job_history_machine_start"),
+    ("jobs_between",
+     lambda db: db.jobs_between("2025-01-01", "2025-02-01"),
+     "idx_job_history_start"),
+    ("jobs_between(machine)",
+     lambda db: db.jobs_between("2025-01-01", "2025-02-01", "OMS 950T öntőgép"),
+     "idx_job_history_machine_start"),
+    ("machine_utilization",
+     lambda db: db.machine_utilization("2025-01-01T00:00:00", "2025-02-01T00:00:00"),
+     "idx_job_history_start", (SORT,)),   # az ablakfüggvény a már szűrt munkákat rendezi
+    ("shift_product",
+     lambda db: db.shift_product("OMS 950T öntőgép", "2025-01-02", "délelőtt"),
+     "idx_job_history_machine_start", (SORT,)),   # a műszakot átfedő néhány munka átfedés szerint
+    ("machine_board",
+     lambda db: db.machine_board("2025-01-02", "délelőtt"),
+     "idx_shift_logs_machine_date_shift", ("machine_jobs",)),
+    ("get_current_stock",
+     lambda db: db.get_current_stock(1),
+     "idx_inventory_movements_inventory"),
+    ("get_norm",
+     lambda db: db.get_norm(1),
+     None),
+    ("rollup.month_report",
+     lambda db: db.rollup.month_report("2025-01"),
+     None),
+    ("rollup.month_report(plant)",
+     lambda db: db.rollup.month_report("2025-01", plant="Öntöde"),
+     None),
+    ("rollup.totals(plant)",
+     lambda db: db.rollup.totals("2025-01", by="plant"),
+     None),
+]
+
+# OrderDB: a rendelés / termék / szállítólevél adatbázisokon átívelő lekérdezések
+ORDER_CHECKS = [
+    ("get_all_order_items",
+     lambda odb: odb.get_all_order_items(),
+     None, ("orders",)),
+    ("get_all_order_items(order_id)",
+     lambda odb: odb.get_all_order_items(1),
+     None),
+    ("get_order_items",
+     lambda odb: odb.get_order_items(1),
+     None),
+    ("get_pending_items_list",
+     lambda odb: odb.get_pending_items_list(),
+     "idx_order_items_pending"),
+    ("get_pending_items_list(kiszállítva)",
+     lambda odb: odb.get_pending_items_list(),
+     "idx_delivery_notes_order"),
+    ("get_order_with_product_info",
+     lambda odb: odb.get_order_with_product_info(1, 1),
+     None),
+    ("get_remaining_qty",
+     lambda odb: odb.get_remaining_qty(1, 1),
+     None),
+    ("count_items",
+     lambda odb: odb.count_items(1),
+     None),
+]
+
+# delivery_module.DeliveryNoteDB: számozás
+DELIVERY_CHECKS = [
+    ("get_existing_numbers",
+     lambda ddb: ddb.get_existing_numbers("DRK-20250102-"),
+     "idx_delivery_notes_note_number"),
+    ("exists_delivery_note_number",
+     lambda ddb: ddb.exists_delivery_note_number("DRK-20250102-001"),
+     "idx_delivery_notes_note_number"),
+]
+
+# delivery_note_db.DeliveryNoteDB: kiszállítások listája
+DELIVERY_VIEW_CHECKS = [
+    ("get_delivery_note",
+     lambda ddb: ddb.get_delivery_note(1),
+     "idx_delivery_note_items_note_product"),
+    ("get_all_delivery_notes",
+     lambda ddb: ddb.get_all_delivery_notes(),
+     None, ("delivery_notes", SORT)),
+    ("get_all_delivery_note_items",
+     lambda ddb: ddb.get_all_delivery_note_items(),
+     "idx_delivery_note_items_note_product"),
+    ("get_all_delivery_note_rows",
+     lambda ddb: ddb.get_all_delivery_note_rows(),
+     "idx_delivery_note_items_note_product"),
+]
+
+# delivery_module.pdf_archive.PdfArchive: archivált PDF keresése, újranyomtatás
+ARCHIVE_CHECKS = [
+    ("pdf_archive.lookup",
+     lambda arc: arc.lookup("0" * 64),
+     "idx_delivery_note_pdfs_context"),
+    ("pdf_archive.note_pdf (id)",
+     lambda arc: arc.note_pdf(delivery_note_id=1),
+     "idx_delivery_note_pdfs_note"),
+    ("pdf_archive.note_pdf (szám)",
+     lambda arc: arc.note_pdf(note_number="DRK-20250102-001"),
+     "idx_delivery_note_pdfs_number"),
+]
+
+# product_module / order_module listázó függvényei (saját kapcsolatot nyitnak)
+MODULE_CHECKS = [
+    ("osszes_termek",
+     lambda _: __import__("modules.product_module.product_module", fromlist=["x"]).osszes_termek(),
+     "idx_arak_product_kezdet", ("products",)),
+    ("osszes_megrendeles",
+     lambda _: __import__("modules.order_module.order_module", fromlist=["x"]).osszes_megrendeles(),
+     None, ("orders",)),
+    ("megrendeles",
+     lambda _: __import__("modules.order_module.order_module", fromlist=["x"]).megrendeles(1),
+     None),
+]
+
+
+def _reports():
+    return __import__("modules.manufacturing_module.reports", fromlist=["x"])
+
+
+# A riport ablakok adatai: ugyanazokat a függvényeket hívjuk, mint a GUI.
+# target: {"paths": {"products": ..., ...}, "inv": InventoryDB, "deliv": delivery_note_db.DeliveryNoteDB}
+REPORT_CHECKS = [
+    # gui/stock_overview_gui.py StockOverviewWindow.load_stock
+    ("készlet: öntöde termékek",
+     lambda t: _reports().foundry_products(t["paths"]["products"]),
+     None, ("products", SORT)),
+    ("készlet: kiszállítva termékenként",
+     lambda t: t["deliv"].delivered_by_product(),
+     "idx_delivery_note_items_product"),
+    ("készlet: gyártott termékenként",
+     lambda t: t["inv"].produced_by_product(),
+     "idx_shift_logs_product_date"),
+    ("készlet: teljes",
+     lambda t: _reports().stock_rows(t["paths"]["products"], t["inv"], t["deliv"]),
+     None, ("products", SORT)),
+    # gui/foundry_products_gui.py FoundryProductsWindow
+    ("műszakgyártások: állásidő okok",
+     lambda t: _reports().downtime_causes(t["inv"].conn),
+     "idx_shift_downtimes_cause"),
+    ("műszakgyártások: gépek",
+     lambda t: t["inv"].list_logged_machines(),
+     "idx_shift_logs_machine_date_shift"),
+    ("műszakgyártások: sorok",
+     lambda t: _reports().load_foundry_rows(t["paths"]["products"], _reports().downtime_causes(t["inv"].conn)),
+     None),
+]
+
+
+GROUPS = {
+    "inventory":     INVENTORY_CHECKS,
+    "order":         ORDER_CHECKS,
+    "delivery":      DELIVERY_CHECKS,
+    "delivery_view": DELIVERY_VIEW_CHECKS,
+    "archive":       ARCHIVE_CHECKS,
+    "module":        MODULE_CHECKS,
+    "report":        REPORT_CHECKS,
+}
+
+# a modulok adatbázis útvonal konstansai (use_databases írja át, a végén visszaállnak)
+_PATH_CONSTANTS = ("DB_PATH", "PRODUCTS_DB", "DELIV_DB", "ORDERS_DB")
+
+
+@pytest.fixture(scope="module")
+def targets(tmp_path_factory):
+    """
+    Generált adatbázisok, a modulok útvonalai ezekre irányítva; a sémát (indexeket)
+    a modulok saját inicializálása hozza létre, ahogy éles indításkor.
+    csoport → (target, a target már megnyitott kapcsolatai).
+    """
+    from modules.product_module import product_module, weights
+    from modules.order_module import order_module, order_db
+    from modules.delivery_module import delivery_note_db, delivery_module
+    from modules.manufacturing_module import inventory_db, report_rollup, shift_import
+    from modules.delivery_module.pdf_archive import PdfArchive
+
+    mods = (product_module, weights, order_module, order_db, delivery_note_db,
+            delivery_module, inventory_db, report_rollup, shift_import)
+    saved = [(m, a, getattr(m, a)) for m in mods for a in _PATH_CONSTANTS if hasattr(m, a)]
+
+    scale = os.environ.get("QUERY_PLAN_SCALE", "1k")
+    paths = generate(str(tmp_path_factory.mktemp("query_plan")), SCALES.get(scale) or int(scale))
+    use_databases(paths)
+
+    inv = inventory_db.InventoryDB(paths["inventory"])
+    odb = order_db.OrderDB()
+    ddb = delivery_module.DeliveryNoteDB()
+    vdb = delivery_note_db.DeliveryNoteDB()
+    arc = PdfArchive(paths["delivery"])
+    yield {
+        "inventory":     (inv, [inv.conn]),
+        "order":         (odb, [odb.conn, odb.prod_conn, odb.deliv_conn]),
+        "delivery":      (ddb, [ddb.conn]),
+        "delivery_view": (vdb, [vdb.conn]),
+        "archive":       (arc, [arc.conn]),
+        "module":        (None, []),
+        "report":        ({"paths": paths, "inv": inv, "deliv": vdb}, [inv.conn, vdb.conn]),
+    }
+    for conn in (inv.conn, odb.conn, odb.prod_conn, odb.deliv_conn, ddb.conn, vdb.conn, arc.conn):
+        conn.close()
+    for m, a, value in saved:
+        setattr(m, a, value)
+
+
+@pytest.mark.parametrize("group, check", [
+    pytest.param(group, check, id=f"{group}:{check[0]}")
+    for group, checks in GROUPS.items() for check in checks
+])
+def test_query_plan(targets, group, check):
+    target, conns = targets[group]
+    errors = check_plans(target, [check], conns)
+    assert not errors, "\n".join(errors)
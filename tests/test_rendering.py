@@ -0,0 +1,29 @@
+# tests/test_rendering.py
+#
+# Párhuzamos PDF: pypdf nélkül egy folyamatban, egymás után renderel, és ezt
+# figyelmeztetés jelzi.
+
+import logging
+import sys
+
+from modules.shared import rendering
+
+
+def test_parallel_without_pypdf_warns_and_falls_back(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "pypdf", None)   # import → ImportError
+    calls = []
+    monkeypatch.setattr(rendering, "write_pdf_chunks",
+                        lambda chunks, target, base_url: calls.append(list(chunks)) or b"%PDF")
+    with caplog.at_level(logging.WARNING, logger="erp.render"):
+        out = rendering.write_pdf_parallel(["<p>1</p>", "<p>2</p>", "<p>3</p>"], workers=4)
+    assert out == b"%PDF"
+    assert calls == [["<p>1</p>", "<p>2</p>", "<p>3</p>"]]
+    assert any("pypdf" in r.getMessage() for r in caplog.records)
+
+
+def test_single_worker_no_warning(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "pypdf", None)
+    monkeypatch.setattr(rendering, "write_pdf_chunks", lambda chunks, target, base_url: b"%PDF")
+    with caplog.at_level(logging.WARNING, logger="erp.render"):
+        rendering.write_pdf_parallel(["<p>1</p>", "<p>2</p>"], workers=1)
+    assert not caplog.records
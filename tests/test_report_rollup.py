@@ -0,0 +1,92 @@
+# tests/test_report_rollup.py
+#
+# Havi rollup: a gyártott súly mindig az aktuális egységsúlyból számolódik (nem
+# marad maradék egységsúly változás után), és a séma migráció csak egyszer fut.
+
+import sqlite3
+
+import pytest
+
+from modules.manufacturing_module import report_rollup
+from modules.manufacturing_module.inventory_db import InventoryDB
+
+
+@pytest.fixture
+def dbs(tmp_path, monkeypatch):
+    products = tmp_path / "products.db"
+    con = sqlite3.connect(products)
+    con.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY, megnevezes TEXT, cikkszam TEXT, vevo_nev TEXT,
+            uzem_lanc TEXT, suly REAL, suly_mertekegyseg TEXT)
+    """)
+    con.execute("INSERT INTO products VALUES (1, 'Ház', 'C-1', 'Vevő', 'Öntöde', 500, 'g')")
+    con.commit()
+    con.close()
+    monkeypatch.setattr(report_rollup, "PRODUCTS_DB", str(products))
+    monkeypatch.setattr(report_rollup, "DELIV_DB", str(tmp_path / "nincs.db"))
+    return {"products": str(products), "inventory": str(tmp_path / "inv.db")}
+
+
+def _set_weight(path, suly, unit):
+    con = sqlite3.connect(path)
+    con.execute("UPDATE products SET suly = ?, suly_mertekegyseg = ?", (suly, unit))
+    con.commit()
+    con.close()
+
+
+def _made(inv, month="2025-01"):
+    rows = inv.rollup.month_report(month)
+    return (rows[0]["made_qty"], rows[0]["made_weight"]) if rows else (0, 0)
+
+
+def test_made_weight_follows_unit_weight(dbs):
+    inv = InventoryDB(dbs["inventory"])
+    log_id = inv.add_shift_log("G1", "op", "2025-01-10", "délelőtt", 10, 0, 100, 0, product_id=1)
+    assert _made(inv) == (100, 50.0)
+
+    _set_weight(dbs["products"], 2, "kg")
+    inv.rollup.refresh_products()
+    assert _made(inv) == (100, 200.0)
+
+    inv.conn.execute("DELETE FROM shift_logs WHERE id = ?", (log_id,))
+    inv.conn.commit()
+    assert _made(inv) == (0, 0)
+    assert inv.conn.execute("SELECT COUNT(*) FROM monthly_rollup WHERE qty != 0").fetchone()[0] == 0
+    inv.close()
+
+
+def test_legacy_rollup_migrated_once(dbs):
+    inv = InventoryDB(dbs["inventory"])
+    inv.add_shift_log("G1", "op", "2025-01-10", "délelőtt", 10, 0, 100, 0, product_id=1)
+    # 1-es verziójú séma: súly oszlop, 'delivered' sorok, súlyt író triggerek
+    with inv.conn:
+        inv.conn.execute("DELETE FROM rollup_meta WHERE key = 'schema_version'")
+        for trg in report_rollup._MADE_TRIGGERS:
+            inv.conn.execute(f"DROP TRIGGER {trg}")
+        inv.conn.execute("DROP TABLE monthly_rollup")
+        inv.conn.execute("""
+            CREATE TABLE monthly_rollup (
+                month TEXT NOT NULL, kind TEXT NOT NULL, product_id INTEGER NOT NULL,
+                qty REAL NOT NULL DEFAULT 0, weight REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, kind, product_id)) WITHOUT ROWID
+        """)
+        inv.conn.execute("INSERT INTO monthly_rollup VALUES ('2025-01', 'made', 1, 7, 3.5)")
+        inv.conn.execute("INSERT INTO monthly_rollup VALUES ('2025-01', 'delivered', 1, 5, 2.5)")
+    inv.close()
+
+    inv = InventoryDB(dbs["inventory"])
+    cols = {r["name"] for r in inv.conn.execute("PRAGMA table_info(monthly_rollup)")}
+    assert "weight" not in cols
+    assert inv.conn.execute(
+        "SELECT value FROM rollup_meta WHERE key = 'schema_version'").fetchone()[0] == \
+        str(report_rollup.SCHEMA_VERSION)
+    assert _made(inv) == (100, 50.0)
+    # a már migrált adatbázisnál a megnyitás nem ír a rollupba
+    with inv.conn:
+        inv.conn.execute("INSERT INTO monthly_rollup VALUES ('2024-12', 'made', 1, 1)")
+    inv.close()
+
+    inv = InventoryDB(dbs["inventory"])
+    assert _made(inv, "2024-12") == (1, 0.5)
+    inv.close()
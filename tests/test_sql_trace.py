@@ -0,0 +1,58 @@
+# tests/test_sql_trace.py
+#
+# SQL mérés: a SELECT ideje a sorok lekérését is tartalmazza, így egy lassú,
+# sok sort visszaadó olvasás a lassú naplóba kerül.
+
+import logging
+import sqlite3
+
+import pytest
+
+from modules.shared import sql_trace
+
+# sok sort adó olvasás: az execute() csak az első sort lépteti, a többi a lekéréskor fut
+SLOW_SELECT = """
+    WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 300000)
+    SELECT x, x * 2 FROM c
+"""
+
+
+@pytest.fixture
+def traced(monkeypatch):
+    monkeypatch.setitem(sql_trace._settings, "enabled", True)
+    monkeypatch.setitem(sql_trace._settings, "slow_ms", 20.0)
+    conn = sqlite3.connect(":memory:", factory=sql_trace.TracedConnection)
+    yield conn
+    conn.close()
+
+
+def _slow_lines(caplog):
+    return [r.getMessage() for r in caplog.records if "lassú" in r.getMessage()]
+
+
+def test_slow_select_fetchall_is_logged(traced, caplog):
+    caplog.set_level(logging.INFO, logger="erp.sql")
+    with sql_trace.action("teszt") as act:
+        rows = traced.execute(SLOW_SELECT).fetchall()
+    assert len(rows) == 300000
+    lines = _slow_lines(caplog)
+    assert len(lines) == 1 and "WITH RECURSIVE" in lines[0]
+    assert act.count == 1 and act.total >= 20.0
+
+
+def test_slow_select_iteration_is_logged(traced, caplog):
+    caplog.set_level(logging.INFO, logger="erp.sql")
+    cur = traced.cursor()
+    assert sum(1 for _ in cur.execute(SLOW_SELECT)) == 300000
+    assert len(_slow_lines(caplog)) == 1
+
+
+def test_fast_statements_are_not_logged(traced, caplog):
+    caplog.set_level(logging.INFO, logger="erp.sql")
+    traced.execute("CREATE TABLE t (a INTEGER)")
+    traced.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    assert traced.execute("SELECT count(*) FROM t").fetchone() == (10,)
+    cur = traced.execute("SELECT a FROM t")
+    assert len(cur.fetchmany(4)) == 4
+    cur.close()
+    assert _slow_lines(caplog) == []